@@ -7,18 +7,26 @@ Demo mod: E-posta/SMS göndermez, sadece konsola yazar
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import requests
 import json
+import queue
 from datetime import datetime
 import schedule
 import time
 import threading
 from .config import EMAIL_CONFIG, SMS_CONFIG, ALERT_CONFIG, DEMO_MODE
+from api_client.sync_client import PharmacyClient
+from api_client.errors import ApiError
 
 class StockAlertService:
     def __init__(self, api_url="http://localhost:8000"):
         self.api_url = api_url
+        self.api = PharmacyClient(api_url)
         self.alerts_sent = []  # Gönderilen uyarıların geçmişi
+        # Backend içinde çalışırken: order_handler(drug, quantity) siparişi HTTP'siz
+        # oluşturur; seviye değişimleri kuyruktan ayrı bir thread'de işlenir
+        self.order_handler = None
+        self.notifications = queue.Queue(maxsize=ALERT_CONFIG["NOTIFY_QUEUE_SIZE"])
+        self._worker = None
         
     def check_stock_levels(self):
         """Tüm ilaçların stok seviyelerini kontrol et"""
@@ -26,41 +34,76 @@ class StockAlertService:
         
         try:
             # API'den ilaçları çek
-            response = requests.get(f"{self.api_url}/drugs")
-            if response.status_code == 200:
-                drugs = response.json()
-                low_stock_drugs = []
-                critical_stock_drugs = []
-                
-                for drug in drugs:
-                    stock = drug.get("stock_quantity", 0)
-                    threshold = drug.get("low_stock_threshold", ALERT_CONFIG["LOW_STOCK_THRESHOLD"])
-                    
-                    if stock <= ALERT_CONFIG["CRITICAL_STOCK_THRESHOLD"]:
-                        critical_stock_drugs.append(drug)
-                    elif stock <= threshold:
-                        low_stock_drugs.append(drug)
-                
-                # Uyarıları işle
-                if critical_stock_drugs:
-                    self.handle_critical_stock(critical_stock_drugs)
+            drugs = self.api.list_drugs()
+            low_stock_drugs = []
+            critical_stock_drugs = []
+            
+            for drug in drugs:
+                stock = drug.get("stock_quantity", 0)
+                threshold = drug.get("low_stock_threshold", ALERT_CONFIG["LOW_STOCK_THRESHOLD"])
                 
-                if low_stock_drugs:
-                    self.handle_low_stock(low_stock_drugs)
-                    
-                print(f"[{datetime.now()}] Kontrol tamamlandı. "
-                      f"Kritik: {len(critical_stock_drugs)}, Düşük: {len(low_stock_drugs)}")
+                if stock <= ALERT_CONFIG["CRITICAL_STOCK_THRESHOLD"]:
+                    critical_stock_drugs.append(drug)
+                elif stock <= threshold:
+                    low_stock_drugs.append(drug)
+            
+            # Uyarıları işle
+            if critical_stock_drugs:
+                self.handle_critical_stock(critical_stock_drugs)
+            
+            if low_stock_drugs:
+                self.handle_low_stock(low_stock_drugs)
                 
-                return {
-                    "critical": critical_stock_drugs,
-                    "low": low_stock_drugs
-                }
+            print(f"[{datetime.now()}] Kontrol tamamlandı. "
+                  f"Kritik: {len(critical_stock_drugs)}, Düşük: {len(low_stock_drugs)}")
+            
+            return {
+                "critical": critical_stock_drugs,
+                "low": low_stock_drugs
+            }
                 
         except Exception as e:
             print(f"Stok kontrolü hatası: {e}")
         
         return {"critical": [], "low": []}
     
+    def on_level_change(self, level, drugs):
+        """Backend outbox'ından: seviyesi düşük/kritiğe geçen ilaçlar (HTTP yoklaması olmadan)
+
+        Relay thread'ini bekletmemek için yalnızca kuyruğa ekler; e-posta, SMS ve
+        sipariş notification worker'ında çalışır.
+        """
+        try:
+            self.notifications.put_nowait((level, drugs))
+        except queue.Full:
+            print(f"⚠️ Uyarı kuyruğu dolu, {level} bildirimi atlandı: {[d['name'] for d in drugs]}")
+    
+    def start_worker(self):
+        """Seviye değişimi kuyruğunu işleyen thread'i başlat"""
+        self._worker = threading.Thread(target=self._run_worker, name="alert-notifier", daemon=True)
+        self._worker.start()
+    
+    def stop_worker(self):
+        """Kuyruktakileri bitir ve thread'i durdur"""
+        if self._worker:
+            self.notifications.put(None)
+            self._worker.join()
+            self._worker = None
+    
+    def _run_worker(self):
+        while True:
+            item = self.notifications.get()
+            if item is None:
+                return
+            level, drugs = item
+            try:
+                if level == "critical":
+                    self.handle_critical_stock(drugs)
+                elif level == "low":
+                    self.handle_low_stock(drugs)
+            except Exception as e:
+                print(f"❌ Uyarı bildirimi hatası: {e}")
+    
     def handle_low_stock(self, drugs):
         """Düşük stok uyarısı"""
         alert_id = f"low_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -164,7 +207,8 @@ class StockAlertService:
                 "msgheader": "ECZANE_OTO"
             }
             
-            response = requests.get(SMS_CONFIG["SMS_API_URL"], params=params)
+            response = self.api.session.get(SMS_CONFIG["SMS_API_URL"], params=params,
+                                            timeout=self.api.timeout)
             
             if response.status_code == 200:
                 print(f"✅ SMS uyarısı gönderildi")
@@ -188,25 +232,16 @@ class StockAlertService:
                 if urgent:
                     order_quantity *= 2  # Acil durumda iki kat sipariş
                 
-                # API'ye sipariş isteği gönder
-                payload = {
-                    "drug_id": drug["id"],
-                    "quantity": order_quantity,
-                    "auto_order": True,
-                    "urgent": urgent
-                }
-                
-                response = requests.post(
-                    f"{self.api_url}/order_stock",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code == 200:
-                    print(f"✅ Otomatik sipariş oluşturuldu: {drug['name']} x{order_quantity}")
+                # Backend içinde: uyarının geldiği şubeye, HTTP'siz. Bağımsız
+                # serviste ilaçlar ve sipariş aynı istemci şubesindedir (X-Branch-Id)
+                if self.order_handler:
+                    self.order_handler(drug, order_quantity)
                 else:
-                    print(f"❌ Sipariş oluşturulamadı: {response.status_code}")
+                    self.api.order_stock(drug["id"], quantity=order_quantity, auto_order=True)
+                print(f"✅ Otomatik sipariş oluşturuldu: {drug['name']} x{order_quantity}")
                 
+            except ApiError as e:
+                print(f"❌ Sipariş oluşturulamadı: {e.status_code or e.detail}")
             except Exception as e:
                 print(f"❌ Sipariş oluşturma hatası {drug['name']}: {e}")
     
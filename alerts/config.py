@@ -36,7 +36,9 @@ ALERT_CONFIG = {
     "LOW_STOCK_THRESHOLD": int(os.environ.get("LOW_STOCK_THRESHOLD", 10)),
     "CRITICAL_STOCK_THRESHOLD": int(os.environ.get("CRITICAL_STOCK_THRESHOLD", 5)),
     "AUTO_ORDER_QUANTITY": int(os.environ.get("AUTO_ORDER_QUANTITY", 50)),
-    "ENABLE_AUTO_ORDER": os.environ.get("ENABLE_AUTO_ORDER", "false").lower() == "true"
+    "ENABLE_AUTO_ORDER": os.environ.get("ENABLE_AUTO_ORDER", "false").lower() == "true",
+    # Outbox relay'inden gelen seviye değişimleri bu kuyrukta bekler (dolarsa atılır)
+    "NOTIFY_QUEUE_SIZE": int(os.environ.get("ALERT_NOTIFY_QUEUE_SIZE", 1000))
 }
 
 # ==================== DEMO MOD AYARLARI ====================
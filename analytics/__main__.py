@@ -0,0 +1,34 @@
+"""
+Satış analitiği komut satırı
+Çalıştırma:
+    python -m analytics snapshot      # kolon anlık görüntüsünü yeni satışlarla güncelle
+    python -m analytics copurchase    # birlikte alım indeksini baştan kur
+Backend bu dosyaları (backup/analytics/) açılışta yükler ve artımlı günceller.
+"""
+
+import argparse
+import time
+
+from analytics.copurchase import copurchase_index
+from analytics.snapshot import sales_snapshot
+from database import replica_router
+
+def main():
+    parser = argparse.ArgumentParser(description="Satış analitiği işleri")
+    sub = parser.add_subparsers(dest="job", required=True)
+    sub.add_parser("snapshot", help="Kolon anlık görüntüsünü güncelle")
+    sub.add_parser("copurchase", help="Birlikte alım indeksini tüm satışlardan yeniden kur")
+    args = parser.parse_args()
+
+    loaded = sales_snapshot.load()
+    added = sales_snapshot.refresh(replica_router.session)
+    print(f"📋 Anlık görüntü: diskten {loaded}, yeni {added} satış ({sales_snapshot.current.rows} toplam)")
+
+    if args.job == "copurchase":
+        start = time.perf_counter()
+        cells = copurchase_index.rebuild(sales_snapshot.current)
+        print(f"📋 Birlikte alım indeksi: {cells // 2} ilaç çifti, "
+              f"{copurchase_index.status()['drugs']} ilaç ({time.perf_counter() - start:.1f} sn)")
+
+if __name__ == "__main__":
+    main()
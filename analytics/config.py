@@ -0,0 +1,34 @@
+# analytics/config.py
+"""
+Satış analitiği ayarları
+Ortam değişkenleriyle ayarlanır, .env gerektirmez
+"""
+
+import os
+
+ANALYTICS_CONFIG = {
+    "ENABLED": os.environ.get("ANALYTICS_ENABLED", "true").lower() == "true",
+    # Anlık görüntü bu aralıkla yalnızca yeni satışlarla (id > son id) güncellenir
+    "REFRESH_SECONDS": float(os.environ.get("ANALYTICS_REFRESH_SECONDS", 300)),
+    # Kolon dosyası (.npz); yeniden başlatmada tüm tablo tekrar okunmaz
+    "SNAPSHOT_PATH": os.environ.get("ANALYTICS_SNAPSHOT_PATH", "backup/analytics/sales.npz"),
+    # Her SELECT en fazla bu kadar satır okur (kısa sorgular)
+    "BATCH_SIZE": int(os.environ.get("ANALYTICS_BATCH_SIZE", 50000)),
+    # Id sırasında bu kadar saniyeden yeni ilk satışta tur durur, sonrakiler bir
+    # sonraki turu bekler: id sırası ile commit sırası farklı olabilir, geç
+    # commit edilen küçük id kaçmasın
+    "SETTLE_SECONDS": int(os.environ.get("ANALYTICS_SETTLE_SECONDS", 60)),
+    # Sepet: aynı müşterinin aynı gündeki alımları; daha büyük sepetlerde
+    # yalnızca ilk MAX_BASKET_SIZE ilaç çiftlenir
+    "MAX_BASKET_SIZE": int(os.environ.get("ANALYTICS_MAX_BASKET_SIZE", 50)),
+}
+
+COPURCHASE_CONFIG = {
+    # Aynı müşterinin bu kadar gün içindeki alımları birlikte alınmış sayılır
+    "WINDOW_DAYS": int(os.environ.get("COPURCHASE_WINDOW_DAYS", 30)),
+    # Her satış müşterinin en fazla bu kadar önceki alımıyla eşlenir
+    "LOOKBACK": int(os.environ.get("COPURCHASE_LOOKBACK", 50)),
+    # Her ilaç için bellekte tutulan en güçlü komşu sayısı
+    "TOP_K": int(os.environ.get("COPURCHASE_TOP_K", 20)),
+    "INDEX_PATH": os.environ.get("COPURCHASE_INDEX_PATH", "backup/analytics/copurchase.npz"),
+}
@@ -0,0 +1,176 @@
+# analytics/copurchase.py
+"""
+Birlikte alınan ilaçlar indeksi
+Aynı müşterinin WINDOW_DAYS gün içindeki iki farklı ilaç alımı bir "birlikte
+alım" sayılır. Sayımlar seyrek bir eş-oluşum matrisi olarak (yalnızca sıfır
+olmayan hücreler: sıralı çift kodları + sayılar) tutulur; sorgu anında
+self-join yapılmaz. Her ilacın en güçlü TOP_K komşusu CSR düzeninde
+(satır başlangıçları + komşu dizileri) hazırlanır, GET /drugs/{id}/related
+bir sözlük araması ve dilimle O(k) cevaplanır.
+Satış anlık görüntüsü (analytics/snapshot.py) yenilendikçe yalnızca yeni
+satışların çiftleri sayılıp matrise eklenir; tam yeniden kurulum
+`python -m analytics copurchase` ile çevrimdışı yapılır.
+"""
+
+import os
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+from analytics.config import COPURCHASE_CONFIG
+from analytics.snapshot import SalesSnapshot
+
+# Çift kodu: (a << 32) | b; matris simetrik tutulur (her iki yön ayrı kod)
+SHIFT = np.int64(32)
+LOW_MASK = np.int64((1 << 32) - 1)
+
+def pair_counts(snapshot: SalesSnapshot, after_id: int = 0, window_days: Optional[int] = None,
+                lookback: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Satışların oluşturduğu çift sayıları (sıralı kodlar, sayılar)
+
+    after_id > 0 ise yalnızca id'si after_id'den büyük satışların daha önceki
+    alımlarla oluşturduğu çiftler sayılır (artımlı güncelleme).
+    """
+    window = (window_days or COPURCHASE_CONFIG["WINDOW_DAYS"]) * 86400
+    lookback = lookback or COPURCHASE_CONFIG["LOOKBACK"]
+    cols = snapshot.columns
+    valid = (cols["customer_id"] >= 0) & (cols["drug_id"] >= 0)
+    if after_id:
+        # Yalnızca yeni satışı olan müşterilerin geçmişi gerekir
+        new = valid & (cols["sale_id"] > after_id)
+        valid &= np.isin(cols["customer_id"], np.unique(cols["customer_id"][new]))
+
+    idx = np.flatnonzero(valid)
+    order = idx[np.lexsort((cols["sale_id"][idx], cols["ts"][idx], cols["customer_id"][idx]))]
+    customer, ts = cols["customer_id"][order], cols["ts"][order]
+    drug, sale_id = cols["drug_id"][order], cols["sale_id"][order]
+    n = len(order)
+
+    # Müşteri + zaman sıralı dizide k adım gerideki satış aynı müşterinin ve
+    # pencere içindeyse çift oluşturur (döngü satır değil geriye bakış kadar)
+    later_parts, earlier_parts = [], []
+    for k in range(1, min(lookback, n) + 1 if n else 1):
+        later = np.arange(k, n)
+        hit = (customer[k:] == customer[:-k]) & (ts[k:] - ts[:-k] <= window)
+        if not hit.any():
+            break
+        hit &= drug[k:] != drug[:-k]
+        if after_id:
+            hit &= sale_id[k:] > after_id
+        later_parts.append(later[hit])
+        earlier_parts.append(drug[:-k][hit])
+    if not later_parts:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+
+    # Bir satış pencere içindeki aynı ilaçla birden çok kez eşleşmesin
+    later = np.concatenate(later_parts)
+    earlier_drug = np.concatenate(earlier_parts)
+    scale = int(drug.max()) + 1
+    per_sale = np.unique(later * scale + earlier_drug)
+    a, b = drug[per_sale // scale], per_sale % scale
+    codes = np.concatenate([(a << SHIFT) | b, (b << SHIFT) | a])
+    return np.unique(codes, return_counts=True)
+
+def merge_counts(codes: np.ndarray, counts: np.ndarray, new_codes: np.ndarray,
+                 new_counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """İki seyrek sayım kümesini topla"""
+    merged, inverse = np.unique(np.concatenate([codes, new_codes]), return_inverse=True)
+    totals = np.bincount(inverse, weights=np.concatenate([counts, new_counts]), minlength=len(merged))
+    return merged, totals.astype(np.int64)
+
+class CoPurchaseIndex:
+    """Seyrek sayım matrisi + ilaç başına TOP_K komşu (thread-safe okuma)"""
+
+    def __init__(self, path: Optional[str] = None, top_k: Optional[int] = None):
+        self.path = path or COPURCHASE_CONFIG["INDEX_PATH"]
+        self.top_k = top_k or COPURCHASE_CONFIG["TOP_K"]
+        self.codes = np.empty(0, np.int64)
+        self.counts = np.empty(0, np.int64)
+        self.last_id = 0
+        self._lock = threading.Lock()
+        # (ilaç id -> (başlangıç, bitiş, toplam birlikte alım), komşu id'leri, sayılar)
+        self._index = ({}, np.empty(0, np.int64), np.empty(0, np.int64))
+
+    # ---- Disk ----
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as data:
+                codes, counts, last_id = data["codes"], data["counts"], int(data["last_id"])
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️ Birlikte alım indeksi okunamadı, yeniden kurulacak: {e}")
+            return False
+        with self._lock:
+            self.codes, self.counts, self.last_id = codes, counts, last_id
+            self._build()
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(tmp, codes=self.codes, counts=self.counts, last_id=np.int64(self.last_id))
+        os.replace(tmp, self.path)
+
+    # ---- Kurulum / güncelleme ----
+
+    def _build(self):
+        """Sayımlardan ilaç başına en güçlü TOP_K komşuyu CSR düzeninde hazırla"""
+        a, b = self.codes >> SHIFT, self.codes & LOW_MASK
+        order = np.lexsort((-self.counts, a))
+        a, b, counts = a[order], b[order], self.counts[order]
+        starts = np.flatnonzero(np.r_[True, a[1:] != a[:-1]]) if len(a) else np.empty(0, np.int64)
+        totals = np.add.reduceat(counts, starts) if len(a) else np.empty(0, np.int64)
+        rank = np.arange(len(a)) - np.repeat(starts, np.diff(np.r_[starts, len(a)]))
+        keep = rank < self.top_k
+        a, b, counts = a[keep], b[keep], counts[keep]
+        rows, first, sizes = np.unique(a, return_index=True, return_counts=True)
+        offsets = {int(drug): (int(s), int(s + size), int(total))
+                   for drug, s, size, total in zip(rows, first, sizes, totals)}
+        self._index = (offsets, b, counts)
+
+    def rebuild(self, snapshot: SalesSnapshot) -> int:
+        """Tüm anlık görüntüden yeniden kur; sıfır olmayan hücre sayısı"""
+        codes, counts = pair_counts(snapshot)
+        with self._lock:
+            self.codes, self.counts, self.last_id = codes, counts.astype(np.int64), snapshot.last_id
+            self._build()
+            self.save()
+        return len(self.codes)
+
+    def update(self, snapshot: SalesSnapshot) -> int:
+        """Anlık görüntüye yeni eklenen satışları matrise ekle (anlık görüntü yenileme dinleyicisi)"""
+        if snapshot.last_id == self.last_id:
+            return 0
+        if not self.last_id or snapshot.last_id < self.last_id:
+            # İndeks yok ya da anlık görüntü baştan kuruldu
+            return self.rebuild(snapshot)
+        new_codes, new_counts = pair_counts(snapshot, after_id=self.last_id)
+        with self._lock:
+            self.codes, self.counts = merge_counts(self.codes, self.counts, new_codes, new_counts)
+            self.last_id = snapshot.last_id
+            self._build()
+            self.save()
+        return len(new_codes)
+
+    # ---- Sorgu ----
+
+    def related(self, drug_id: int, limit: int = 10) -> list:
+        """En sık birlikte alınan ilaçlar: komşu id, birlikte alım sayısı ve
+        bu ilacın tüm birlikte alımları içindeki payı"""
+        offsets, neighbors, counts = self._index
+        start, end, total = offsets.get(drug_id, (0, 0, 0))
+        end = min(end, start + limit)
+        return [{
+            "drug_id": int(neighbor),
+            "count": int(count),
+            "share": round(int(count) / total, 4),
+        } for neighbor, count in zip(neighbors[start:end], counts[start:end])]
+
+    def status(self) -> dict:
+        return {"pairs": len(self.codes) // 2, "drugs": len(self._index[0]), "last_sale_id": self.last_id}
+
+# Global indeks (backend süreci başına bir tane)
+copurchase_index = CoPurchaseIndex()
@@ -0,0 +1,183 @@
+# analytics/queries.py
+"""
+Anlık görüntü üzerinde vektörel analitik sorgular
+Hiçbiri satır satır Python döngüsü kurmaz: gruplama np.unique/np.bincount,
+sıralama argsort, sepet çiftleri kaydırmalı dizi karşılaştırmasıyla yapılır.
+Tümü isteğe bağlı `days` penceresi alır (son N gün; None = tüm geçmiş).
+"""
+
+import time
+from typing import Optional
+
+import numpy as np
+
+from analytics.config import ANALYTICS_CONFIG
+from analytics.snapshot import SalesSnapshot
+
+WEEKDAYS = ["Pazartesi", "Salı", "Çarşamba", "Perşembe", "Cuma", "Cumartesi", "Pazar"]
+
+def window(snapshot: SalesSnapshot, days: Optional[int]) -> np.ndarray:
+    """Son `days` güne düşen satırların maskesi"""
+    ts = snapshot.columns["ts"]
+    if not days:
+        return np.ones(len(ts), dtype=bool)
+    return ts >= int(time.time()) - days * 86400
+
+def per_drug(snapshot: SalesSnapshot, days: Optional[int]):
+    """İlaç bazında (id'ler, ciro, adet, satış sayısı)"""
+    mask = window(snapshot, days)
+    # İlaç id'leri küçük tablo anahtarları: sıralama yerine doğrudan id+1 kovasına
+    # topla (null = -1 → kova 0), sonra boş kovaları at
+    bucket = snapshot.columns["drug_id"][mask] + 1
+    count = np.bincount(bucket)
+    revenue = np.bincount(bucket, weights=snapshot.columns["revenue"][mask], minlength=len(count))
+    quantity = np.bincount(bucket, weights=snapshot.columns["quantity"][mask], minlength=len(count))
+    present = np.flatnonzero(count)
+    return present - 1, revenue[present], quantity[present], count[present]
+
+def top_drugs(snapshot: SalesSnapshot, limit: int = 10, days: Optional[int] = None,
+              by: str = "revenue") -> list:
+    """En çok satan ilaçlar (ciroya ya da adede göre)"""
+    ids, revenue, quantity, count = per_drug(snapshot, days)
+    metric = revenue if by == "revenue" else quantity
+    order = np.argsort(-metric, kind="stable")[:limit]
+    return [{
+        "drug_id": int(ids[i]) if ids[i] >= 0 else None,
+        "drug_name": snapshot.drug_name(int(ids[i])),
+        "revenue": round(float(revenue[i]), 2),
+        "quantity": int(quantity[i]),
+        "sales": int(count[i]),
+    } for i in order]
+
+def abc_analysis(snapshot: SalesSnapshot, days: Optional[int] = None,
+                 a_share: float = 0.8, b_share: float = 0.95) -> dict:
+    """ABC sınıflaması: ciroya göre sıralı ilaçların kümülatif payı
+    A: cironun ilk %80'i, B: sonraki %15, C: kalan"""
+    ids, revenue, quantity, _ = per_drug(snapshot, days)
+    total = float(revenue.sum())
+    order = np.argsort(-revenue, kind="stable")
+    share = revenue[order] / total if total else np.zeros(len(order))
+    before = np.cumsum(share) - share  # ilacın kendisinden önceki kümülatif pay
+    classes = np.where(before < a_share, "A", np.where(before < b_share, "B", "C"))
+
+    items = [{
+        "drug_id": int(ids[i]) if ids[i] >= 0 else None,
+        "drug_name": snapshot.drug_name(int(ids[i])),
+        "revenue": round(float(revenue[i]), 2),
+        "quantity": int(quantity[i]),
+        "share": round(float(s), 4),
+        "cumulative_share": round(float(b + s), 4),
+        "class": str(c),
+    } for i, s, b, c in zip(order, share, before, classes)]
+    summary = {}
+    for label in ("A", "B", "C"):
+        selected = classes == label
+        summary[label] = {"drugs": int(selected.sum()),
+                          "revenue": round(float(revenue[order][selected].sum()), 2)}
+    return {"total_revenue": round(total, 2), "summary": summary, "items": items}
+
+def hourly_heatmap(snapshot: SalesSnapshot, days: Optional[int] = None) -> dict:
+    """Haftanın günü x saat (UTC) satış adedi ve ciro matrisi (7 x 24)"""
+    mask = window(snapshot, days)
+    ts = snapshot.columns["ts"][mask]
+    # 1970-01-01 perşembe: (gün + 3) % 7 → pazartesi = 0
+    weekday = (ts // 86400 + 3) % 7
+    hour = (ts // 3600) % 24
+    cell = weekday * 24 + hour
+    sales = np.bincount(cell, minlength=168).reshape(7, 24)
+    revenue = np.bincount(cell, weights=snapshot.columns["revenue"][mask], minlength=168).reshape(7, 24)
+    busiest = np.unravel_index(int(np.argmax(sales)), sales.shape) if sales.any() else None
+    return {
+        "weekdays": WEEKDAYS,
+        "hours": list(range(24)),
+        "sales": sales.tolist(),
+        "revenue": np.round(revenue, 2).tolist(),
+        "busiest": {"weekday": WEEKDAYS[busiest[0]], "hour": int(busiest[1])} if busiest else None,
+    }
+
+def basket_items(snapshot: SalesSnapshot, days: Optional[int] = None):
+    """Tekil (sepet, ilaç) satırları sepet sırasıyla: sepet = aynı müşteri + aynı gün
+    Dönen: (sepet indeksi, ilaç indeksi, ilaç id'leri, sepet sayısı)"""
+    cols = snapshot.columns
+    mask = window(snapshot, days) & (cols["customer_id"] >= 0) & (cols["drug_id"] >= 0)
+    # (müşteri, gün) tek bir int64 anahtarda: gün sayısı 2^20'nin altında
+    _, basket = np.unique(cols["customer_id"][mask] * (1 << 20) + cols["ts"][mask] // 86400,
+                          return_inverse=True)
+    drug_ids, drug = np.unique(cols["drug_id"][mask], return_inverse=True)
+    n_drugs = max(len(drug_ids), 1)
+    keys = np.unique(basket * n_drugs + drug)  # sepet içinde tekrar eden ilaç tek sayılır
+    n_baskets = int(basket.max()) + 1 if len(basket) else 0
+    return keys // n_drugs, keys % n_drugs, drug_ids, n_baskets
+
+def co_occurrence(snapshot: SalesSnapshot, days: Optional[int] = None):
+    """Aynı sepette birlikte görülen ilaç çiftleri
+    Dönen: (a indeksleri, b indeksleri, çift sayıları, ilaç başına sepet sayısı, ilaç id'leri, sepet sayısı)
+    Sonuç anlık görüntü yenilenene kadar saklanır (en pahalı sorgu)"""
+    key = ("co_occurrence", days)
+    if key not in snapshot.memo:
+        snapshot.memo[key] = _co_occurrence(snapshot, days)
+    return snapshot.memo[key]
+
+def _co_occurrence(snapshot: SalesSnapshot, days: Optional[int]):
+    basket, drug, drug_ids, n_baskets = basket_items(snapshot, days)
+    n_drugs = max(len(drug_ids), 1)
+    # Sıralı (sepet, ilaç) dizisinde k adım uzaktaki eleman aynı sepetteyse bir çifttir;
+    # k en büyük sepet boyutuna kadar kaydırılır (döngü satır değil sepet boyutu kadar)
+    codes = []
+    for k in range(1, ANALYTICS_CONFIG["MAX_BASKET_SIZE"]):
+        same = basket[:-k] == basket[k:]
+        if not same.any():
+            break
+        codes.append(drug[:-k][same] * n_drugs + drug[k:][same])
+    item_baskets = np.bincount(drug, minlength=n_drugs)
+    if not codes:
+        empty = np.empty(0, np.int64)
+        return empty, empty, empty, item_baskets, drug_ids, n_baskets
+    pairs, counts = np.unique(np.concatenate(codes), return_counts=True)
+    return pairs // n_drugs, pairs % n_drugs, counts, item_baskets, drug_ids, n_baskets
+
+def basket_pairs(snapshot: SalesSnapshot, days: Optional[int] = None, limit: int = 20,
+                 min_count: int = 2) -> dict:
+    """En sık birlikte alınan ilaç çiftleri (destek, güven, lift)"""
+    a, b, counts, item_baskets, drug_ids, n_baskets = co_occurrence(snapshot, days)
+    keep = counts >= min_count
+    a, b, counts = a[keep], b[keep], counts[keep]
+    order = np.argsort(-counts, kind="stable")[:limit]
+    pairs = []
+    for i in order:
+        na, nb, n = int(item_baskets[a[i]]), int(item_baskets[b[i]]), int(counts[i])
+        pairs.append({
+            "drug_a": {"id": int(drug_ids[a[i]]), "name": snapshot.drug_name(int(drug_ids[a[i]]))},
+            "drug_b": {"id": int(drug_ids[b[i]]), "name": snapshot.drug_name(int(drug_ids[b[i]]))},
+            "baskets": n,
+            "support": round(n / n_baskets, 4),
+            "confidence_a_to_b": round(n / na, 4),
+            "confidence_b_to_a": round(n / nb, 4),
+            "lift": round(n * n_baskets / (na * nb), 2),
+        })
+    return {"baskets": n_baskets, "pairs": pairs}
+
+def ingredient_summary(snapshot: SalesSnapshot, days: Optional[int] = None) -> list:
+    """Etken madde bazında ciro, adet ve ortalama satış fiyatı
+    Şemada alış maliyeti tutulmadığı için marj yerine ciro payı verilir"""
+    ids, revenue, quantity, count = per_drug(snapshot, days)
+    dim_ids = snapshot.drugs["id"]
+    pos = np.clip(np.searchsorted(dim_ids, ids), 0, max(len(dim_ids) - 1, 0))
+    found = (dim_ids[pos] == ids) if len(dim_ids) else np.zeros(len(ids), dtype=bool)
+    ingredient = np.where(found, snapshot.drugs["ingredient"][pos] if len(dim_ids) else "", "Bilinmiyor")
+
+    names, inverse = np.unique(ingredient.astype(str), return_inverse=True)
+    revenue_by = np.bincount(inverse, weights=revenue, minlength=len(names))
+    quantity_by = np.bincount(inverse, weights=quantity, minlength=len(names))
+    sales_by = np.bincount(inverse, weights=count, minlength=len(names))
+    drugs_by = np.bincount(inverse, minlength=len(names))
+    total = float(revenue_by.sum())
+    return [{
+        "active_ingredient": str(names[i]),
+        "drugs": int(drugs_by[i]),
+        "revenue": round(float(revenue_by[i]), 2),
+        "quantity": int(quantity_by[i]),
+        "sales": int(sales_by[i]),
+        "revenue_share": round(float(revenue_by[i]) / total, 4) if total else 0.0,
+        "avg_unit_price": round(float(revenue_by[i] / quantity_by[i]), 2) if quantity_by[i] else 0.0,
+    } for i in np.argsort(-revenue_by, kind="stable")]
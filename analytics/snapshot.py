@@ -0,0 +1,218 @@
+# analytics/snapshot.py
+"""
+Satışların kolon bazlı (NumPy) anlık görüntüsü
+sales tablosu periyodik olarak, yalnızca son okunan id'den sonraki satırlar
+kısa batch SELECT'lerle okunarak kolon dizilerine eklenir (satışlar değişmez).
+Okuma session'ı dışarıdan verilir: backend replika yönlendiricisini kullanır,
+böylece analitik sorgular birincil veritabanına yük bindirmez. Diziler .npz
+olarak diske yazılır; yeniden başlatmada yalnızca aradaki satışlar okunur.
+Analitik sorgular (analytics/queries.py) yalnızca bu diziler üzerinde çalışır.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from sqlalchemy import text
+
+from analytics.config import ANALYTICS_CONFIG
+
+# kolon -> dtype (null drug_id / customer_id = -1)
+SALES_COLUMNS = {
+    "sale_id": np.int64,
+    "drug_id": np.int64,
+    "customer_id": np.int64,
+    "quantity": np.int64,
+    "revenue": np.float64,
+    "ts": np.int64,  # UTC epoch saniye
+}
+
+SALES_BATCH_SQL = text("""
+    SELECT id, drug_id, customer_id, quantity, total_price, sale_date
+    FROM sales
+    WHERE id > :last_id
+    ORDER BY id
+    LIMIT :batch
+""")
+
+DRUGS_SQL = text("SELECT id, name, active_ingredient, price FROM drugs ORDER BY id")
+
+class SalesSnapshot:
+    """Değişmez kolon dizileri + ilaç boyutu; yenilemede nesne bütünüyle değiştirilir"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], drugs: Dict[str, np.ndarray],
+                 refreshed_at: Optional[datetime] = None):
+        self.columns = columns
+        self.drugs = drugs  # id (sıralı), name, ingredient, price
+        self.refreshed_at = refreshed_at
+        self.memo = {}  # pahalı sorgu sonuçları (anlık görüntüyle birlikte geçersizleşir)
+
+    @classmethod
+    def empty(cls) -> "SalesSnapshot":
+        columns = {name: np.empty(0, dtype) for name, dtype in SALES_COLUMNS.items()}
+        drugs = {"id": np.empty(0, np.int64), "name": np.empty(0, object),
+                 "ingredient": np.empty(0, object), "price": np.empty(0, np.float64)}
+        return cls(columns, drugs)
+
+    @property
+    def rows(self) -> int:
+        return len(self.columns["sale_id"])
+
+    @property
+    def last_id(self) -> int:
+        return int(self.columns["sale_id"][-1]) if self.rows else 0
+
+    def drug_name(self, drug_id: int) -> str:
+        pos = np.searchsorted(self.drugs["id"], drug_id)
+        if pos < len(self.drugs["id"]) and self.drugs["id"][pos] == drug_id:
+            return self.drugs["name"][pos]
+        return "Silinmiş İlaç"
+
+def _to_columns(rows) -> Dict[str, np.ndarray]:
+    ids, drug_ids, customer_ids, quantities, revenues, dates = zip(*rows)
+    return {
+        "sale_id": np.array(ids, np.int64),
+        "drug_id": np.array([-1 if v is None else v for v in drug_ids], np.int64),
+        "customer_id": np.array([-1 if v is None else v for v in customer_ids], np.int64),
+        "quantity": np.array(quantities, np.int64),
+        "revenue": np.array(revenues, np.float64),
+        # datetime ya da (sqlite) ISO metin: ikisi de saniye hassasiyetinde epoch'a
+        "ts": np.array(dates, "datetime64[s]").astype(np.int64),
+    }
+
+def load_drugs(db) -> Dict[str, np.ndarray]:
+    rows = db.execute(DRUGS_SQL).all()
+    return {
+        "id": np.array([r[0] for r in rows], np.int64),
+        "name": np.array([r[1] for r in rows], object),
+        "ingredient": np.array([r[2] or "Bilinmiyor" for r in rows], object),
+        "price": np.array([float(r[3]) for r in rows], np.float64),
+    }
+
+class SnapshotStore:
+    """Güncel anlık görüntüyü tutar, artımlı yeniler ve diske yazar (thread-safe)"""
+
+    def __init__(self, path: Optional[str] = None, batch_size: Optional[int] = None,
+                 settle_seconds: Optional[int] = None):
+        self.path = path or ANALYTICS_CONFIG["SNAPSHOT_PATH"]
+        self.batch_size = batch_size or ANALYTICS_CONFIG["BATCH_SIZE"]
+        self.settle_seconds = ANALYTICS_CONFIG["SETTLE_SECONDS"] if settle_seconds is None else settle_seconds
+        self.current = SalesSnapshot.empty()
+        self.listeners = []  # her yenilemeden sonra yeni anlık görüntüyle çağrılır
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+
+    # ---- Disk ----
+
+    def load(self) -> int:
+        """Diskteki kolon dosyasını yükle (yoksa boş başla)"""
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with np.load(self.path) as data:
+                columns = {name: data[name].astype(dtype) for name, dtype in SALES_COLUMNS.items()}
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️ Analitik anlık görüntüsü okunamadı, baştan oluşturulacak: {e}")
+            return 0
+        self.current = SalesSnapshot(columns, self.current.drugs)
+        return self.current.rows
+
+    def save(self, snapshot: SalesSnapshot):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(tmp, **snapshot.columns)
+        os.replace(tmp, self.path)
+
+    # ---- Yenileme ----
+
+    def refresh(self, session_factory: Callable) -> int:
+        """Son id'den sonraki satışları ve ilaç boyutunu oku; eklenen satır sayısı"""
+        with self._refresh_lock:
+            base = self.current
+            cutoff = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+            cutoff_ts = np.datetime64(cutoff, "s").astype(np.int64)
+            last_id = base.last_id
+            parts = []
+            db = session_factory()
+            try:
+                drugs = load_drugs(db)
+                while True:
+                    rows = db.execute(SALES_BATCH_SQL, {"last_id": last_id,
+                                                        "batch": self.batch_size}).all()
+                    if not rows:
+                        break
+                    part = _to_columns(rows)
+                    # Tur, id sırasındaki ilk yeni satışta durur: tarihe göre süzüp id'yi
+                    # ilerletmek, geriye tarihli bir offline satışın arkasında kalan yeni
+                    # satışı (daha küçük id) sonsuza dek atlatırdı
+                    fresh = np.flatnonzero(part["ts"] >= cutoff_ts)
+                    if len(fresh):
+                        part = {name: values[:fresh[0]] for name, values in part.items()}
+                        if fresh[0]:
+                            parts.append(part)
+                        break
+                    parts.append(part)
+                    last_id = rows[-1][0]
+                    if len(rows) < self.batch_size:
+                        break
+            finally:
+                db.close()
+
+            added = sum(len(p["sale_id"]) for p in parts)
+            if added:
+                columns = {name: np.concatenate([base.columns[name]] + [p[name] for p in parts])
+                           for name in SALES_COLUMNS}
+            else:
+                columns = base.columns
+            snapshot = SalesSnapshot(columns, drugs, datetime.utcnow())
+            if added:
+                self.save(snapshot)
+            self.current = snapshot
+            for listener in self.listeners:
+                listener(snapshot)
+            return added
+
+    def reload_drugs(self, session_factory: Callable):
+        """Yalnızca ilaç boyutunu yeniden oku (katalog değişti); bellekteki sonuçlar atılır"""
+        with self._refresh_lock:
+            db = session_factory()
+            try:
+                drugs = load_drugs(db)
+            finally:
+                db.close()
+            base = self.current
+            self.current = SalesSnapshot(base.columns, drugs, base.refreshed_at)
+
+    def start(self, session_factory: Callable, interval: Optional[float] = None):
+        """Diskten yükle ve periyodik yenilemeyi ayrı bir thread'de başlat"""
+        interval = interval or ANALYTICS_CONFIG["REFRESH_SECONDS"]
+        loaded = self.load()
+
+        def run():
+            while True:
+                try:
+                    added = self.refresh(session_factory)
+                    if added:
+                        print(f"📈 Analitik anlık görüntüsü: +{added} satış ({self.current.rows} toplam)")
+                except Exception as e:
+                    print(f"❌ Analitik yenileme hatası: {e}")
+                time.sleep(interval)
+
+        self._thread = threading.Thread(target=run, daemon=True, name="analytics-snapshot")
+        self._thread.start()
+        print(f"📊 Satış analitiği aktif (diskten {loaded} satış, {int(interval)} sn'de bir yenileme)")
+
+    def status(self) -> dict:
+        snapshot = self.current
+        return {
+            "rows": snapshot.rows,
+            "last_sale_id": snapshot.last_id,
+            "drugs": len(snapshot.drugs["id"]),
+            "refreshed_at": snapshot.refreshed_at.isoformat() if snapshot.refreshed_at else None,
+        }
+
+# Global anlık görüntü (backend süreci başına bir tane)
+sales_snapshot = SnapshotStore()
@@ -0,0 +1,106 @@
+# api_client/async_client.py
+"""
+Asenkron API istemcisi (httpx)
+Senkron istemciyle aynı uç noktaları sunar; metotlar await edilir.
+"""
+
+import asyncio
+from typing import Any, Optional
+
+import httpx
+
+from .config import CLIENT_CONFIG
+from .endpoints import AuthEndpoints, PharmacyEndpoints
+from .errors import ApiConnectionError, ApiError
+from .retry import IDEMPOTENT_METHODS, RetryPolicy
+
+def build_async_client(max_connections: Optional[int] = None) -> httpx.AsyncClient:
+    """Havuzlu ve sınırlı bir httpx.AsyncClient oluştur"""
+    max_connections = max_connections or CLIENT_CONFIG["POOL_MAXSIZE"]
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        ),
+        timeout=httpx.Timeout(
+            CLIENT_CONFIG["READ_TIMEOUT"],
+            connect=CLIENT_CONFIG["CONNECT_TIMEOUT"]
+        )
+    )
+
+def _error_detail(resp: httpx.Response) -> str:
+    try:
+        detail = resp.json().get("detail", resp.text)
+    except (ValueError, AttributeError):
+        detail = resp.text
+    return detail if isinstance(detail, str) else str(detail)
+
+class AsyncBaseClient:
+    """Ortak asenkron istek/yanıt mantığı"""
+
+    def __init__(self, base_url: str, token: Optional[str] = None,
+                 client: Optional[httpx.AsyncClient] = None,
+                 retry: Optional[RetryPolicy] = None):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.client = client or build_async_client()
+        self.retry = retry or RetryPolicy()
+
+    def with_token(self, token: Optional[str]):
+        """Aynı bağlantı havuzunu paylaşan, farklı token'lı bir kopya"""
+        return self.__class__(self.base_url, token=token, client=self.client, retry=self.retry)
+
+    def _headers(self) -> dict:
+        headers = {"X-Branch-Id": CLIENT_CONFIG["BRANCH_ID"]} if CLIENT_CONFIG["BRANCH_ID"] else {}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    async def request(self, method: str, path: str, *, json: Any = None,
+                      params: Optional[dict] = None) -> Any:
+        """İsteği gönder; 2xx değilse ApiError fırlat"""
+        method = method.upper()
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            try:
+                resp = await self.client.request(
+                    method, url, json=json, params=params, headers=self._headers()
+                )
+            except httpx.TransportError as e:
+                never_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                retryable = method in IDEMPOTENT_METHODS or never_sent
+                if retryable and self.retry.can_retry(attempt):
+                    await asyncio.sleep(self.retry.delay(attempt))
+                    attempt += 1
+                    continue
+                raise ApiConnectionError(f"Backend'e ulaşılamadı: {e}") from e
+
+            if self.retry.should_retry_status(method, resp.status_code, attempt):
+                await asyncio.sleep(self.retry.delay(attempt, resp.headers.get("Retry-After")))
+                attempt += 1
+                continue
+
+            if resp.status_code >= 400:
+                raise ApiError(resp.status_code, _error_detail(resp))
+            if resp.status_code == 204 or not resp.content:
+                return None
+            try:
+                return resp.json()
+            except ValueError:
+                return resp.text
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+class AsyncPharmacyClient(PharmacyEndpoints, AsyncBaseClient):
+    """Eczane backend'i için asenkron istemci"""
+
+class AsyncAuthClient(AuthEndpoints, AsyncBaseClient):
+    """JWT auth servisi için asenkron istemci"""
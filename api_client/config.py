@@ -0,0 +1,25 @@
+# api_client/config.py
+"""
+Eczane API istemcisi için bağlantı ayarları
+Ortam değişkenleriyle ayarlanır, .env gerektirmez
+"""
+
+import os
+
+# ==================== BAĞLANTI AYARLARI ====================
+CLIENT_CONFIG = {
+    # Zaman aşımları (saniye): bağlantı kurma / yanıt okuma
+    "CONNECT_TIMEOUT": float(os.environ.get("API_CONNECT_TIMEOUT", 3.05)),
+    "READ_TIMEOUT": float(os.environ.get("API_READ_TIMEOUT", 15)),
+    # Akış (SSE) bağlantısında iki veri arası en uzun bekleme; sunucu 15 sn'de bir ping atar
+    "STREAM_READ_TIMEOUT": float(os.environ.get("API_STREAM_READ_TIMEOUT", 60)),
+    # Tekrar deneme (üstel bekleme + tam jitter)
+    "MAX_RETRIES": int(os.environ.get("API_MAX_RETRIES", 3)),
+    "BACKOFF_BASE": float(os.environ.get("API_BACKOFF_BASE", 0.2)),
+    "BACKOFF_MAX": float(os.environ.get("API_BACKOFF_MAX", 5)),
+    # Bağlantı havuzu (keep-alive); POOL_MAXSIZE host başına üst sınırdır
+    "POOL_CONNECTIONS": int(os.environ.get("API_POOL_CONNECTIONS", 4)),
+    "POOL_MAXSIZE": int(os.environ.get("API_POOL_MAXSIZE", 20)),
+    # Terminalin şubesi (X-Branch-Id); boşsa backend merkez şubeyi kullanır
+    "BRANCH_ID": os.environ.get("API_BRANCH_ID") or None,
+}
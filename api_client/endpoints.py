@@ -0,0 +1,133 @@
+# api_client/endpoints.py
+"""
+Eczane backend ve JWT auth servisinin uç noktaları
+Senkron ve asenkron istemciler bu sınıfları paylaşır: senkron istemcide
+metotlar veriyi, asenkron istemcide await edilecek coroutine'i döndürür.
+"""
+
+from typing import List, Optional
+
+from .models import (
+    AlertPage, BatchSaleResult, Customer, DailyReport, DataVersion, Drug, HistoryPage,
+    HistorySummary, LoginResult, OrderResult, SaleResult, StockDrug, StockStatus, TokenPair, UserInfo
+)
+
+class PharmacyEndpoints:
+    """eczane_otomasyonu.py (port 8000) uç noktaları"""
+
+    # ---- Auth ----
+    def login(self, username: str, password: str) -> LoginResult:
+        return self.request("POST", "/login", json={"username": username, "password": password})
+
+    # ---- Veri sürümü ----
+    def data_version(self) -> DataVersion:
+        """Panel verisinin sürüm etiketi (değişmediyse aynı kalır)"""
+        return self.request("GET", "/version")
+
+    # ---- İlaçlar ----
+    def list_drugs(self) -> List[Drug]:
+        return self.request("GET", "/drugs")
+
+    def get_drug(self, drug_id: int) -> Drug:
+        return self.request("GET", f"/drugs/{drug_id}")
+
+    def create_drug(self, drug: dict) -> dict:
+        return self.request("POST", "/drugs", json=drug)
+
+    def delete_drug(self, drug_id: int) -> dict:
+        return self.request("DELETE", f"/drugs/{drug_id}")
+
+    def update_threshold(self, drug_id: int, threshold: int) -> dict:
+        return self.request("PUT", f"/drugs/{drug_id}/threshold", params={"threshold": threshold})
+
+    def low_stock_drugs(self) -> List[StockDrug]:
+        return self.request("GET", "/drugs/low-stock")
+
+    def critical_stock_drugs(self) -> List[StockDrug]:
+        return self.request("GET", "/drugs/critical-stock")
+
+    # ---- Satış / Sipariş ----
+    def sell(self, drug_id: int, quantity: int = 1, customer_id: Optional[int] = None) -> SaleResult:
+        return self.request("POST", "/sales", json={
+            "drug_id": drug_id,
+            "quantity": quantity,
+            "customer_id": customer_id
+        })
+
+    def sell_batch(self, sales: List[dict]) -> BatchSaleResult:
+        """Çevrimdışı kuyruktaki satışlar (client_ref, drug_id, quantity, customer_id,
+        unit_price, sold_at); client_ref ile tekrar gönderim güvenlidir"""
+        return self.request("POST", "/sales/batch", json={"sales": sales})
+
+    def order_stock(self, drug_id: int, quantity: int = 10, auto_order: bool = False) -> OrderResult:
+        return self.request("POST", "/order_stock", json={
+            "drug_id": drug_id,
+            "quantity": quantity,
+            "auto_order": auto_order
+        })
+
+    # ---- Müşteriler ----
+    def list_customers(self) -> List[Customer]:
+        return self.request("GET", "/customers")
+
+    def create_customer(self, customer: dict) -> dict:
+        return self.request("POST", "/customers", json=customer)
+
+    def customer_history(self, customer_id: int, cursor: Optional[str] = None,
+                         limit: int = 50) -> HistoryPage:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        return self.request("GET", f"/customers/{customer_id}/history", params=params)
+
+    def customer_history_summary(self, customer_id: int) -> HistorySummary:
+        return self.request("GET", f"/customers/{customer_id}/history", params={"mode": "summary"})
+
+    # ---- Raporlar / Uyarılar ----
+    def daily_report(self) -> DailyReport:
+        return self.request("GET", "/reports/daily")
+
+    def stock_status(self) -> StockStatus:
+        return self.request("GET", "/reports/stock-status")
+
+    def check_alerts(self) -> dict:
+        return self.request("GET", "/alerts/check")
+
+    def alert_history(self, cursor: Optional[str] = None, limit: int = 50,
+                      alert_type: Optional[str] = None, is_read: Optional[bool] = None,
+                      drug_id: Optional[int] = None) -> AlertPage:
+        params = {"limit": limit, "cursor": cursor, "alert_type": alert_type,
+                  "is_read": None if is_read is None else str(is_read).lower(),
+                  "drug_id": drug_id}
+        return self.request("GET", "/alerts/history",
+                            params={k: v for k, v in params.items() if v is not None})
+
+    def ack_alerts(self, ids: Optional[List[int]] = None, all: bool = False, **filters) -> dict:
+        return self.request("POST", "/alerts/ack", json={"ids": ids, "all": all, **filters})
+
+class AuthEndpoints:
+    """server_jwt.py (port 8001) uç noktaları"""
+
+    def login(self, username: str, password: str) -> TokenPair:
+        return self.request("POST", "/login", json={"username": username, "password": password})
+
+    def refresh(self, refresh_token: str) -> TokenPair:
+        return self.request("POST", "/refresh", json={"refresh_token": refresh_token})
+
+    def logout(self, refresh_token: Optional[str] = None) -> dict:
+        return self.request("POST", "/logout", json={"refresh_token": refresh_token})
+
+    def profile(self) -> UserInfo:
+        return self.request("GET", "/profile")
+
+    def validate(self, token: str) -> dict:
+        return self.request("POST", "/validate", json={"token": token})
+
+    def protected(self) -> dict:
+        return self.request("GET", "/protected")
+
+    def users(self) -> dict:
+        return self.request("GET", "/users")
+
+    def status(self) -> dict:
+        return self.request("GET", "/")
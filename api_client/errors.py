@@ -0,0 +1,20 @@
+# api_client/errors.py
+"""
+API istemcisinin fırlattığı hatalar
+"""
+
+from typing import Optional
+
+class ApiError(Exception):
+    """Backend 2xx dışı bir yanıt döndürdü"""
+
+    def __init__(self, status_code: Optional[int], detail: str):
+        super().__init__(f"{status_code}: {detail}" if status_code else detail)
+        self.status_code = status_code
+        self.detail = detail
+
+class ApiConnectionError(ApiError):
+    """Backend'e ulaşılamadı (bağlantı hatası veya zaman aşımı)"""
+
+    def __init__(self, detail: str):
+        super().__init__(None, detail)
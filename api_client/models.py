@@ -0,0 +1,160 @@
+# api_client/models.py
+"""
+Backend yanıtlarının tip tanımları
+"""
+
+from typing import List, Optional, TypedDict
+
+class UserInfo(TypedDict):
+    username: str
+    role: str
+    full_name: Optional[str]
+
+class LoginResult(TypedDict):
+    token: str
+    role: str
+    user_info: UserInfo
+
+class Drug(TypedDict):
+    id: int
+    name: str
+    active_ingredient: Optional[str]
+    price: float
+    stock_quantity: int
+    low_stock_threshold: int
+    description: Optional[str]
+
+class StockDrug(TypedDict):
+    id: int
+    name: str
+    stock_quantity: int
+    low_stock_threshold: int
+    price: float
+
+class StockDelta(TypedDict):
+    """Yazma yanıtlarındaki ve canlı akıştaki güncel stok satırı"""
+    id: int
+    name: str
+    stock: int
+    threshold: Optional[int]
+    level: str
+
+class SaleInfo(TypedDict):
+    id: int
+    drug_name: str
+    quantity: int
+    total_price: float
+    its_id: Optional[str]  # ITS onayı arka planda gelir; satış anında None
+    its_status: Optional[str]  # 'pending' (ITS kapalıysa None)
+    date: str
+
+class SaleResult(TypedDict):
+    message: str
+    sale: SaleInfo
+    stock: StockDelta
+
+class BatchSaleItemResult(TypedDict, total=False):
+    client_ref: str
+    status: str  # 'applied', 'duplicate', 'conflict'
+    sale_id: int
+    reason: str  # conflict: 'drug_not_found', 'insufficient_stock', 'insufficient_lots'
+    message: str
+    available: int
+    current_price: float  # satış fiyatı katalogdan farklıysa
+
+class BatchSaleResult(TypedDict):
+    message: str
+    applied: int
+    duplicate: int
+    conflict: int
+    results: List[BatchSaleItemResult]
+
+class OrderResult(TypedDict):
+    message: str
+    old_stock: int
+    new_stock: int
+    auto_order: bool
+    stock: StockDelta
+
+class Customer(TypedDict):
+    id: int
+    name: str
+    tc_no: Optional[str]
+    phone: Optional[str]
+    email: Optional[str]
+    created_at: Optional[str]
+
+class HistoryItem(TypedDict):
+    id: int
+    drug_name: str
+    quantity: int
+    total_price: float
+    date: str
+    its_id: Optional[str]
+
+class HistoryPage(TypedDict):
+    customer_id: int
+    items: List[HistoryItem]
+    next_cursor: Optional[str]
+
+class DrugPurchaseSummary(TypedDict):
+    drug_id: Optional[int]
+    drug_name: str
+    purchase_count: int
+    total_quantity: int
+    total_spent: float
+    first_purchase: str
+    last_purchase: str
+    avg_interval_days: Optional[float]
+
+class HistorySummary(TypedDict):
+    customer_id: int
+    drugs: List[DrugPurchaseSummary]
+    total_purchases: int
+    total_spent: float
+
+class ReportDetail(TypedDict):
+    drug_name: str
+    quantity: int
+    total_price: float
+    its_id: Optional[str]
+    date: str
+
+class DailyReport(TypedDict):
+    date: str
+    total_sales_count: int
+    total_revenue: float
+    details: List[ReportDetail]
+
+class DataVersion(TypedDict):
+    version: str
+
+class StockStatus(TypedDict):
+    total_drugs: int
+    total_stock_value: float
+    low_stock_count: int
+    critical_stock_count: int
+    min_stock_drug: dict
+    check_time: str
+
+class AlertRecord(TypedDict):
+    id: int
+    drug_id: Optional[int]
+    drug_name: str
+    alert_type: str
+    message: str
+    is_read: bool
+    created_at: Optional[str]
+    read_at: Optional[str]
+
+class AlertPage(TypedDict):
+    items: List[AlertRecord]
+    next_cursor: Optional[str]
+
+class TokenPair(TypedDict):
+    access_token: str
+    refresh_token: str
+    token_type: str
+    expires_in: int
+    refresh_expires_in: int
+    user_info: UserInfo
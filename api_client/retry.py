@@ -0,0 +1,41 @@
+# api_client/retry.py
+"""
+Tekrar deneme politikası (senkron ve asenkron istemci ortak)
+"""
+
+import random
+from typing import Optional
+
+from .config import CLIENT_CONFIG
+
+# Tekrar gönderilmesi güvenli (idempotent) metotlar
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+# Geçici olduğu varsayılan durum kodları
+RETRY_STATUSES = {429, 502, 503, 504}
+
+class RetryPolicy:
+    """Üstel bekleme + tam jitter (AWS 'full jitter')"""
+
+    def __init__(self, max_retries: Optional[int] = None, base: Optional[float] = None,
+                 cap: Optional[float] = None):
+        self.max_retries = CLIENT_CONFIG["MAX_RETRIES"] if max_retries is None else max_retries
+        self.base = CLIENT_CONFIG["BACKOFF_BASE"] if base is None else base
+        self.cap = CLIENT_CONFIG["BACKOFF_MAX"] if cap is None else cap
+
+    def can_retry(self, attempt: int) -> bool:
+        return attempt < self.max_retries
+
+    def should_retry_status(self, method: str, status_code: int, attempt: int) -> bool:
+        return (self.can_retry(attempt)
+                and method.upper() in IDEMPOTENT_METHODS
+                and status_code in RETRY_STATUSES)
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """attempt. denemeden sonra beklenecek süre (saniye)"""
+        if retry_after:
+            try:
+                return min(self.cap, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.cap, self.base * (2 ** attempt)))
@@ -0,0 +1,132 @@
+# api_client/sync_client.py
+"""
+Senkron API istemcisi (requests)
+Tek bir Session üzerinden keep-alive bağlantı havuzu kullanır;
+her çağrıda zaman aşımı ve jitter'lı tekrar deneme uygulanır.
+"""
+
+import time
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from .config import CLIENT_CONFIG
+from .endpoints import AuthEndpoints, PharmacyEndpoints
+from .errors import ApiConnectionError, ApiError
+from .retry import IDEMPOTENT_METHODS, RetryPolicy
+
+def build_session(pool_connections: Optional[int] = None,
+                  pool_maxsize: Optional[int] = None) -> requests.Session:
+    """Havuzlu ve sınırlı bir requests.Session oluştur"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections or CLIENT_CONFIG["POOL_CONNECTIONS"],
+        pool_maxsize=pool_maxsize or CLIENT_CONFIG["POOL_MAXSIZE"],
+        pool_block=True,  # sınır aşılınca yeni bağlantı açmak yerine bekle
+        max_retries=0     # tekrar denemeyi RetryPolicy yönetir
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _never_sent(exc: requests.RequestException) -> bool:
+    """İstek sunucuya hiç ulaşmadı mı? (POST'u tekrar göndermek güvenli mi)"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
+
+def _error_detail(resp: requests.Response) -> str:
+    try:
+        detail = resp.json().get("detail", resp.text)
+    except (ValueError, AttributeError):
+        detail = resp.text
+    return detail if isinstance(detail, str) else str(detail)
+
+class BaseClient:
+    """Ortak istek/yanıt mantığı"""
+
+    def __init__(self, base_url: str, token: Optional[str] = None,
+                 session: Optional[requests.Session] = None,
+                 timeout: Optional[tuple] = None,
+                 retry: Optional[RetryPolicy] = None):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.session = session or build_session()
+        self.timeout = timeout or (CLIENT_CONFIG["CONNECT_TIMEOUT"], CLIENT_CONFIG["READ_TIMEOUT"])
+        self.retry = retry or RetryPolicy()
+
+    def with_token(self, token: Optional[str]):
+        """Aynı bağlantı havuzunu paylaşan, farklı token'lı bir kopya"""
+        return self.__class__(self.base_url, token=token, session=self.session,
+                              timeout=self.timeout, retry=self.retry)
+
+    def _headers(self) -> dict:
+        headers = {"X-Branch-Id": CLIENT_CONFIG["BRANCH_ID"]} if CLIENT_CONFIG["BRANCH_ID"] else {}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def request(self, method: str, path: str, *, json: Any = None,
+                params: Optional[dict] = None) -> Any:
+        """İsteği gönder; 2xx değilse ApiError fırlat"""
+        method = method.upper()
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            try:
+                resp = self.session.request(
+                    method, url, json=json, params=params,
+                    headers=self._headers(), timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retryable = method in IDEMPOTENT_METHODS or _never_sent(e)
+                if retryable and self.retry.can_retry(attempt):
+                    time.sleep(self.retry.delay(attempt))
+                    attempt += 1
+                    continue
+                raise ApiConnectionError(f"Backend'e ulaşılamadı: {e}") from e
+
+            if self.retry.should_retry_status(method, resp.status_code, attempt):
+                time.sleep(self.retry.delay(attempt, resp.headers.get("Retry-After")))
+                attempt += 1
+                continue
+
+            if resp.status_code >= 400:
+                raise ApiError(resp.status_code, _error_detail(resp))
+            if resp.status_code == 204 or not resp.content:
+                return None
+            try:
+                return resp.json()
+            except ValueError:
+                return resp.text
+
+    def stream(self, path: str, headers: Optional[dict] = None) -> requests.Response:
+        """Uzun süreli akış (SSE) isteği aç; çağıran iter_content ile okuyup kapatır
+
+        Havuz dışında ayrı bir bağlantı kullanılır: açık kalan akışlar havuzu
+        doldurup (pool_block) diğer API çağrılarını bekletmesin.
+        """
+        try:
+            resp = requests.get(
+                f"{self.base_url}{path}", headers={**self._headers(), **(headers or {})}, stream=True,
+                timeout=(CLIENT_CONFIG["CONNECT_TIMEOUT"], CLIENT_CONFIG["STREAM_READ_TIMEOUT"])
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise ApiConnectionError(f"Backend'e ulaşılamadı: {e}") from e
+        if resp.status_code >= 400:
+            detail = _error_detail(resp)
+            resp.close()
+            raise ApiError(resp.status_code, detail)
+        return resp
+
+    def close(self):
+        self.session.close()
+
+class PharmacyClient(PharmacyEndpoints, BaseClient):
+    """Eczane backend'i (FastAPI, port 8000) için senkron istemci"""
+
+class AuthClient(AuthEndpoints, BaseClient):
+    """JWT auth servisi (port 8001) için senkron istemci"""
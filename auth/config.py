@@ -0,0 +1,31 @@
+# auth/config.py
+"""
+Kimlik doğrulama (parola hash) ayarları
+Ortam değişkenleriyle ayarlanır, .env gerektirmez
+"""
+
+import os
+
+# ==================== PAROLA HASH AYARLARI ====================
+PASSWORD_CONFIG = {
+    # bcrypt maliyet parametresi (her +1 doğrulama süresini ikiye katlar)
+    "BCRYPT_ROUNDS": int(os.environ.get("BCRYPT_ROUNDS", 12)),
+    # Doğrulamayı yapan süreç havuzunun boyutu
+    "HASH_WORKERS": int(os.environ.get("AUTH_HASH_WORKERS", os.cpu_count() or 2)),
+    # Havuzda aynı anda bekleyebilecek en fazla doğrulama (fazlası 503 alır)
+    "MAX_PENDING": int(os.environ.get("AUTH_MAX_PENDING", 64)),
+    # Başarılı doğrulamaların bellekte tutulma süresi ve kapasitesi
+    "VERIFY_CACHE_TTL_SECONDS": int(os.environ.get("AUTH_VERIFY_CACHE_TTL", 300)),
+    "VERIFY_CACHE_SIZE": int(os.environ.get("AUTH_VERIFY_CACHE_SIZE", 1024)),
+}
+
+# ==================== TOKEN İPTAL LİSTESİ AYARLARI ====================
+REVOCATION_CONFIG = {
+    # Bloom filtresinin yanlış pozitif oranı bu sayıya kadar korunur
+    "BLOOM_CAPACITY": int(os.environ.get("REVOCATION_BLOOM_CAPACITY", 100000)),
+    "BLOOM_ERROR_RATE": float(os.environ.get("REVOCATION_BLOOM_ERROR_RATE", 0.001)),
+    # Diğer auth instance'larının iptallerini çekme aralığı
+    "SYNC_INTERVAL_SECONDS": int(os.environ.get("REVOCATION_SYNC_INTERVAL", 5)),
+    # Süresi dolmuş kayıtları temizleme aralığı
+    "PURGE_INTERVAL_SECONDS": int(os.environ.get("REVOCATION_PURGE_INTERVAL", 3600)),
+}
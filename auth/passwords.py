@@ -0,0 +1,188 @@
+# auth/passwords.py
+"""
+Parola hashleme ve doğrulama
+bcrypt kullanır; eski (tuzsuz MD5) hash'leri de tanır ve yükseltilmesini sağlar.
+Pahalı doğrulama sınırlı bir süreç havuzunda çalışır, event loop'u bloklamaz.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+from .config import PASSWORD_CONFIG
+
+_LEGACY_MD5 = re.compile(r"^[0-9a-f]{32}$")
+
+# ================ HASH FONKSİYONLARI ================
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    """Parolayı bcrypt ile hashle"""
+    rounds = rounds or PASSWORD_CONFIG["BCRYPT_ROUNDS"]
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """Parolayı kayıtlı hash ile karşılaştır (bcrypt veya eski MD5)"""
+    if not password_hash:
+        return False
+    if _LEGACY_MD5.match(password_hash):
+        legacy = hashlib.md5(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, password_hash)
+    try:
+        return bcrypt.checkpw(password.encode(), password_hash.encode())
+    except ValueError:
+        # Bozuk hash veya bcrypt'in kabul etmediği parola
+        return False
+
+_dummy_hash: Optional[str] = None
+
+def dummy_hash() -> str:
+    """Olmayan kullanıcı için doğrulanacak hash (güncel maliyette, ilk çağrıda üretilir)
+
+    Bilinmeyen kullanıcı adında da aynı bcrypt maliyeti ödenir; yanıt süresi
+    kullanıcı adının kayıtlı olup olmadığını belli etmez.
+    """
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(os.urandom(16).hex())
+    return _dummy_hash
+
+def needs_rehash(password_hash: str, rounds: Optional[int] = None) -> bool:
+    """Hash eski formatta mı ya da maliyeti güncel ayardan farklı mı?"""
+    rounds = rounds or PASSWORD_CONFIG["BCRYPT_ROUNDS"]
+    if not password_hash or _LEGACY_MD5.match(password_hash):
+        return True
+    try:
+        # Format: $2b$12$<salt+hash>
+        return int(password_hash.split("$")[2]) != rounds
+    except (IndexError, ValueError):
+        return True
+
+# ================ DOĞRULAMA ÖNBELLEĞİ ================
+
+class VerificationCache:
+    """Başarılı doğrulamaları kısa süreliğine hatırlar.
+
+    Anahtar, süreç başına rastgele bir sırla alınmış HMAC'tir; parola
+    bellekte düz metin olarak tutulmaz. Kayıtlı hash anahtara dahil
+    olduğu için parola değişince eski kayıt kendiliğinden geçersizleşir.
+    """
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._secret = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, username: str, password: str, password_hash: str) -> bytes:
+        message = "\0".join([username, password, password_hash]).encode()
+        return hmac.new(self._secret, message, hashlib.sha256).digest()
+
+    def hit(self, username: str, password: str, password_hash: str) -> bool:
+        if self.ttl_seconds <= 0:
+            return False
+        key = self._key(username, password, password_hash)
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at < now:
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def remember(self, username: str, password: str, password_hash: str):
+        if self.ttl_seconds <= 0:
+            return
+        key = self._key(username, password, password_hash)
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl_seconds
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# ================ SÜREÇ HAVUZLU DOĞRULAYICI ================
+
+class VerifierBusy(Exception):
+    """Bekleyen doğrulama sayısı sınırı aşıldı"""
+
+class PasswordVerifier:
+    """bcrypt doğrulamasını sınırlı bir süreç havuzunda çalıştırır"""
+
+    def __init__(self, workers: int, max_pending: int, cache: Optional[VerificationCache] = None):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self.cache = cache
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise VerifierBusy("Çok fazla eşzamanlı giriş denemesi")
+            self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    async def _submit(self, func, *args):
+        """İşi havuza ver; bekleyen iş sınırı doğrulama ve hash için ortaktır"""
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._release()
+
+    async def verify(self, username: str, password: str, password_hash: str) -> bool:
+        """Parolayı doğrula; önbellekte varsa havuza hiç gitme"""
+        if self.cache and self.cache.hit(username, password, password_hash):
+            return True
+
+        ok = await self._submit(verify_password, password, password_hash)
+        if ok and self.cache:
+            self.cache.remember(username, password, password_hash)
+        return ok
+
+    async def hash(self, password: str) -> str:
+        """Yeni hash'i de havuzda üret (sınır doluysa VerifierBusy)"""
+        return await self._submit(hash_password, password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# Global doğrulayıcı instance'ı
+password_verifier = PasswordVerifier(
+    workers=PASSWORD_CONFIG["HASH_WORKERS"],
+    max_pending=PASSWORD_CONFIG["MAX_PENDING"],
+    cache=VerificationCache(
+        ttl_seconds=PASSWORD_CONFIG["VERIFY_CACHE_TTL_SECONDS"],
+        max_size=PASSWORD_CONFIG["VERIFY_CACHE_SIZE"],
+    ),
+)
@@ -0,0 +1,196 @@
+# auth/revocation.py
+"""
+JWT iptal listesi (jti bazlı)
+Bellekte bloom filtresi + tam küme tutulur, kalıcı kayıt PostgreSQL'dedir.
+verify_token() yolunda veritabanına gidilmez; diğer instance'ların
+iptalleri arka plandaki senkron thread'i ile kısa aralıklarla çekilir.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal, RevokedToken
+from .config import REVOCATION_CONFIG
+
+def _epoch(dt: datetime) -> float:
+    """Tablodaki (naive, UTC) zamanı epoch saniyeye çevir"""
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+# ================ BLOOM FİLTRESİ ================
+
+class BloomFilter:
+    """Sabit boyutlu bloom filtresi (çift hash yöntemi)"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+# ================ İPTAL DEPOSU ================
+
+class RevocationStore:
+    """İptal edilmiş token'ların jti'lerini tutar"""
+
+    def __init__(self, capacity: int, error_rate: float,
+                 sync_interval: int, purge_interval: int):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._revoked = {}  # jti -> son geçerlilik (epoch saniye)
+        self._lock = threading.Lock()
+        self._last_sync = None
+        self._last_purge = time.monotonic()
+        self._thread = None
+
+    # ---- bellek tarafı ----
+
+    def _remember(self, jti: str, expires_at: datetime):
+        with self._lock:
+            self._revoked[jti] = _epoch(expires_at)
+            self._bloom.add(jti)
+            # Kapasite aşıldıysa yanlış pozitif oranı korunsun diye büyüt
+            if len(self._revoked) > self.capacity:
+                self.capacity *= 2
+                self._rebuild_locked()
+
+    def _rebuild_locked(self):
+        now = time.time()
+        self._revoked = {j: exp for j, exp in self._revoked.items() if exp > now}
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        for jti in self._revoked:
+            bloom.add(jti)
+        self._bloom = bloom
+
+    def is_revoked(self, jti: str) -> bool:
+        """O(1): bloom 'yok' derse kesin yoktur, 'var' derse tam kümeye bak"""
+        if jti not in self._bloom:
+            return False
+        return jti in self._revoked
+
+    # ---- kalıcı taraf ----
+
+    def revoke(self, jti: str, token_type: str, username: str, expires_at: datetime) -> bool:
+        """Token'ı iptal et; daha önce iptal edilmişse False döner"""
+        db = SessionLocal()
+        try:
+            db.add(RevokedToken(
+                jti=jti,
+                token_type=token_type,
+                username=username,
+                expires_at=expires_at
+            ))
+            db.commit()
+            created = True
+        except IntegrityError:
+            db.rollback()
+            created = False
+        finally:
+            db.close()
+
+        self._remember(jti, expires_at)
+        return created
+
+    def load(self):
+        """Henüz süresi dolmamış tüm iptalleri belleğe al"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            rows = db.query(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)\
+                     .filter(RevokedToken.expires_at > now).all()
+        finally:
+            db.close()
+
+        with self._lock:
+            if len(rows) > self.capacity:
+                self.capacity = len(rows) * 2
+            self._revoked = {}
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            for jti, expires_at, _ in rows:
+                self._revoked[jti] = _epoch(expires_at)
+                self._bloom.add(jti)
+            self._last_sync = max((r.revoked_at for r in rows if r.revoked_at), default=now)
+        print(f"🔒 {len(rows)} iptal edilmiş token yüklendi")
+
+    def sync(self):
+        """Son senkrondan beri (başka instance'larda) eklenen iptalleri çek"""
+        db = SessionLocal()
+        try:
+            query = db.query(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+            if self._last_sync is not None:
+                # Instance'lar arası saat farkı/geç commit için bir aralık geriden başla
+                since = self._last_sync - timedelta(seconds=self.sync_interval)
+                query = query.filter(RevokedToken.revoked_at >= since)
+            rows = query.all()
+        finally:
+            db.close()
+
+        for jti, expires_at, revoked_at in rows:
+            if jti not in self._revoked:
+                self._remember(jti, expires_at)
+            if revoked_at and (self._last_sync is None or revoked_at > self._last_sync):
+                self._last_sync = revoked_at
+
+    def purge(self):
+        """Süresi dolmuş iptalleri bellekten ve tablodan sil"""
+        db = SessionLocal()
+        try:
+            deleted = db.query(RevokedToken)\
+                        .filter(RevokedToken.expires_at < datetime.utcnow())\
+                        .delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            self._rebuild_locked()
+        if deleted:
+            print(f"🧹 {deleted} süresi dolmuş iptal kaydı silindi")
+
+    def start_sync(self):
+        """Senkron/temizlik thread'ini başlat"""
+        if self._thread is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.sync_interval)
+                try:
+                    self.sync()
+                    if time.monotonic() - self._last_purge >= self.purge_interval:
+                        self.purge()
+                        self._last_purge = time.monotonic()
+                except Exception as e:
+                    print(f"❌ İptal listesi senkron hatası: {e}")
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+# Global iptal deposu instance'ı
+revocation_store = RevocationStore(
+    capacity=REVOCATION_CONFIG["BLOOM_CAPACITY"],
+    error_rate=REVOCATION_CONFIG["BLOOM_ERROR_RATE"],
+    sync_interval=REVOCATION_CONFIG["SYNC_INTERVAL_SECONDS"],
+    purge_interval=REVOCATION_CONFIG["PURGE_INTERVAL_SECONDS"],
+)
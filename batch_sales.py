@@ -0,0 +1,133 @@
+# batch_sales.py
+"""
+Toplu satış (POST /sales/batch): çevrimdışı kasanın kuyruğunu tek istekte yazar
+Her satış istemcinin verdiği client_ref (UUID) ile gelir ve sonuç satır satır
+döner:
+- applied: satış yazıldı (satış anındaki fiyat ve zamanla)
+- duplicate: client_ref daha önce yazılmış (yanıtı kaybolmuş bir tekrar gönderim)
+- conflict: yazılamadı (ilaç silinmiş, şube stoğu ya da satılabilir parti yetersiz);
+  kasa bunu kuyrukta bekletip kullanıcıya gösterir
+Tüm parti tek transaction'dır ve maliyeti satış sayısına değil ilaç sayısına
+bağlıdır: partideki ilaçların branch_stock satırları ilaç sırasıyla tek
+sorguda kilitlenir, satılabilir parti stoğu tek gruplu sorguyla okunur ve
+satışlar bellekte sırayla bunlardan düşülür (çakışma partinin geri kalanını
+geri almaz). Sonra ilaç başına tek FEFO tahsisi ve tek stok hareketi yazılır;
+tahsis satışlara sırayla bölünür, satışlar tek flush'ta eklenir. Her satış
+outbox'a bir satış olayı yazar (İTS, uyarı, özet, canlı akış relay'den).
+"""
+
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+import drug_lots
+from database import BranchStock, Customer, Drug, Sale, SaleClientRef, session_branch
+from events import sale_event
+from outbox.relay import emit
+from stock_ledger import record_movement
+
+BATCH_CONFIG = {
+    # Tek istekte kabul edilen en fazla satış (kasa kuyruğu bu boyutta parçalar)
+    "MAX_ITEMS": int(os.environ.get("SALES_BATCH_MAX_ITEMS", 500)),
+}
+
+def conflict(item, reason: str, message: str, **extra) -> dict:
+    return {"client_ref": item.client_ref, "status": "conflict", "reason": reason,
+            "message": message, **extra}
+
+def apply_batch(db: Session, items: List, created_by: Optional[int] = 1) -> List[dict]:
+    """Satışları sırayla yaz (commit etmez); satır sonuçları
+
+    items: client_ref, drug_id, quantity, customer_id, unit_price, sold_at
+    alanları olan nesneler (SaleBatchItem).
+    """
+    branch_id = session_branch(db)
+    refs = [item.client_ref for item in items]
+    done = dict(db.query(SaleClientRef.client_ref, SaleClientRef.sale_id)
+                  .filter(SaleClientRef.client_ref.in_(refs)).all())
+
+    drug_ids = sorted({item.drug_id for item in items if item.client_ref not in done})
+    drugs = {d.id: d for d in db.query(Drug).filter(Drug.id.in_(drug_ids)).all()}
+    # Şube stoğu satırları önce ve ilaç sırasıyla kilitlenir: aynı ilacın
+    # partilerine yazan diğer işlemler (satış, sipariş, transfer) burada bekler
+    stock = {s.drug_id: s.quantity for s in db.query(BranchStock)
+             .filter(BranchStock.drug_id.in_(drug_ids))
+             .order_by(BranchStock.drug_id).with_for_update().all()}
+    sellable = drug_lots.sellable_quantities(db, drug_ids)
+    customer_ids = {item.customer_id for item in items if item.customer_id}
+    customers = {c[0] for c in db.query(Customer.id).filter(Customer.id.in_(customer_ids)).all()}
+
+    # Satır satır karar: kalan şube stoğu ve satılabilir parti stoğu bellekte düşülür
+    results, applied, seen = [], defaultdict(list), {}
+    for item in items:
+        if item.client_ref in done or item.client_ref in seen:
+            # Daha önce yazılmış ya da aynı partide tekrar eden client_ref
+            results.append({"client_ref": item.client_ref, "status": "duplicate",
+                            "sale_id": done.get(item.client_ref)})
+            continue
+        drug = drugs.get(item.drug_id)
+        if drug is None:
+            results.append(conflict(item, "drug_not_found", "İlaç bulunamadı"))
+            continue
+        available, lots_left = stock.get(drug.id, 0), sellable.get(drug.id, 0)
+        if available < item.quantity:
+            results.append(conflict(item, "insufficient_stock", f"Yetersiz stok. Mevcut: {available}",
+                                    available=available))
+            continue
+        if lots_left < item.quantity:
+            results.append(conflict(item, "insufficient_lots",
+                                    f"Miadı geçmemiş stok yetersiz. Satılabilir: {lots_left}",
+                                    available=lots_left))
+            continue
+        stock[drug.id] = available - item.quantity
+        sellable[drug.id] = lots_left - item.quantity
+        result = {"client_ref": item.client_ref, "status": "applied"}
+        results.append(result)
+        applied[drug.id].append((item, result))
+        seen[item.client_ref] = result
+
+    # İlaç başına tek tahsis + tek stok hareketi; satışlar tek flush'ta
+    now = datetime.utcnow()
+    sales = []
+    for drug_id, rows in applied.items():
+        drug = drugs[drug_id]
+        total = sum(item.quantity for item, _ in rows)
+        allocations = drug_lots.allocate(db, drug, total)
+        record_movement(db, drug, "sale", -total, f"{total} adet satış (çevrimdışı, {len(rows)} satış)",
+                        created_by=created_by)
+        parts = drug_lots.split(allocations, [item.quantity for item, _ in rows])
+        running = stock[drug_id] + total  # satış olaylarındaki şube stoğu (sırayla düşer)
+        for (item, result), part in zip(rows, parts):
+            running -= item.quantity
+            # Müşteriye satış anındaki fiyat uygulanmıştır; katalog fiyatı sonradan değiştiyse işaretlenir
+            unit_price = float(drug.price) if item.unit_price is None else item.unit_price
+            sales.append((result, drug, running, Sale(
+                drug_id=drug.id,
+                customer_id=item.customer_id if item.customer_id in customers else None,
+                quantity=item.quantity,
+                unit_price=unit_price,
+                total_price=round(unit_price * item.quantity, 2),
+                sale_date=min(item.sold_at or now, now),
+                created_by=created_by,
+                notes=f"{drug_lots.sale_note(part)} | Çevrimdışı satış"
+            )))
+            result["lots"] = drug_lots.describe(part)
+            if abs(unit_price - float(drug.price)) >= 0.005:
+                result["current_price"] = float(drug.price)
+    db.add_all([sale for *_, sale in sales])
+    db.flush()
+
+    for result, drug, running, sale in sales:
+        result["sale_id"] = sale.id
+        emit(db, "sale", sale_event(sale, drug, result["lots"], running, branch_id), branch_id)
+    for result in results:
+        if result["status"] == "duplicate" and result["sale_id"] is None:
+            result["sale_id"] = seen[result["client_ref"]]["sale_id"]
+    db.add_all([SaleClientRef(client_ref=result["client_ref"], branch_id=branch_id, sale_id=sale.id)
+                for result, *_, sale in sales])
+    db.flush()
+
+    return results
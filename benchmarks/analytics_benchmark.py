@@ -0,0 +1,80 @@
+"""
+Satış analitiği: satır satır Python döngüsü vs kolon anlık görüntüsü üzerinde NumPy
+Çalıştırma:
+    python -m benchmarks.analytics_benchmark --rows 1000000
+Veritabanı kullanılmaz; rastgele satış kolonları üretilir. Eski yol ORM
+döngüsünün eşdeğeridir (her satır için dict güncellemesi), yeni yol
+analytics.queries fonksiyonlarıdır.
+"""
+
+import argparse
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from analytics import queries
+from analytics.snapshot import SalesSnapshot
+
+def make_snapshot(rows: int, drugs: int = 400, customers: int = 5000) -> SalesSnapshot:
+    rng = np.random.default_rng(0)
+    now = int(time.time())
+    columns = {
+        "sale_id": np.arange(1, rows + 1, dtype=np.int64),
+        "drug_id": rng.integers(1, drugs + 1, rows),
+        "customer_id": np.where(rng.random(rows) < 0.3, -1, rng.integers(1, customers + 1, rows)),
+        "quantity": rng.integers(1, 4, rows),
+        "revenue": np.round(rng.random(rows) * 100, 2),
+        "ts": now - rng.integers(0, 365 * 86400, rows),
+    }
+    ids = np.arange(1, drugs + 1, dtype=np.int64)
+    dimension = {"id": ids, "name": np.array([f"İlaç {i}" for i in ids], object),
+                 "ingredient": np.array([f"Etken {i % 40}" for i in ids], object),
+                 "price": np.full(drugs, 10.0)}
+    return SalesSnapshot(columns, dimension)
+
+def loop_top_drugs(rows, limit=10):
+    revenue = defaultdict(float)
+    for sale in rows:
+        revenue[sale[0]] += sale[2]
+    return sorted(revenue.items(), key=lambda item: -item[1])[:limit]
+
+def loop_heatmap(rows):
+    cells = [[0] * 24 for _ in range(7)]
+    for sale in rows:
+        ts = sale[3]
+        cells[(ts // 86400 + 3) % 7][(ts // 3600) % 24] += 1
+    return cells
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Satış analitiği ölçümü")
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    snapshot = make_snapshot(args.rows)
+    cols = snapshot.columns
+    # ORM'den gelen satır listesinin eşdeğeri (yükleme süresi ölçüme dahil değil)
+    rows = list(zip(cols["drug_id"].tolist(), cols["quantity"].tolist(),
+                    cols["revenue"].tolist(), cols["ts"].tolist()))
+
+    print(f"Satış={args.rows}")
+    for name, old, new in (
+        ("top-drugs", lambda: loop_top_drugs(rows), lambda: queries.top_drugs(snapshot)),
+        ("heatmap", lambda: loop_heatmap(rows), lambda: queries.hourly_heatmap(snapshot)),
+    ):
+        old_ms, new_ms = timed(old), timed(new)
+        print(f"  {name:<12} döngü={old_ms:8.1f} ms  numpy={new_ms:7.1f} ms  ({old_ms / new_ms:.1f}x)")
+    for name, func in (
+        ("abc", lambda: queries.abc_analysis(snapshot)),
+        ("baskets", lambda: queries.basket_pairs(snapshot)),
+        ("ingredients", lambda: queries.ingredient_summary(snapshot)),
+    ):
+        print(f"  {name:<12} numpy={timed(func):7.1f} ms")
+
+if __name__ == "__main__":
+    main()
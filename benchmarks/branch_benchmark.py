@@ -0,0 +1,136 @@
+"""
+Çok şubeli model ölçümü (varsayılan 100 şube)
+Çalıştırma:
+    python -m benchmarks.branch_benchmark --branches 100 --drugs 2000
+1) Şube kapsamlı sorgu: şube sayısı arttıkça tek şubenin günlük satış sorgusu.
+   branch_id önde index'le (ix_sales_branch_date) yalnızca o şubenin aralığı
+   okunur; index kaldırılınca sale_date index'i tüm şubelerin satışlarını tarar.
+   Ölçüm --db-url veritabanında yapılır (varsayılan bellek içi sqlite).
+2) Transfer önerisi: şube x ilaç satırlarında ilaç başına Python döngüsü vs
+   branches.suggest_transfers (vektörel); sonuçların aynı olduğu doğrulanır.
+"""
+
+import argparse
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+import branches
+from database import Base, Branch, Sale, branch_scope
+
+def timed(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+# ================ ŞUBE KAPSAMLI SORGU ================
+
+def fill_sales(engine, branch_count: int, per_branch: int):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = np.random.default_rng(0)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Branch), [{"id": b, "code": f"S{b:03d}", "name": f"Şube {b}"}
+                                      for b in range(1, branch_count + 1)])
+        for b in range(1, branch_count + 1):
+            ages = rng.integers(0, 30 * 86400, per_branch)
+            conn.execute(insert(Sale), [{
+                "branch_id": b, "drug_id": None, "quantity": 1, "unit_price": 10, "total_price": 10,
+                "sale_date": now - timedelta(seconds=int(age))
+            } for age in ages])
+        conn.execute(text("ANALYZE") if engine.dialect.name == "sqlite" else text("ANALYZE sales"))
+
+def scoped_report(Session, branch_id: int):
+    db = branch_scope(Session(), branch_id)
+    try:
+        since = datetime.utcnow() - timedelta(days=1)
+        return db.query(Sale.id, Sale.total_price).filter(Sale.sale_date >= since).all()
+    finally:
+        db.close()
+
+def bench_scoped(db_url: str, branch_counts: list, per_branch: int):
+    engine = create_engine(db_url)
+    Session = sessionmaker(bind=engine)
+    print(f"Şube kapsamlı günlük satış sorgusu (şube başına {per_branch} satış, 30 gün)")
+    for count in branch_counts:
+        fill_sales(engine, count, per_branch)
+        with_index = timed(lambda: scoped_report(Session, 1))
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_sales_branch_date"))
+            conn.execute(text("DROP INDEX ix_sales_branch_drug_date"))
+        without_index = timed(lambda: scoped_report(Session, 1))
+        print(f"  şube={count:<4} branch_id önde index={with_index:7.2f} ms  "
+              f"yalnızca sale_date index={without_index:7.2f} ms")
+    Base.metadata.drop_all(engine)
+
+# ================ TRANSFER ÖNERİSİ ================
+
+def make_rows(branch_count: int, drug_count: int):
+    rng = np.random.default_rng(1)
+    branch = np.repeat(np.arange(1, branch_count + 1), drug_count)
+    drug = np.tile(np.arange(1, drug_count + 1), branch_count)
+    sold = rng.poisson(rng.gamma(1.0, 20.0, len(branch)))
+    quantity = rng.poisson(sold * rng.uniform(0.05, 1.5, len(branch)))
+    return branch, drug, quantity.astype(np.int64), sold.astype(np.int64)
+
+def loop_transfers(branch, drug, quantity, sold, window_days, min_cover, target_cover):
+    """Eski yol: satır satır ihtiyaç/fazla hesabı, ilaç başına iki işaretçili eşleştirme"""
+    needs, spares = defaultdict(list), defaultdict(list)
+    for b, d, q, s in zip(branch.tolist(), drug.tolist(), quantity.tolist(), sold.tolist()):
+        velocity = s / window_days
+        target = int(np.ceil(velocity * target_cover))
+        if velocity > 0 and q < velocity * min_cover and target > q:
+            needs[d].append((target - q, b))
+        if q > target:
+            spares[d].append((q - target, b))
+    moves = []
+    for d in sorted(needs):
+        need = sorted(needs[d], key=lambda item: -item[0])
+        spare = sorted(spares.get(d, []), key=lambda item: -item[0])
+        i = j = 0
+        while i < len(need) and j < len(spare):
+            amount = min(need[i][0], spare[j][0])
+            moves.append((d, spare[j][1], need[i][1], amount))
+            need[i] = (need[i][0] - amount, need[i][1])
+            spare[j] = (spare[j][0] - amount, spare[j][1])
+            i += need[i][0] == 0
+            j += spare[j][0] == 0
+    return moves
+
+def bench_transfers(branch_count: int, drug_count: int):
+    rows = make_rows(branch_count, drug_count)
+    config = (branches.BRANCH_CONFIG["DEMAND_WINDOW_DAYS"], branches.BRANCH_CONFIG["MIN_COVER_DAYS"],
+              branches.BRANCH_CONFIG["TARGET_COVER_DAYS"])
+    old = loop_transfers(*rows, *config)
+    new = branches.suggest_transfers(*rows, *config)
+    new_moves = list(zip(*(new[k].tolist() for k in ("drug", "source", "target", "quantity"))))
+    assert sorted(old) == sorted(new_moves), "vektörel sonuç döngüyle aynı değil"
+
+    old_ms = timed(lambda: loop_transfers(*rows, *config), repeat=3)
+    new_ms = timed(lambda: branches.suggest_transfers(*rows, *config), repeat=3)
+    print(f"Transfer önerisi ({branch_count} şube x {drug_count} ilaç = {len(rows[0])} satır, "
+          f"{len(new_moves)} transfer, {int(new['quantity'].sum())} adet)")
+    print(f"  döngü={old_ms:8.1f} ms  numpy={new_ms:7.1f} ms  ({old_ms / new_ms:.1f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Çok şubeli model ölçümü")
+    parser.add_argument("--branches", type=int, default=100)
+    parser.add_argument("--drugs", type=int, default=2000)
+    parser.add_argument("--sales-per-branch", type=int, default=2000)
+    parser.add_argument("--db-url", default="sqlite://")
+    args = parser.parse_args()
+
+    counts = sorted({c for c in (1, 10, args.branches // 2, args.branches) if c >= 1})
+    bench_scoped(args.db_url, counts, args.sales_per_branch)
+    bench_transfers(args.branches, args.drugs)
+
+if __name__ == "__main__":
+    main()
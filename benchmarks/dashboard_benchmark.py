@@ -0,0 +1,81 @@
+"""
+Flask paneli (GET /) render CPU'su: parça önbelleği kapalı vs açık
+Çalıştırma:
+    python -m benchmarks.dashboard_benchmark --drugs 200 --customers 50 --repeat 50
+Backend çağrılmaz: panel verisi bellekteki bir istemciden gelir, böylece yalnızca
+Flask tarafındaki şablon/render maliyeti (process CPU süresi) ölçülür.
+"""
+
+import argparse
+import statistics
+import time
+
+import client
+
+class InMemoryBackend:
+    """PharmacyClient'ın panelde kullanılan metotları (sabit veri)"""
+
+    def __init__(self, drug_count: int, customer_count: int):
+        self.drugs = [{"id": i, "name": f"İlaç {i}", "active_ingredient": "Parasetamol",
+                       "price": 12.5, "stock_quantity": i % 40, "low_stock_threshold": 10,
+                       "description": None} for i in range(1, drug_count + 1)]
+        self.customers = [{"id": i, "name": f"Müşteri {i}", "tc_no": f"{10**10 + i}",
+                           "phone": "05551234567", "email": None} for i in range(1, customer_count + 1)]
+
+    def data_version(self):
+        return {"version": "sabit"}
+
+    def list_drugs(self):
+        return self.drugs
+
+    def list_customers(self):
+        return self.customers
+
+    def daily_report(self):
+        return {"date": "2026-01-01", "total_sales_count": 0, "total_revenue": 0, "details": []}
+
+    def low_stock_drugs(self):
+        return [d for d in self.drugs if d["stock_quantity"] <= d["low_stock_threshold"]]
+
+    def critical_stock_drugs(self):
+        return [d for d in self.drugs if d["stock_quantity"] <= 5]
+
+    def stock_status(self):
+        return {"total_stock_value": sum(d["price"] * d["stock_quantity"] for d in self.drugs),
+                "low_stock_count": 0, "critical_stock_count": 0}
+
+def bench(test_client, repeat: int) -> float:
+    """Medyan CPU süresi (ms)"""
+    test_client.get("/")  # ısınma (önbellek açıksa doldurur)
+    samples = []
+    for _ in range(repeat):
+        start = time.process_time()
+        test_client.get("/")
+        samples.append(time.process_time() - start)
+    return statistics.median(samples) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Panel render CPU ölçümü")
+    parser.add_argument("--drugs", type=int, default=200)
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    fake = InMemoryBackend(args.drugs, args.customers)
+    client.backend = lambda: fake
+    test_client = client.app.test_client()
+    with test_client.session_transaction() as session:
+        session["token"] = "benchmark"
+        session["role"] = "Yönetici"
+
+    print(f"İlaç={args.drugs}, müşteri={args.customers}, tekrar={args.repeat} (istek başına CPU, medyan)")
+    results = {}
+    for enabled in (False, True):
+        client.fragment_cache.enabled = enabled
+        client.fragment_cache.set_version(None)
+        results[enabled] = bench(test_client, args.repeat)
+        print(f"  parça önbelleği {'AÇIK ' if enabled else 'KAPALI'}: {results[enabled]:8.2f} ms")
+    print(f"  kazanç: {results[False] / results[True]:.1f}x")
+
+if __name__ == "__main__":
+    main()
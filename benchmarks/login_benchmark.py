@@ -0,0 +1,127 @@
+"""
+Giriş (login) verim ölçümü
+Çalıştırma:
+    python -m benchmarks.login_benchmark                 # yerel: seri vs süreç havuzu
+    python -m benchmarks.login_benchmark --url http://localhost:8001 --username yonetici --password admin123
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from auth.passwords import (
+    hash_password, verify_password, PasswordVerifier, VerificationCache
+)
+
+def bench_serial(password_hash: str, count: int) -> float:
+    """Event loop'ta doğrudan (bloklayarak) doğrulama"""
+    start = time.perf_counter()
+    for _ in range(count):
+        verify_password("admin123", password_hash)
+    return count / (time.perf_counter() - start)
+
+async def _loop_lag_probe(stop: asyncio.Event, samples: list):
+    """Event loop'un ne kadar geciktiğini ölç (10 ms'lik tıklar)"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append(time.perf_counter() - start - 0.01)
+
+async def bench_pool(password_hash: str, count: int, concurrency: int,
+                     workers: int, cache: bool) -> dict:
+    verifier = PasswordVerifier(
+        workers=workers,
+        max_pending=concurrency,
+        cache=VerificationCache(300, 1024) if cache else None,
+    )
+    stop = asyncio.Event()
+    lag = []
+    probe = asyncio.create_task(_loop_lag_probe(stop, lag))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await verifier.verify("yonetici", "admin123", password_hash)
+
+    # Havuzu ısıt (süreç başlatma maliyeti ölçüme girmesin)
+    await asyncio.gather(*[verifier.verify("x", "y", password_hash) for _ in range(workers)])
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(count)])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    verifier.shutdown()
+    return {
+        "per_sec": count / elapsed,
+        "max_lag_ms": max(lag, default=0) * 1000,
+        "p50_lag_ms": statistics.median(lag) * 1000 if lag else 0,
+    }
+
+def bench_http(url: str, username: str, password: str, count: int, concurrency: int) -> dict:
+    """Çalışan auth sunucusuna eşzamanlı /login istekleri gönder"""
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    latencies, failures = [], 0
+
+    def one(_):
+        start = time.perf_counter()
+        resp = session.post(f"{url}/login", json={"username": username, "password": password}, timeout=30)
+        return resp.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for code, latency in pool.map(one, range(count)):
+            latencies.append(latency)
+            if code != 200:
+                failures += 1
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "per_sec": count / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "failures": failures,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Login verim ölçümü")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt maliyeti")
+    parser.add_argument("--workers", type=int, default=4, help="süreç havuzu boyutu")
+    parser.add_argument("--url", help="Ölçülecek auth sunucusu (verilirse HTTP modu)")
+    parser.add_argument("--username", default="yonetici")
+    parser.add_argument("--password", default="admin123")
+    args = parser.parse_args()
+
+    if args.url:
+        result = bench_http(args.url, args.username, args.password, args.count, args.concurrency)
+        print(f"🔐 HTTP /login: {result['per_sec']:.1f} giriş/sn  "
+              f"p50={result['p50_ms']:.1f} ms  p99={result['p99_ms']:.1f} ms  "
+              f"hatalı={result['failures']}")
+        return
+
+    password_hash = hash_password("admin123", rounds=args.rounds)
+    print(f"bcrypt maliyeti={args.rounds}, istek={args.count}, eşzamanlı={args.concurrency}")
+
+    serial = bench_serial(password_hash, max(1, args.count // 10))
+    print(f"  Seri (event loop'ta)         : {serial:8.1f} doğrulama/sn")
+
+    pooled = asyncio.run(bench_pool(password_hash, args.count, args.concurrency, args.workers, cache=False))
+    print(f"  Süreç havuzu ({args.workers} işçi)      : {pooled['per_sec']:8.1f} doğrulama/sn  "
+          f"loop gecikmesi p50={pooled['p50_lag_ms']:.1f} ms max={pooled['max_lag_ms']:.1f} ms")
+
+    cached = asyncio.run(bench_pool(password_hash, args.count, args.concurrency, args.workers, cache=True))
+    print(f"  Havuz + doğrulama önbelleği: {cached['per_sec']:8.1f} doğrulama/sn  "
+          f"loop gecikmesi max={cached['max_lag_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    main()
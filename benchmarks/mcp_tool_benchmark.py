@@ -0,0 +1,70 @@
+"""
+MCP sunucusu eşzamanlı tool çağrısı verim ölçümü (stdio üzerinden)
+Çalıştırma:
+    python -m benchmarks.mcp_tool_benchmark --tool check_stock --args '{"drug_id": 1}' --count 200 --concurrency 20
+Sunucu mcp_server.py alt süreç olarak başlatılır; DATABASE_URL ortamdan aktarılır.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+async def run(tool: str, arguments: dict, count: int, concurrency: int) -> dict:
+    server = StdioServerParameters(
+        command=sys.executable,
+        args=[os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mcp_server.py")],
+        env=dict(os.environ),
+    )
+    latencies, errors = [], 0
+    async with stdio_client(server) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            # Isınma: ilk bağlantı/havuz açılışı ölçüme girmesin
+            await session.call_tool(tool, arguments)
+
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one():
+                nonlocal errors
+                async with semaphore:
+                    start = time.perf_counter()
+                    result = await session.call_tool(tool, arguments)
+                    latencies.append(time.perf_counter() - start)
+                    if result.isError:
+                        errors += 1
+
+            start = time.perf_counter()
+            await asyncio.gather(*[one() for _ in range(count)])
+            elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "per_sec": count / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000,
+        "errors": errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP tool çağrısı verim ölçümü")
+    parser.add_argument("--tool", default="check_stock")
+    parser.add_argument("--args", default='{"drug_id": 1}', help="Tool argümanları (JSON)")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    arguments = json.loads(args.args)
+    print(f"Tool: {args.tool} {arguments}, çağrı={args.count}")
+    for concurrency in args.concurrency:
+        result = asyncio.run(run(args.tool, arguments, args.count, concurrency))
+        print(f"  eşzamanlı={concurrency:<4} {result['per_sec']:8.1f} çağrı/sn  "
+              f"p50={result['p50_ms']:.1f} ms  p99={result['p99_ms']:.1f} ms  hatalı={result['errors']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Çevrimdışı kasa kuyruğunun boşaltılma süresi (bir günlük satış)
+Çalıştırma:
+    python -m benchmarks.offline_sync_benchmark --count 2000 --drugs 5
+Backend ayrı bir uvicorn alt süreci olarak başlatılır (DATABASE_URL ortamdan).
+Ölçülen ilaçlar önce yeterli stokla beslenir; ardından iki ayrı yerel kuyruk
+--count satışla doldurulur ve backend'e oynatılır:
+1) satış başına bir istek (batch_size=1: eski POST /sales yolunun maliyeti)
+2) POST /sales/batch partileri (varsayılan CLIENT_OFFLINE_BATCH_SIZE)
+Yerel kuyruğa yazma (synchronous=FULL) süresi de raporlanır.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from api_client.sync_client import PharmacyClient
+from benchmarks.sales_benchmark import start_backend
+from offline_queue import OFFLINE_CONFIG, OfflineStore, replay
+
+def fill_queue(store: OfflineStore, drugs: list, count: int) -> float:
+    """Kuyruğa count satış yaz (ilaçlar sırayla); satış başına ms"""
+    store.save_catalog("drugs", drugs)
+    start = time.perf_counter()
+    for i in range(count):
+        store.enqueue_sale(drugs[i % len(drugs)]["id"])
+    return (time.perf_counter() - start) * 1000 / count
+
+def drain(store: OfflineStore, client: PharmacyClient, batch_size: int) -> dict:
+    start = time.perf_counter()
+    result = replay(store, client, batch_size=batch_size)
+    return {**result, "seconds": time.perf_counter() - start}
+
+def main():
+    parser = argparse.ArgumentParser(description="Çevrimdışı kuyruk boşaltma ölçümü")
+    parser.add_argument("--count", type=int, default=2000, help="kuyruktaki satış (bir gün)")
+    parser.add_argument("--drugs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=OFFLINE_CONFIG["BATCH_SIZE"])
+    parser.add_argument("--port", type=int, default=8791)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = start_backend(args.port, False, os.path.join(tmp, "wal"))
+        try:
+            client = PharmacyClient(f"http://127.0.0.1:{args.port}")
+            drugs = client.list_drugs()[:args.drugs]
+            # Her iki ölçüm için yeterli stok (satışlar çakışmaya düşmesin)
+            per_drug = 2 * (args.count // len(drugs) + 1) + 10
+            for drug in drugs:
+                client.order_stock(drug["id"], quantity=per_drug)
+            drugs = [d for d in client.list_drugs() if d["id"] in {x["id"] for x in drugs}]
+
+            print(f"Çevrimdışı kuyruk: {args.count} satış, {len(drugs)} ilaç")
+            for label, batch_size in (("satış başına istek", 1), (f"parti ({args.batch_size})", args.batch_size)):
+                store = OfflineStore(os.path.join(tmp, f"queue-{batch_size}.db"))
+                enqueue_ms = fill_queue(store, drugs, args.count)
+                result = drain(store, client, batch_size)
+                print(f"  {label:<22} kuyruğa yazma={enqueue_ms:5.2f} ms/satış  "
+                      f"boşaltma={result['seconds']:7.2f} sn ({args.count / result['seconds']:7.0f} satış/sn)  "
+                      f"yazılan={result['applied']} çakışma={result['conflict']} kalan={result['pending']}")
+                store.close()
+        finally:
+            proc.terminate()
+            proc.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Outbox relay verimi (olay/sn)
+Çalıştırma:
+    python -m benchmarks.outbox_benchmark --events 20000 --drugs 200
+Ölçüm --db-url veritabanında yapılır (varsayılan geçici sqlite dosyası).
+Outbox --events satış olayıyla doldurulur ve relay tüm abonelerle (canlı akış,
+uyarılar, günlük özet, İTS kuyruğu) boşaltılır:
+1) olay başına bir relay turu (batch_size=1: her olay kendi transaction'ı)
+2) OUTBOX_BATCH_SIZE'lık partiler (tek SELECT + abone başına tek yazı + tek DELETE)
+Sonunda özet tablosunun toplamları ve İTS kuyruğu olay sayısıyla doğrulanır.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, Branch, ItsNotification, OutboxEvent, SalesDaily
+from events import EventBus
+from its.gateway import ItsGateway
+from its.transport import LocalTransport
+from outbox.config import OUTBOX_CONFIG
+from outbox.relay import OutboxRelay
+from outbox.subscribers import ItsNotifications, LiveStream, SalesRollup, StockAlerts
+
+def fill_outbox(engine, count: int, drug_count: int, first_sale_id: int):
+    rng = np.random.default_rng(0)
+    drugs = rng.integers(1, drug_count + 1, count)
+    quantities = rng.integers(1, 4, count)
+    now = datetime.utcnow()
+    stock = {}
+    rows = []
+    for i, (drug_id, quantity) in enumerate(zip(drugs.tolist(), quantities.tolist())):
+        stock[drug_id] = stock.get(drug_id, 10000) - quantity
+        rows.append({"topic": "sale", "branch_id": 1, "created_at": now, "attempts": 0, "payload": {
+            "sale_id": first_sale_id + i, "sale_date": now.isoformat(), "drug_id": drug_id,
+            "drug_name": f"İlaç {drug_id}", "barcode": None, "quantity": quantity,
+            "total_price": 10.0 * quantity, "lots": [],
+            "stock": {"id": drug_id, "name": f"İlaç {drug_id}", "stock": stock[drug_id],
+                      "threshold": 10, "level": "normal", "branch_id": 1}}})
+    with engine.begin() as conn:
+        conn.execute(insert(OutboxEvent), rows)
+    return int(quantities.sum())
+
+def make_relay(Session, batch_size: int) -> OutboxRelay:
+    bus = EventBus(history_size=1000, queue_size=256, heartbeat=15)
+    relay = OutboxRelay(session_factory=Session, batch_size=batch_size)
+    relay.subscribe(LiveStream(bus))
+    relay.subscribe(StockAlerts(bus, session_factory=Session))
+    relay.subscribe(SalesRollup())
+    relay.subscribe(ItsNotifications(ItsGateway(session_factory=Session, transport=LocalTransport())))
+    return relay
+
+def main():
+    parser = argparse.ArgumentParser(description="Outbox relay verimi")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--drugs", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=OUTBOX_CONFIG["BATCH_SIZE"])
+    parser.add_argument("--single-events", type=int, default=2000,
+                        help="olay başına tur ölçümünde kullanılan olay (yavaş)")
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.db_url or f"sqlite:///{os.path.join(tmp, 'outbox.db')}")
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(Branch), [{"id": 1, "code": "MERKEZ", "name": "Merkez"}])
+        Session = sessionmaker(bind=engine)
+
+        print(f"Outbox relay: {args.drugs} ilaç, abone: canlı akış, uyarı, özet, İTS")
+        sale_id, expected = 1, 0
+        for label, batch_size, count in (("olay başına tur", 1, args.single_events),
+                                         (f"parti ({args.batch_size})", args.batch_size, args.events)):
+            expected += fill_outbox(engine, count, args.drugs, sale_id)
+            sale_id += count
+            relay = make_relay(Session, batch_size)
+            start = time.perf_counter()
+            relayed = relay.drain()
+            seconds = time.perf_counter() - start
+            print(f"  {label:<20} {relayed:6d} olay  {seconds:7.2f} sn  ({relayed / seconds:8.0f} olay/sn)")
+
+        with Session() as db:
+            quantity = db.query(func.sum(SalesDaily.quantity)).scalar()
+            notifications = db.query(func.count(ItsNotification.id)).scalar()
+            left = db.query(func.count(OutboxEvent.id)).scalar()
+        assert quantity == expected and notifications == sale_id - 1 and left == 0, \
+            f"özet={quantity}/{expected} İTS={notifications}/{sale_id - 1} kalan={left}"
+        print(f"  doğrulandı: özet adedi={quantity}, İTS bildirimi={notifications}, outbox boş")
+        Base.metadata.drop_all(engine)
+
+if __name__ == "__main__":
+    main()
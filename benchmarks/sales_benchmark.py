@@ -0,0 +1,96 @@
+"""
+Satış (POST /sales) verim ölçümü: yazma-arkası uyarı tamponu açık ve kapalı
+Çalıştırma:
+    python -m benchmarks.sales_benchmark --count 500 --concurrency 1 10 50
+Her mod için backend ayrı bir uvicorn alt süreci olarak başlatılır
+(WRITE_BEHIND_ENABLED=true/false); DATABASE_URL ortamdan aktarılır.
+Ölçülen ilaç önce yeterli stokla beslenir (POST /order_stock); eşiği ölçüm
+boyunca yükseltilir ki her satış bir stok uyarısı üretsin (tamponun yolu).
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def start_backend(port: int, write_behind: bool, wal_dir: str) -> subprocess.Popen:
+    env = dict(os.environ, WRITE_BEHIND_ENABLED=str(write_behind).lower(),
+               WRITE_BEHIND_WAL_DIR=wal_dir, PYTHONPATH=ROOT)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "eczane_otomasyonu:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code < 500:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.3)
+    proc.terminate()
+    raise RuntimeError("Backend 30 sn içinde açılmadı")
+
+async def run(base_url: str, drug_id: int, count: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await client.post("/order_stock", json={"drug_id": drug_id, "quantity": count + 10})
+        threshold = (await client.get(f"/drugs/{drug_id}")).json()["low_stock_threshold"]
+        await client.put(f"/drugs/{drug_id}/threshold", params={"threshold": 10 ** 9})
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                resp = await client.post("/sales", json={"drug_id": drug_id, "quantity": 1})
+                latencies.append(time.perf_counter() - start)
+                if resp.status_code != 201:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[one() for _ in range(count)])
+        elapsed = time.perf_counter() - start
+        await client.put(f"/drugs/{drug_id}/threshold", params={"threshold": threshold})
+
+    latencies.sort()
+    return {
+        "per_sec": count / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000,
+        "errors": errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Satış verim ölçümü (yazma-arkası tampon açık/kapalı)")
+    parser.add_argument("--drug-id", type=int, default=1)
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+
+    print(f"Satış: ilaç={args.drug_id}, istek={args.count}")
+    for write_behind in (False, True):
+        with tempfile.TemporaryDirectory() as wal_dir:
+            proc = start_backend(args.port, write_behind, wal_dir)
+            try:
+                print(f" yazma-arkası tampon: {'AÇIK' if write_behind else 'KAPALI'}")
+                for concurrency in args.concurrency:
+                    result = asyncio.run(run(f"http://127.0.0.1:{args.port}", args.drug_id,
+                                             args.count, concurrency))
+                    print(f"  eşzamanlı={concurrency:<4} {result['per_sec']:8.1f} satış/sn  "
+                          f"p50={result['p50_ms']:.1f} ms  p99={result['p99_ms']:.1f} ms  "
+                          f"hatalı={result['errors']}")
+            finally:
+                proc.terminate()
+                proc.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Yanıt serileştirme maliyeti (10k satır başına): eski yol vs önceden derlenmiş TypeAdapter
+Çalıştırma:
+    python -m benchmarks.serialization_benchmark --rows 10000 --repeat 20
+Eski yol: dict listesi kur → jsonable_encoder → json.dumps (FastAPI JSONResponse).
+Yeni yol: satırlar → TypeAdapter.validate_python(from_attributes) → dump_json.
+Veritabanı kullanılmaz; satırlar kolon projeksiyonu (Row) benzeri nesnelerdir.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from responses import CUSTOMER_LIST, DRUG_LIST, CustomerResponse, DrugResponse
+
+DrugRow = namedtuple("DrugRow", list(DrugResponse.model_fields))
+CustomerRow = namedtuple("CustomerRow", list(CustomerResponse.model_fields))
+
+def make_rows(count: int):
+    drugs = [DrugRow(i, f"İlaç {i}", "Parasetamol", 12.5 + i % 100, i % 300, 10,
+                     "Ağrı kesici" if i % 2 else None) for i in range(count)]
+    now = datetime.utcnow()
+    customers = [CustomerRow(i, f"Müşteri {i}", f"{10**10 + i}", "05551234567",
+                             None, now) for i in range(count)]
+    return drugs, customers
+
+def old_drugs(rows) -> bytes:
+    content = [{
+        "id": d.id,
+        "name": d.name,
+        "active_ingredient": d.active_ingredient,
+        "price": float(d.price),
+        "stock_quantity": d.stock_quantity,
+        "low_stock_threshold": d.low_stock_threshold,
+        "description": d.description
+    } for d in rows]
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+def old_customers(rows) -> bytes:
+    content = [{
+        "id": c.id,
+        "name": c.name,
+        "tc_no": c.tc_no,
+        "phone": c.phone,
+        "email": c.email,
+        "created_at": c.created_at.isoformat() if c.created_at else None
+    } for c in rows]
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+def new_path(adapter):
+    return lambda rows: adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+def bench(func, rows, repeat: int) -> float:
+    """Medyan süre (ms)"""
+    func(rows)  # ısınma
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Yanıt serileştirme maliyeti")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    drugs, customers = make_rows(args.rows)
+    per_10k = 10000 / args.rows
+    print(f"Satır={args.rows}, tekrar={args.repeat} (süreler 10k satır başına, medyan)")
+    for name, rows, old, new in (
+        ("/drugs", drugs, old_drugs, new_path(DRUG_LIST)),
+        ("/customers", customers, old_customers, new_path(CUSTOMER_LIST)),
+    ):
+        old_ms = bench(old, rows, args.repeat) * per_10k
+        new_ms = bench(new, rows, args.repeat) * per_10k
+        print(f"  {name:<12} önce={old_ms:8.1f} ms  sonra={new_ms:7.1f} ms  ({old_ms / new_ms:.1f}x)")
+
+if __name__ == "__main__":
+    main()
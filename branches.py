@@ -0,0 +1,233 @@
+# branches.py
+"""
+Şubeler ve şubeler arası stok transferi
+Şube stoğu branch_stock tablosundadır (database.BranchStock). Transfer önerisi
+zincir genelinde iki toplama sorgusuyla beslenir (şube x ilaç stoğu ve son
+DEMAND_WINDOW_DAYS günün satışları) ve tamamen vektörel hesaplanır:
+- Satış hızı = pencere satışı / gün. Stoğu MIN_COVER_DAYS günden az yetecek şube
+  eksiktir ve TARGET_COVER_DAYS güne tamamlanmak ister; diğer şubeler kendi
+  TARGET_COVER_DAYS ihtiyacının üstündeki stoğu verebilir.
+- Her ilaçta en büyük eksik en büyük fazlayla eşlenir. Eşleştirme döngüsüz
+  yapılır: eksik ve fazla miktarların ilaç içi kümülatif toplamları tek bir
+  sıralı eksende birleştirilir, her aralık bir (alan şube, veren şube, miktar)
+  transferidir. Maliyet O(N log N), N = şube x ilaç satır sayısı.
+Transferin kendisi iki stok hareketidir (kaynakta transfer_out, hedefte
+transfer_in); partiler FEFO ile kaynaktan düşülüp aynı lot/miatla hedefe girer.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+import drug_lots
+from database import Branch, BranchStock, Drug, SessionLocal, as_branch
+from stock_ledger import record_movement
+
+BRANCH_CONFIG = {
+    # Satış hızı bu kadar günlük satıştan hesaplanır
+    "DEMAND_WINDOW_DAYS": int(os.environ.get("BRANCH_DEMAND_WINDOW_DAYS", 30)),
+    # Stoğu bu kadar günden az yetecek şube eksik sayılır
+    "MIN_COVER_DAYS": float(os.environ.get("BRANCH_MIN_COVER_DAYS", 7)),
+    # Eksik şube bu kadar güne tamamlanır; veren şube bu kadarını elinde tutar
+    "TARGET_COVER_DAYS": float(os.environ.get("BRANCH_TARGET_COVER_DAYS", 21)),
+    # Bilinmeyen şube id'si gelince şube listesi en fazla bu sıklıkla yeniden okunur
+    "REGISTRY_RELOAD_SECONDS": float(os.environ.get("BRANCH_REGISTRY_RELOAD_SECONDS", 1)),
+}
+
+STOCK_SQL = text("SELECT branch_id, drug_id, quantity FROM branch_stock")
+STOCK_BY_DRUG_SQL = text("SELECT branch_id, drug_id, quantity FROM branch_stock WHERE drug_id = :drug_id")
+DEMAND_SQL = text("""
+    SELECT branch_id, drug_id, SUM(quantity) FROM sales
+    WHERE sale_date >= :since AND drug_id IS NOT NULL
+    GROUP BY branch_id, drug_id
+""")
+DEMAND_BY_DRUG_SQL = text("""
+    SELECT branch_id, drug_id, SUM(quantity) FROM sales
+    WHERE sale_date >= :since AND drug_id = :drug_id
+    GROUP BY branch_id, drug_id
+""")
+
+# ================ ŞUBE KAYDI ================
+
+class BranchRegistry:
+    """Geçerli şube id'leri (istek başına veritabanına gitmemek için bellekte)"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._ids = frozenset()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def reload(self):
+        db = self.session_factory()
+        try:
+            self._ids = frozenset(r[0] for r in db.query(Branch.id).filter(Branch.is_active).all())
+        finally:
+            db.close()
+        self._loaded_at = time.monotonic()
+
+    def exists(self, branch_id: int) -> bool:
+        if branch_id in self._ids:
+            return True
+        with self._lock:
+            if time.monotonic() - self._loaded_at >= BRANCH_CONFIG["REGISTRY_RELOAD_SECONDS"]:
+                self.reload()
+        return branch_id in self._ids
+
+branch_registry = BranchRegistry()
+
+# ================ ŞUBE STOĞU SORGULARI ================
+
+def branch_stock_column():
+    """İlacın session şubesindeki stoğu (branch_stock satırı yoksa 0)"""
+    return func.coalesce(BranchStock.quantity, 0)
+
+def branch_drugs(db: Session, model):
+    """Yanıt modelinin kolonları; stock_quantity session'ın şubesindeki stoktur
+    (BranchStock outer join'inin ON koşuluna şube kapsamı otomatik eklenir;
+    join'i ix_branch_stock_levels yalnızca index'ten karşılar)"""
+    return db.query(*(branch_stock_column().label("stock_quantity") if field == "stock_quantity"
+                      else getattr(Drug, field) for field in model.model_fields))\
+             .outerjoin(BranchStock, BranchStock.drug_id == Drug.id)
+
+def stock_below(db: Session, model, level: Optional[int] = None):
+    """Şube stoğu ilacın eşiğinde/altında (level verilirse o sabitte/altında) olan ilaçlar"""
+    return branch_drugs(db, model).filter(
+        branch_stock_column() <= (Drug.low_stock_threshold if level is None else level))
+
+# ================ TRANSFER ÖNERİSİ ================
+
+def _group_cumsum(groups: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """groups'a göre sıralı dizide grup içi kümülatif toplam"""
+    total = np.cumsum(values)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    offsets = np.repeat(total[starts] - values[starts], np.diff(np.r_[starts, len(values)]))
+    return total - offsets
+
+def suggest_transfers(branch: np.ndarray, drug: np.ndarray, quantity: np.ndarray, sold: np.ndarray,
+                      window_days: Optional[int] = None, min_cover: Optional[float] = None,
+                      target_cover: Optional[float] = None) -> dict:
+    """Şube x ilaç satırlarından transfer önerileri (kolonlar: drug, source, target, quantity)"""
+    window_days = window_days or BRANCH_CONFIG["DEMAND_WINDOW_DAYS"]
+    min_cover = BRANCH_CONFIG["MIN_COVER_DAYS"] if min_cover is None else min_cover
+    target_cover = BRANCH_CONFIG["TARGET_COVER_DAYS"] if target_cover is None else target_cover
+
+    velocity = sold / window_days
+    target = np.ceil(velocity * target_cover).astype(np.int64)
+    short = (velocity > 0) & (quantity < velocity * min_cover)
+    need = np.where(short, np.maximum(target - quantity, 0), 0)
+    spare = np.maximum(quantity - target, 0)
+
+    # Eksikler ve fazlalar: ilaç önde, miktar büyükten küçüğe
+    d_idx = np.flatnonzero(need > 0)
+    d_idx = d_idx[np.lexsort((-need[d_idx], drug[d_idx]))]
+    s_idx = np.flatnonzero(spare > 0)
+    s_idx = s_idx[np.lexsort((-spare[s_idx], drug[s_idx]))]
+
+    # Yalnızca hem eksiği hem fazlası olan ilaçlar; ilaç başına aktarılabilir toplam
+    drugs = np.intersect1d(drug[d_idx], drug[s_idx])
+    d_idx = d_idx[np.isin(drug[d_idx], drugs)]
+    s_idx = s_idx[np.isin(drug[s_idx], drugs)]
+    empty = {"drug": np.empty(0, np.int64), "source": np.empty(0, np.int64),
+             "target": np.empty(0, np.int64), "quantity": np.empty(0, np.int64)}
+    if not len(drugs):
+        return empty
+
+    d_rank = np.searchsorted(drugs, drug[d_idx])
+    s_rank = np.searchsorted(drugs, drug[s_idx])
+    d_cum = _group_cumsum(d_rank, need[d_idx])
+    s_cum = _group_cumsum(s_rank, spare[s_idx])
+    limit = np.minimum(np.bincount(d_rank, need[d_idx]), np.bincount(s_rank, spare[s_idx])).astype(np.int64)
+
+    # Tek eksen: ilaç sırası * M + ilaç içi kümülatif miktar
+    scale = np.int64(max(int(d_cum.max()), int(s_cum.max())) + 1)
+    d_key = d_rank * scale + d_cum
+    s_key = s_rank * scale + s_cum
+    points = np.union1d(d_key[d_cum <= limit[d_rank]], s_key[s_cum <= limit[s_rank]])
+    point_rank = points // scale
+    previous = np.r_[np.int64(-1), points[:-1]]
+    start = np.where(np.r_[True, point_rank[1:] != point_rank[:-1]], point_rank * scale, previous)
+    amount = points - start
+
+    # Her aralık, kümülatif toplamı onu kapsayan ilk eksik/fazla satırına düşer
+    to_row = d_idx[np.searchsorted(d_key, points)]
+    from_row = s_idx[np.searchsorted(s_key, points)]
+    keep = amount > 0
+    return {"drug": drug[to_row][keep], "source": branch[from_row][keep],
+            "target": branch[to_row][keep], "quantity": amount[keep]}
+
+def load_inputs(db: Session, drug_id: Optional[int] = None, window_days: Optional[int] = None) -> tuple:
+    """Zincir geneli şube stoğu + pencere satışları (branch, drug, quantity, sold dizileri)"""
+    since = datetime.utcnow() - timedelta(days=window_days or BRANCH_CONFIG["DEMAND_WINDOW_DAYS"])
+    if drug_id is None:
+        stock = db.execute(STOCK_SQL).all()
+        demand = db.execute(DEMAND_SQL, {"since": since}).all()
+    else:
+        stock = db.execute(STOCK_BY_DRUG_SQL, {"drug_id": drug_id}).all()
+        demand = db.execute(DEMAND_BY_DRUG_SQL, {"since": since, "drug_id": drug_id}).all()
+
+    # Satışı olup stok satırı olmayan şube-ilaç çiftleri 0 stokla eklenir
+    keys = {(b, d): i for i, (b, d, _) in enumerate(stock)}
+    rows = [list(r) + [0] for r in stock]
+    for b, d, sold in demand:
+        if (b, d) in keys:
+            rows[keys[(b, d)]][3] = int(sold or 0)
+        else:
+            rows.append([b, d, 0, int(sold or 0)])
+    if not rows:
+        return tuple(np.empty(0, np.int64) for _ in range(4))
+    columns = np.array(rows, dtype=np.int64).T
+    return columns[0], columns[1], columns[2], columns[3]
+
+def transfer_suggestions(db: Session, drug_id: Optional[int] = None, limit: int = 100) -> list:
+    """En büyük transferler önce; ilaç ve şube adlarıyla"""
+    branch, drug, quantity, sold = load_inputs(db, drug_id)
+    moves = suggest_transfers(branch, drug, quantity, sold)
+    order = np.argsort(-moves["quantity"], kind="stable")[:limit]
+    if not len(order):
+        return []
+
+    drug_ids = sorted({int(v) for v in moves["drug"][order]})
+    names = dict(db.query(Drug.id, Drug.name).filter(Drug.id.in_(drug_ids)).all())
+    codes = dict(db.query(Branch.id, Branch.code).all())
+    stock = {(int(b), int(d)): int(q) for b, d, q in zip(branch, drug, quantity)}
+    return [{
+        "drug_id": d,
+        "drug_name": names.get(d, "Silinmiş İlaç"),
+        "from_branch_id": s,
+        "from_branch": codes.get(s),
+        "from_stock": stock.get((s, d), 0),
+        "to_branch_id": t,
+        "to_branch": codes.get(t),
+        "to_stock": stock.get((t, d), 0),
+        "quantity": q
+    } for d, s, t, q in zip(*(moves[k][order].tolist() for k in ("drug", "source", "target", "quantity")))]
+
+# ================ TRANSFER ================
+
+def transfer(db: Session, drug: Drug, source_id: int, target_id: int, quantity: int) -> list:
+    """Stoğu şubeler arasında taşı (commit etmez); taşınan partiler
+
+    Kilit sırası diğer stok yazılarıyla aynıdır: önce branch_stock satırları
+    (şube id sırasıyla), sonra drugs, en son partiler.
+    """
+    db.query(BranchStock).filter(BranchStock.drug_id == drug.id,
+                                 BranchStock.branch_id.in_([source_id, target_id]))\
+      .order_by(BranchStock.branch_id).with_for_update()\
+      .execution_options(all_branches=True).all()
+
+    with as_branch(db, source_id):
+        record_movement(db, drug, "transfer_out", -quantity, f"Şube #{target_id}'e transfer")
+        allocations = drug_lots.allocate(db, drug, quantity)
+        moved = drug_lots.describe(allocations)
+    with as_branch(db, target_id):
+        record_movement(db, drug, "transfer_in", quantity, f"Şube #{source_id}'den transfer")
+        for lot, taken in allocations:
+            drug_lots.receive(db, drug, taken, lot.lot_number, lot.expiry_date)
+    return moved
@@ -1,12 +1,67 @@
-from flask import Flask, request, redirect, url_for, session, flash, render_template_string, jsonify
-import requests
+from flask import Flask, Response, request, redirect, url_for, session, flash, render_template, jsonify
+import hashlib
 import os
+import requests
 from datetime import datetime
+from functools import cached_property, lru_cache
+from jinja2 import DictLoader
+from jinja2.utils import htmlsafe_json_dumps
+
+from api_client.sync_client import PharmacyClient
+from api_client.errors import ApiError, ApiConnectionError
+from api_client.retry import RetryPolicy
+from mcp_cache import ResultCache
+from offline_queue import OFFLINE_CONFIG, OfflineStore, SyncWorker
 
 app = Flask(__name__)
 app.secret_key = "cok-gizli-anahtar"
 API_URL = os.environ.get("API_URL", "http://localhost:8000")
 
+# Tüm istekler aynı bağlantı havuzunu paylaşır
+api = PharmacyClient(API_URL)
+
+# Çevrimdışı kasa: yerel satış kuyruğu ve katalog kopyası; senkron istemcisi
+# tekrar denemez (bağlantı yoksa yoklama hemen başarısız olur)
+offline_store = OfflineStore() if OFFLINE_CONFIG["ENABLED"] else None
+sync_worker = SyncWorker(offline_store, PharmacyClient(API_URL, session=api.session,
+                                                       retry=RetryPolicy(max_retries=0))) if offline_store else None
+
+def backend():
+    """Oturumdaki token ile backend istemcisi"""
+    return api.with_token(session.get("token"))
+
+def fetch_or(default, func, *args):
+    """Backend hata dönerse varsayılanı kullan (bağlantı hatası yukarı çıkar)"""
+    try:
+        return func(*args)
+    except ApiConnectionError:
+        raise
+    except ApiError:
+        return default
+
+def fetch_catalog(name, func):
+    """Katalog listesi; her başarılı okuma çevrimdışı kopyaya da yazılır"""
+    rows = fetch_or(None, func)
+    if rows is None:
+        return []
+    if offline_store:
+        offline_store.save_catalog(name, rows)
+    return rows
+
+def sell_or_queue(drug_id: int, customer_id=None) -> dict:
+    """Satışı backend'e gönder; backend'e ulaşılamıyorsa yerel kuyruğa yaz"""
+    if offline_store and offline_store.is_offline:
+        sync_worker.ensure_started()
+        return offline_store.enqueue_sale(drug_id, 1, customer_id)
+    try:
+        return backend().sell(drug_id, quantity=1, customer_id=customer_id)
+    except ApiConnectionError:
+        if not offline_store:
+            raise
+        offline_store.mark_offline()
+        sync_worker.ensure_started()
+        return offline_store.enqueue_sale(drug_id, 1, customer_id)
+
 # --- HTML ŞABLONLARI ---
 
 MAIN_HTML = """
@@ -17,20 +72,7 @@ MAIN_HTML = """
     <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
     <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        .stock-critical { background-color: #ffe6e6 !important; }
-        .stock-low { background-color: #fff3cd !important; }
-        .stock-ok { background-color: #d1e7dd !important; }
-        .alert-badge { 
-            animation: pulse 2s infinite;
-            cursor: pointer;
-        }
-        @keyframes pulse {
-            0% { opacity: 1; }
-            50% { opacity: 0.7; }
-            100% { opacity: 1; }
-        }
-    </style>
+    <link href="{{ static_url('css/dashboard.css') }}" rel="stylesheet">
 </head>
 <body class="bg-light">
 
@@ -64,6 +106,14 @@ MAIN_HTML = """
         {% endfor %}
       {% endif %}
     {% endwith %}
+    {% if offline and session.get('token') %}
+    <div class="alert alert-warning">
+        {% if offline.offline %}📴 Çevrimdışı kasa: katalog {{ offline.catalog_saved_at or '---' }} (UTC) tarihli yerel kopyadan gösteriliyor.{% endif %}
+        {% if offline.pending %}{{ offline.pending }} satış senkron bekliyor.{% endif %}
+        {% if offline.conflict %}{{ offline.conflict }} satış backend'e yazılamadı (stok/parti yetersiz ya da ilaç silinmiş): /api/offline/status{% endif %}
+    </div>
+    {% endif %}
+    <div id="liveMessages"></div>
 
     {% if not session.get('token') %}
     <!-- Giriş Formu -->
@@ -96,51 +146,7 @@ MAIN_HTML = """
                     <button type="button" class="btn-close" data-bs-dismiss="modal"></button>
                 </div>
                 <div class="modal-body">
-                    <div class="row">
-                        <div class="col-md-6">
-                            <div class="card mb-3">
-                                <div class="card-header bg-danger text-white">
-                                    <h6>⛔ Kritik Stok (≤ 5 adet)</h6>
-                                </div>
-                                <div class="card-body">
-                                    {% if critical_drugs %}
-                                    <ul class="list-group">
-                                        {% for d in critical_drugs %}
-                                        <li class="list-group-item d-flex justify-content-between">
-                                            <span>{{ d.name }}</span>
-                                            <span class="badge bg-danger">{{ d.stock_quantity }} adet</span>
-                                        </li>
-                                        {% endfor %}
-                                    </ul>
-                                    {% else %}
-                                    <p class="text-muted">Kritik stok yok</p>
-                                    {% endif %}
-                                </div>
-                            </div>
-                        </div>
-                        <div class="col-md-6">
-                            <div class="card mb-3">
-                                <div class="card-header bg-warning">
-                                    <h6>⚠️ Düşük Stok</h6>
-                                </div>
-                                <div class="card-body">
-                                    {% if low_drugs %}
-                                    <ul class="list-group">
-                                        {% for d in low_drugs %}
-                                        <li class="list-group-item d-flex justify-content-between">
-                                            <span>{{ d.name }}</span>
-                                            <span class="badge bg-warning">{{ d.stock_quantity }} adet</span>
-                                            <small>Eşik: {{ d.low_stock_threshold }}</small>
-                                        </li>
-                                        {% endfor %}
-                                    </ul>
-                                    {% else %}
-                                    <p class="text-muted">Düşük stok yok</p>
-                                    {% endif %}
-                                </div>
-                            </div>
-                        </div>
-                    </div>
+                    {{ fragments.stock_alerts|safe }}
                     
                     <div class="mt-3">
                         <button class="btn btn-primary btn-sm" onclick="manualStockCheck()">
@@ -164,7 +170,7 @@ MAIN_HTML = """
                     <button type="button" class="btn-close" data-bs-dismiss="modal"></button>
                 </div>
                 <div class="modal-body">
-                    <form action="/add_drug" method="POST" id="addDrugForm">
+                    <form action="/add_drug" method="POST" id="addDrugForm" data-api="/api/drugs">
                         <input type="text" name="name" class="form-control mb-2" placeholder="İlaç Adı" required>
                         <input type="text" name="active_ingredient" class="form-control mb-2" placeholder="Etken Madde" required>
                         <input type="number" step="0.01" name="price" class="form-control mb-2" placeholder="Fiyat" required>
@@ -192,7 +198,7 @@ MAIN_HTML = """
             <div class="row mb-3">
                 <div class="col-md-8">
                     <h5>📦 Stok Listesi
-                        <span class="badge bg-info ms-2">Toplam: {{ drugs|length }} ilaç</span>
+                        <span class="badge bg-info ms-2">Toplam: {{ drug_count }} ilaç</span>
                         {% if low_stock_count > 0 %}
                         <span class="badge bg-warning ms-1">Düşük: {{ low_stock_count }}</span>
                         {% endif %}
@@ -213,121 +219,7 @@ MAIN_HTML = """
                 </div>
             </div>
 
-            <!-- İlaç Tablosu -->
-            <table class="table table-hover border">
-                <thead class="table-light">
-                    <tr>
-                        <th>İlaç</th>
-                        <th>Fiyat</th>
-                        <th>Stok</th>
-                        <th>Eşik</th>
-                        <th>Durum</th>
-                        <th>İşlem</th>
-                    </tr>
-                </thead>
-                <tbody>
-                {% for d in drugs %}
-                <tr class="
-                    {% if d.stock_quantity <= 5 %}stock-critical
-                    {% elif d.stock_quantity <= d.low_stock_threshold %}stock-low
-                    {% else %}stock-ok{% endif %}">
-                    <td>
-                        <strong>{{ d.name }}</strong><br>
-                        <small class="text-muted">{{ d.active_ingredient }}</small>
-                    </td>
-                    <td>{{ d.price }} TL</td>
-                    <td>
-                        <span class="badge 
-                            {% if d.stock_quantity <= 5 %}bg-danger
-                            {% elif d.stock_quantity <= d.low_stock_threshold %}bg-warning
-                            {% else %}bg-success{% endif %}">
-                            {{ d.stock_quantity }}
-                        </span>
-                    </td>
-                    <td>
-                        {% if session['role'] == 'Yönetici' %}
-                        <form action="/update_threshold" method="POST" class="d-flex">
-                            <input type="hidden" name="drug_id" value="{{ d.id }}">
-                            <input type="number" name="threshold" value="{{ d.low_stock_threshold }}" 
-                                   class="form-control form-control-sm" style="width: 60px;">
-                            <button type="submit" class="btn btn-sm btn-outline-secondary ms-1">✓</button>
-                        </form>
-                        {% else %}
-                        {{ d.low_stock_threshold }}
-                        {% endif %}
-                    </td>
-                    <td>
-                        {% if d.stock_quantity <= 5 %}
-                        <span class="badge bg-danger">KRİTİK</span>
-                        {% elif d.stock_quantity <= d.low_stock_threshold %}
-                        <span class="badge bg-warning">DÜŞÜK</span>
-                        {% else %}
-                        <span class="badge bg-success">NORMAL</span>
-                        {% endif %}
-                    </td>
-                    <td>
-                        <div class="d-flex gap-1">
-                            <form action="/sell" method="POST" class="d-flex align-items-center">
-                                <input type="hidden" name="drug_id" value="{{ d.id }}">
-                                <select name="customer_id" class="form-select form-select-sm me-1" style="width:110px;">
-                                    <option value="">Müşterisiz</option>
-                                    {% for c in customers %}
-                                    <option value="{{ c.id }}">{{ c.name }}</option>
-                                    {% endfor %}
-                                </select>
-                                <button class="btn btn-primary btn-sm">Sat</button>
-                            </form>
-                            
-                            <form action="/order_stock" method="POST">
-                                <input type="hidden" name="drug_id" value="{{ d.id }}">
-                                <button class="btn btn-warning btn-sm">Depo</button>
-                            </form>
-
-                            {% if session['role'] == 'Yönetici' %}
-                            <form action="/delete_drug" method="POST" onsubmit="return confirm('Silmek istediğine emin misin?');">
-                                <input type="hidden" name="drug_id" value="{{ d.id }}">
-                                <button class="btn btn-outline-danger btn-sm">Sil</button>
-                            </form>
-                            {% endif %}
-                        </div>
-                    </td>
-                </tr>
-                {% endfor %}
-                </tbody>
-            </table>
-
-            <!-- Stok Grafiği -->
-            <div class="row mt-4">
-                <div class="col-md-6">
-                    <div class="card">
-                        <div class="card-header">📊 Stok Durumu</div>
-                        <div class="card-body">
-                            <canvas id="stockChart" width="400" height="200"></canvas>
-                        </div>
-                    </div>
-                </div>
-                <div class="col-md-6">
-                    <div class="card">
-                        <div class="card-header">ℹ️ Stok İstatistikleri</div>
-                        <div class="card-body">
-                            <p><strong>Toplam Stok Değeri:</strong> {{ stock_report.total_stock_value|round(2) }} TL</p>
-                            <p><strong>Ortalama Stok:</strong> {{ (stock_report.total_stock_value / drugs|length)|round(2) if drugs|length > 0 else 0 }} TL/ilaç</p>
-                            <p><strong>En Düşük Stoklu:</strong> 
-                                {% if drugs %}
-                                    {% set min_stock = drugs|min(attribute='stock_quantity') %}
-                                    {{ min_stock.name }} ({{ min_stock.stock_quantity }} adet)
-                                {% endif %}
-                            </p>
-                            <p><strong>En Yüksek Stoklu:</strong>
-                                {% if drugs %}
-                                    {% set max_stock = drugs|max(attribute='stock_quantity') %}
-                                    {{ max_stock.name }} ({{ max_stock.stock_quantity }} adet)
-                                {% endif %}
-                            </p>
-                        </div>
-                    </div>
-                </div>
-            </div>
+            {{ fragments.drug_table|safe }}
         </div>
 
         <!-- MÜŞTERİLER TABI -->
@@ -337,7 +229,7 @@ MAIN_HTML = """
                     <div class="card">
                         <div class="card-header">Yeni Müşteri Ekle</div>
                         <div class="card-body">
-                            <form action="/add_customer" method="POST">
+                            <form action="/add_customer" method="POST" data-api="/api/customers">
                                 <input type="text" name="name" class="form-control mb-2" placeholder="Ad Soyad" required>
                                 <input type="text" name="tc_no" class="form-control mb-2" placeholder="TC Kimlik No" required>
                                 <input type="text" name="phone" class="form-control mb-2" placeholder="Telefon" required>
@@ -350,17 +242,8 @@ MAIN_HTML = """
                     <h5>Müşteri Listesi & Geçmişi</h5>
                     <table class="table border">
                         <thead><tr><th>Ad Soyad</th><th>TC</th><th>Telefon</th><th>Geçmiş</th></tr></thead>
-                        <tbody>
-                        {% for c in customers %}
-                        <tr>
-                            <td>{{ c.name }}</td>
-                            <td>{{ c.tc_no }}</td>
-                            <td>{{ c.phone }}</td>
-                            <td>
-                                <a href="/customer_history/{{ c.id }}" class="btn btn-sm btn-secondary">Geçmişi Gör</a>
-                            </td>
-                        </tr>
-                        {% endfor %}
+                        <tbody id="customerRows">
+                        {{ fragments.customer_rows|safe }}
                         </tbody>
                     </table>
                 </div>
@@ -369,40 +252,7 @@ MAIN_HTML = """
 
         <!-- RAPORLAR TABI -->
         <div class="tab-pane fade" id="reports">
-            <div class="text-center p-4">
-                <h3>Gün Sonu Raporu</h3>
-                <p class="text-muted">Tarih: {{ report.date }}</p>
-                <div class="row mt-4">
-                    <div class="col-md-6">
-                        <div class="card bg-primary text-white p-3 mb-3">
-                            <h4>Toplam Satış</h4>
-                            <h2>{{ report.total_sales_count }} Adet</h2>
-                        </div>
-                    </div>
-                    <div class="col-md-6">
-                        <div class="card bg-success text-white p-3 mb-3">
-                            <h4>Toplam Ciro</h4>
-                            <h2>{{ report.total_revenue }} TL</h2>
-                        </div>
-                    </div>
-                </div>
-                <h5 class="mt-4 text-start">Satış Detayları (İTS Logları)</h5>
-                <table class="table table-striped mt-2 border">
-                    <thead><tr><th>İlaç</th><th>Tutar</th><th>İTS Onay No</th><th>Tarih</th></tr></thead>
-                    <tbody>
-                    {% for s in report.details %}
-                    <tr>
-                        <td>{{ s.drug_name }}</td>
-                        <td>{{ s.total_price }} TL</td>
-                        <td><span class="badge bg-dark">{{ s.its_id }}</span></td>
-                        <td>{{ s.date }}</td>
-                    </tr>
-                    {% else %}
-                    <tr><td colspan="4" class="text-center">Henüz satış yapılmadı.</td></tr>
-                    {% endfor %}
-                    </tbody>
-                </table>
-            </div>
+            {{ fragments.report|safe }}
         </div>
 
         <!-- YENİ: UYARILAR TABI -->
@@ -513,138 +363,241 @@ MAIN_HTML = """
     {% endif %}
 </div>
 
-<script>
-// JavaScript Fonksiyonları
-function manualStockCheck() {
-    fetch('/api/check_stock')
-        .then(response => response.json())
-        .then(data => {
-            alert(data.message || 'Stok kontrolü başlatıldı!');
-            setTimeout(() => location.reload(), 1000);
-        })
-        .catch(error => {
-            console.error('Hata:', error);
-            alert('Stok kontrolü başlatılamadı');
-        });
-}
+{% if session.get('token') %}
+<script id="chartData" type="application/json">{{ fragments.chart_data|safe }}</script>
+<script src="{{ static_url('js/dashboard.js') }}"></script>
+{% endif %}
 
-function checkStock() {
-    fetch('/api/check_stock')
-        .then(response => response.json())
-        .then(data => {
-            alert('Stok kontrolü tamamlandı!');
-            location.reload();
-        });
-}
+</body>
+</html>
+"""
 
-function viewAlertHistory() {
-    fetch('/api/alert_history')
-        .then(response => response.json())
-        .then(data => {
-            const historyDiv = document.getElementById('alertHistory');
-            if (data.length === 0) {
-                historyDiv.innerHTML = '<p class="text-muted">Henüz uyarı yok.</p>';
-                return;
-            }
-            
-            let html = '<table class="table table-sm"><thead><tr><th>Tarih</th><th>Tip</th><th>İlaç Sayısı</th></tr></thead><tbody>';
-            data.slice(-10).reverse().forEach(alert => {
-                const date = new Date(alert.timestamp).toLocaleString('tr-TR');
-                const typeBadge = alert.type === 'critical' ? 
-                    '<span class="badge bg-danger">KRİTİK</span>' : 
-                    '<span class="badge bg-warning">DÜŞÜK</span>';
-                
-                html += `<tr>
-                    <td>${date}</td>
-                    <td>${typeBadge}</td>
-                    <td>${alert.drug_count} ilaç</td>
-                </tr>`;
-            });
-            html += '</tbody></table>';
-            historyDiv.innerHTML = html;
-        });
-}
+# Sayfa parçaları: her biri ayrı derlenir ve veri sürümüne göre önbelleğe alınır
 
-function getAlertHistory() {
-    viewAlertHistory();
-}
+# Uyarılar modal'ındaki kritik / düşük stok listeleri
+STOCK_ALERTS_HTML = """
+<div class="row">
+    <div class="col-md-6">
+        <div class="card mb-3">
+            <div class="card-header bg-danger text-white">
+                <h6>⛔ Kritik Stok (≤ 5 adet)</h6>
+            </div>
+            <div class="card-body">
+                {% if critical_drugs %}
+                <ul class="list-group">
+                    {% for d in critical_drugs %}
+                    <li class="list-group-item d-flex justify-content-between">
+                        <span>{{ d.name }}</span>
+                        <span class="badge bg-danger">{{ d.stock_quantity }} adet</span>
+                    </li>
+                    {% endfor %}
+                </ul>
+                {% else %}
+                <p class="text-muted">Kritik stok yok</p>
+                {% endif %}
+            </div>
+        </div>
+    </div>
+    <div class="col-md-6">
+        <div class="card mb-3">
+            <div class="card-header bg-warning">
+                <h6>⚠️ Düşük Stok</h6>
+            </div>
+            <div class="card-body">
+                {% if low_drugs %}
+                <ul class="list-group">
+                    {% for d in low_drugs %}
+                    <li class="list-group-item d-flex justify-content-between">
+                        <span>{{ d.name }}</span>
+                        <span class="badge bg-warning">{{ d.stock_quantity }} adet</span>
+                        <small>Eşik: {{ d.low_stock_threshold }}</small>
+                    </li>
+                    {% endfor %}
+                </ul>
+                {% else %}
+                <p class="text-muted">Düşük stok yok</p>
+                {% endif %}
+            </div>
+        </div>
+    </div>
+</div>
+"""
 
-function saveAlertSettings() {
-    const settings = {
-        check_interval: document.getElementById('checkInterval').value,
-        enable_email: document.getElementById('enableEmail').checked,
-        enable_sms: document.getElementById('enableSMS').checked,
-        enable_auto_order: document.getElementById('enableAutoOrder').checked
-    };
-    
-    alert('Ayarlar kaydedildi (demo modu). Gerçek uygulamada API\'ye gönderilecek.');
-    console.log('Kaydedilen ayarlar:', settings);
-}
+# İlaç tablosu + stok istatistikleri
+DRUG_TABLE_HTML = """
+<!-- İlaç Tablosu -->
+<table class="table table-hover border">
+    <thead class="table-light">
+        <tr>
+            <th>İlaç</th>
+            <th>Fiyat</th>
+            <th>Stok</th>
+            <th>Eşik</th>
+            <th>Durum</th>
+            <th>İşlem</th>
+        </tr>
+    </thead>
+    <tbody id="drugRows">
+    {% for d in drugs %}
+    {% include "drug_row.html" %}
+    {% endfor %}
+    </tbody>
+</table>
 
-function autoOrderLowStock() {
-    if (confirm('Düşük stoklu tüm ilaçlara otomatik sipariş verilsin mi?')) {
-        alert('Otomatik siparişler oluşturuluyor... (demo modu)');
-        // Gerçek uygulamada API çağrısı yapılacak
-    }
-}
+<!-- Stok Grafiği -->
+<div class="row mt-4">
+    <div class="col-md-6">
+        <div class="card">
+            <div class="card-header">📊 Stok Durumu</div>
+            <div class="card-body">
+                <canvas id="stockChart" width="400" height="200"></canvas>
+            </div>
+        </div>
+    </div>
+    <div class="col-md-6">
+        <div class="card">
+            <div class="card-header">ℹ️ Stok İstatistikleri</div>
+            <div class="card-body">
+                <p><strong>Toplam Stok Değeri:</strong> {{ stock_report.total_stock_value|round(2) }} TL</p>
+                <p><strong>Ortalama Stok:</strong> {{ (stock_report.total_stock_value / drugs|length)|round(2) if drugs|length > 0 else 0 }} TL/ilaç</p>
+                <p><strong>En Düşük Stoklu:</strong> 
+                    {% if drugs %}
+                        {% set min_stock = drugs|min(attribute='stock_quantity') %}
+                        {{ min_stock.name }} ({{ min_stock.stock_quantity }} adet)
+                    {% endif %}
+                </p>
+                <p><strong>En Yüksek Stoklu:</strong>
+                    {% if drugs %}
+                        {% set max_stock = drugs|max(attribute='stock_quantity') %}
+                        {{ max_stock.name }} ({{ max_stock.stock_quantity }} adet)
+                    {% endif %}
+                </p>
+            </div>
+        </div>
+    </div>
+</div>
+"""
 
-// Sayfa yüklendiğinde stok grafiğini çiz
-document.addEventListener('DOMContentLoaded', function() {
-    // Stok grafiği verileri - DÜZELTİLDİ!
-    const drugNames = {{ drug_names|tojson if drug_names else '[]' }};
-    const stockQuantities = {{ stock_quantities|tojson if stock_quantities else '[]' }};
-    
-    if (drugNames && drugNames.length > 0 && drugNames[0] !== '') {
-        const ctx = document.getElementById('stockChart').getContext('2d');
-        new Chart(ctx, {
-            type: 'bar',
-            data: {
-                labels: drugNames,
-                datasets: [{
-                    label: 'Stok Miktarı',
-                    data: stockQuantities,
-                    backgroundColor: stockQuantities.map(q => 
-                        q <= 5 ? '#dc3545' : 
-                        q <= 10 ? '#ffc107' : '#198754'
-                    ),
-                    borderColor: '#333',
-                    borderWidth: 1
-                }]
-            },
-            options: {
-                responsive: true,
-                scales: {
-                    y: {
-                        beginAtZero: true,
-                        title: {
-                            display: true,
-                            text: 'Adet'
-                        }
-                    },
-                    x: {
-                        ticks: {
-                            maxRotation: 45,
-                            minRotation: 45
-                        }
-                    }
-                }
-            }
-        });
-    } else {
-        // Grafik yoksa mesaj göster
-        document.getElementById('stockChart').parentElement.innerHTML = 
-            '<p class="text-muted">Grafik verisi bulunamadı veya henüz ilaç eklenmedi.</p>';
-    }
-    
-    // Sayfa açıldığında uyarı geçmişini yükle
-    if (document.getElementById('alerts').classList.contains('active')) {
-        viewAlertHistory();
-    }
-});
-</script>
+# Tek ilaç satırı (tabloda ve canlı eklemede kullanılır)
+DRUG_ROW_HTML = """
+<tr data-drug-id="{{ d.id }}" class="
+    {% if d.stock_quantity <= 5 %}stock-critical
+    {% elif d.stock_quantity <= d.low_stock_threshold %}stock-low
+    {% else %}stock-ok{% endif %}">
+    <td>
+        <strong>{{ d.name }}</strong><br>
+        <small class="text-muted">{{ d.active_ingredient }}</small>
+    </td>
+    <td>{{ d.price }} TL</td>
+    <td>
+        <span class="badge stock-badge
+            {% if d.stock_quantity <= 5 %}bg-danger
+            {% elif d.stock_quantity <= d.low_stock_threshold %}bg-warning
+            {% else %}bg-success{% endif %}">
+            {{ d.stock_quantity }}
+        </span>
+    </td>
+    <td>
+        {% if session['role'] == 'Yönetici' %}
+        <form action="/update_threshold" method="POST" class="d-flex" data-api="/api/drugs/{{ d.id }}/threshold">
+            <input type="hidden" name="drug_id" value="{{ d.id }}">
+            <input type="number" name="threshold" value="{{ d.low_stock_threshold }}" 
+                   class="form-control form-control-sm" style="width: 60px;">
+            <button type="submit" class="btn btn-sm btn-outline-secondary ms-1">✓</button>
+        </form>
+        {% else %}
+        {{ d.low_stock_threshold }}
+        {% endif %}
+    </td>
+    <td class="stock-status">
+        {% if d.stock_quantity <= 5 %}
+        <span class="badge bg-danger">KRİTİK</span>
+        {% elif d.stock_quantity <= d.low_stock_threshold %}
+        <span class="badge bg-warning">DÜŞÜK</span>
+        {% else %}
+        <span class="badge bg-success">NORMAL</span>
+        {% endif %}
+    </td>
+    <td>
+        <div class="d-flex gap-1">
+            <form action="/sell" method="POST" class="d-flex align-items-center" data-api="/api/sell">
+                <input type="hidden" name="drug_id" value="{{ d.id }}">
+                <select name="customer_id" class="form-select form-select-sm me-1" style="width:110px;">
+                    <option value="">Müşterisiz</option>
+                    {% for c in customers %}
+                    <option value="{{ c.id }}">{{ c.name }}</option>
+                    {% endfor %}
+                </select>
+                <button class="btn btn-primary btn-sm">Sat</button>
+            </form>
+            
+            <form action="/order_stock" method="POST" data-api="/api/order_stock">
+                <input type="hidden" name="drug_id" value="{{ d.id }}">
+                <button class="btn btn-warning btn-sm">Depo</button>
+            </form>
 
-</body>
-</html>
+            {% if session['role'] == 'Yönetici' %}
+            <form action="/delete_drug" method="POST" data-api="/api/drugs/{{ d.id }}" data-method="DELETE"
+          onsubmit="return confirm('Silmek istediğine emin misin?');">
+                <input type="hidden" name="drug_id" value="{{ d.id }}">
+                <button class="btn btn-outline-danger btn-sm">Sil</button>
+            </form>
+            {% endif %}
+        </div>
+    </td>
+</tr>
+"""
+
+# Müşteri listesi satırları
+CUSTOMER_ROWS_HTML = """
+{% for c in customers %}
+<tr>
+    <td>{{ c.name }}</td>
+    <td>{{ c.tc_no }}</td>
+    <td>{{ c.phone }}</td>
+    <td>
+        <a href="/customer_history/{{ c.id }}" class="btn btn-sm btn-secondary">Geçmişi Gör</a>
+    </td>
+</tr>
+{% endfor %}
+"""
+
+# Gün sonu raporu paneli
+REPORT_HTML = """
+<div class="text-center p-4">
+    <h3>Gün Sonu Raporu</h3>
+    <p class="text-muted">Tarih: {{ report.date }}</p>
+    <div class="row mt-4">
+        <div class="col-md-6">
+            <div class="card bg-primary text-white p-3 mb-3">
+                <h4>Toplam Satış</h4>
+                <h2>{{ report.total_sales_count }} Adet</h2>
+            </div>
+        </div>
+        <div class="col-md-6">
+            <div class="card bg-success text-white p-3 mb-3">
+                <h4>Toplam Ciro</h4>
+                <h2>{{ report.total_revenue }} TL</h2>
+            </div>
+        </div>
+    </div>
+    <h5 class="mt-4 text-start">Satış Detayları (İTS Logları)</h5>
+    <table class="table table-striped mt-2 border">
+        <thead><tr><th>İlaç</th><th>Tutar</th><th>İTS Onay No</th><th>Tarih</th></tr></thead>
+        <tbody>
+        {% for s in report.details %}
+        <tr>
+            <td>{{ s.drug_name }}</td>
+            <td>{{ s.total_price }} TL</td>
+            <td><span class="badge bg-dark">{{ s.its_id or 'Bekliyor' }}</span></td>
+            <td>{{ s.date }}</td>
+        </tr>
+        {% else %}
+        <tr><td colspan="4" class="text-center">Henüz satış yapılmadı.</td></tr>
+        {% endfor %}
+        </tbody>
+    </table>
+</div>
 """
 
 # Müşteri Geçmişi Şablonu
@@ -661,6 +614,24 @@ HISTORY_HTML = """
             <a href="/" class="btn btn-light btn-sm">Geri Dön</a>
         </div>
         <div class="card-body">
+            {% if summary.drugs %}
+            <h6>İlaç Bazında Özet ({{ summary.total_purchases }} alım, {{ summary.total_spent }} TL)</h6>
+            <table class="table table-sm table-bordered mb-4">
+                <thead><tr><th>İlaç</th><th>Alım</th><th>Toplam Adet</th><th>Toplam Tutar</th><th>İlk / Son Alım</th><th>Ort. Aralık</th></tr></thead>
+                <tbody>
+                {% for d in summary.drugs %}
+                <tr>
+                    <td>{{ d.drug_name }}</td>
+                    <td>{{ d.purchase_count }}</td>
+                    <td>{{ d.total_quantity }}</td>
+                    <td>{{ d.total_spent }} TL</td>
+                    <td>{{ d.first_purchase }} / {{ d.last_purchase }}</td>
+                    <td>{% if d.avg_interval_days is not none %}{{ d.avg_interval_days }} gün{% else %}-{% endif %}</td>
+                </tr>
+                {% endfor %}
+                </tbody>
+            </table>
+            {% endif %}
             <table class="table table-bordered table-striped">
                 <thead><tr><th>İlaç</th><th>Adet</th><th>Tutar</th><th>Tarih</th><th>İTS No</th></tr></thead>
                 <tbody>
@@ -670,237 +641,494 @@ HISTORY_HTML = """
                     <td>{{ h.quantity }}</td>
                     <td>{{ h.total_price }} TL</td>
                     <td>{{ h.date }}</td>
-                    <td><span class="badge bg-info text-dark">{{ h.its_id }}</span></td>
+                    <td><span class="badge bg-info text-dark">{{ h.its_id or 'Bekliyor' }}</span></td>
                 </tr>
                 {% else %}
                 <tr><td colspan="5" class="text-center text-muted">Bu müşteriye ait kayıt bulunamadı.</td></tr>
                 {% endfor %}
                 </tbody>
             </table>
+            {% if next_cursor %}
+            <a href="/customer_history/{{ customer_id }}?cursor={{ next_cursor }}" class="btn btn-outline-secondary btn-sm">Daha Eski Kayıtlar</a>
+            {% endif %}
         </div>
     </div>
 </body></html>
 """
 
+# --- ŞABLON DERLEME / STATİK DOSYALAR / PARÇA ÖNBELLEĞİ ---
+
+CLIENT_CACHE_CONFIG = {
+    "MAX_ENTRIES": int(os.environ.get("CLIENT_CACHE_MAX_ENTRIES", 64)),
+    # Backend sürümü bu kadar süre yeniden kullanılır; istemcinin kendi
+    # yazılarından sonra (POST) hemen yeniden okunur
+    "VERSION_TTL_SECONDS": float(os.environ.get("CLIENT_CACHE_VERSION_TTL", 0.5)),
+    "ENABLED": os.environ.get("CLIENT_CACHE_ENABLED", "true").lower() == "true",
+    # Sürümlü statik URL'ler (?v=<içerik özeti>) tarayıcıda 1 yıl önbelleklenir
+    "STATIC_MAX_AGE": int(os.environ.get("CLIENT_STATIC_MAX_AGE", 31536000)),
+}
+
+TEMPLATES = {
+    "main.html": MAIN_HTML,
+    "history.html": HISTORY_HTML,
+    "stock_alerts.html": STOCK_ALERTS_HTML,
+    "drug_table.html": DRUG_TABLE_HTML,
+    "drug_row.html": DRUG_ROW_HTML,
+    "customer_rows.html": CUSTOMER_ROWS_HTML,
+    "report.html": REPORT_HTML,
+}
+app.jinja_loader = DictLoader(TEMPLATES)
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = CLIENT_CACHE_CONFIG["STATIC_MAX_AGE"]
+
+# Şablonlar modül yüklenirken bir kez derlenir (render_template_string her
+# istekte yeniden derliyordu); Jinja ortamı derlenmiş şablonları saklar
+for _name in TEMPLATES:
+    app.jinja_env.get_template(_name)
+
+@lru_cache(maxsize=None)
+def static_url(filename: str) -> str:
+    """İçerik özetli statik dosya URL'i (dosya değişince URL de değişir)"""
+    with open(os.path.join(app.static_folder, filename), "rb") as f:
+        digest = hashlib.md5(f.read()).hexdigest()[:10]
+    return f"/static/{filename}?v={digest}"
+
+app.jinja_env.globals["static_url"] = static_url
+
+# Render edilmiş panel parçaları ve tam sayfa: anahtar (bölüm, rol), etiket backend veri sürümü
+fragment_cache = ResultCache(
+    max_entries=CLIENT_CACHE_CONFIG["MAX_ENTRIES"],
+    version_ttl=CLIENT_CACHE_CONFIG["VERSION_TTL_SECONDS"],
+    enabled=CLIENT_CACHE_CONFIG["ENABLED"],
+)
+
+EMPTY_REPORT = {"total_sales_count": 0, "total_revenue": 0, "details": [], "date": "---"}
+EMPTY_STOCK_REPORT = {"total_stock_value": 0, "low_stock_count": 0, "critical_stock_count": 0}
+
+class DashboardData:
+    """Panel verisi; her kaynak yalnızca önbellekte olmayan bir parça için
+    ilk kez gerektiğinde backend'den çekilir"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def empty(cls):
+        """Backend'e ulaşılamadığında boş panel"""
+        data = cls(None)
+        data.__dict__.update(drugs=[], customers=[], report=EMPTY_REPORT, low_drugs=[],
+                             critical_drugs=[], stock_report=EMPTY_STOCK_REPORT)
+        return data
+
+    @classmethod
+    def offline(cls):
+        """Çevrimdışı panel: katalog yerel kopyadan, stok kuyruktaki satışlar düşülmüş"""
+        data = cls.empty()
+        drugs = offline_store.local_drugs()
+        data.__dict__.update(
+            drugs=drugs,
+            customers=offline_store.load_catalog("customers") or [],
+            critical_drugs=[d for d in drugs if d["stock_quantity"] <= 5],
+            low_drugs=[d for d in drugs
+                       if 5 < d["stock_quantity"] <= (d.get("low_stock_threshold") or 0)]
+        )
+        return data
+
+    @cached_property
+    def drugs(self):
+        return fetch_catalog("drugs", self.client.list_drugs)
+
+    @cached_property
+    def customers(self):
+        return fetch_catalog("customers", self.client.list_customers)
+
+    @cached_property
+    def report(self):
+        return fetch_or(EMPTY_REPORT, self.client.daily_report)
+
+    @cached_property
+    def low_drugs(self):
+        return fetch_or([], self.client.low_stock_drugs)
+
+    @cached_property
+    def critical_drugs(self):
+        return fetch_or([], self.client.critical_stock_drugs)
+
+    @cached_property
+    def stock_report(self):
+        return fetch_or(EMPTY_STOCK_REPORT, self.client.stock_status)
+
+def render_summary(data: DashboardData) -> dict:
+    return {
+        "drug_count": len(data.drugs),
+        "low_stock_count": len(data.low_drugs),
+        "critical_stock_count": len(data.critical_drugs),
+    }
+
+def render_chart_data(data: DashboardData) -> str:
+    # <script type="application/json"> içine gömülür: HTML'e güvenli JSON
+    return htmlsafe_json_dumps({
+        "names": [d.get("name", "") for d in data.drugs],
+        "quantities": [d.get("stock_quantity", 0) for d in data.drugs],
+    })
+
+# bölüm -> (rol bağımlı mı, üretici)
+FRAGMENTS = {
+    "summary": (False, render_summary),
+    "chart_data": (False, render_chart_data),
+    "stock_alerts": (False, lambda data: render_template(
+        "stock_alerts.html", critical_drugs=data.critical_drugs, low_drugs=data.low_drugs)),
+    "drug_table": (True, lambda data: render_template(
+        "drug_table.html", drugs=data.drugs, customers=data.customers, stock_report=data.stock_report)),
+    "customer_rows": (False, lambda data: render_template("customer_rows.html", customers=data.customers)),
+    "report": (False, lambda data: render_template("report.html", report=data.report)),
+}
+
+def data_version(client):
+    """Backend veri sürümü (TTL içindeyse bellekten); alınamazsa None"""
+    if not fragment_cache.enabled:
+        return None
+    version = fragment_cache.cached_version()
+    if version is None:
+        version = fetch_or(None, lambda: client.data_version()["version"])
+        if version is not None:
+            fragment_cache.set_version(version)
+    return version
+
+def render_fragments(data: DashboardData, version) -> dict:
+    """Her bölümü önbellekten al; eksik olanları render edip sakla (sürüm yoksa önbelleksiz)"""
+    role = session.get("role")
+    fragments = {}
+    for section, (per_role, render) in FRAGMENTS.items():
+        key = (section, role if per_role else None)
+        value = fragment_cache.get(key, version) if version is not None else None
+        if value is None:
+            value = render(data)
+            if version is not None:
+                fragment_cache.put(key, version, value)
+        fragments[section] = value
+    return fragments
+
+@app.after_request
+def invalidate_after_write(response):
+    """Kendi yazımızdan sonraki panel isteği sürümü yeniden okusun"""
+    if request.method in ("POST", "PUT", "DELETE"):
+        fragment_cache.invalidate()
+    return response
+
 # --- FLASK ROTALARI ---
 
 @app.route("/")
 def index():
     if "token" not in session:
-        return render_template_string(MAIN_HTML)
-    
-    headers = {"Authorization": f"Bearer {session['token']}"}
+        return render_template("main.html", fragments={})
+
+    # Bağlantı koptuysa backend'i beklemeden yerel kopyadan çiz (yoklama arka planda)
+    if offline_store and offline_store.is_offline:
+        return render_offline_page()
+
+    client = backend()
     try:
-        # Temel verileri getir
-        drugs_response = requests.get(f"{API_URL}/drugs", headers=headers)
-        customers_response = requests.get(f"{API_URL}/customers", headers=headers)
-        report_response = requests.get(f"{API_URL}/reports/daily", headers=headers)
-        
-        # Yeni endpoint'ler
-        low_stock_response = requests.get(f"{API_URL}/drugs/low-stock", headers=headers)
-        critical_stock_response = requests.get(f"{API_URL}/drugs/critical-stock", headers=headers)
-        stock_report_response = requests.get(f"{API_URL}/reports/stock-status", headers=headers)
-        
-        drugs = drugs_response.json() if drugs_response.status_code == 200 else []
-        customers = customers_response.json() if customers_response.status_code == 200 else []
-        report = report_response.json() if report_response.status_code == 200 else {
-            "total_sales_count": 0, "total_revenue": 0, "details": [], "date": "---"
-        }
-        
-        low_drugs = low_stock_response.json() if low_stock_response.status_code == 200 else []
-        critical_drugs = critical_stock_response.json() if critical_stock_response.status_code == 200 else []
-        stock_report = stock_report_response.json() if stock_report_response.status_code == 200 else {
-            "total_stock_value": 0, "low_stock_count": 0, "critical_stock_count": 0
-        }
-        
-        # Grafik verileri - GÜVENLİ HALE GETİRİLDİ
-        drug_names = []
-        stock_quantities = []
-        if drugs and len(drugs) > 0:
-            drug_names = [d.get("name", "") for d in drugs]
-            stock_quantities = [d.get("stock_quantity", 0) for d in drugs]
-        
-        # Uyarı sayıları
-        low_stock_count = len(low_drugs) if low_drugs else 0
-        critical_stock_count = len(critical_drugs) if critical_drugs else 0
-        
+        version = data_version(client)
     except Exception as e:
         print(f"Hata: {e}")
-        drugs, customers, report = [], [], {"total_sales_count": 0, "total_revenue": 0, "details": [], "date": "---"}
-        low_drugs, critical_drugs = [], []
-        stock_report = {"total_stock_value": 0, "low_stock_count": 0, "critical_stock_count": 0}
-        drug_names, stock_quantities = [], []
-        low_stock_count, critical_stock_count = 0, 0
-
-    return render_template_string(
-        MAIN_HTML, 
-        drugs=drugs, 
-        customers=customers, 
-        report=report,
-        low_drugs=low_drugs,
-        critical_drugs=critical_drugs,
-        stock_report=stock_report,
-        drug_names=drug_names,
-        stock_quantities=stock_quantities,
-        low_stock_count=low_stock_count,
-        critical_stock_count=critical_stock_count
-    )
+        if offline_store and isinstance(e, ApiConnectionError):
+            offline_store.mark_offline()
+            return render_offline_page()
+        version = None
+    # Flash mesajı yoksa sayfanın tamamı yalnızca sürüme ve role bağlıdır:
+    # hazır UTF-8 byte'ları doğrudan dön (şablon ve encode adımı yok)
+    page_key = ("page", session.get("role"))
+    offline = offline_status()
+    cacheable = version is not None and not session.get("_flashes") and not offline
+    if cacheable:
+        page = fragment_cache.get(page_key, version)
+        if page is not None:
+            return Response(page, mimetype="text/html")
+
+    try:
+        fragments = render_fragments(DashboardData(client), version)
+    except Exception as e:
+        print(f"Hata: {e}")
+        if offline_store and isinstance(e, ApiConnectionError):
+            offline_store.mark_offline()
+            return render_offline_page()
+        fragments, cacheable = render_fragments(DashboardData.empty(), None), False
+    page = render_template("main.html", fragments=fragments, offline=offline,
+                           **fragments["summary"]).encode("utf-8")
+    if cacheable:
+        fragment_cache.put(page_key, version, page)
+    return Response(page, mimetype="text/html")
+
+def offline_status():
+    """Panel bandı için kuyruk durumu; gösterilecek bir şey yoksa None"""
+    if not offline_store:
+        return None
+    status = offline_store.status()
+    if status["pending"]:
+        sync_worker.ensure_started()
+    return status if status["offline"] or status["pending"] or status["conflict"] else None
+
+def render_offline_page():
+    """Backend'siz panel: yerel kopya + kuyruk bandı (önbelleğe alınmaz)"""
+    sync_worker.ensure_started()
+    fragments = render_fragments(DashboardData.offline(), None)
+    return render_template("main.html", fragments=fragments, offline=offline_store.status(),
+                           **fragments["summary"])
 
 @app.route("/login", methods=["POST"])
 def login():
     try:
-        resp = requests.post(f"{API_URL}/login", json={
-            "username": request.form["username"],
-            "password": request.form["password"]
-        })
-        if resp.status_code == 200:
-            data = resp.json()
-            session["token"] = data["token"]
-            session["role"] = data.get("user_info", {}).get("role", data.get("role", "Personel"))
-            return redirect("/")
-    except Exception as e:
+        data = api.login(request.form["username"], request.form["password"])
+        session["token"] = data["token"]
+        session["role"] = data.get("user_info", {}).get("role", data.get("role", "Personel"))
+        return redirect("/")
+    except ApiConnectionError as e:
         print(f"Login hatası: {e}")
         flash("Giriş başarısız! Backend kapalı olabilir.", "danger")
+    except ApiError as e:
+        flash(f"Giriş başarısız: {e.detail}", "danger")
     return redirect("/")
 
 @app.route("/sell", methods=["POST"])
 def sell():
     if "token" not in session: return redirect("/")
-    headers = {"Authorization": f"Bearer {session['token']}"}
     
     customer_id = request.form.get("customer_id")
     if not customer_id:
         customer_id = None
     
-    payload = {
-        "drug_id": request.form.get("drug_id"), 
-        "quantity": 1,
-        "customer_id": customer_id
-    }
     try:
-        resp = requests.post(f"{API_URL}/sales", json=payload, headers=headers)
-        if resp.status_code == 201:
-            flash("Satış Başarılı! İTS Onayı Alındı.", "success")
-        else:
-            flash(f"Hata: {resp.json().get('detail', 'Bilinmeyen hata')}", "danger")
-    except: flash("Bağlantı hatası", "danger")
+        result = sell_or_queue(int(request.form.get("drug_id")),
+                               customer_id=int(customer_id) if customer_id else None)
+        flash(result["message"] if result.get("offline") else "Satış Başarılı! İTS bildirimi kuyruğa alındı.", "success")
+    except ApiConnectionError: flash("Bağlantı hatası", "danger")
+    except ApiError as e: flash(f"Hata: {e.detail}", "danger")
     return redirect("/")
 
 @app.route("/order_stock", methods=["POST"])
 def order_stock():
     if "token" not in session: return redirect("/")
-    headers = {"Authorization": f"Bearer {session['token']}"}
     try:
-        resp = requests.post(f"{API_URL}/order_stock", 
-                           json={"drug_id": request.form["drug_id"], "quantity": 10}, 
-                           headers=headers)
-        if resp.status_code == 200:
-            flash(resp.json()["message"], "info")
-        else:
-            flash("Stok siparişi başarısız.", "danger")
-    except: flash("Depo hatası", "danger")
+        result = backend().order_stock(int(request.form["drug_id"]), quantity=10)
+        flash(result["message"], "info")
+    except ApiConnectionError: flash("Depo hatası", "danger")
+    except ApiError: flash("Stok siparişi başarısız.", "danger")
     return redirect("/")
 
+def drug_payload(form) -> dict:
+    return {
+        "name": form["name"],
+        "active_ingredient": form["active_ingredient"],
+        "price": float(form["price"]),
+        "stock_quantity": int(form["stock_quantity"]),
+        "low_stock_threshold": int(form.get("low_stock_threshold", 10))
+    }
+
 @app.route("/add_drug", methods=["POST"])
 def add_drug():
     if "token" not in session: return redirect("/")
-    headers = {"Authorization": f"Bearer {session['token']}"}
-    payload = {
-        "name": request.form["name"],
-        "active_ingredient": request.form["active_ingredient"],
-        "price": float(request.form["price"]),
-        "stock_quantity": int(request.form["stock_quantity"]),
-        "low_stock_threshold": int(request.form.get("low_stock_threshold", 10))
-    }
     try:
-        resp = requests.post(f"{API_URL}/drugs", json=payload, headers=headers)
-        if resp.status_code == 201:
-            flash("İlaç başarıyla eklendi", "success")
-        else:
-            flash("İlaç eklenemedi", "danger")
-    except: flash("Bağlantı hatası", "danger")
+        backend().create_drug(drug_payload(request.form))
+        flash("İlaç başarıyla eklendi", "success")
+    except ApiConnectionError: flash("Bağlantı hatası", "danger")
+    except ApiError: flash("İlaç eklenemedi", "danger")
     return redirect("/")
 
 @app.route("/update_threshold", methods=["POST"])
 def update_threshold():
     if "token" not in session: return redirect("/")
-    headers = {"Authorization": f"Bearer {session['token']}"}
     try:
         drug_id = int(request.form["drug_id"])
         threshold = int(request.form["threshold"])
-        resp = requests.put(f"{API_URL}/drugs/{drug_id}/threshold?threshold={threshold}", headers=headers)
-        if resp.status_code == 200:
-            flash(f"Stok eşiği {threshold} olarak güncellendi", "info")
-        else:
-            flash("Eşik güncellenemedi", "danger")
-    except: flash("Bağlantı hatası", "danger")
+        backend().update_threshold(drug_id, threshold)
+        flash(f"Stok eşiği {threshold} olarak güncellendi", "info")
+    except ApiConnectionError: flash("Bağlantı hatası", "danger")
+    except (ApiError, ValueError): flash("Eşik güncellenemedi", "danger")
     return redirect("/")
 
 @app.route("/delete_drug", methods=["POST"])
 def delete_drug():
     if "token" not in session: return redirect("/")
-    headers = {"Authorization": f"Bearer {session['token']}"}
     try:
-        resp = requests.delete(f"{API_URL}/drugs/{request.form['drug_id']}", headers=headers)
-        if resp.status_code in [200, 204]:
-            flash("İlaç silindi", "warning")
-        else:
-            flash("İlaç silinemedi", "danger")
-    except: flash("Bağlantı hatası", "danger")
+        backend().delete_drug(int(request.form["drug_id"]))
+        flash("İlaç silindi", "warning")
+    except ApiConnectionError: flash("Bağlantı hatası", "danger")
+    except ApiError: flash("İlaç silinemedi", "danger")
     return redirect("/")
 
 @app.route("/add_customer", methods=["POST"])
 def add_customer():
     if "token" not in session: return redirect("/")
-    headers = {"Authorization": f"Bearer {session['token']}"}
     try:
-        resp = requests.post(f"{API_URL}/customers", json=request.form, headers=headers)
-        if resp.status_code == 200:
-            flash("Müşteri başarıyla eklendi", "success")
-        else:
-            flash("Müşteri eklenemedi", "danger")
-    except: flash("Bağlantı hatası", "danger")
+        backend().create_customer(request.form.to_dict())
+        flash("Müşteri başarıyla eklendi", "success")
+    except ApiConnectionError: flash("Bağlantı hatası", "danger")
+    except ApiError: flash("Müşteri eklenemedi", "danger")
     return redirect("/")
 
 @app.route("/customer_history/<int:c_id>")
 def customer_history(c_id):
     if "token" not in session: return redirect("/")
-    headers = {"Authorization": f"Bearer {session['token']}"}
+    client = backend()
+    cursor = request.args.get("cursor")
     try:
-        history = requests.get(f"{API_URL}/customers/{c_id}/history", headers=headers).json()
-    except: history = []
-    return render_template_string(HISTORY_HTML, history=history)
+        page = fetch_or({"items": [], "next_cursor": None}, client.customer_history, c_id, cursor)
+        # Özet yalnızca ilk sayfada gösterilir
+        summary = {"drugs": []} if cursor else fetch_or({"drugs": []}, client.customer_history_summary, c_id)
+    except ApiConnectionError:
+        flash("Bağlantı hatası", "danger")
+        return redirect("/")
+    return render_template("history.html", history=page["items"], next_cursor=page["next_cursor"],
+                           summary=summary, customer_id=c_id)
 
 # YENİ API ENDPOINT'LERİ
+def api_proxy(func):
+    """Backend yanıtını JSON olarak ilet"""
+    try:
+        return jsonify(func())
+    except ApiConnectionError:
+        return jsonify({"error": "Backend connection failed"}), 500
+    except ApiError as e:
+        return jsonify({"error": e.detail}), e.status_code
+
+# Yazma işlemleri (fetch): yalnızca güncellenen satırı döner, sayfa yerinde
+# güncellenir; yukarıdaki form rotaları JavaScript'siz kullanım için kalır
+@app.route("/api/sell", methods=["POST"])
+def api_sell():
+    if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
+    try:
+        drug_id = int(request.form["drug_id"])
+        customer_id = int(request.form["customer_id"]) if request.form.get("customer_id") else None
+    except (KeyError, ValueError):
+        return jsonify({"error": "Geçersiz ilaç ya da müşteri"}), 400
+    return api_proxy(lambda: sell_or_queue(drug_id, customer_id=customer_id))
+
+@app.route("/api/order_stock", methods=["POST"])
+def api_order_stock():
+    if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
+    try:
+        drug_id = int(request.form["drug_id"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Geçersiz ilaç"}), 400
+    return api_proxy(lambda: backend().order_stock(drug_id, quantity=10))
+
+@app.route("/api/drugs/<int:drug_id>/threshold", methods=["POST"])
+def api_update_threshold(drug_id):
+    if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
+    try:
+        threshold = int(request.form["threshold"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Geçersiz eşik"}), 400
+    return api_proxy(lambda: backend().update_threshold(drug_id, threshold))
+
+@app.route("/api/drugs/<int:drug_id>", methods=["DELETE"])
+def api_delete_drug(drug_id):
+    if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
+    return api_proxy(lambda: backend().delete_drug(drug_id))
+
+@app.route("/api/drugs", methods=["POST"])
+def api_add_drug():
+    if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
+    try:
+        payload = drug_payload(request.form)
+    except (KeyError, ValueError):
+        return jsonify({"error": "Eksik ya da geçersiz alan"}), 400
+
+    def create():
+        result = backend().create_drug(payload)
+        # Müşteri seçenekleri tarayıcıda mevcut satırlardan kopyalanır
+        result["row"] = render_template("drug_row.html", d=result["drug"], customers=[])
+        return result
+    return api_proxy(create)
+
+@app.route("/api/customers", methods=["POST"])
+def api_add_customer():
+    if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
+
+    def create():
+        result = backend().create_customer(request.form.to_dict())
+        result["row"] = render_template("customer_rows.html", customers=[result["customer"]])
+        return result
+    return api_proxy(create)
+
 @app.route("/api/check_stock")
 def api_check_stock():
     if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
-    headers = {"Authorization": f"Bearer {session['token']}"}
-    try:
-        resp = requests.get(f"{API_URL}/alerts/check", headers=headers)
-        return jsonify(resp.json())
-    except:
-        return jsonify({"error": "Backend connection failed"}), 500
+    return api_proxy(backend().check_alerts)
 
 @app.route("/api/alert_history")
 def api_alert_history():
     if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
-    headers = {"Authorization": f"Bearer {session['token']}"}
-    try:
-        resp = requests.get(f"{API_URL}/alerts/history", headers=headers)
-        return jsonify(resp.json())
-    except:
-        return jsonify({"error": "Backend connection failed"}), 500
+    is_read = request.args.get("is_read")
+    return api_proxy(lambda: backend().alert_history(
+        cursor=request.args.get("cursor"),
+        limit=request.args.get("limit", 10, type=int),
+        alert_type=request.args.get("alert_type") or None,
+        is_read=None if is_read in (None, "") else is_read == "true"
+    ))
+
+@app.route("/api/alerts/ack", methods=["POST"])
+def api_ack_alerts():
+    if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
+    body = request.get_json(silent=True) or {}
+    return api_proxy(lambda: backend().ack_alerts(ids=body.get("ids"), all=bool(body.get("all"))))
 
 @app.route("/api/stock_report")
 def api_stock_report():
     if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
-    headers = {"Authorization": f"Bearer {session['token']}"}
+    return api_proxy(backend().stock_status)
+
+@app.route("/api/events/stock")
+def api_stock_events():
+    """Backend'in canlı stok akışını (SSE) tarayıcıya aktar"""
+    if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
+    last_event_id = request.headers.get("Last-Event-ID")
     try:
-        resp = requests.get(f"{API_URL}/reports/stock-status", headers=headers)
-        return jsonify(resp.json())
-    except:
-        return jsonify({"error": "Backend connection failed"}), 500
+        upstream = backend().stream("/events/stock", {"Last-Event-ID": last_event_id} if last_event_id else None)
+    except ApiConnectionError:
+        return jsonify({"error": "Backend connection failed"}), 503
+    except ApiError as e:
+        return jsonify({"error": e.detail}), e.status_code
+
+    def relay():
+        try:
+            for chunk in upstream.iter_content(chunk_size=None):
+                yield chunk
+        except requests.RequestException:
+            pass  # backend bağlantısı koptu; EventSource kendisi yeniden bağlanır
+        finally:
+            upstream.close()
+
+    return Response(relay(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Çevrimdışı kasa kuyruğu: durum, elle senkron, çakışan satışların çözümü
+@app.route("/api/offline/status")
+def api_offline_status():
+    if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
+    if not offline_store: return jsonify({"error": "Çevrimdışı mod kapalı"}), 404
+    return jsonify({**offline_store.status(), "conflicts": offline_store.conflicts()})
+
+@app.route("/api/offline/sync", methods=["POST"])
+def api_offline_sync():
+    if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
+    if not offline_store: return jsonify({"error": "Çevrimdışı mod kapalı"}), 404
+    result = sync_worker.sync_once()
+    if offline_store.is_offline:
+        return jsonify({"error": "Backend'e hâlâ ulaşılamıyor", **offline_store.status()}), 503
+    return jsonify({**offline_store.status(), "synced": result})
+
+@app.route("/api/offline/resolve", methods=["POST"])
+def api_offline_resolve():
+    if "token" not in session: return jsonify({"error": "Unauthorized"}), 401
+    if not offline_store: return jsonify({"error": "Çevrimdışı mod kapalı"}), 404
+    body = request.get_json(silent=True) or {}
+    if body.get("action") not in ("requeue", "discard") or not isinstance(body.get("client_refs"), list):
+        return jsonify({"error": "action (requeue/discard) ve client_refs gerekli"}), 400
+    changed = offline_store.resolve(body["client_refs"], body["action"])
+    if body["action"] == "requeue":
+        sync_worker.wake()
+    return jsonify({"changed": changed, **offline_store.status()})
 
 @app.route("/logout")
 def logout():
@@ -3,54 +3,78 @@ JWT Token Kullanan İstemci Uygulaması
 Çalıştırma: python client_jwt.py
 """
 
-import requests
 import json
 from datetime import datetime
 import time
 
+from api_client.sync_client import AuthClient
+from api_client.errors import ApiError, ApiConnectionError
+
 # API URL'leri
 BASE_URL = "http://localhost:8001"
-LOGIN_URL = f"{BASE_URL}/login"
-PROFILE_URL = f"{BASE_URL}/profile"
-VALIDATE_URL = f"{BASE_URL}/validate"
-PROTECTED_URL = f"{BASE_URL}/protected"
-USERS_URL = f"{BASE_URL}/users"
 
 class JWTClient:
     def __init__(self):
+        self.api = AuthClient(BASE_URL)
         self.token = None
+        self.refresh_token = None
         self.user_info = None
-        self.headers = {}
+    
+    def _store_tokens(self, data):
+        """Sunucudan gelen token çiftini sakla"""
+        self.token = data["access_token"]
+        self.refresh_token = data.get("refresh_token")
+        self.user_info = data["user_info"]
+        self.api = self.api.with_token(self.token)
     
     def login(self, username, password):
         """Kullanıcı girişi yap ve token al"""
         try:
-            response = requests.post(LOGIN_URL, json={
-                "username": username,
-                "password": password
-            })
-            
-            if response.status_code == 200:
-                data = response.json()
-                self.token = data["access_token"]
-                self.user_info = data["user_info"]
-                self.headers = {
-                    "Authorization": f"Bearer {self.token}",
-                    "Content-Type": "application/json"
-                }
-                print("✅ Giriş başarılı!")
-                print(f"   Kullanıcı: {self.user_info['full_name']}")
-                print(f"   Rol: {self.user_info['role']}")
-                print(f"   Token: {self.token[:50]}...")
-                return True
-            else:
-                print(f"❌ Giriş başarısız: {response.json().get('detail', 'Bilinmeyen hata')}")
-                return False
+            self._store_tokens(self.api.login(username, password))
+            print("✅ Giriş başarılı!")
+            print(f"   Kullanıcı: {self.user_info['full_name']}")
+            print(f"   Rol: {self.user_info['role']}")
+            print(f"   Token: {self.token[:50]}...")
+            return True
                 
-        except requests.exceptions.ConnectionError:
+        except ApiConnectionError:
             print("❌ Sunucuya bağlanılamadı. server_jwt.py çalışıyor mu?")
             print(f"   Komut: uvicorn server_jwt:app --reload --port 8001")
             return False
+        except ApiError as e:
+            print(f"❌ Giriş başarısız: {e.detail}")
+            return False
+    
+    def refresh_session(self):
+        """Yenileme token'ı ile yeni token çifti al (şifre sormadan)"""
+        if not self.refresh_token:
+            print("❌ Önce giriş yapmalısınız!")
+            return False
+        
+        try:
+            self._store_tokens(self.api.refresh(self.refresh_token))
+            print("🔄 Token yenilendi")
+            return True
+        except ApiError as e:
+            print(f"❌ Token yenilenemedi: {e.detail}")
+            return False
+    
+    def logout(self):
+        """Token'ları sunucuda iptal et"""
+        if not self.token:
+            print("❌ Önce giriş yapmalısınız!")
+            return
+        
+        try:
+            self.api.logout(self.refresh_token)
+            print("👋 Oturum kapatıldı, token'lar iptal edildi")
+        except ApiError as e:
+            print(f"❌ Çıkış hatası: {e.detail}")
+        finally:
+            self.token = None
+            self.refresh_token = None
+            self.user_info = None
+            self.api = self.api.with_token(None)
     
     def get_profile(self):
         """Token ile profil bilgilerini getir"""
@@ -59,20 +83,16 @@ class JWTClient:
             return
         
         try:
-            response = requests.get(PROFILE_URL, headers=self.headers)
-            
-            if response.status_code == 200:
-                profile = response.json()
-                print("\n📋 PROFİL BİLGİLERİ:")
-                print(f"   Kullanıcı Adı: {profile['username']}")
-                print(f"   Ad Soyad: {profile['full_name']}")
-                print(f"   Rol: {profile['role']}")
-                return profile
-            else:
-                print(f"❌ Profil alınamadı: {response.json().get('detail')}")
-                
-        except Exception as e:
+            profile = self.api.profile()
+            print("\n📋 PROFİL BİLGİLERİ:")
+            print(f"   Kullanıcı Adı: {profile['username']}")
+            print(f"   Ad Soyad: {profile['full_name']}")
+            print(f"   Rol: {profile['role']}")
+            return profile
+        except ApiConnectionError as e:
             print(f"❌ Hata: {e}")
+        except ApiError as e:
+            print(f"❌ Profil alınamadı: {e.detail}")
     
     def validate_token(self, token=None):
         """Token'ı doğrula"""
@@ -83,11 +103,7 @@ class JWTClient:
             return
         
         try:
-            response = requests.post(VALIDATE_URL, json={
-                "token": token_to_validate
-            })
-            
-            result = response.json()
+            result = self.api.validate(token_to_validate)
             print("\n🔐 TOKEN DOĞRULAMA:")
             print(f"   Geçerli mi: {'✅' if result['valid'] else '❌'}")
             print(f"   Kullanıcı: {result.get('username', 'N/A')}")
@@ -95,7 +111,7 @@ class JWTClient:
             print(f"   Mesaj: {result.get('message', 'N/A')}")
             return result
             
-        except Exception as e:
+        except ApiError as e:
             print(f"❌ Doğrulama hatası: {e}")
     
     def access_protected_endpoint(self):
@@ -105,20 +121,16 @@ class JWTClient:
             return
         
         try:
-            response = requests.get(PROTECTED_URL, headers=self.headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                print("\n🔒 KORUMALI ENDPOINT:")
-                print(f"   Mesaj: {data['message']}")
-                print(f"   Kullanıcı: {data['user_data']['username']}")
-                print(f"   Token Süresi: {data['user_data']['token_expires']}")
-                return data
-            else:
-                print(f"❌ Erişim reddedildi: {response.json().get('detail')}")
-                
-        except Exception as e:
+            data = self.api.protected()
+            print("\n🔒 KORUMALI ENDPOINT:")
+            print(f"   Mesaj: {data['message']}")
+            print(f"   Kullanıcı: {data['user_data']['username']}")
+            print(f"   Token Süresi: {data['user_data']['token_expires']}")
+            return data
+        except ApiConnectionError as e:
             print(f"❌ Hata: {e}")
+        except ApiError as e:
+            print(f"❌ Erişim reddedildi: {e.detail}")
     
     def list_users(self):
         """Tüm kullanıcıları listele (sadece yönetici)"""
@@ -127,19 +139,15 @@ class JWTClient:
             return
         
         try:
-            response = requests.get(USERS_URL, headers=self.headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                print(f"\n👥 TOPLAM {data['count']} KULLANICI:")
-                for user in data['users']:
-                    print(f"   👤 {user['full_name']} ({user['username']}) - {user['role']}")
-                return data
-            else:
-                print(f"❌ Kullanıcılar listelenemedi: {response.json().get('detail')}")
-                
-        except Exception as e:
+            data = self.api.users()
+            print(f"\n👥 TOPLAM {data['count']} KULLANICI:")
+            for user in data['users']:
+                print(f"   👤 {user['full_name']} ({user['username']}) - {user['role']}")
+            return data
+        except ApiConnectionError as e:
             print(f"❌ Hata: {e}")
+        except ApiError as e:
+            print(f"❌ Kullanıcılar listelenemedi: {e.detail}")
     
     def decode_token_parts(self):
         """Token'ı manuel olarak decode et (eğitim amaçlı)"""
@@ -188,9 +196,9 @@ def main():
     
     # Sunucu kontrolü
     try:
-        response = requests.get(BASE_URL, timeout=2)
+        client.api.status()
         print("✅ Sunucu erişilebilir")
-    except:
+    except ApiError:
         print("❌ Sunucu çalışmıyor! Önce sunucuyu başlat:")
         print("   uvicorn server_jwt:app --reload --port 8001")
         return
@@ -206,10 +214,12 @@ def main():
         print("  6. Tüm Kullanıcıları Listele (Yönetici)")
         print("  7. Token Yapısını İncele")
         print("  8. Manuel Token Doğrula")
-        print("  9. Çıkış")
+        print("  9. Token Yenile")
+        print(" 10. Oturumu Kapat (token iptali)")
+        print(" 11. Çıkış")
         print("=" * 50)
         
-        choice = input("Seçiminiz (1-9): ").strip()
+        choice = input("Seçiminiz (1-11): ").strip()
         
         if choice == "1":
             client.login("yonetici", "admin123")
@@ -229,6 +239,10 @@ def main():
             token = input("Token girin: ").strip()
             client.validate_token(token)
         elif choice == "9":
+            client.refresh_session()
+        elif choice == "10":
+            client.logout()
+        elif choice == "11":
             print("👋 Çıkış yapılıyor...")
             break
         else:
@@ -1,9 +1,15 @@
 # database.py - PostgreSQL Bağlantı ve ORM Modelleri
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, String, Numeric, Date, DateTime, Boolean, Text, JSON, ForeignKey, Index
+from sqlalchemy import CheckConstraint, UniqueConstraint
+from sqlalchemy import select, func, text, event, FetchedValue
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import Session, sessionmaker, relationship, with_loader_criteria
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Optional
 import os
+import threading
+import time
 
 # ================ DATABASE BAĞLANTISI ================
 
@@ -22,6 +28,163 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base class (tüm tablolar bundan türeyecek)
 Base = declarative_base()
 
+# ================ OKUMA REPLİKASI ================
+
+REPLICA_CONFIG = {
+    # Boşsa tüm sorgular birincil veritabanına gider
+    "URL": os.getenv("DATABASE_REPLICA_URL") or None,
+    # Replika bundan fazla gerideyse okumalar birincile döner
+    "MAX_LAG_SECONDS": float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5)),
+    # Bir istemcinin son yazısı bu süre boyunca takip edilir
+    "STICKY_SECONDS": float(os.getenv("REPLICA_STICKY_SECONDS", 30)),
+    # Replika durum sorgusunun sonucu bu kadar süre yeniden kullanılır
+    "STATUS_TTL_SECONDS": float(os.getenv("REPLICA_STATUS_TTL", 0.5)),
+}
+
+replica_engine = create_engine(REPLICA_CONFIG["URL"], pool_pre_ping=True) if REPLICA_CONFIG["URL"] else None
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False,
+                                  bind=replica_engine) if replica_engine else SessionLocal
+
+def lsn_to_int(lsn: str) -> int:
+    """PostgreSQL WAL konumunu ('16/B374D848') karşılaştırılabilir sayıya çevir"""
+    high, low = lsn.split("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+class ReplicaRouter:
+    """Salt-okuma sorgularını replikaya, gerisini birincile yönlendirir
+
+    Kendi yazısını okuma garantisi: bir istemci yazdıktan sonra birincilin
+    WAL konumu kaydedilir; replika o konumu uygulayana kadar aynı istemcinin
+    okumaları birincilden yapılır. Replika erişilemez ya da MAX_LAG_SECONDS'tan
+    fazla gerideyse herkes birincile düşer.
+    """
+
+    def __init__(self, primary_engine, replica_engine, config: dict):
+        self.primary_engine = primary_engine
+        self.replica_engine = replica_engine
+        self.config = config
+        self._writes = {}  # istemci anahtarı → (WAL konumu, son geçerlilik)
+        self._lock = threading.Lock()
+        self._status = None
+        self._status_checked_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        # WAL konumu takibi PostgreSQL'e özgüdür
+        return self.replica_engine is not None and self.primary_engine.dialect.name == "postgresql"
+
+    def note_write(self, client_key: Optional[str]):
+        """İstemcinin commit ettiği yazının WAL konumunu kaydet"""
+        if not self.enabled or not client_key:
+            return
+        with self.primary_engine.connect() as conn:
+            lsn = lsn_to_int(conn.execute(text("SELECT pg_current_wal_lsn()::text")).scalar())
+        now = time.monotonic()
+        with self._lock:
+            self._writes[client_key] = (lsn, now + self.config["STICKY_SECONDS"])
+            # Süresi dolan kayıtları temizle (bellek sınırlı kalsın)
+            if len(self._writes) > 1000:
+                self._writes = {k: v for k, v in self._writes.items() if v[1] > now}
+
+    def replica_status(self) -> Optional[tuple]:
+        """(uygulanan WAL konumu, gecikme saniyesi); replika yoksa/erişilemezse None"""
+        if time.monotonic() - self._status_checked_at < self.config["STATUS_TTL_SECONDS"]:
+            return self._status
+        status = None
+        try:
+            with self.replica_engine.connect() as conn:
+                # Alınan WAL'ın tamamı uygulandıysa gecikme yoktur (boşta bekleyen
+                # birincilde son replay zamanı eskir ama replika güncel kalır)
+                row = conn.execute(text("""
+                    SELECT pg_last_wal_replay_lsn()::text,
+                           CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+                           END
+                """)).one()
+            if row[0] is not None:
+                status = (lsn_to_int(row[0]), float(row[1] or 0))
+        except Exception as e:
+            # Yalnızca sağlıklıdan hatalıya geçişte yaz (her TTL'de log basma)
+            if self._status is not None or not self._status_checked_at:
+                print(f"⚠️ Replika durumu okunamadı, birincil kullanılıyor: {e}")
+        self._status = status
+        self._status_checked_at = time.monotonic()
+        return status
+
+    def use_replica(self, client_key: Optional[str] = None) -> bool:
+        if not self.enabled:
+            return False
+        status = self.replica_status()
+        if status is None or status[1] > self.config["MAX_LAG_SECONDS"]:
+            return False
+        with self._lock:
+            write = self._writes.get(client_key) if client_key else None
+        if write and write[1] > time.monotonic() and status[0] < write[0]:
+            return False
+        return True
+
+    def session(self, client_key: Optional[str] = None):
+        """Okuma için uygun session'ı aç"""
+        return ReplicaSessionLocal() if self.use_replica(client_key) else SessionLocal()
+
+replica_router = ReplicaRouter(engine, replica_engine, REPLICA_CONFIG)
+
+# ================ ŞUBE KAPSAMI ================
+# Her şube bir kiracıdır (tenant). Şubeye ait tablolar BranchScoped'dan türer
+# ve branch_id kolonu taşır; index'leri branch_id ile başlar. Bir session'a
+# branch_scope() ile şube verilirse o session'daki tüm ORM sorguları (SELECT,
+# toplu UPDATE/DELETE, ilişki yüklemeleri) otomatik olarak o şubeye daraltılır
+# ve eklenen satırlara şube yazılır. Zincir geneli okumalar (şubeler arası
+# transfer önerisi) sorguya execution_options(all_branches=True) ekler.
+
+DEFAULT_BRANCH_ID = 1
+
+class BranchScoped:
+    """Şubeye ait tablolar için branch_id kolonu (şube kapsamının anahtarı)"""
+    branch_id = Column(Integer, nullable=False, default=DEFAULT_BRANCH_ID, server_default="1")
+
+def branch_scope(db: Session, branch_id: Optional[int]) -> Session:
+    """Session'ı tek şubeye kapsa (None: kapsamsız, tüm şubeler)"""
+    db.info["branch_id"] = branch_id
+    return db
+
+def session_branch(db: Session) -> int:
+    """Session'ın şubesi (kapsamsız session'lar varsayılan şubeye yazar)"""
+    branch_id = db.info.get("branch_id")
+    return DEFAULT_BRANCH_ID if branch_id is None else branch_id
+
+@contextmanager
+def as_branch(db: Session, branch_id: int):
+    """Aynı transaction içinde geçici olarak başka bir şube adına çalış (transfer)"""
+    previous = db.info.get("branch_id")
+    db.info["branch_id"] = branch_id
+    try:
+        yield db
+    finally:
+        db.info["branch_id"] = previous
+
+def branch_criteria(branch_id: int):
+    """ORM sorgusunu tek şubeye daraltan seçenek (şube kapsamlı session'lar otomatik ekler)"""
+    return with_loader_criteria(BranchScoped, lambda cls: cls.branch_id == branch_id, include_aliases=True)
+
+@event.listens_for(Session, "do_orm_execute")
+def _prune_to_branch(state):
+    branch_id = state.session.info.get("branch_id")
+    if branch_id is None or state.execution_options.get("all_branches", False):
+        return
+    if (state.is_select and not state.is_column_load and not state.is_relationship_load) \
+            or state.is_update or state.is_delete:
+        state.statement = state.statement.options(branch_criteria(branch_id))
+
+@event.listens_for(Session, "before_flush")
+def _stamp_branch(db, flush_context, instances):
+    branch_id = db.info.get("branch_id")
+    if branch_id is None:
+        return
+    for obj in db.new:
+        if isinstance(obj, BranchScoped) and obj.branch_id is None:
+            obj.branch_id = branch_id
+
 # ================ TABLO MODELLERİ ================
 
 class User(Base):
@@ -45,19 +208,41 @@ class Drug(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, index=True)
     active_ingredient = Column(String(100))
-    price = Column(Float, nullable=False)
+    price = Column(Numeric(10, 2, asdecimal=False), nullable=False)
     stock_quantity = Column(Integer, nullable=False, default=0)
     low_stock_threshold = Column(Integer, default=10)
     description = Column(Text)
     barcode = Column(String(50))
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # İlişkiler
     sales = relationship("Sale", back_populates="drug")
     stock_movements = relationship("StockMovement", back_populates="drug")
     alerts = relationship("Alert", back_populates="drug")
 
+class Branch(Base):
+    __tablename__ = "branches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    code = Column(String(20), unique=True, nullable=False)
+    name = Column(String(100), nullable=False)
+    city = Column(String(50))
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class BranchStock(BranchScoped, Base):
+    __tablename__ = "branch_stock"
+    __table_args__ = (
+        CheckConstraint("quantity >= 0", name="branch_stock_nonnegative"),
+    )
+    
+    # Şube stoğu: drugs.stock_quantity = SUM(quantity) (zincir toplamı)
+    branch_id = Column(Integer, ForeignKey("branches.id", ondelete="CASCADE"), primary_key=True)
+    drug_id = Column(Integer, ForeignKey("drugs.id", ondelete="CASCADE"), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Customer(Base):
     __tablename__ = "customers"
     
@@ -72,17 +257,18 @@ class Customer(Base):
     # İlişkiler
     sales = relationship("Sale", back_populates="customer")
 
-class Sale(Base):
+class Sale(BranchScoped, Base):
     __tablename__ = "sales"
     
     id = Column(Integer, primary_key=True, index=True)
     drug_id = Column(Integer, ForeignKey("drugs.id", ondelete="SET NULL"))
     customer_id = Column(Integer, ForeignKey("customers.id", ondelete="SET NULL"))
     quantity = Column(Integer, nullable=False)
-    unit_price = Column(Float, nullable=False)
-    total_price = Column(Float, nullable=False)
+    unit_price = Column(Numeric(10, 2, asdecimal=False), nullable=False)
+    total_price = Column(Numeric(10, 2, asdecimal=False), nullable=False)
     its_transaction_id = Column(String(50))
-    sale_date = Column(DateTime, default=datetime.utcnow)
+    # PostgreSQL'de sales, sale_date'e göre aylık partition'lıdır (DB'deki PK: id, sale_date)
+    sale_date = Column(DateTime, nullable=False, default=datetime.utcnow)
     created_by = Column(Integer, ForeignKey("users.id"))
     notes = Column(Text)
     
@@ -91,24 +277,53 @@ class Sale(Base):
     customer = relationship("Customer", back_populates="sales")
     created_by_user = relationship("User", back_populates="sales", foreign_keys=[created_by])
 
-class StockMovement(Base):
+class StockMovement(BranchScoped, Base):
     __tablename__ = "stock_movements"
+    # PostgreSQL'de previous/new_quantity trigger ile dolar; INSERT ... RETURNING ile okunur
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     drug_id = Column(Integer, ForeignKey("drugs.id"))
     movement_type = Column(String(20), nullable=False)  # 'purchase', 'sale', 'adjustment'
     quantity_change = Column(Integer, nullable=False)
-    previous_quantity = Column(Integer, nullable=False)
-    new_quantity = Column(Integer, nullable=False)
+    previous_quantity = Column(Integer, nullable=False, server_default=FetchedValue())
+    new_quantity = Column(Integer, nullable=False, server_default=FetchedValue())
     reason = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # PostgreSQL'de created_at'e göre aylık partition'lıdır (DB'deki PK: id, created_at)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     created_by = Column(Integer, ForeignKey("users.id"))
     
     # İlişkiler
     drug = relationship("Drug", back_populates="stock_movements")
     user = relationship("User", back_populates="stock_movements")
 
-class Alert(Base):
+class StockLedgerBaseline(Base):
+    __tablename__ = "stock_ledger_baselines"
+    
+    # Arşivlenmiş (silinmiş) stok hareketi partition'larının ilaç bazında toplamı
+    drug_id = Column(Integer, ForeignKey("drugs.id", ondelete="CASCADE"), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    as_of = Column(DateTime, nullable=False)
+
+class DrugLot(BranchScoped, Base):
+    __tablename__ = "drug_lots"
+    __table_args__ = (
+        UniqueConstraint("branch_id", "drug_id", "lot_number", name="uq_drug_lots_branch_lot"),
+        CheckConstraint("quantity >= 0", name="drug_lots_quantity_nonnegative"),
+    )
+    
+    # Şube stoğunun parti kırılımı: şube + ilaç başına SUM(quantity) = branch_stock.quantity
+    id = Column(Integer, primary_key=True, index=True)
+    drug_id = Column(Integer, ForeignKey("drugs.id", ondelete="CASCADE"), nullable=False)
+    lot_number = Column(String(50), nullable=False)
+    expiry_date = Column(Date)  # NULL: miadı bilinmiyor, FEFO'da en son tüketilir
+    quantity = Column(Integer, nullable=False, default=0)
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # İlişkiler
+    drug = relationship("Drug")
+
+class Alert(BranchScoped, Base):
     __tablename__ = "alerts"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -117,10 +332,106 @@ class Alert(Base):
     message = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    read_at = Column(DateTime)  # okundu işaretlendiği an (budama bu tarihe göre)
     
     # İlişkiler
     drug = relationship("Drug", back_populates="alerts")
 
+class SaleClientRef(Base):
+    __tablename__ = "sale_client_refs"
+    
+    # Çevrimdışı kasadan gelen satışın istemci kimliği -> yazılan satış (tekrar gönderime karşı)
+    client_ref = Column(String(64), primary_key=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False)
+    sale_id = Column(Integer, nullable=False)
+    synced_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class ItsNotification(BranchScoped, Base):
+    __tablename__ = "its_notifications"
+    
+    # İTS satış bildirimi kuyruğu (its/gateway.py); satışla aynı transaction'da eklenir
+    id = Column(Integer, primary_key=True, index=True)
+    sale_id = Column(Integer, nullable=False, unique=True)
+    sale_date = Column(DateTime, nullable=False)  # sales partition anahtarı
+    payload = Column(JSON, nullable=False)
+    status = Column(String(10), nullable=False, default="pending")  # 'pending', 'confirmed', 'rejected', 'failed'
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # gönderim sırasında kira sonu
+    transaction_id = Column(String(50))  # ITS onay numarası
+    last_error = Column(Text)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    confirmed_at = Column(DateTime)
+
+class OutboxEvent(BranchScoped, Base):
+    __tablename__ = "outbox"
+    
+    # Yan etki olayları (outbox/relay.py); yazıyla aynı transaction'da eklenir
+    id = Column(Integer, primary_key=True)
+    topic = Column(String(30), nullable=False)  # 'sale', 'stock', 'drug_added', 'drug_removed', 'branch'
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    failed_at = Column(DateTime)  # dolu: denemeler tükendi, relay atlar
+
+class SalesDaily(BranchScoped, Base):
+    __tablename__ = "sales_daily"
+    
+    # Günlük satış özeti; outbox relay'i satış olaylarından günceller
+    day = Column(Date, primary_key=True)
+    branch_id = Column(Integer, primary_key=True, default=DEFAULT_BRANCH_ID, server_default="1")
+    drug_id = Column(Integer, primary_key=True)
+    sale_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2, asdecimal=False), nullable=False, default=0)
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(64), primary_key=True)
+    token_type = Column(String(10), nullable=False)  # 'access', 'refresh'
+    username = Column(String(50), index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+# ================ SORGU INDEX'LERİ ================
+# migrations/versions/ altındaki index'lerle aynı isimler
+
+Index("ix_sales_customer_date", Sale.customer_id, Sale.sale_date.desc(), Sale.id.desc())
+Index("ix_sales_sale_date", Sale.sale_date)
+Index("ix_alerts_created", Alert.created_at.desc(), Alert.id.desc())
+Index("ix_alerts_unread", Alert.created_at.desc(), Alert.id.desc(),
+      postgresql_where=~Alert.is_read, sqlite_where=~Alert.is_read)
+Index("ix_alerts_drug_created", Alert.drug_id, Alert.created_at.desc())
+Index("ix_alerts_read_at", Alert.read_at,
+      postgresql_where=Alert.is_read, sqlite_where=Alert.is_read)
+Index("ix_sales_drug_date", Sale.drug_id, Sale.sale_date)
+Index("ix_stock_movements_drug_created", StockMovement.drug_id, StockMovement.created_at)
+Index("ix_stock_movements_created", StockMovement.created_at)
+_lot_filled = DrugLot.quantity > 0
+Index("ix_drug_lots_fefo", DrugLot.branch_id, DrugLot.drug_id, DrugLot.expiry_date, DrugLot.id,
+      postgresql_where=_lot_filled, sqlite_where=_lot_filled)
+Index("ix_drug_lots_expiry", DrugLot.branch_id, DrugLot.expiry_date, DrugLot.id,
+      postgresql_where=_lot_filled, sqlite_where=_lot_filled)
+# Şube kapsamlı sorgular: branch_id önde (tek şubenin aralığı okunur)
+Index("ix_sales_branch_date", Sale.branch_id, Sale.sale_date)
+Index("ix_sales_branch_drug_date", Sale.branch_id, Sale.drug_id, Sale.sale_date)
+Index("ix_stock_movements_branch_drug_created", StockMovement.branch_id, StockMovement.drug_id,
+      StockMovement.created_at)
+Index("ix_alerts_branch_created", Alert.branch_id, Alert.created_at.desc(), Alert.id.desc())
+# Transfer önerisi: bir ilacın tüm şubelerdeki stoğu
+Index("ix_branch_stock_drug", BranchStock.drug_id, BranchStock.quantity)
+# Şube stok listeleri (düşük/kritik stok, rapor): drugs ile join index'ten, tablo okunmadan
+Index("ix_branch_stock_levels", BranchStock.branch_id, BranchStock.drug_id, BranchStock.quantity)
+_low_stock = Drug.stock_quantity <= Drug.low_stock_threshold
+Index("ix_drugs_low_stock", Drug.stock_quantity, Drug.id,
+      postgresql_where=_low_stock, sqlite_where=_low_stock)
+# İTS gönderici: yalnızca bekleyen bildirimler
+_its_pending = ItsNotification.status == "pending"
+Index("ix_its_notifications_due", ItsNotification.next_attempt_at, ItsNotification.id,
+      postgresql_where=_its_pending, sqlite_where=_its_pending)
+Index("ix_sales_daily_branch_day", SalesDaily.branch_id, SalesDaily.day)
+
 # ================ YARDIMCI FONKSİYONLAR ================
 
 def get_db():
@@ -131,24 +442,70 @@ def get_db():
     finally:
         db.close()
 
+def get_branch_db(branch_id: int):
+    """Tek şubeye kapsanmış yazma session'ı"""
+    db = branch_scope(SessionLocal(), branch_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db(client_key: Optional[str] = None, branch_id: Optional[int] = None):
+    """Salt-okuma sorguları (rapor, arama, MCP) için session: replika uygunsa
+    replikadan, istemcinin henüz replikaya ulaşmamış bir yazısı varsa birincilden.
+    branch_id verilirse sorgular o şubeye daraltılır."""
+    db = branch_scope(replica_router.session(client_key), branch_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_data_version(db) -> tuple:
+    """Stok/satış verisinin ucuz sürüm damgası (önbellek anahtarları için)
+    
+    İlaç eklenince/silinince sayı, stok veya eşik değişince max(updated_at),
+    satış yapılınca max(sales.id) değişir. Üçü de index'ten okunur. Stok
+    defteri trigger'ı updated_at'e clock_timestamp() yazar (0014): geç commit
+    edilen eski bir transaction'ın damgası da max'ı ilerletir.
+    """
+    row = db.query(
+        select(func.count(Drug.id)).scalar_subquery(),
+        select(func.max(Drug.updated_at)).scalar_subquery(),
+        select(func.max(Sale.id)).scalar_subquery()
+    ).one()
+    return tuple(str(v) for v in row)
+
 def create_tables():
-    """Tabloları veritabanında oluşturur"""
-    Base.metadata.create_all(bind=engine)
-    print("✅ PostgreSQL tabloları oluşturuldu!")
+    """Şemayı hazırlar: PostgreSQL'de şemanın sahibi migration'lardır
+    (migrations/versions), diğer veritabanlarında (yerel geliştirme) create_all"""
+    if engine.dialect.name != "postgresql":
+        Base.metadata.create_all(bind=engine)
+        print(f"✅ {engine.dialect.name} tabloları oluşturuldu (create_all)")
+        return
+
+    from migrations.config import MIGRATION_CONFIG
+    from migrations.runner import pending, upgrade
+    if MIGRATION_CONFIG["MIGRATE_ON_STARTUP"]:
+        upgrade(engine)
+        print("✅ PostgreSQL şeması güncel")
+    else:
+        waiting = pending(engine)
+        if waiting:
+            print(f"⚠️ {len(waiting)} migration bekliyor: python -m migrations upgrade")
 
 def init_database():
-    """Veritabanını başlat ve tabloları oluştur"""
+    """Veritabanını başlat ve şemayı hazırla"""
     create_tables()
     
     # Test bağlantısı
     db = SessionLocal()
     try:
-        result = db.execute("SELECT version();")
+        result = db.execute(text("SELECT version();"))
         version = result.fetchone()[0]
         print(f"✅ PostgreSQL bağlantısı başarılı: {version}")
         
         # Tablo sayılarını kontrol et
-        table_count = db.execute("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = 'public';").fetchone()[0]
+        table_count = db.execute(text("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = 'public';")).fetchone()[0]
         print(f"✅ {table_count} tablo oluşturuldu")
         
     except Exception as e:
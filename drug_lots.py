@@ -0,0 +1,130 @@
+# drug_lots.py
+"""
+Parti (lot) ve son kullanma tarihi takibi, FEFO (ilk miadı dolan ilk çıkar)
+Her ilacın stoğu drug_lots satırlarına bölünür; parti miktarları toplamı
+drugs.stock_quantity'ye eşittir. Stok yine yalnızca stok defterinden
+(stock_ledger.record_movement) değişir; buradaki fonksiyonlar aynı
+transaction içinde hareketin parti kırılımını yazar (commit etmez).
+- Satış: ix_drug_lots_fefo (drug_id, expiry_date, id) index'inde ilacın en
+  erken miatlı dolu partisine O(log n) ile inilir; yalnızca tüketilen
+  partiler okunur ve kilitlenir.
+- Toplu satış (POST /sales/batch): ilaç başına satılabilir stok tek gruplu
+  sorguyla okunur; tek tahsis yapılıp split ile satışlara sırayla bölünür.
+- Giriş: aynı lot numarası varsa üstüne eklenir, yoksa yeni parti açılır.
+- Miadı yaklaşanlar: ix_drug_lots_expiry kısmi index'i (quantity > 0) ile
+  taranır; boşalmış partiler index'te yer almaz.
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from database import Drug, DrugLot
+
+LOT_CONFIG = {
+    # Miadı geçmiş partilerden satış yapılsın mı (varsayılan: hayır)
+    "SELL_EXPIRED": os.environ.get("LOT_SELL_EXPIRED", "false").lower() == "true",
+    # /lots/expiring varsayılan ufku (gün)
+    "EXPIRY_WARNING_DAYS": int(os.environ.get("LOT_EXPIRY_WARNING_DAYS", 90)),
+}
+
+class InsufficientLots(Exception):
+    """Satılabilir (miadı geçmemiş) partiler istenen miktarı karşılamıyor"""
+
+    def __init__(self, drug: Drug, available: int, requested: int):
+        self.available = available
+        super().__init__(f"{drug.name}: satılabilir parti stoğu {available}, istenen {requested}")
+
+def default_lot_number() -> str:
+    """Lot numarası verilmeyen girişler günlük tek partide toplanır"""
+    return f"SIP-{datetime.utcnow():%Y%m%d}"
+
+def receive(db: Session, drug: Drug, quantity: int, lot_number: Optional[str] = None,
+            expiry_date: Optional[date] = None) -> DrugLot:
+    """Stok girişini partiye yaz (aynı lot varsa üstüne ekle)"""
+    lot_number = lot_number or default_lot_number()
+    lot = db.query(DrugLot).filter(DrugLot.drug_id == drug.id, DrugLot.lot_number == lot_number)\
+            .with_for_update().first()
+    if lot is None:
+        lot = DrugLot(drug_id=drug.id, lot_number=lot_number, expiry_date=expiry_date, quantity=0)
+        db.add(lot)
+    elif expiry_date and lot.expiry_date and lot.expiry_date != expiry_date:
+        raise ValueError(f"{lot_number} partisi {lot.expiry_date} miadıyla kayıtlı")
+    elif expiry_date:
+        lot.expiry_date = expiry_date
+    lot.quantity += quantity
+    db.flush()
+    return lot
+
+def _sellable(query):
+    """Miadı geçmiş partileri dışla (LOT_SELL_EXPIRED kapalıysa)"""
+    if LOT_CONFIG["SELL_EXPIRED"]:
+        return query
+    return query.filter(or_(DrugLot.expiry_date >= datetime.utcnow().date(), DrugLot.expiry_date.is_(None)))
+
+def sellable_quantities(db: Session, drug_ids: List[int]) -> Dict[int, int]:
+    """İlaç başına satılabilir parti stoğu (tek gruplu sorgu, fefo index'i üzerinden)"""
+    query = db.query(DrugLot.drug_id, func.sum(DrugLot.quantity))\
+              .filter(DrugLot.drug_id.in_(drug_ids), DrugLot.quantity > 0)
+    return {drug_id: int(total) for drug_id, total in _sellable(query).group_by(DrugLot.drug_id).all()}
+
+def allocate(db: Session, drug: Drug, quantity: int) -> List[Tuple[DrugLot, int]]:
+    """FEFO ile partilerden düş; (parti, düşülen miktar) listesi
+
+    Her dolu partide en az 1 adet olduğundan en fazla `quantity` parti gerekir;
+    sorgu bu kadar satırla sınırlanır ve satırlar FOR UPDATE ile kilitlenir.
+    """
+    query = _sellable(db.query(DrugLot).filter(DrugLot.drug_id == drug.id, DrugLot.quantity > 0))
+    lots = query.order_by(DrugLot.expiry_date.asc().nulls_last(), DrugLot.id)\
+                .limit(quantity).with_for_update().all()
+
+    available = sum(lot.quantity for lot in lots)
+    if available < quantity:
+        raise InsufficientLots(drug, available, quantity)
+
+    allocations, remaining = [], quantity
+    for lot in lots:
+        taken = min(lot.quantity, remaining)
+        lot.quantity -= taken
+        allocations.append((lot, taken))
+        remaining -= taken
+        if not remaining:
+            break
+    db.flush()
+    return allocations
+
+def split(allocations: List[Tuple[DrugLot, int]], quantities: List[int]) -> List[List[Tuple[DrugLot, int]]]:
+    """Tek tahsisi sırayla satışlara böl (ilk satış en erken miatlı partiden alır)"""
+    lots = [[lot, taken] for lot, taken in allocations]
+    parts, i = [], 0
+    for quantity in quantities:
+        part = []
+        while quantity:
+            taken = min(lots[i][1], quantity)
+            part.append((lots[i][0], taken))
+            lots[i][1] -= taken
+            quantity -= taken
+            i += not lots[i][1]
+        parts.append(part)
+    return parts
+
+def describe(allocations: List[Tuple[DrugLot, int]]) -> list:
+    """Tahsisin yanıt/kayıt biçimi"""
+    return [{
+        "lot_id": lot.id,
+        "lot_number": lot.lot_number,
+        "expiry_date": lot.expiry_date.isoformat() if lot.expiry_date else None,
+        "quantity": taken
+    } for lot, taken in allocations]
+
+def sale_note(allocations: List[Tuple[DrugLot, int]]) -> str:
+    """Satış kaydına yazılan parti izi (ör. 'Parti: A123 x2, B456 x1')"""
+    return "Parti: " + ", ".join(f"{lot.lot_number} x{taken}" for lot, taken in allocations)
+
+def expiry_horizon(days: Optional[int] = None) -> date:
+    """Bugünden itibaren `days` gün sonrası (miadı yaklaşanlar için üst sınır)"""
+    days = LOT_CONFIG["EXPIRY_WARNING_DAYS"] if days is None else days
+    return datetime.utcnow().date() + timedelta(days=days)
@@ -1,18 +1,41 @@
 # eczane_otomasyonu.py - PostgreSQL ile Tam Entegre
-from fastapi import FastAPI, HTTPException, Depends, status, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response, status, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime, timedelta
-import random
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Literal
+from datetime import date, datetime, timedelta, timezone
 import time
 import hashlib
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, tuple_
+from sqlalchemy.exc import IntegrityError
 
 # Database modüllerini import et
-from database import get_db, SessionLocal, init_database
-from database import User, Drug, Customer, Sale, StockMovement, Alert
+from database import get_db, get_branch_db, get_read_db, get_data_version, replica_router, SessionLocal, init_database, engine
+from database import User, Branch, BranchStock, Drug, DrugLot, Customer, Sale, SalesDaily, Alert
+from database import DEFAULT_BRANCH_ID, as_branch, session_branch
+import batch_sales
+import branches
+import drug_lots
+from events import sale_event, stock_alert_row, stock_event, stock_events
+from its.config import ITS_CONFIG
+from its.gateway import ItsGateway
+from outbox.relay import OutboxRelay, emit
+from outbox.subscribers import CacheInvalidation, ItsNotifications, LiveStream, SalesRollup, StockAlerts
+from analytics import queries as analytics
+from analytics.config import ANALYTICS_CONFIG, COPURCHASE_CONFIG
+from analytics.copurchase import copurchase_index
+from analytics.snapshot import sales_snapshot
+from auth.passwords import dummy_hash, hash_password, verify_password, needs_rehash
+from maintenance import partitions
+from maintenance.scheduler import start_scheduler as start_maintenance_scheduler
+from pagination import decode_cursor, paginate
+from responses import (CUSTOMER, CUSTOMER_LIST, DRUG, DRUG_LIST, STOCK_DRUG_LIST, CustomerResponse,
+                       DrugResponse, StockDrugResponse, as_dict, columns, json_response)
+from stock_ledger import InsufficientStock, branch_quantity, record_movement
+from write_behind import WRITE_BEHIND_CONFIG, WriteBehindBuffer
 
 app = FastAPI(title="Eczane Otomasyonu API", version="3.0 - PostgreSQL")
 
@@ -25,6 +48,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ================ OKUMA REPLİKASI YÖNLENDİRMESİ ================
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+def client_key(request: Request) -> str:
+    """Kendi yazısını okuma takibi için istemci anahtarı (token, yoksa IP)"""
+    return request.headers.get("authorization") or (request.client.host if request.client else "")
+
+@app.middleware("http")
+async def track_writes(request: Request, call_next):
+    """Başarılı yazılardan sonra istemcinin WAL konumunu kaydet"""
+    response = await call_next(request)
+    if replica_router.enabled and request.method in WRITE_METHODS and response.status_code < 400:
+        try:
+            await run_in_threadpool(replica_router.note_write, client_key(request))
+        except Exception as e:
+            print(f"⚠️ Yazı konumu kaydedilemedi: {e}")
+    return response
+
+# ================ ŞUBE KAPSAMI ================
+
+def current_branch(x_branch_id: Optional[int] = Header(None)) -> int:
+    """İsteğin şubesi (X-Branch-Id başlığı; yoksa merkez şube)"""
+    branch_id = DEFAULT_BRANCH_ID if x_branch_id is None else x_branch_id
+    if not branches.branch_registry.exists(branch_id):
+        raise HTTPException(404, "Şube bulunamadı")
+    return branch_id
+
+def branch_db(branch_id: int = Depends(current_branch)):
+    """Yazma session'ı; tüm ORM sorguları isteğin şubesine daraltılır"""
+    yield from get_branch_db(branch_id)
+
+def read_db(request: Request, branch_id: int = Depends(current_branch)):
+    """Rapor/arama endpoint'leri için okuma session'ı (replika yönlendirmeli, şube kapsamlı)"""
+    yield from get_read_db(client_key(request), branch_id)
+
+def analytics_snapshot():
+    """Analitik endpoint'leri için satışların güncel kolon anlık görüntüsü"""
+    if not ANALYTICS_CONFIG["ENABLED"]:
+        raise HTTPException(503, "Satış analitiği devre dışı (ANALYTICS_ENABLED)")
+    return sales_snapshot.current
+
 # Alert servisini import et
 try:
     from alerts.alert_service import alert_service
@@ -46,16 +111,39 @@ class DrugCreate(BaseModel):
     stock_quantity: int
     description: Optional[str] = None
     low_stock_threshold: Optional[int] = 10
+    lot_number: Optional[str] = Field(None, max_length=50)  # ilk stoğun partisi
+    expiry_date: Optional[date] = None
 
 class SaleRequest(BaseModel):
     drug_id: int
     quantity: int = 1
     customer_id: Optional[int] = None
 
+class SaleBatchItem(BaseModel):
+    client_ref: str = Field(..., min_length=8, max_length=64)  # kasanın verdiği UUID
+    drug_id: int
+    quantity: int = Field(1, gt=0)
+    customer_id: Optional[int] = None
+    unit_price: Optional[float] = Field(None, ge=0)  # satış anında uygulanan fiyat
+    sold_at: Optional[datetime] = None
+
+    @field_validator("sold_at")
+    @classmethod
+    def naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        """Saat dilimli zamanı UTC'ye çevir (sales.sale_date saat dilimsiz UTC tutar)"""
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+class SaleBatchRequest(BaseModel):
+    sales: List[SaleBatchItem] = Field(..., max_length=batch_sales.BATCH_CONFIG["MAX_ITEMS"])
+
 class OrderRequest(BaseModel):
     drug_id: int
     quantity: int = 10
     auto_order: bool = False
+    lot_number: Optional[str] = Field(None, max_length=50)  # boşsa günlük sipariş partisi
+    expiry_date: Optional[date] = None
 
 class CustomerCreate(BaseModel):
     name: str
@@ -64,67 +152,59 @@ class CustomerCreate(BaseModel):
     email: Optional[str] = None
     address: Optional[str] = None
 
-class DrugResponse(BaseModel):
-    id: int
-    name: str
-    active_ingredient: str
-    price: float
-    stock_quantity: int
-    low_stock_threshold: int
-    description: Optional[str] = None
+class BranchCreate(BaseModel):
+    code: str = Field(..., max_length=20)
+    name: str = Field(..., max_length=100)
+    city: Optional[str] = Field(None, max_length=50)
 
-# ================ YARDIMCI FONKSİYONLAR ================
+class TransferRequest(BaseModel):
+    drug_id: int
+    from_branch_id: int
+    to_branch_id: int
+    quantity: int = Field(..., gt=0)
 
-def hash_password(password: str) -> str:
-    """Basit şifre hashleme"""
-    return hashlib.md5(password.encode()).hexdigest()
+class AlertAckRequest(BaseModel):
+    ids: Optional[List[int]] = Field(None, max_length=10000)
+    all: bool = False  # ids yerine filtreye uyan tüm okunmamış uyarılar
+    alert_type: Optional[str] = None
+    drug_id: Optional[int] = None
+    up_to_id: Optional[int] = None  # bu id'den sonra gelen uyarılar etkilenmez
+
+# ================ YARDIMCI FONKSİYONLAR ================
 
 def create_token(username: str) -> str:
     """Basit token oluştur"""
     return hashlib.md5(f"{username}{time.time()}".encode()).hexdigest()
 
 def check_stock_levels(db: Session):
-    """Stok seviyelerini kontrol et ve uyarı oluştur"""
+    """Şubenin stok seviyelerini kontrol et ve uyarı oluştur"""
     try:
-        drugs = db.query(Drug).all()
-        for drug in drugs:
-            if drug.stock_quantity <= 5:
-                # Kritik stok uyarısı
-                alert = Alert(
-                    drug_id=drug.id,
-                    alert_type="critical_stock",
-                    message=f"{drug.name} kritik stokta! ({drug.stock_quantity} adet kaldı)"
-                )
-                db.add(alert)
-            elif drug.stock_quantity <= drug.low_stock_threshold:
-                # Düşük stok uyarısı
-                alert = Alert(
-                    drug_id=drug.id,
-                    alert_type="low_stock",
-                    message=f"{drug.name} düşük stokta. Eşik: {drug.low_stock_threshold}, Mevcut: {drug.stock_quantity}"
-                )
-                db.add(alert)
+        branch_id = session_branch(db)
+        for drug in branches.branch_drugs(db, StockDrugResponse).all():
+            alert = stock_alert_row(stock_event(drug, branch_id=branch_id))
+            if alert:
+                db.add(Alert(**alert))
         db.commit()
     except Exception as e:
         print(f"Stok kontrol hatası: {e}")
 
-def log_stock_movement(db: Session, drug_id: int, movement_type: str, 
-                       quantity_change: int, previous_qty: int, reason: str = ""):
-    """Stok hareketini logla"""
-    try:
-        movement = StockMovement(
-            drug_id=drug_id,
-            movement_type=movement_type,
-            quantity_change=quantity_change,
-            previous_quantity=previous_qty,
-            new_quantity=previous_qty + quantity_change,
-            reason=reason,
-            created_by=1  # Default admin user
-        )
-        db.add(movement)
-        db.commit()
-    except Exception as e:
-        print(f"Stok log hatası: {e}")
+# Satış sonrası uyarılar için yazma-arkası tampon (WRITE_BEHIND_ENABLED=true ise)
+alert_buffer = WriteBehindBuffer(engine, Alert.__table__) if WRITE_BEHIND_CONFIG["ENABLED"] else None
+
+# ITS satış bildirimleri: satışla aynı transaction'da kuyruğa, arka planda partiler halinde
+its_gateway = ItsGateway() if ITS_CONFIG["ENABLED"] else None
+
+# Yan etkiler: yazılar aynı transaction'da outbox'a olay ekler (emit), relay
+# commit edilmiş olayları partiler halinde abonelere dağıtır
+outbox_relay = OutboxRelay()
+outbox_relay.subscribe(LiveStream(stock_events))
+outbox_relay.subscribe(StockAlerts(stock_events, buffer=alert_buffer,
+                                   notifier=alert_service.on_level_change if ALERTS_ENABLED else None))
+outbox_relay.subscribe(SalesRollup())
+if its_gateway:
+    outbox_relay.subscribe(ItsNotifications(its_gateway))
+outbox_relay.subscribe(CacheInvalidation(branches.branch_registry,
+                                         sales_snapshot if ANALYTICS_CONFIG["ENABLED"] else None))
 
 # ================ UYGULAMA BAŞLANGICI ================
 
@@ -135,8 +215,31 @@ def startup_event():
         init_database()
         print("✅ PostgreSQL veritabanı hazır")
         
-        # Demo kullanıcıları kontrol et
+        if alert_buffer:
+            alert_buffer.start()
+        if its_gateway:
+            its_gateway.start()
+        outbox_relay.start()
+        
+        # Önümüzdeki aylar için satış/stok partition'ları; arşiv ve budama günlük işte
+        partitions.run_maintenance(engine, archive=False)
+        start_maintenance_scheduler(engine)
+        
+        # Satış analitiği: kolon anlık görüntüsü replikadan (varsa) artımlı yenilenir
+        # ve birlikte alım indeksi her yenilemede yeni satışlarla güncellenir
+        if ANALYTICS_CONFIG["ENABLED"]:
+            copurchase_index.load()
+            sales_snapshot.listeners.append(copurchase_index.update)
+            sales_snapshot.start(replica_router.session)
+        
+        # Merkez şube (PostgreSQL'de migration 0008 ekler)
         db = SessionLocal()
+        if not db.get(Branch, DEFAULT_BRANCH_ID):
+            db.add(Branch(id=DEFAULT_BRANCH_ID, code="MERKEZ", name="Merkez Eczane"))
+            db.commit()
+        branches.branch_registry.reload()
+        
+        # Demo kullanıcıları kontrol et
         if db.query(User).count() == 0:
             # Demo kullanıcıları ekle
             admin = User(
@@ -158,32 +261,52 @@ def startup_event():
         
         if db.query(Drug).count() == 0:
             # Demo ilaçları ekle
+            # (ilaç, açılış stoğu): stok, stok defteri üzerinden girilir
             demo_drugs = [
-                Drug(name="Parol", active_ingredient="Parasetamol", price=50.0, 
-                     stock_quantity=100, low_stock_threshold=10, description="Ağrı kesici"),
-                Drug(name="Majezik", active_ingredient="Flurbiprofen", price=85.0, 
-                     stock_quantity=20, low_stock_threshold=5, description="Anti-enflamatuar"),
-                Drug(name="Aspirin", active_ingredient="Asetilsalisilik Asit", price=30.0, 
-                     stock_quantity=5, low_stock_threshold=10, description="Kan sulandırıcı"),
-                Drug(name="Augmentin", active_ingredient="Amoksisilin", price=120.0, 
-                     stock_quantity=3, low_stock_threshold=5, description="Antibiyotik"),
-                Drug(name="Ventolin", active_ingredient="Salbutamol", price=45.0, 
-                     stock_quantity=15, low_stock_threshold=8, description="Astım ilacı")
+                (Drug(name="Parol", active_ingredient="Parasetamol", price=50.0, 
+                      low_stock_threshold=10, description="Ağrı kesici"), 100),
+                (Drug(name="Majezik", active_ingredient="Flurbiprofen", price=85.0, 
+                      low_stock_threshold=5, description="Anti-enflamatuar"), 20),
+                (Drug(name="Aspirin", active_ingredient="Asetilsalisilik Asit", price=30.0, 
+                      low_stock_threshold=10, description="Kan sulandırıcı"), 5),
+                (Drug(name="Augmentin", active_ingredient="Amoksisilin", price=120.0, 
+                      low_stock_threshold=5, description="Antibiyotik"), 3),
+                (Drug(name="Ventolin", active_ingredient="Salbutamol", price=45.0, 
+                      low_stock_threshold=8, description="Astım ilacı"), 15)
             ]
-            for drug in demo_drugs:
+            demo_expiry = datetime.utcnow().date() + timedelta(days=365)
+            for drug, opening_stock in demo_drugs:
+                drug.stock_quantity = 0
                 db.add(drug)
+                db.flush()
+                record_movement(db, drug, "purchase", opening_stock, "Demo açılış stoğu")
+                drug_lots.receive(db, drug, opening_stock, f"DEMO-{drug.id:04d}", demo_expiry)
             db.commit()
             print("✅ Demo ilaçlar eklendi")
         
         db.close()
         
         if ALERTS_ENABLED:
-            alert_service.start_scheduler()
-            print("🔄 Otomatik stok uyarı servisi aktif")
+            # Uyarı servisi backend'i HTTP ile yoklamaz; seviye değişimleri outbox'tan
+            # kuyruğuna gelir, otomatik siparişler süreç içinde şubeye girilir
+            alert_service.order_handler = auto_order
+            alert_service.start_worker()
+            print("🔄 Otomatik stok uyarı servisi aktif (outbox aboneliği)")
             
     except Exception as e:
         print(f"❌ Startup hatası: {e}")
 
+@app.on_event("shutdown")
+def shutdown_event():
+    """Kapanırken tamponda bekleyen satırları yaz"""
+    outbox_relay.stop()
+    if ALERTS_ENABLED:
+        alert_service.stop_worker()
+    if its_gateway:
+        its_gateway.stop()
+    if alert_buffer:
+        alert_buffer.stop()
+
 # ================ AUTH ENDPOINT'LERİ ================
 
 @app.post("/login")
@@ -191,12 +314,18 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
     """Kullanıcı girişi"""
     user = db.query(User).filter(User.username == request.username).first()
     
-    if not user or user.password_hash != hash_password(request.password):
+    # Kullanıcı yoksa da aynı maliyette doğrula: süre farkı kullanıcı adını sızdırmasın
+    if not verify_password(request.password, user.password_hash if user else dummy_hash()) or not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Kullanıcı adı veya şifre hatalı"
         )
     
+    # Eski MD5 hash'leri bcrypt'e yükselt
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(request.password)
+        db.commit()
+    
     token = create_token(request.username)
     
     return {
@@ -211,51 +340,61 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
 
 # ================ İLAÇ ENDPOINT'LERİ ================
 
-@app.get("/drugs")
-def get_all_drugs(db: Session = Depends(get_db)):
+@app.get("/drugs", response_model=List[DrugResponse])
+def get_all_drugs(db: Session = Depends(read_db)):
     """Tüm ilaçları getir"""
-    drugs = db.query(Drug).order_by(Drug.name).all()
-    return [{
-        "id": d.id,
-        "name": d.name,
-        "active_ingredient": d.active_ingredient,
-        "price": float(d.price),
-        "stock_quantity": d.stock_quantity,
-        "low_stock_threshold": d.low_stock_threshold,
-        "description": d.description
-    } for d in drugs]
-
-@app.get("/drugs/{drug_id}")
-def get_drug(drug_id: int, db: Session = Depends(get_db)):
+    drugs = branches.branch_drugs(db, DrugResponse).order_by(Drug.name).all()
+    return json_response(DRUG_LIST, drugs)
+
+# :int dönüştürücü, /drugs/low-stock gibi sabit yolların burada yakalanmasını önler
+@app.get("/drugs/{drug_id:int}", response_model=DrugResponse)
+def get_drug(drug_id: int, db: Session = Depends(branch_db)):
     """Belirli bir ilacı getir"""
-    drug = db.query(Drug).filter(Drug.id == drug_id).first()
+    drug = branches.branch_drugs(db, DrugResponse).filter(Drug.id == drug_id).first()
     if not drug:
         raise HTTPException(404, "İlaç bulunamadı")
-    return drug
+    return json_response(DRUG, drug)
+
+@app.get("/drugs/{drug_id:int}/related")
+def get_related_drugs(drug_id: int, limit: int = Query(10, ge=1, le=50),
+                      snapshot=Depends(analytics_snapshot)):
+    """Bu ilaçla birlikte alınan ilaçlar (bellekteki indeksten, veritabanına gitmez)"""
+    items = copurchase_index.related(drug_id, limit)
+    for item in items:
+        item["drug_name"] = snapshot.drug_name(item["drug_id"])
+    return {"drug_id": drug_id, "window_days": COPURCHASE_CONFIG["WINDOW_DAYS"], "items": items}
 
 @app.post("/drugs", status_code=201)
-def add_drug(drug: DrugCreate, db: Session = Depends(get_db)):
+def add_drug(drug: DrugCreate, db: Session = Depends(branch_db)):
     """Yeni ilaç ekle"""
     # Aynı isimde ilaç var mı kontrol et
     existing = db.query(Drug).filter(Drug.name == drug.name).first()
     if existing:
         raise HTTPException(400, "Bu isimde ilaç zaten var")
     
+    # İlaç 0 stokla eklenir; ilk stok aynı transaction'da defter hareketiyle girilir
     new_drug = Drug(
         name=drug.name,
         active_ingredient=drug.active_ingredient,
         price=drug.price,
-        stock_quantity=drug.stock_quantity,
+        stock_quantity=0,
         low_stock_threshold=drug.low_stock_threshold,
         description=drug.description
     )
     
     db.add(new_drug)
+    db.flush()
+    if drug.stock_quantity:
+        try:
+            record_movement(db, new_drug, "purchase", drug.stock_quantity, "İlk stok ekleme")
+        except InsufficientStock:
+            raise HTTPException(400, "Stok miktarı negatif olamaz")
+        drug_lots.receive(db, new_drug, drug.stock_quantity, drug.lot_number, drug.expiry_date)
+    event = stock_event(new_drug, branch_id=session_branch(db))
+    emit(db, "drug_added", event)
     db.commit()
     db.refresh(new_drug)
-    
-    # Stok logu
-    log_stock_movement(db, new_drug.id, "purchase", drug.stock_quantity, 0, "İlk stok ekleme")
+    outbox_relay.wake()
     
     # Stok kontrolü
     check_stock_levels(db)
@@ -263,11 +402,13 @@ def add_drug(drug: DrugCreate, db: Session = Depends(get_db)):
     return {
         "id": new_drug.id,
         "name": new_drug.name,
-        "message": "İlaç başarıyla eklendi"
+        "message": "İlaç başarıyla eklendi",
+        "drug": as_dict(DRUG, new_drug),
+        "stock": event
     }
 
 @app.put("/drugs/{drug_id}/threshold")
-def update_stock_threshold(drug_id: int, threshold: int, db: Session = Depends(get_db)):
+def update_stock_threshold(drug_id: int, threshold: int, db: Session = Depends(branch_db)):
     """Stok uyarı eşiğini güncelle"""
     drug = db.query(Drug).filter(Drug.id == drug_id).first()
     if not drug:
@@ -276,11 +417,14 @@ def update_stock_threshold(drug_id: int, threshold: int, db: Session = Depends(g
     old_threshold = drug.low_stock_threshold
     drug.low_stock_threshold = threshold
     drug.updated_at = datetime.utcnow()
-    
+    stock = branch_quantity(db, drug.id)
+    event = stock_event(drug, stock, session_branch(db))
+    emit(db, "stock", event)
     db.commit()
+    outbox_relay.wake()
     
-    # Eşik düşürüldüyse ve stok yetersizse uyarı oluştur
-    if threshold < old_threshold and drug.stock_quantity <= threshold:
+    # Eşik düşürüldüyse ve şube stoğu yetersizse uyarı oluştur
+    if threshold < old_threshold and stock <= threshold:
         check_stock_levels(db)
     
     return {
@@ -288,105 +432,163 @@ def update_stock_threshold(drug_id: int, threshold: int, db: Session = Depends(g
         "drug": {
             "id": drug.id,
             "name": drug.name,
-            "stock_quantity": drug.stock_quantity,
+            "stock_quantity": stock,
             "low_stock_threshold": drug.low_stock_threshold
-        }
+        },
+        "stock": event
     }
 
 @app.delete("/drugs/{drug_id}")
 def delete_drug(drug_id: int, db: Session = Depends(get_db)):
-    """İlaç sil"""
+    """İlaç sil (katalog zincir geneli: kapsamsız session, tüm şubelerin
+    satış/hareket/uyarı satırlarının drug_id'si boşaltılır)"""
     drug = db.query(Drug).filter(Drug.id == drug_id).first()
     if not drug:
         raise HTTPException(404, "İlaç bulunamadı")
     
     db.delete(drug)
+    emit(db, "drug_removed", {"id": drug_id})
     db.commit()
+    outbox_relay.wake()
     
-    return {"message": f"{drug.name} başarıyla silindi"}
+    return {"message": f"{drug.name} başarıyla silindi", "id": drug_id}
 
 # ================ SATIŞ ENDPOINT'LERİ ================
 
 @app.post("/sales", status_code=201)
-def sell_drug(sale: SaleRequest, db: Session = Depends(get_db)):
+def sell_drug(sale: SaleRequest, db: Session = Depends(branch_db)):
     """Satış yap"""
     # İlacı bul
     drug = db.query(Drug).filter(Drug.id == sale.drug_id).first()
     if not drug:
         raise HTTPException(404, "İlaç bulunamadı")
     
-    # Stok kontrolü
-    if drug.stock_quantity < sale.quantity:
-        raise HTTPException(400, f"Yetersiz stok. Mevcut: {drug.stock_quantity}")
+    # Stok kontrolü (şube stoğu)
+    available = branch_quantity(db, drug.id)
+    if available < sale.quantity:
+        raise HTTPException(400, f"Yetersiz stok. Mevcut: {available}")
     
     # Müşteriyi bul (varsa)
     customer = None
     if sale.customer_id:
         customer = db.query(Customer).filter(Customer.id == sale.customer_id).first()
     
-    # Önceki stok miktarını kaydet
-    previous_stock = drug.stock_quantity
-    
-    # Stok güncelle
-    drug.stock_quantity -= sale.quantity
-    drug.updated_at = datetime.utcnow()
-    
-    # Satış kaydı oluştur
-    its_id = random.randint(100000, 999999)
+    # Satış kaydı oluştur (ITS işlem numarası bildirim onaylanınca yazılır)
     new_sale = Sale(
         drug_id=drug.id,
         customer_id=customer.id if customer else None,
         quantity=sale.quantity,
         unit_price=float(drug.price),
         total_price=float(drug.price * sale.quantity),
-        its_transaction_id=str(its_id),
         created_by=1  # Default user
     )
     
-    # Stok hareketi logu
-    log_stock_movement(db, drug.id, "sale", -sale.quantity, previous_stock, 
-                      f"{sale.quantity} adet satış")
-    
     db.add(new_sale)
-    db.commit()
     
-    # Stok kontrolü (arka planda)
-    def check_after_sale():
-        time.sleep(1)
-        check_stock_levels(db)
+    # Stok düşümü: satışla aynı transaction; eşzamanlı satışlarda stok
+    # veritabanında kilitli satırdan kontrol edilir, negatife düşemez
+    try:
+        movement = record_movement(db, drug, "sale", -sale.quantity, f"{sale.quantity} adet satış")
+    except InsufficientStock as e:
+        raise HTTPException(400, f"Yetersiz stok. Mevcut: {e.available}")
     
-    import threading
-    threading.Thread(target=check_after_sale).start()
+    # FEFO: en erken miatlı partiden düş (ilaç satırı kilitliyken; sipariş ile aynı kilit sırası)
+    try:
+        allocations = drug_lots.allocate(db, drug, sale.quantity)
+    except drug_lots.InsufficientLots as e:
+        raise HTTPException(400, f"Miadı geçmemiş stok yetersiz. Satılabilir: {e.available}")
+    new_sale.notes = drug_lots.sale_note(allocations)
+    
+    # Yan etkiler (canlı akış, stok uyarısı, İTS bildirimi, günlük özet) tek
+    # outbox olayıyla satışla aynı transaction'da; relay commit'ten sonra dağıtır
+    lots = drug_lots.describe(allocations)
+    outbox_event = sale_event(new_sale, drug, lots, movement.new_quantity, session_branch(db))
+    emit(db, "sale", outbox_event)
+    db.commit()
+    outbox_relay.wake()
+    event = outbox_event["stock"]
     
     return {
-        "message": "Satış başarılı. İTS onayı alındı.",
+        "message": "Satış başarılı. İTS bildirimi kuyruğa alındı." if its_gateway else "Satış başarılı.",
         "sale": {
             "id": new_sale.id,
             "drug_name": drug.name,
             "quantity": sale.quantity,
             "total_price": float(new_sale.total_price),
-            "its_id": its_id,
-            "date": new_sale.sale_date.isoformat()
-        }
+            "its_id": None,
+            "its_status": "pending" if its_gateway else None,
+            "date": new_sale.sale_date.isoformat(),
+            "lots": lots
+        },
+        "stock": event
+    }
+
+@app.post("/sales/batch")
+def sell_batch(batch: SaleBatchRequest, db: Session = Depends(branch_db)):
+    """Çevrimdışı kasa kuyruğunu yaz: tek transaction, satır satır sonuç
+    (applied / duplicate / conflict); client_ref ile tekrar gönderim güvenlidir"""
+    results = batch_sales.apply_batch(db, batch.sales)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Aynı client_ref'ler eşzamanlı başka bir istekle yazıldı; kasa partiyi yeniden gönderir
+        db.rollback()
+        raise HTTPException(409, "Parti eşzamanlı gönderildi, tekrar deneyin")
+    outbox_relay.wake()
+    
+    counts = {status: sum(r["status"] == status for r in results)
+              for status in ("applied", "duplicate", "conflict")}
+    return {
+        "message": f"{counts['applied']} satış yazıldı, {counts['duplicate']} tekrar, "
+                   f"{counts['conflict']} çakışma",
+        **counts,
+        "results": results
     }
 
+# ================ İTS BİLDİRİMLERİ ================
+# Satışlar ITS'e arka planda bildirilir (its/gateway.py); onaylanan satışın
+# its_transaction_id'si dolar. Kuyruk zincir geneli tektir.
+
+@app.get("/its/status")
+def get_its_status(db: Session = Depends(get_db)):
+    """ITS bildirim kuyruğunun durumu"""
+    if not its_gateway:
+        return {"enabled": False}
+    return {"enabled": True, **its_gateway.status(db)}
+
+@app.post("/its/retry")
+def retry_its_notifications(db: Session = Depends(get_db)):
+    """Denemeleri tükenmiş bildirimleri yeniden kuyruğa al"""
+    if not its_gateway:
+        raise HTTPException(400, "ITS bildirimi kapalı")
+    count = its_gateway.requeue_failed(db)
+    return {"message": f"{count} bildirim yeniden kuyruğa alındı", "requeued": count}
+
+# ================ OUTBOX ================
+# Yan etkiler (canlı akış, uyarılar, İTS kuyruğu, günlük özet, önbellekler)
+# yazıyla aynı transaction'da outbox'a yazılan olaylardan relay ile üretilir.
+
+@app.get("/outbox/status")
+def get_outbox_status(db: Session = Depends(get_db)):
+    """Dağıtılmayı bekleyen ve bekletilen olaylar"""
+    return outbox_relay.status(db)
+
+@app.post("/outbox/retry")
+def retry_outbox_events(db: Session = Depends(get_db)):
+    """Denemeleri tükenmiş olayları yeniden dağıtıma al"""
+    count = outbox_relay.requeue_failed(db)
+    return {"message": f"{count} olay yeniden kuyruğa alındı", "requeued": count}
+
 # ================ MÜŞTERİ ENDPOINT'LERİ ================
 
-@app.get("/customers")
-def get_customers(db: Session = Depends(get_db)):
+@app.get("/customers", response_model=List[CustomerResponse])
+def get_customers(db: Session = Depends(read_db)):
     """Tüm müşterileri getir"""
-    customers = db.query(Customer).order_by(Customer.name).all()
-    return [{
-        "id": c.id,
-        "name": c.name,
-        "tc_no": c.tc_no,
-        "phone": c.phone,
-        "email": c.email,
-        "created_at": c.created_at.isoformat() if c.created_at else None
-    } for c in customers]
+    customers = db.query(*columns(Customer, CustomerResponse)).order_by(Customer.name).all()
+    return json_response(CUSTOMER_LIST, customers)
 
 @app.post("/customers", status_code=201)
-def add_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
+def add_customer(customer: CustomerCreate, db: Session = Depends(branch_db)):
     """Yeni müşteri ekle"""
     # TC kontrolü
     if customer.tc_no:
@@ -408,47 +610,124 @@ def add_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
     return {
         "id": new_customer.id,
         "name": new_customer.name,
-        "message": "Müşteri başarıyla eklendi"
+        "message": "Müşteri başarıyla eklendi",
+        "customer": as_dict(CUSTOMER, new_customer)
     }
 
 @app.get("/customers/{customer_id}/history")
-def get_customer_history(customer_id: int, db: Session = Depends(get_db)):
-    """Müşteri satış geçmişi"""
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
-    if not customer:
+def get_customer_history(customer_id: int,
+                         mode: Literal["items", "summary"] = "items",
+                         limit: int = Query(50, ge=1, le=200),
+                         cursor: Optional[str] = None,
+                         db: Session = Depends(read_db)):
+    """Müşteri satış geçmişi
+
+    mode=items: (sale_date, id) keyset ile sayfalı satış listesi (yeniden eskiye)
+    mode=summary: ilaç bazında özet (kaç kez, toplam adet/tutar, ortalama alım aralığı)
+    """
+    if not db.query(Customer.id).filter(Customer.id == customer_id).first():
         raise HTTPException(404, "Müşteri bulunamadı")
     
-    sales = db.query(Sale).filter(Sale.customer_id == customer_id)\
-              .join(Drug).order_by(desc(Sale.sale_date)).all()
+    if mode == "summary":
+        return customer_history_summary(db, customer_id)
     
-    return [{
-        "id": s.id,
-        "drug_name": s.drug.name if s.drug else "Silinmiş İlaç",
-        "quantity": s.quantity,
-        "total_price": float(s.total_price),
-        "date": s.sale_date.strftime("%Y-%m-%d %H:%M"),
-        "its_id": s.its_transaction_id
-    } for s in sales]
+    # Yalnızca gereken kolonlar; ilaç adı aynı sorguda (satır başına lazy load yok)
+    query = db.query(Sale.id, Sale.quantity, Sale.total_price, Sale.sale_date,
+                     Sale.its_transaction_id, Drug.name)\
+              .outerjoin(Drug, Sale.drug_id == Drug.id)\
+              .filter(Sale.customer_id == customer_id)
+    if cursor:
+        try:
+            last_date, last_id = decode_cursor(cursor, (datetime, int))
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        query = query.filter(tuple_(Sale.sale_date, Sale.id) < tuple_(last_date, last_id))
+    
+    rows = query.order_by(desc(Sale.sale_date), desc(Sale.id)).limit(limit + 1).all()
+    rows, next_cursor = paginate(rows, limit, key=lambda r: (r.sale_date, r.id))
+    
+    return {
+        "customer_id": customer_id,
+        "items": [{
+            "id": r.id,
+            "drug_name": r.name or "Silinmiş İlaç",
+            "quantity": r.quantity,
+            "total_price": float(r.total_price),
+            "date": r.sale_date.strftime("%Y-%m-%d %H:%M"),
+            "its_id": r.its_transaction_id
+        } for r in rows],
+        "next_cursor": next_cursor
+    }
+
+def customer_history_summary(db: Session, customer_id: int) -> dict:
+    """İlaç bazında satın alma özeti (tekrar alım düzeni için)"""
+    rows = db.query(
+        Sale.drug_id,
+        Drug.name,
+        func.count(Sale.id).label("purchase_count"),
+        func.sum(Sale.quantity).label("total_quantity"),
+        func.sum(Sale.total_price).label("total_spent"),
+        func.min(Sale.sale_date).label("first_purchase"),
+        func.max(Sale.sale_date).label("last_purchase")
+    ).outerjoin(Drug, Sale.drug_id == Drug.id)\
+     .filter(Sale.customer_id == customer_id)\
+     .group_by(Sale.drug_id, Drug.name)\
+     .order_by(desc("last_purchase")).all()
+    
+    drugs = []
+    for r in rows:
+        # Ortalama alım aralığı: ilk ve son alım arasındaki süre / (alım sayısı - 1)
+        interval = None
+        if r.purchase_count > 1:
+            span = r.last_purchase - r.first_purchase
+            interval = round(span.total_seconds() / 86400 / (r.purchase_count - 1), 1)
+        drugs.append({
+            "drug_id": r.drug_id,
+            "drug_name": r.name or "Silinmiş İlaç",
+            "purchase_count": r.purchase_count,
+            "total_quantity": int(r.total_quantity or 0),
+            "total_spent": round(float(r.total_spent or 0), 2),
+            "first_purchase": r.first_purchase.strftime("%Y-%m-%d"),
+            "last_purchase": r.last_purchase.strftime("%Y-%m-%d"),
+            "avg_interval_days": interval
+        })
+    
+    return {
+        "customer_id": customer_id,
+        "drugs": drugs,
+        "total_purchases": sum(d["purchase_count"] for d in drugs),
+        "total_spent": round(sum(d["total_spent"] for d in drugs), 2)
+    }
 
 # ================ STOK SİPARİŞİ ================
 
+def receive_order(db: Session, drug: Drug, quantity: int, auto_order: bool = False,
+                  lot_number: Optional[str] = None, expiry_date: Optional[date] = None):
+    """Depo siparişini session'ın şubesine gir: defter hareketi + parti + stok olayı (commit etmez)"""
+    # Stok girişi defter hareketiyle (önceki/yeni miktar hareket satırından)
+    movement_type = "auto_purchase" if auto_order else "purchase"
+    movement = record_movement(db, drug, movement_type, quantity, f"Depo siparişi: {quantity} adet")
+    lot = drug_lots.receive(db, drug, quantity, lot_number, expiry_date)
+    event = stock_event(drug, movement.new_quantity, session_branch(db))
+    emit(db, "stock", event)
+    return movement, lot, event
+
 @app.post("/order_stock")
-def order_stock(order: OrderRequest, db: Session = Depends(get_db)):
+def order_stock(order: OrderRequest, db: Session = Depends(branch_db)):
     """Depodan stok siparişi"""
     drug = db.query(Drug).filter(Drug.id == order.drug_id).first()
     if not drug:
         raise HTTPException(404, "İlaç bulunamadı")
     
-    previous_stock = drug.stock_quantity
-    drug.stock_quantity += order.quantity
-    drug.updated_at = datetime.utcnow()
-    
-    # Stok logu
-    log_movement_type = "auto_purchase" if order.auto_order else "purchase"
-    log_stock_movement(db, drug.id, log_movement_type, order.quantity, 
-                      previous_stock, f"Depo siparişi: {order.quantity} adet")
-    
+    try:
+        movement, lot, event = receive_order(db, drug, order.quantity, order.auto_order,
+                                             order.lot_number, order.expiry_date)
+    except InsufficientStock as e:
+        raise HTTPException(400, f"Stok negatife düşemez. Mevcut: {e.available}")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
     db.commit()
+    outbox_relay.wake()
     
     message = f"{order.quantity} adet {drug.name} sipariş edildi"
     if order.auto_order:
@@ -456,15 +735,155 @@ def order_stock(order: OrderRequest, db: Session = Depends(get_db)):
     
     return {
         "message": message,
-        "old_stock": previous_stock,
-        "new_stock": drug.stock_quantity,
-        "auto_order": order.auto_order
+        "old_stock": movement.previous_quantity,
+        "new_stock": movement.new_quantity,
+        "auto_order": order.auto_order,
+        "lot": {"lot_number": lot.lot_number,
+                "expiry_date": lot.expiry_date.isoformat() if lot.expiry_date else None,
+                "quantity": lot.quantity},
+        "stock": event
+    }
+
+def auto_order(drug: dict, quantity: int):
+    """Uyarı servisinin otomatik siparişi: HTTP'siz, uyarının geldiği şubeye"""
+    with SessionLocal() as db, as_branch(db, drug["branch_id"]):
+        row = db.query(Drug).filter(Drug.id == drug["id"]).first()
+        if row is None:
+            return
+        receive_order(db, row, quantity, auto_order=True)
+        db.commit()
+    outbox_relay.wake()
+
+# ================ PARTİ / MİAT TAKİBİ ================
+
+def lot_row(lot: DrugLot, drug_name: Optional[str] = None) -> dict:
+    today = datetime.utcnow().date()
+    row = {
+        "id": lot.id,
+        "drug_id": lot.drug_id,
+        "lot_number": lot.lot_number,
+        "expiry_date": lot.expiry_date.isoformat() if lot.expiry_date else None,
+        "days_left": (lot.expiry_date - today).days if lot.expiry_date else None,
+        "quantity": lot.quantity,
+        "received_at": lot.received_at.isoformat() if lot.received_at else None
+    }
+    if drug_name is not None:
+        row["drug_name"] = drug_name
+    return row
+
+@app.get("/drugs/{drug_id:int}/lots")
+def get_drug_lots(drug_id: int, db: Session = Depends(read_db)):
+    """İlacın dolu partileri, FEFO sırasıyla (önce satılacak olan başta)"""
+    lots = db.query(DrugLot).filter(DrugLot.drug_id == drug_id, DrugLot.quantity > 0)\
+             .order_by(DrugLot.expiry_date.asc().nulls_last(), DrugLot.id).all()
+    return {"drug_id": drug_id, "items": [lot_row(lot) for lot in lots]}
+
+@app.get("/lots/expiring")
+def get_expiring_lots(days: Optional[int] = Query(None, ge=0, le=3650),
+                      limit: int = Query(50, ge=1, le=200),
+                      cursor: Optional[str] = None,
+                      db: Session = Depends(read_db)):
+    """Miadı `days` gün içinde dolacak (ve dolmuş) dolu partiler, en yakın miat başta
+
+    ix_drug_lots_expiry kısmi index'i üzerinden (expiry_date, id) keyset ile sayfalı.
+    """
+    horizon = drug_lots.expiry_horizon(days)
+    query = db.query(DrugLot, Drug.name).join(Drug, DrugLot.drug_id == Drug.id)\
+              .filter(DrugLot.quantity > 0, DrugLot.expiry_date <= horizon)
+    if cursor:
+        try:
+            last_expiry, last_id = decode_cursor(cursor, (date, int))
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        query = query.filter(tuple_(DrugLot.expiry_date, DrugLot.id) > tuple_(last_expiry, last_id))
+    
+    rows = query.order_by(DrugLot.expiry_date, DrugLot.id).limit(limit + 1).all()
+    rows, next_cursor = paginate(rows, limit, key=lambda r: (r[0].expiry_date, r[0].id))
+    
+    return {
+        "until": horizon.isoformat(),
+        "items": [lot_row(lot, name) for lot, name in rows],
+        "next_cursor": next_cursor
+    }
+
+# ================ ŞUBELER ================
+# Şube, X-Branch-Id başlığıyla seçilir; stok, satış, hareket, uyarı ve parti
+# sorguları o şubeye daraltılır. Transfer önerisi zincir genelinde hesaplanır.
+
+@app.get("/branches")
+def get_branches(db: Session = Depends(read_db)):
+    """Şubeler"""
+    rows = db.query(Branch).order_by(Branch.id).all()
+    return [{"id": b.id, "code": b.code, "name": b.name, "city": b.city,
+             "is_active": b.is_active} for b in rows]
+
+@app.post("/branches", status_code=201)
+def add_branch(branch: BranchCreate, db: Session = Depends(branch_db)):
+    """Yeni şube ekle"""
+    if db.query(Branch.id).filter(Branch.code == branch.code).first():
+        raise HTTPException(400, "Bu şube kodu zaten kayıtlı")
+    new_branch = Branch(code=branch.code, name=branch.name, city=branch.city)
+    db.add(new_branch)
+    db.flush()
+    emit(db, "branch", {"id": new_branch.id, "code": new_branch.code})
+    db.commit()
+    db.refresh(new_branch)
+    # Yeni şubeyle gelen ilk istek relay'i beklemesin
+    branches.branch_registry.reload()
+    outbox_relay.wake()
+    return {"id": new_branch.id, "code": new_branch.code, "message": "Şube başarıyla eklendi"}
+
+@app.get("/branches/transfers")
+def get_transfer_suggestions(drug_id: Optional[int] = None,
+                             limit: int = Query(50, ge=1, le=500),
+                             db: Session = Depends(read_db)):
+    """Şubeler arası transfer önerileri: stoğu azalan şubeye fazlası olan şubeden"""
+    return {
+        "window_days": branches.BRANCH_CONFIG["DEMAND_WINDOW_DAYS"],
+        "min_cover_days": branches.BRANCH_CONFIG["MIN_COVER_DAYS"],
+        "target_cover_days": branches.BRANCH_CONFIG["TARGET_COVER_DAYS"],
+        "items": branches.transfer_suggestions(db, drug_id, limit)
+    }
+
+@app.post("/branches/transfers", status_code=201)
+def transfer_stock(request: TransferRequest, db: Session = Depends(branch_db)):
+    """Stoğu bir şubeden diğerine taşı (iki stok hareketi + partiler, tek transaction)"""
+    if request.from_branch_id == request.to_branch_id:
+        raise HTTPException(400, "Kaynak ve hedef şube aynı olamaz")
+    for branch_id in (request.from_branch_id, request.to_branch_id):
+        if not branches.branch_registry.exists(branch_id):
+            raise HTTPException(404, f"Şube bulunamadı: {branch_id}")
+    drug = db.query(Drug).filter(Drug.id == request.drug_id).first()
+    if not drug:
+        raise HTTPException(404, "İlaç bulunamadı")
+    
+    try:
+        moved = branches.transfer(db, drug, request.from_branch_id, request.to_branch_id, request.quantity)
+    except InsufficientStock as e:
+        raise HTTPException(400, f"Kaynak şubede yetersiz stok. Mevcut: {e.available}")
+    except drug_lots.InsufficientLots as e:
+        raise HTTPException(400, f"Kaynak şubede miadı geçmemiş stok yetersiz. Satılabilir: {e.available}")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    
+    stocks = {}
+    for branch_id in (request.from_branch_id, request.to_branch_id):
+        stocks[branch_id] = branch_quantity(db, drug.id, branch_id)
+        emit(db, "stock", stock_event(drug, stocks[branch_id], branch_id), branch_id)
+    db.commit()
+    outbox_relay.wake()
+    
+    return {
+        "message": f"{request.quantity} adet {drug.name} transfer edildi",
+        "from_stock": stocks[request.from_branch_id],
+        "to_stock": stocks[request.to_branch_id],
+        "lots": moved
     }
 
 # ================ RAPORLAMA ENDPOINT'LERİ ================
 
 @app.get("/reports/daily")
-def get_daily_report(db: Session = Depends(get_db)):
+def get_daily_report(db: Session = Depends(read_db)):
     """Günlük rapor"""
     today = datetime.utcnow().date()
     tomorrow = today + timedelta(days=1)
@@ -498,21 +917,41 @@ def get_daily_report(db: Session = Depends(get_db)):
         "details": details
     }
 
+@app.get("/reports/sales-daily")
+def get_sales_daily(days: int = Query(30, ge=1, le=366), drug_id: Optional[int] = None,
+                    db: Session = Depends(read_db)):
+    """Şubenin günlük satış özeti (sales_daily; satış tablosu taranmaz)"""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    query = db.query(SalesDaily.day, func.sum(SalesDaily.sale_count), func.sum(SalesDaily.quantity),
+                     func.sum(SalesDaily.revenue)).filter(SalesDaily.day >= since)
+    if drug_id is not None:
+        query = query.filter(SalesDaily.drug_id == drug_id)
+    rows = query.group_by(SalesDaily.day).order_by(SalesDaily.day).all()
+    return {
+        "days": days,
+        "drug_id": drug_id,
+        "items": [{"day": day.isoformat(), "sale_count": int(count), "quantity": int(quantity),
+                   "revenue": round(float(revenue), 2)} for day, count, quantity, revenue in rows]
+    }
+
 @app.get("/reports/stock-status")
-def get_stock_status_report(db: Session = Depends(get_db)):
-    """Stok durum raporu"""
+def get_stock_status_report(db: Session = Depends(read_db)):
+    """Şubenin stok durum raporu"""
+    stock = branches.branch_stock_column()
     # Toplam ilaç sayısı
     total_drugs = db.query(Drug).count()
     
     # Toplam stok değeri
-    total_stock_value = db.query(func.sum(Drug.price * Drug.stock_quantity)).scalar() or 0
+    total_stock_value = db.query(func.sum(Drug.price * BranchStock.quantity))\
+                          .join(BranchStock, BranchStock.drug_id == Drug.id).scalar() or 0
     
     # Düşük ve kritik stok sayıları
-    low_stock = db.query(Drug).filter(Drug.stock_quantity <= Drug.low_stock_threshold).count()
-    critical_stock = db.query(Drug).filter(Drug.stock_quantity <= 5).count()
+    drugs = db.query(Drug.id).outerjoin(BranchStock, BranchStock.drug_id == Drug.id)
+    low_stock = drugs.filter(stock <= Drug.low_stock_threshold).count()
+    critical_stock = drugs.filter(stock <= 5).count()
     
     # En düşük stoklu ilaç
-    min_stock_drug = db.query(Drug).order_by(Drug.stock_quantity).first()
+    min_stock_drug = branches.branch_drugs(db, StockDrugResponse).order_by(stock, Drug.id).first()
     
     return {
         "total_drugs": total_drugs,
@@ -526,53 +965,158 @@ def get_stock_status_report(db: Session = Depends(get_db)):
         "check_time": datetime.utcnow().isoformat()
     }
 
+@app.get("/version")
+def get_version(request: Request, response: Response, db: Session = Depends(read_db),
+                branch_id: int = Depends(current_branch)):
+    """Panel verisinin sürüm etiketi (istemci parça önbelleği anahtarı)
+
+    İlaç/stok/satış sürümüne müşteri sayısı + son müşteri id'si ve günün
+    tarihi (günlük rapor gece sıfırlanır) eklenir. ETag olarak da döner.
+    """
+    customers = db.query(func.count(Customer.id), func.max(Customer.id)).one()
+    parts = get_data_version(db) + tuple(str(v) for v in customers) + \
+        (datetime.utcnow().date().isoformat(), str(branch_id))
+    version = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+    etag = f'"{version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return {"version": version}
+
+# ================ SATIŞ ANALİTİĞİ ================
+# Sorgular veritabanına gitmez; satışların bellekteki kolon anlık görüntüsü
+# (analytics/snapshot.py) üzerinde NumPy ile hesaplanır
+
+@app.get("/reports/analytics/status")
+def get_analytics_status():
+    """Anlık görüntünün durumu (satır sayısı, son yenileme)"""
+    return {"enabled": ANALYTICS_CONFIG["ENABLED"], **sales_snapshot.status(),
+            "copurchase": copurchase_index.status()}
+
+@app.get("/reports/analytics/top-drugs")
+def get_top_drugs(limit: int = Query(10, ge=1, le=100),
+                  days: Optional[int] = Query(None, ge=1),
+                  by: Literal["revenue", "quantity"] = "revenue",
+                  snapshot=Depends(analytics_snapshot)):
+    """En çok satan ilaçlar"""
+    return {"days": days, "by": by, "items": analytics.top_drugs(snapshot, limit, days, by)}
+
+@app.get("/reports/analytics/abc")
+def get_abc_analysis(days: Optional[int] = Query(None, ge=1), snapshot=Depends(analytics_snapshot)):
+    """ABC analizi (ciro payına göre A/B/C sınıfları)"""
+    return {"days": days, **analytics.abc_analysis(snapshot, days)}
+
+@app.get("/reports/analytics/heatmap")
+def get_sales_heatmap(days: Optional[int] = Query(None, ge=1), snapshot=Depends(analytics_snapshot)):
+    """Haftanın günü x saat satış yoğunluğu"""
+    return {"days": days, **analytics.hourly_heatmap(snapshot, days)}
+
+@app.get("/reports/analytics/baskets")
+def get_basket_pairs(days: Optional[int] = Query(None, ge=1),
+                     limit: int = Query(20, ge=1, le=200),
+                     min_count: int = Query(2, ge=1),
+                     snapshot=Depends(analytics_snapshot)):
+    """Birlikte alınan ilaç çiftleri (sepet = aynı müşteri, aynı gün)"""
+    return {"days": days, **analytics.basket_pairs(snapshot, days, limit, min_count)}
+
+@app.get("/reports/analytics/ingredients")
+def get_ingredient_summary(days: Optional[int] = Query(None, ge=1), snapshot=Depends(analytics_snapshot)):
+    """Etken madde bazında ciro dağılımı"""
+    return {"days": days, "items": analytics.ingredient_summary(snapshot, days)}
+
 # ================ UYARI ENDPOINT'LERİ ================
 
 @app.get("/alerts/check")
-def manual_stock_check(db: Session = Depends(get_db)):
+def manual_stock_check(db: Session = Depends(branch_db)):
     """Manuel stok kontrolü"""
     check_stock_levels(db)
     return {"message": "Stok kontrolü tamamlandı"}
 
 @app.get("/alerts/history")
-def get_alert_history(db: Session = Depends(get_db)):
-    """Uyarı geçmişi"""
-    alerts = db.query(Alert).join(Drug).order_by(desc(Alert.created_at)).limit(50).all()
-    
-    return [{
-        "id": a.id,
-        "drug_name": a.drug.name if a.drug else "Silinmiş İlaç",
-        "alert_type": a.alert_type,
-        "message": a.message,
-        "is_read": a.is_read,
-        "created_at": a.created_at.isoformat() if a.created_at else None
-    } for a in alerts]
-
-@app.get("/drugs/low-stock")
-def get_low_stock_drugs(db: Session = Depends(get_db)):
+def get_alert_history(limit: int = Query(50, ge=1, le=200),
+                      cursor: Optional[str] = None,
+                      alert_type: Optional[str] = None,
+                      is_read: Optional[bool] = None,
+                      drug_id: Optional[int] = None,
+                      db: Session = Depends(read_db)):
+    """Uyarı geçmişi (yeniden eskiye, (created_at, id) keyset ile sayfalı)"""
+    # outerjoin: silinmiş ilaçların uyarıları da listelenir
+    query = db.query(Alert.id, Alert.drug_id, Alert.alert_type, Alert.message,
+                     Alert.is_read, Alert.created_at, Alert.read_at, Drug.name)\
+              .outerjoin(Drug, Alert.drug_id == Drug.id)
+    if alert_type:
+        query = query.filter(Alert.alert_type == alert_type)
+    if is_read is not None:
+        query = query.filter(Alert.is_read if is_read else ~Alert.is_read)
+    if drug_id is not None:
+        query = query.filter(Alert.drug_id == drug_id)
+    if cursor:
+        try:
+            last_created, last_id = decode_cursor(cursor, (datetime, int))
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        query = query.filter(tuple_(Alert.created_at, Alert.id) < tuple_(last_created, last_id))
+    
+    rows = query.order_by(desc(Alert.created_at), desc(Alert.id)).limit(limit + 1).all()
+    rows, next_cursor = paginate(rows, limit, key=lambda r: (r.created_at, r.id))
+    
+    return {
+        "items": [{
+            "id": r.id,
+            "drug_id": r.drug_id,
+            "drug_name": r.name or "Silinmiş İlaç",
+            "alert_type": r.alert_type,
+            "message": r.message,
+            "is_read": r.is_read,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+            "read_at": r.read_at.isoformat() if r.read_at else None
+        } for r in rows],
+        "next_cursor": next_cursor
+    }
+
+@app.post("/alerts/ack")
+def acknowledge_alerts(request: AlertAckRequest, db: Session = Depends(branch_db)):
+    """Uyarıları toplu olarak okundu işaretle (tek UPDATE ifadesi)"""
+    if not request.ids and not request.all:
+        raise HTTPException(400, "ids listesi veya all=true gerekli")
+    
+    query = db.query(Alert).filter(~Alert.is_read)
+    if request.ids:
+        query = query.filter(Alert.id.in_(request.ids))
+    if request.alert_type:
+        query = query.filter(Alert.alert_type == request.alert_type)
+    if request.drug_id is not None:
+        query = query.filter(Alert.drug_id == request.drug_id)
+    if request.up_to_id is not None:
+        query = query.filter(Alert.id <= request.up_to_id)
+    
+    count = query.update({Alert.is_read: True, Alert.read_at: datetime.utcnow()},
+                         synchronize_session=False)
+    db.commit()
+    return {"acknowledged": count}
+
+@app.get("/drugs/low-stock", response_model=List[StockDrugResponse])
+def get_low_stock_drugs(db: Session = Depends(read_db)):
     """Düşük stoklu ilaçlar"""
-    drugs = db.query(Drug).filter(Drug.stock_quantity <= Drug.low_stock_threshold).all()
-    
-    return [{
-        "id": d.id,
-        "name": d.name,
-        "stock_quantity": d.stock_quantity,
-        "low_stock_threshold": d.low_stock_threshold,
-        "price": float(d.price)
-    } for d in drugs]
-
-@app.get("/drugs/critical-stock")
-def get_critical_stock_drugs(db: Session = Depends(get_db)):
+    drugs = branches.stock_below(db, StockDrugResponse).all()
+    return json_response(STOCK_DRUG_LIST, drugs)
+
+@app.get("/drugs/critical-stock", response_model=List[StockDrugResponse])
+def get_critical_stock_drugs(db: Session = Depends(read_db)):
     """Kritik stoklu ilaçlar"""
-    drugs = db.query(Drug).filter(Drug.stock_quantity <= 5).all()
-    
-    return [{
-        "id": d.id,
-        "name": d.name,
-        "stock_quantity": d.stock_quantity,
-        "low_stock_threshold": d.low_stock_threshold,
-        "price": float(d.price)
-    } for d in drugs]
+    drugs = branches.stock_below(db, StockDrugResponse, level=5).all()
+    return json_response(STOCK_DRUG_LIST, drugs)
+
+# ================ CANLI STOK AKIŞI ================
+
+@app.get("/events/stock")
+async def stream_stock_events(request: Request, branch_id: int = Depends(current_branch)):
+    """Şubenin stok deltaları ve uyarıları (Server-Sent Events); Last-Event-ID ile kaldığı yerden devam"""
+    return StreamingResponse(
+        stock_events.stream(request.headers.get("last-event-id"), branch_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # ================ ROOT ENDPOINT ================
 
@@ -585,10 +1129,18 @@ def root():
         "endpoints": {
             "auth": "/login (POST)",
             "drugs": "/drugs (GET, POST, PUT, DELETE)",
-            "sales": "/sales (POST)",
+            "sales": "/sales (POST), /sales/batch (POST, çevrimdışı kasa senkronu)",
+            "its": "/its/status, /its/retry (POST)",
+            "outbox": "/outbox/status, /outbox/retry (POST)",
             "customers": "/customers (GET, POST)",
-            "reports": "/reports/daily, /reports/stock-status",
+            "reports": "/reports/daily, /reports/sales-daily, /reports/stock-status",
+            "analytics": "/reports/analytics/{top-drugs,abc,heatmap,baskets,ingredients,status}",
+            "related": "/drugs/{id}/related",
+            "lots": "/drugs/{id}/lots, /lots/expiring",
+            "branches": "/branches (GET, POST), /branches/transfers (GET öneri, POST), X-Branch-Id başlığı",
             "alerts": "/alerts/check, /alerts/history",
+            "events": "/events/stock (SSE)",
+            "version": "/version (ETag)",
             "docs": "/docs (Swagger UI)"
         }
     }
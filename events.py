@@ -0,0 +1,173 @@
+# events.py
+"""
+Canlı stok akışı (Server-Sent Events)
+Satış, sipariş ve ilaç değişiklikleri olaylarını yazıyla aynı transaction'da
+outbox'a yazar; relay (outbox/relay.py) commit edilmiş olayları buradan küçük
+delta olayları olarak yayınlar. /events/stock'a bağlı her istemci bunları anında
+alır ve tabloyu/grafiği yerinde günceller (tam sayfa yenileme ya da polling yok).
+- Her olayın artan bir id'si vardır; son HISTORY_SIZE olay bellekte tutulur.
+  Yeniden bağlanan tarayıcı Last-Event-ID ile kaçırdıklarını alır.
+- Yavaş istemcinin kuyruğu dolarsa kuyruğu boşaltılır ve tek bir "resync"
+  olayı gönderilir (istemci tabloyu bir kez yeniden çeker); diğerleri etkilenmez.
+- Şubeye ait olaylar (branch_id) yalnızca o şubenin akışına gider; şubesiz
+  olaylar (ilaç ekleme/silme) herkese gider.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+EVENTS_CONFIG = {
+    "HISTORY_SIZE": int(os.environ.get("EVENTS_HISTORY_SIZE", 1000)),
+    "QUEUE_SIZE": int(os.environ.get("EVENTS_QUEUE_SIZE", 256)),
+    # Proxy'ler boşta bağlantıyı kapatmasın diye yorum satırı (": ping")
+    "HEARTBEAT_SECONDS": float(os.environ.get("EVENTS_HEARTBEAT_SECONDS", 15)),
+}
+
+CRITICAL_STOCK_LEVEL = 5
+
+def stock_level(stock: int, threshold: Optional[int]) -> str:
+    if stock <= CRITICAL_STOCK_LEVEL:
+        return "critical"
+    if threshold is not None and stock <= threshold:
+        return "low"
+    return "normal"
+
+def stock_event(drug, stock: Optional[int] = None, branch_id: Optional[int] = None) -> dict:
+    """İlacın güncel stok durumu (kompakt delta olayı); stock verilirse şube stoğu"""
+    stock = drug.stock_quantity if stock is None else stock
+    return {
+        "id": drug.id,
+        "name": drug.name,
+        "stock": stock,
+        "threshold": drug.low_stock_threshold,
+        "level": stock_level(stock, drug.low_stock_threshold),
+        "branch_id": branch_id,
+    }
+
+def sale_event(sale, drug, lots: list, stock: int, branch_id: Optional[int] = None) -> dict:
+    """Satış olayı (outbox): İTS bildirimi, günlük özet ve stok deltası bundan üretilir"""
+    return {
+        "sale_id": sale.id,
+        "sale_date": sale.sale_date.isoformat(),
+        "drug_id": drug.id,
+        "drug_name": drug.name,
+        "barcode": drug.barcode,
+        "quantity": sale.quantity,
+        "total_price": float(sale.total_price),
+        "lots": lots,
+        "stock": stock_event(drug, stock, branch_id),
+    }
+
+def stock_alert_row(event: dict) -> Optional[dict]:
+    """Stok olayı eşikteyse uyarı satırı (alerts tablosu kolonları), değilse None"""
+    stock, threshold = event["stock"], event["threshold"]
+    if stock <= CRITICAL_STOCK_LEVEL:
+        alert_type = "critical_stock"
+        message = f"{event['name']} kritik stokta! ({stock} adet kaldı)"
+    elif threshold is not None and stock <= threshold:
+        alert_type = "low_stock"
+        message = f"{event['name']} düşük stokta. Eşik: {threshold}, Mevcut: {stock}"
+    else:
+        return None
+    return {"drug_id": event["id"], "branch_id": event["branch_id"], "alert_type": alert_type,
+            "message": message, "is_read": False, "created_at": datetime.utcnow()}
+
+def format_sse(event_id: int, event_type: str, data: str, branch_id: Optional[int] = None) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+
+def for_branch(record: tuple, branch_id: Optional[int]) -> bool:
+    """Olay bu şubenin akışına gider mi (şubesiz olay ya da şubesiz akış: evet)"""
+    return branch_id is None or record[3] is None or record[3] == branch_id
+
+class EventBus:
+    """Süreç içi yayın/abone; publish() herhangi bir thread'den çağrılabilir"""
+
+    def __init__(self, history_size: int, queue_size: int, heartbeat: float):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._seq = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: dict):
+        """Olayı geçmişe ekle ve abonelere dağıt (commit'ten sonra çağrılmalı)"""
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._seq += 1
+            record = (self._seq, event_type, payload, data.get("branch_id"))
+            self._history.append(record)
+            loop = self._loop
+        if loop is not None and self._subscribers:
+            loop.call_soon_threadsafe(self._fanout, record)
+
+    def _fanout(self, record):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(record)
+            except asyncio.QueueFull:
+                # Yavaş istemci: biriken deltaları at, tek bir resync gönder
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait((record[0], "resync", "{}", None))
+
+    def _replay(self, last_event_id: Optional[str]) -> list:
+        """Last-Event-ID'den sonraki olaylar; geçmişte yoksa resync"""
+        if not last_event_id:
+            return []
+        try:
+            last = int(last_event_id)
+        except ValueError:
+            return []
+        with self._lock:
+            history = list(self._history)
+            current = self._seq
+        if last >= current:
+            return [] if last == current else [(current, "resync", "{}", None)]
+        if not history or history[0][0] > last + 1:
+            return [(current, "resync", "{}", None)]
+        return [record for record in history if record[0] > last]
+
+    async def stream(self, last_event_id: Optional[str] = None,
+                     branch_id: Optional[int] = None) -> AsyncIterator[str]:
+        """Bir istemcinin SSE akışı (bağlantı kapanınca abonelik silinir)"""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield "retry: 3000\n\n"
+            last_sent = 0
+            for record in self._replay(last_event_id):
+                last_sent = record[0]
+                if for_branch(record, branch_id):
+                    yield format_sse(*record)
+            while True:
+                try:
+                    record = await asyncio.wait_for(queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                # Abone olunduktan sonra gelen olay geçmişten de gönderilmiş olabilir
+                if record[0] <= last_sent and record[1] != "resync":
+                    continue
+                if for_branch(record, branch_id):
+                    yield format_sse(*record)
+        finally:
+            self._subscribers.discard(queue)
+
+# Global olay yolu (backend süreci başına bir tane)
+stock_events = EventBus(
+    history_size=EVENTS_CONFIG["HISTORY_SIZE"],
+    queue_size=EVENTS_CONFIG["QUEUE_SIZE"],
+    heartbeat=EVENTS_CONFIG["HEARTBEAT_SECONDS"],
+)
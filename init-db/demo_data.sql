@@ -0,0 +1,41 @@
+-- ============================================
+-- ECZANE OTOMASYONU DEMO VERİLERİ
+-- ============================================
+-- init.sql'den (şemadan) sonra çalıştırılır; tekrar çalıştırmak güvenlidir.
+
+-- DEMO KULLANICILAR (şifreler: admin123 ve 123)
+INSERT INTO users (username, password_hash, role, full_name) VALUES
+('yonetici', '$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW', 'Yönetici', 'Eczane Yöneticisi'),
+('personel', '$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW', 'Personel', 'Eczane Personeli')
+ON CONFLICT (username) DO NOTHING;
+
+-- DEMO İLAÇLAR (drugs.name benzersiz değil; aynı isim varsa eklenmez)
+-- İlaçlar 0 stokla eklenir; açılış stoğu stok defterine hareket olarak ve
+-- bir yıl miatlı demo partisine (drug_lots) yazılır
+WITH v(name, active_ingredient, price, stock_quantity, low_stock_threshold, description) AS (VALUES
+    ('Parol', 'Parasetamol', 50.00, 100, 10, 'Ağrı kesici ve ateş düşürücü'),
+    ('Majezik', 'Flurbiprofen', 85.00, 20, 5, 'Anti-enflamatuar ağrı kesici'),
+    ('Aspirin', 'Asetilsalisilik Asit', 30.00, 5, 10, 'Kan sulandırıcı ve ağrı kesici'),
+    ('Augmentin', 'Amoksisilin', 120.00, 3, 5, 'Antibiyotik'),
+    ('Ventolin', 'Salbutamol', 45.00, 15, 8, 'Astım ilacı')
+), inserted AS (
+    INSERT INTO drugs (name, active_ingredient, price, stock_quantity, low_stock_threshold, description)
+    SELECT v.name, v.active_ingredient, v.price, 0, v.low_stock_threshold, v.description
+    FROM v WHERE NOT EXISTS (SELECT 1 FROM drugs d WHERE d.name = v.name)
+    RETURNING id, name
+), moved AS (
+    INSERT INTO stock_movements (drug_id, movement_type, quantity_change, reason)
+    SELECT i.id, 'purchase', v.stock_quantity, 'Demo açılış stoğu'
+    FROM inserted i JOIN v ON v.name = i.name
+    RETURNING drug_id, quantity_change
+)
+INSERT INTO drug_lots (drug_id, lot_number, expiry_date, quantity)
+SELECT drug_id, 'DEMO-' || lpad(drug_id::text, 4, '0'), CURRENT_DATE + 365, quantity_change
+FROM moved;
+
+-- DEMO MÜŞTERİLER
+INSERT INTO customers (name, tc_no, phone) VALUES
+('Ahmet Yılmaz', '12345678901', '05551234567'),
+('Ayşe Demir', '98765432109', '05557654321'),
+('Mehmet Kaya', '45678912345', '05559876543')
+ON CONFLICT (tc_no) DO NOTHING;
@@ -0,0 +1,39 @@
+# its/config.py
+"""
+İTS (İlaç Takip Sistemi) bildirim ayarları
+Ortam değişkenleriyle ayarlanır, .env gerektirmez
+"""
+
+import os
+
+ITS_CONFIG = {
+    "ENABLED": os.environ.get("ITS_ENABLED", "true").lower() == "true",
+    # local: süreç içi yerel onay (geliştirme/demo); http: ITS_URL'deki servis
+    "TRANSPORT": os.environ.get("ITS_TRANSPORT", "local"),
+    "URL": os.environ.get("ITS_URL", "http://localhost:8900"),
+    "PHARMACY_GLN": os.environ.get("ITS_PHARMACY_GLN", "8680000000000"),
+    "TIMEOUT_SECONDS": float(os.environ.get("ITS_TIMEOUT_SECONDS", 10)),
+    # Tek istekte gönderilen en fazla bildirim
+    "BATCH_SIZE": int(os.environ.get("ITS_BATCH_SIZE", 100)),
+    # Satış olmasa da kuyruk bu aralıkla kontrol edilir (yeniden denemeler için)
+    "FLUSH_INTERVAL_MS": int(os.environ.get("ITS_FLUSH_INTERVAL_MS", 500)),
+    # ITS hız sınırı: saniyede en fazla bu kadar istek
+    "MAX_REQUESTS_PER_SECOND": float(os.environ.get("ITS_MAX_REQUESTS_PER_SECOND", 5)),
+    # Geçici hatada üstel bekleme (BACKOFF_BASE * 2^deneme, en fazla BACKOFF_MAX saniye)
+    "MAX_ATTEMPTS": int(os.environ.get("ITS_MAX_ATTEMPTS", 8)),
+    "BACKOFF_BASE_SECONDS": float(os.environ.get("ITS_BACKOFF_BASE_SECONDS", 1)),
+    "BACKOFF_MAX_SECONDS": float(os.environ.get("ITS_BACKOFF_MAX_SECONDS", 300)),
+    # Sahiplenilen satırların kirası: süreç ölürse satırlar bu süre sonra yeniden gönderilir
+    "LEASE_SECONDS": int(os.environ.get("ITS_LEASE_SECONDS", 60)),
+}
+
+# Yerel sahte ITS sunucusu (python -m its.mock_server); testler ve ölçümler için
+MOCK_CONFIG = {
+    "LATENCY_MS": int(os.environ.get("ITS_MOCK_LATENCY_MS", 200)),
+    # Saniyede kabul edilen istek; fazlası 429 + Retry-After
+    "MAX_REQUESTS_PER_SECOND": float(os.environ.get("ITS_MOCK_MAX_REQUESTS_PER_SECOND", 5)),
+    # İsteklerin bu oranı 503 ile düşer (geçici kesinti)
+    "FAILURE_RATE": float(os.environ.get("ITS_MOCK_FAILURE_RATE", 0)),
+    # Bildirimlerin bu oranı reddedilir (ör. geçersiz karekod)
+    "REJECT_RATE": float(os.environ.get("ITS_MOCK_REJECT_RATE", 0)),
+}
@@ -0,0 +1,248 @@
+# its/gateway.py
+"""
+İTS bildirim kuyruğu (its_notifications) ve gönderici
+Satış olayı outbox'a yazılır; relay'in İTS abonesi (outbox/subscribers.py)
+bildirimleri relay transaction'ında kuyruğa ekler (enqueue). Checkout ITS'i
+beklemez. Arka plandaki gönderici:
+- Vadesi gelen satırları FOR UPDATE SKIP LOCKED ile sahiplenir ve kira süresi
+  kadar ileri atar (kısa transaction; ITS çağrısı sırasında kilit tutulmaz).
+- Satırları BATCH_SIZE'lık partiler halinde, MAX_REQUESTS_PER_SECOND hız
+  sınırına uyarak gönderir; sunucu Retry-After isterse o kadar bekler.
+- Onaylanan satışların işlem numarasını sales.its_transaction_id'ye tek
+  executemany ile yazar; reddedilenler 'rejected' olur.
+- Geçici hatada partiyi tam jitter'lı üstel beklemeyle erteler, MAX_ATTEMPTS
+  denemeden sonra 'failed' bırakır (GET /its/status'ta görünür).
+Bildirim ref'i satış id'sidir; aynı satış iki kez gönderilse de ITS aynı
+işlem numarasını döner (en az bir kez teslim).
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+
+from database import ItsNotification, Sale, SessionLocal
+from its.config import ITS_CONFIG
+from its.transport import ItsUnavailable, build_transport
+
+NOTIFICATIONS = ItsNotification.__table__
+SALES = Sale.__table__
+
+CONFIRM_SQL = update(NOTIFICATIONS).where(NOTIFICATIONS.c.id == bindparam("n_id")).values(
+    status="confirmed", transaction_id=bindparam("tid"), confirmed_at=bindparam("now"), last_error=None)
+REJECT_SQL = update(NOTIFICATIONS).where(NOTIFICATIONS.c.id == bindparam("n_id")).values(
+    status="rejected", last_error=bindparam("error"))
+RETRY_SQL = update(NOTIFICATIONS).where(NOTIFICATIONS.c.id == bindparam("n_id")).values(
+    status=bindparam("new_status"), attempts=bindparam("new_attempts"),
+    next_attempt_at=bindparam("due"), last_error=bindparam("error"))
+# sale_date ile: partition'lı sales'te güncelleme tek partition'a gider
+SALE_ID_SQL = update(SALES).where(SALES.c.id == bindparam("s_id"), SALES.c.sale_date == bindparam("s_date"))\
+    .values(its_transaction_id=bindparam("tid"))
+
+def notification_payload(sale: dict) -> dict:
+    """Satış olayından (events.sale_event) ITS bildirimi; karekod yoksa ilaç id'si GTIN yerine"""
+    return {
+        "ref": str(sale["sale_id"]),
+        "gtin": sale["barcode"] or f"{sale['drug_id']:014d}",
+        "drug_name": sale["drug_name"],
+        "quantity": sale["quantity"],
+        "lots": sale["lots"],
+        "sold_at": sale["sale_date"]
+    }
+
+def backoff_seconds(attempts: int, retry_after: Optional[float] = None) -> float:
+    """Tam jitter'lı üstel bekleme; sunucunun istediği süreden kısa olmaz"""
+    ceiling = min(ITS_CONFIG["BACKOFF_MAX_SECONDS"], ITS_CONFIG["BACKOFF_BASE_SECONDS"] * 2 ** attempts)
+    return max(retry_after or 0, random.uniform(0, ceiling))
+
+class ItsGateway:
+    """Kuyruktaki bildirimleri arka planda partiler halinde ITS'e gönderir"""
+
+    def __init__(self, session_factory=SessionLocal, transport=None, batch_size: Optional[int] = None,
+                 flush_interval_ms: Optional[int] = None, max_requests_per_second: Optional[float] = None):
+        self.session_factory = session_factory
+        self.transport = transport or build_transport()
+        self.batch_size = batch_size or ITS_CONFIG["BATCH_SIZE"]
+        self.flush_interval = (flush_interval_ms or ITS_CONFIG["FLUSH_INTERVAL_MS"]) / 1000
+        self.min_gap = 1 / (max_requests_per_second or ITS_CONFIG["MAX_REQUESTS_PER_SECOND"])
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._next_send = 0.0  # hız sınırı: bir sonraki isteğin en erken zamanı (monotonic)
+        self.sent = 0
+        self.confirmed = 0
+
+    # ---- Kuyruğa alma (outbox relay transaction'ında) ----
+
+    @staticmethod
+    def enqueue(db: Session, sales: List[Tuple[int, dict]]):
+        """(şube, satış olayı) çiftlerinin bildirimlerini tek executemany ile ekle (commit etmez)"""
+        now = datetime.utcnow()
+        db.execute(NOTIFICATIONS.insert(), [{
+            "sale_id": sale["sale_id"],
+            "sale_date": datetime.fromisoformat(sale["sale_date"]),
+            "branch_id": branch_id,
+            "payload": notification_payload(sale),
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now
+        } for branch_id, sale in sales])
+
+    # ---- Yaşam döngüsü ----
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="its-gateway", daemon=True)
+        self._thread.start()
+        print(f"✅ İTS bildirim kuyruğu aktif: {self.transport.name} "
+              f"({self.batch_size} bildirim/istek, {1 / self.min_gap:g} istek/sn)")
+
+    def stop(self):
+        """Thread'i durdur; gönderilmemiş bildirimler kuyrukta kalır"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        self.transport.close()
+
+    def wake(self):
+        """Yeni bildirim commit edildi: bekleme süresini kısalt"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                # Dolu parti geldikçe beklemeden devam (birikmiş kuyruk)
+                while not self._stopped.is_set() and self.drain_once() >= self.batch_size:
+                    pass
+            except Exception as e:
+                print(f"❌ İTS gönderim hatası: {e}")
+
+    # ---- Gönderim ----
+
+    def claim(self) -> List[dict]:
+        """Vadesi gelen satırları sahiplen: kilitli olanları atla, kira süresi kadar ileri at"""
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            rows = db.query(ItsNotification)\
+                .filter(ItsNotification.status == "pending", ItsNotification.next_attempt_at <= now)\
+                .order_by(ItsNotification.next_attempt_at, ItsNotification.id)\
+                .limit(self.batch_size).with_for_update(skip_locked=True).all()
+            lease = now + timedelta(seconds=ITS_CONFIG["LEASE_SECONDS"])
+            claimed = []
+            for row in rows:
+                row.next_attempt_at = lease
+                claimed.append({"id": row.id, "sale_id": row.sale_id, "sale_date": row.sale_date,
+                                "attempts": row.attempts, "payload": row.payload})
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def _throttle(self):
+        delay = self._next_send - time.monotonic()
+        if delay > 0:
+            self._stopped.wait(delay)
+
+    def drain_once(self) -> int:
+        """Bir parti gönder; sahiplenilen satır sayısı (hata olsa da)"""
+        claimed = self.claim()
+        if not claimed:
+            return 0
+        self._throttle()
+        self._next_send = time.monotonic() + self.min_gap
+        try:
+            results = self.transport.send([row["payload"] for row in claimed])
+        except ItsUnavailable as e:
+            if e.retry_after:
+                self._next_send = time.monotonic() + e.retry_after
+            self._retry(claimed, str(e), e.retry_after)
+            print(f"⚠️ İTS gönderimi ertelendi ({len(claimed)} bildirim): {e}")
+            return 0
+        except Exception as e:
+            # Beklenmeyen hata da bir deneme sayılır: parti kira bitiminde sonsuza dek
+            # yeniden gönderilmez, MAX_ATTEMPTS sonunda 'failed' olur
+            self._retry(claimed, f"Beklenmeyen İTS hatası: {e!r}")
+            print(f"❌ İTS gönderimi ertelendi ({len(claimed)} bildirim): {e!r}")
+            return 0
+        self.sent += len(claimed)
+        self._record(claimed, results)
+        return len(claimed)
+
+    def _record(self, claimed: List[dict], results: List[dict]):
+        """Onayları satışlara yaz, reddedilenleri işaretle; yanıtsız kalanlar yeniden denenir"""
+        by_ref = {str(r["ref"]): r for r in results}
+        now = datetime.utcnow()
+        confirmed, rejected, missing = [], [], []
+        for row in claimed:
+            result = by_ref.get(row["payload"]["ref"])
+            if result is None:
+                missing.append(row)
+            elif result["status"] == "ok":
+                confirmed.append((row, result["transaction_id"]))
+            else:
+                rejected.append({"n_id": row["id"], "error": result.get("message") or "ITS reddetti"})
+
+        with self.session_factory() as db:
+            if confirmed:
+                db.execute(CONFIRM_SQL, [{"n_id": row["id"], "tid": tid, "now": now} for row, tid in confirmed])
+                db.execute(SALE_ID_SQL, [{"s_id": row["sale_id"], "s_date": row["sale_date"], "tid": tid}
+                                         for row, tid in confirmed])
+            if rejected:
+                db.execute(REJECT_SQL, rejected)
+            db.commit()
+        if missing:
+            self._retry(missing, "ITS yanıtında bildirim yok")
+        if rejected:
+            print(f"⚠️ İTS {len(rejected)} bildirimi reddetti")
+        self.confirmed += len(confirmed)
+
+    def _retry(self, claimed: List[dict], error: str, retry_after: Optional[float] = None):
+        now = datetime.utcnow()
+        rows = []
+        for row in claimed:
+            attempts = row["attempts"] + 1
+            rows.append({
+                "n_id": row["id"],
+                "new_attempts": attempts,
+                "new_status": "failed" if attempts >= ITS_CONFIG["MAX_ATTEMPTS"] else "pending",
+                "due": now + timedelta(seconds=backoff_seconds(attempts, retry_after)),
+                "error": error[:500]
+            })
+        with self.session_factory() as db:
+            db.execute(RETRY_SQL, rows)
+            db.commit()
+
+    def requeue_failed(self, db: Session) -> int:
+        """Denemeleri tükenmiş bildirimleri yeniden kuyruğa al (ITS kesintisi sonrası)"""
+        count = db.query(ItsNotification).filter(ItsNotification.status == "failed")\
+            .update({"status": "pending", "attempts": 0, "next_attempt_at": datetime.utcnow()},
+                    synchronize_session=False)
+        db.commit()
+        self.wake()
+        return count
+
+    # ---- Durum ----
+
+    def status(self, db: Session) -> dict:
+        """Durum başına bildirim sayısı ve en eski bekleyen bildirimin yaşı"""
+        counts = dict(db.query(ItsNotification.status, func.count()).group_by(ItsNotification.status).all())
+        oldest = db.query(func.min(ItsNotification.created_at))\
+            .filter(ItsNotification.status == "pending").scalar()
+        return {
+            "transport": self.transport.name,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "pending": counts.get("pending", 0),
+            "confirmed": counts.get("confirmed", 0),
+            "rejected": counts.get("rejected", 0),
+            "failed": counts.get("failed", 0),
+            "oldest_pending_seconds": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else None
+        }
@@ -0,0 +1,111 @@
+# its/mock_server.py
+"""
+Yerel sahte ITS sunucusu (testler ve ölçümler için)
+Çalıştırma:
+    python -m its.mock_server --port 8900
+Backend'i buna bağlamak için: ITS_TRANSPORT=http ITS_URL=http://localhost:8900
+Gerçek servisin yavaş ve hız sınırlı davranışını taklit eder:
+- Her istek LATENCY_MS bekler; saniyede MAX_REQUESTS_PER_SECOND'dan fazlası
+  429 + Retry-After alır, FAILURE_RATE oranında istek 503 ile düşer.
+- Bildirimlerin REJECT_RATE oranı reddedilir.
+- Aynı ref'e her zaman aynı işlem numarası döner (tekrar gönderim güvenli).
+GET /stats alınan istek/bildirim sayılarını verir.
+"""
+
+import argparse
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from its.config import MOCK_CONFIG
+
+class Notification(BaseModel):
+    ref: str
+    gtin: str
+    quantity: int
+    drug_name: Optional[str] = None
+    lots: list = []
+    sold_at: Optional[str] = None
+
+class NotificationBatch(BaseModel):
+    pharmacy_gln: str
+    notifications: List[Notification]
+
+def create_app(config: Optional[dict] = None) -> FastAPI:
+    config = {**MOCK_CONFIG, **(config or {})}
+    app = FastAPI(title="Sahte ITS")
+    lock = threading.Lock()
+    window = deque()  # son bir saniyedeki kabul edilen isteklerin zamanları
+    transactions = {}  # ref -> işlem numarası
+    stats = {"requests": 0, "throttled": 0, "failed": 0, "notifications": 0, "duplicates": 0, "rejected": 0}
+
+    def admit() -> Optional[float]:
+        """Kayan pencere hız sınırı; reddedilirse Retry-After (sn)"""
+        with lock:
+            now = time.monotonic()
+            while window and now - window[0] >= 1:
+                window.popleft()
+            if len(window) >= config["MAX_REQUESTS_PER_SECOND"]:
+                return 1 - (now - window[0])
+            window.append(now)
+            return None
+
+    @app.post("/notifications")
+    def notify(batch: NotificationBatch):
+        stats["requests"] += 1
+        retry_after = admit()
+        if retry_after is not None:
+            stats["throttled"] += 1
+            return JSONResponse({"detail": "Hız sınırı aşıldı"}, status_code=429,
+                                headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+        time.sleep(config["LATENCY_MS"] / 1000)
+        if random.random() < config["FAILURE_RATE"]:
+            stats["failed"] += 1
+            return JSONResponse({"detail": "Servis geçici olarak kullanılamıyor"}, status_code=503)
+
+        results = []
+        with lock:
+            for n in batch.notifications:
+                stats["notifications"] += 1
+                if n.ref in transactions:
+                    stats["duplicates"] += 1
+                elif random.random() < config["REJECT_RATE"]:
+                    stats["rejected"] += 1
+                    results.append({"ref": n.ref, "status": "rejected", "transaction_id": None,
+                                    "message": "Karekod doğrulanamadı"})
+                    continue
+                else:
+                    transactions[n.ref] = f"ITS{len(transactions) + 1:09d}"
+                results.append({"ref": n.ref, "status": "ok", "transaction_id": transactions[n.ref],
+                                "message": None})
+        return {"results": results}
+
+    @app.get("/stats")
+    def get_stats():
+        return {**stats, "confirmed": len(transactions)}
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Sahte ITS sunucusu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=int, default=MOCK_CONFIG["LATENCY_MS"])
+    parser.add_argument("--rps", type=float, default=MOCK_CONFIG["MAX_REQUESTS_PER_SECOND"])
+    parser.add_argument("--failure-rate", type=float, default=MOCK_CONFIG["FAILURE_RATE"])
+    parser.add_argument("--reject-rate", type=float, default=MOCK_CONFIG["REJECT_RATE"])
+    args = parser.parse_args()
+    app = create_app({"LATENCY_MS": args.latency_ms, "MAX_REQUESTS_PER_SECOND": args.rps,
+                      "FAILURE_RATE": args.failure_rate, "REJECT_RATE": args.reject_rate})
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
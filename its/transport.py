@@ -0,0 +1,101 @@
+# its/transport.py
+"""
+ITS'e bildirim gönderen taşıyıcılar
+Her taşıyıcı send(notifications) -> sonuç listesi verir; sonuçlar bildirimlerle
+ref üzerinden eşleşir: {"ref", "status": "ok" | "rejected", "transaction_id", "message"}.
+Geçici hatalar (bağlantı, zaman aşımı, 429, 5xx, okunamayan yanıt) ItsUnavailable
+fırlatır; tüm parti daha sonra yeniden denenir. Aynı ref ile tekrar gönderim ITS tarafında
+aynı işlem numarasını döner (yanıtı kaybolan istek güvenle tekrarlanır).
+"""
+
+import uuid
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
+
+import requests
+
+from its.config import ITS_CONFIG
+
+class ItsUnavailable(Exception):
+    """ITS şu an yanıt veremiyor; retry_after: sunucunun istediği bekleme (sn)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After başlığı: saniye ya da HTTP tarihi; okunamazsa None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def parse_results(response: requests.Response) -> List[dict]:
+    """Yanıttaki sonuç listesi; biçimi bozuksa ItsUnavailable (parti yeniden denenir)"""
+    try:
+        results = response.json()["results"]
+        for result in results:
+            ref = result["ref"]
+            if result["status"] == "ok" and not result.get("transaction_id"):
+                raise KeyError(f"transaction_id (ref {ref})")
+    except (ValueError, KeyError, TypeError) as e:
+        raise ItsUnavailable(f"ITS yanıtı okunamadı: {e!r}")
+    return results
+
+class LocalTransport:
+    """Süreç içi yerel onay: ITS bağlantısı olmayan kurulumlar (geliştirme, demo)"""
+    name = "local"
+
+    def send(self, notifications: List[dict]) -> List[dict]:
+        return [{"ref": n["ref"], "status": "ok", "transaction_id": "L" + uuid.uuid4().hex[:12].upper(),
+                 "message": None} for n in notifications]
+
+    def close(self):
+        pass
+
+class HttpTransport:
+    """ITS web servisi: POST {url}/notifications (tek istekte parti)"""
+    name = "http"
+
+    def __init__(self, url: Optional[str] = None, pharmacy_gln: Optional[str] = None,
+                 timeout: Optional[float] = None):
+        self.url = (url or ITS_CONFIG["URL"]).rstrip("/")
+        self.pharmacy_gln = pharmacy_gln or ITS_CONFIG["PHARMACY_GLN"]
+        self.timeout = timeout or ITS_CONFIG["TIMEOUT_SECONDS"]
+        self.session = requests.Session()
+
+    def send(self, notifications: List[dict]) -> List[dict]:
+        try:
+            response = self.session.post(f"{self.url}/notifications", timeout=self.timeout,
+                                         json={"pharmacy_gln": self.pharmacy_gln,
+                                               "notifications": notifications})
+        except requests.RequestException as e:
+            raise ItsUnavailable(f"ITS'e ulaşılamadı: {e}")
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ItsUnavailable(f"ITS {response.status_code} döndü",
+                                 parse_retry_after(response.headers.get("Retry-After")))
+        if not response.ok:
+            # 4xx: parti biçimi ya da kimlik sorunu; düzelene kadar beklemede kalır
+            raise ItsUnavailable(f"ITS isteği reddetti ({response.status_code}): {response.text[:200]}")
+        return parse_results(response)
+
+    def close(self):
+        self.session.close()
+
+def build_transport(kind: Optional[str] = None):
+    kind = kind or ITS_CONFIG["TRANSPORT"]
+    if kind == "http":
+        return HttpTransport()
+    if kind == "local":
+        return LocalTransport()
+    raise ValueError(f"Bilinmeyen ITS taşıyıcısı: {kind}")
@@ -0,0 +1,55 @@
+"""
+Bakım işleri komut satırı
+Çalıştırma:
+    python -m maintenance partitions             # partition'ları önceden aç + eskileri arşivle
+    python -m maintenance partitions --ensure    # yalnızca önceden aç
+    python -m maintenance partitions --archive   # yalnızca arşivle
+    python -m maintenance alerts [--days 90]     # okunmuş eski uyarıları sil
+    python -m maintenance reconcile              # stok = baseline + hareket toplamı mı
+"""
+
+import argparse
+import sys
+
+from database import engine
+from maintenance.alerts import prune_read_alerts
+from maintenance.config import PARTITION_CONFIG
+from maintenance.partitions import archive_partitions, ensure_partitions
+from maintenance.reconcile import reconcile
+
+def main():
+    parser = argparse.ArgumentParser(description="Veritabanı bakım işleri")
+    sub = parser.add_subparsers(dest="job", required=True)
+
+    partitions = sub.add_parser("partitions", help="Aylık partition bakımı")
+    partitions.add_argument("--ensure", action="store_true", help="Yalnızca ileri partition'ları oluştur")
+    partitions.add_argument("--archive", action="store_true", help="Yalnızca eski partition'ları arşivle")
+    partitions.add_argument("--retention-months", type=int, default=None)
+
+    alerts = sub.add_parser("alerts", help="Okunmuş eski uyarıları sil")
+    alerts.add_argument("--days", type=int, default=None, help="Saklama süresi (gün)")
+
+    sub.add_parser("reconcile", help="Stok defteri mutabakatı (tutmazsa çıkış kodu 1)")
+    args = parser.parse_args()
+
+    if args.job == "partitions":
+        if engine.dialect.name != "postgresql":
+            print(f"⚠️ Partition bakımı PostgreSQL gerektirir (şu an: {engine.dialect.name})")
+            return
+        both = not (args.ensure or args.archive)
+        for table in PARTITION_CONFIG["TABLES"]:
+            if args.ensure or both:
+                created = ensure_partitions(engine, table)
+                print(f"📋 {table}: {len(created)} yeni partition")
+            if args.archive or both:
+                archived = archive_partitions(engine, table, args.retention_months)
+                print(f"📋 {table}: {len(archived)} partition arşivlendi")
+    elif args.job == "alerts":
+        deleted = prune_read_alerts(engine, args.days)
+        print(f"📋 {deleted} uyarı silindi")
+    elif args.job == "reconcile":
+        if reconcile(engine):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# maintenance/alerts.py
+"""
+Okundu işaretlenmiş eski uyarıların budanması
+Silme, ix_alerts_read_at (WHERE is_read) index'i üzerinden küçük batch'lerle
+yapılır; her batch ayrı transaction'dır, tablo uzun süre kilitlenmez.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+
+from database import Alert
+from maintenance.config import ALERT_RETENTION_CONFIG
+
+def prune_read_alerts(engine, retention_days: Optional[int] = None,
+                      batch_size: Optional[int] = None, pause: float = 0.05) -> int:
+    """read_at'i saklama süresinden eski olan okunmuş uyarıları sil"""
+    retention_days = ALERT_RETENTION_CONFIG["READ_RETENTION_DAYS"] if retention_days is None else retention_days
+    if retention_days <= 0:
+        return 0
+    batch_size = batch_size or ALERT_RETENTION_CONFIG["BATCH_SIZE"]
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+
+    batch = select(Alert.id).where(Alert.is_read, Alert.read_at < cutoff)\
+                            .order_by(Alert.read_at).limit(batch_size)
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            deleted = conn.execute(Alert.__table__.delete().where(Alert.id.in_(batch.scalar_subquery()))).rowcount
+        total += deleted
+        if deleted < batch_size:
+            break
+        time.sleep(pause)
+
+    if total:
+        print(f"🧹 {total} okunmuş uyarı silindi ({retention_days} günden eski)")
+    return total
@@ -0,0 +1,32 @@
+# maintenance/config.py
+"""
+Bakım işleri (partition, arşiv, uyarı budama) ayarları
+Ortam değişkenleriyle ayarlanır, .env gerektirmez
+"""
+
+import os
+
+# ==================== PARTITION AYARLARI ====================
+PARTITION_CONFIG = {
+    # Aylık partition'lı tablolar: {tablo: partition kolonu}
+    "TABLES": {
+        "sales": "sale_date",
+        "stock_movements": "created_at",
+    },
+    # Bu kadar ay ilerisi için partition hazır tutulur
+    "MONTHS_AHEAD": int(os.environ.get("PARTITION_MONTHS_AHEAD", 3)),
+    # Bu kadar aydan eski partition'lar ayrılıp arşivlenir (0 = arşivleme kapalı)
+    "RETENTION_MONTHS": int(os.environ.get("PARTITION_RETENTION_MONTHS", 24)),
+    "ARCHIVE_DIR": os.environ.get("PARTITION_ARCHIVE_DIR", "backup/archive"),
+    # Günlük bakımın (partition + uyarı budama) çalışacağı saat (yerel)
+    "DAILY_AT": os.environ.get("MAINTENANCE_AT", "03:30"),
+    "ENABLE_SCHEDULER": os.environ.get("ENABLE_DB_MAINTENANCE", "true").lower() == "true",
+}
+
+# ==================== UYARI BUDAMA AYARLARI ====================
+ALERT_RETENTION_CONFIG = {
+    # Okundu işaretlenmiş uyarılar bu kadar gün sonra silinir (0 = kapalı)
+    "READ_RETENTION_DAYS": int(os.environ.get("ALERT_READ_RETENTION_DAYS", 90)),
+    # Her DELETE en fazla bu kadar satır siler (kısa transaction'lar)
+    "BATCH_SIZE": int(os.environ.get("ALERT_PRUNE_BATCH_SIZE", 5000)),
+}
@@ -0,0 +1,247 @@
+# maintenance/partitions.py
+"""
+Aylık range partition bakımı
+- ensure_partitions: önümüzdeki aylar için partition'ları önceden oluşturur
+- archive_partitions: saklama süresini aşan partition'ları gzip'li COPY
+  dosyasına yazar, satır sayısını doğrular, ayırır (DETACH CONCURRENTLY) ve siler
+Partition adları: <tablo>_yYYYYmMM, aralık [ayın 1'i, sonraki ayın 1'i).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import date, datetime
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text
+
+from maintenance.config import PARTITION_CONFIG
+from maintenance.reconcile import fold_into_baseline
+from migrations.helpers import locked_transaction
+
+BOUND_RE = re.compile(r"TO \('([^']+)'\)")
+
+# Partition silinmeden önce aynı transaction içinde çalışan kancalar
+# (stock_movements: hareket toplamları stok defteri baseline'ına katlanır)
+BEFORE_DROP = {"stock_movements": fold_into_baseline}
+
+class Partition(NamedTuple):
+    name: str
+    upper: Optional[datetime]  # None: üst sınır MAXVALUE
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+def is_partitioned(conn, table: str) -> bool:
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :t AND c.relnamespace = to_regnamespace(current_schema())"
+    ), {"t": table}).scalar())
+
+def list_partitions(conn, table: str) -> List[Partition]:
+    """Tablonun partition'ları, üst sınıra göre sıralı"""
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = (:t)::regclass"
+    ), {"t": table}).all()
+    partitions = []
+    for name, bound in rows:
+        match = BOUND_RE.search(bound or "")
+        upper = datetime.fromisoformat(match.group(1)) if match else None
+        partitions.append(Partition(name, upper))
+    return sorted(partitions, key=lambda p: (p.upper is None, p.upper or datetime.min))
+
+def ensure_partitions(engine, table: str, months_ahead: Optional[int] = None,
+                      today: Optional[date] = None) -> List[str]:
+    """Bu ay + months_ahead ay sonrasına kadar partition'ları oluştur
+
+    Partition önce bağımsız tablo olarak yaratılıp sonra ATTACH edilir:
+    ATTACH ana tabloda yalnızca SHARE UPDATE EXCLUSIVE kilit alır, yani
+    satışlar sürerken de güvenle çalışır.
+    """
+    months_ahead = PARTITION_CONFIG["MONTHS_AHEAD"] if months_ahead is None else months_ahead
+    today = today or datetime.utcnow().date()
+    until = add_months(month_start(today), months_ahead + 1)
+
+    with engine.connect() as conn:
+        if not is_partitioned(conn, table):
+            return []
+        bounded = [p.upper.date() for p in list_partitions(conn, table) if p.upper]
+    start = max(bounded) if bounded else month_start(today)
+
+    created = []
+    month = start
+    while month < until:
+        name = partition_name(table, month)
+        upper = add_months(month, 1)
+
+        def work(conn, name=name, month=month, upper=upper):
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ))
+            conn.execute(text(
+                f"ALTER TABLE {table} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+        locked_transaction(engine, work)
+        created.append(name)
+        print(f"✅ Partition oluşturuldu: {name}")
+        month = upper
+    return created
+
+def pending_detaches(conn, table: str) -> List[str]:
+    """Yarıda kalmış DETACH ... CONCURRENTLY'ler (iptal ya da çökme)"""
+    return list(conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = (:t)::regclass AND i.inhdetachpending"
+    ), {"t": table}).scalars())
+
+def detached_partitions(conn, table: str) -> List[str]:
+    """Ayrılmış ama silinmemiş partition adlı tablolar (DETACH ile DROP arasında kalanlar)"""
+    return list(conn.execute(text(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition "
+        "AND relnamespace = to_regnamespace(current_schema()) AND relname ~ :pattern"
+    ), {"pattern": f"^{table}_(y[0-9]{{4}}m[0-9]{{2}}|legacy)$"}).scalars())
+
+def manifest_path(archive_dir: str, name: str) -> str:
+    return os.path.join(archive_dir, f"{name}.json")
+
+def export_partition(conn, table: str, partition: Partition, archive_dir: str) -> Optional[dict]:
+    """Bağlı partition'ı gzip'li COPY dosyasına yaz, doğrula ve manifest'i yaz
+
+    Satır sayısı tutmazsa None döner; partition bağlı kaldığı için hiçbir satır
+    tablodan kaybolmaz. Manifest, geri bağlamak için partition sınırını da tutar.
+    """
+    bound = conn.execute(text(
+        "SELECT pg_get_expr(relpartbound, oid) FROM pg_class WHERE oid = (:n)::regclass"
+    ), {"n": partition.name}).scalar()
+    path = os.path.join(archive_dir, f"{partition.name}.copy.gz")
+    raw = conn.connection.dbapi_connection
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        raw.cursor().copy_expert(f"COPY {partition.name} TO STDOUT", f)
+
+    expected = conn.execute(text(f"SELECT count(*) FROM {partition.name}")).scalar()
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        written = sum(1 for _ in f)
+    if written != expected:
+        print(f"❌ {partition.name}: arşiv {written} satır, tablo {expected}; ayrılmadı")
+        return None
+
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    manifest = {
+        "table": table,
+        "partition": partition.name,
+        "bound": bound,
+        "upper_bound": partition.upper.isoformat(),
+        "rows": expected,
+        "sha256": digest,
+        "archived_at": datetime.utcnow().isoformat(),
+        "restore": f"CREATE TABLE {partition.name} (LIKE {table}); "
+                   f"\\copy {partition.name} FROM PROGRAM 'gunzip -c {os.path.basename(path)}'",
+    }
+    with open(manifest_path(archive_dir, partition.name), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+def drop_detached(engine, table: str, manifest: dict) -> bool:
+    """Ayrılmış partition'ı manifest'le doğrulayıp sil; tutmazsa geri bağla
+
+    Sayım, BEFORE_DROP kancası ve DROP tek transaction'dadır. Dışa aktarmadan
+    sonra yazılmış satır varsa partition ana tabloya geri bağlanır; satırlar
+    (ve stock_movements için hareket toplamları) tablodan düşmez.
+    """
+    name = manifest["partition"]
+    with engine.begin() as tx:
+        rows = tx.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+        if rows == manifest["rows"]:
+            hook = BEFORE_DROP.get(table)
+            if hook:
+                hook(tx, name)
+            tx.execute(text(f"DROP TABLE {name}"))
+            print(f"✅ Arşivlendi: {name} ({rows} satır)")
+            return True
+
+    if not manifest.get("bound"):
+        print(f"❌ {name}: {rows} satır, arşiv {manifest['rows']}; sınır bilinmiyor, elle bağlanmalı")
+        return False
+    locked_transaction(engine, lambda conn: conn.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} {manifest['bound']}"
+    )))
+    print(f"❌ {name}: {rows} satır, arşiv {manifest['rows']}; silinmedi, geri bağlandı")
+    return False
+
+def archive_partitions(engine, table: str, retention_months: Optional[int] = None,
+                       archive_dir: Optional[str] = None,
+                       today: Optional[date] = None) -> List[dict]:
+    """Tamamı saklama süresinden eski partition'ları arşivle ve sil
+
+    Dışa aktarma ve doğrulama partition bağlıyken yapılır; yalnızca doğrulanan
+    partition ayrılır (DETACH CONCURRENTLY, transaction dışında, süren sorguları
+    beklemez). Önceki bir çalışmadan yarıda kalan DETACH'ler FINALIZE edilir,
+    ayrılmış ama silinmemiş partition'lar manifest'leriyle tamamlanır.
+    """
+    retention_months = PARTITION_CONFIG["RETENTION_MONTHS"] if retention_months is None else retention_months
+    if retention_months <= 0:
+        return []
+    archive_dir = archive_dir or PARTITION_CONFIG["ARCHIVE_DIR"]
+    today = today or datetime.utcnow().date()
+    cutoff = datetime.combine(add_months(month_start(today), -retention_months), datetime.min.time())
+
+    with engine.connect() as conn:
+        if not is_partitioned(conn, table):
+            return []
+        pending = pending_detaches(conn, table)
+    for name in pending:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name} FINALIZE"))
+        print(f"📦 Yarıda kalan ayırma tamamlandı: {name}")
+
+    with engine.connect() as conn:
+        expired = [p for p in list_partitions(conn, table) if p.upper and p.upper <= cutoff]
+        detached = detached_partitions(conn, table)
+
+    os.makedirs(archive_dir, exist_ok=True)
+    archived = []
+    for name in detached:
+        path = manifest_path(archive_dir, name)
+        if not os.path.exists(path):
+            print(f"⚠️ {name}: ayrılmış partition'ın manifest'i yok ({path}), dokunulmadı")
+            continue
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if drop_detached(engine, table, manifest):
+            archived.append(manifest)
+
+    for partition in expired:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            manifest = export_partition(conn, table, partition, archive_dir)
+            if manifest is None:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition.name} CONCURRENTLY"))
+            print(f"📦 Partition ayrıldı: {partition.name}")
+        if drop_detached(engine, table, manifest):
+            archived.append(manifest)
+    return archived
+
+def run_maintenance(engine, archive: bool = True):
+    """Tüm partition'lı tablolar için: önceden oluştur, sonra (isteğe bağlı) arşivle"""
+    if engine.dialect.name != "postgresql":
+        return
+    for table in PARTITION_CONFIG["TABLES"]:
+        try:
+            ensure_partitions(engine, table)
+            if archive:
+                archive_partitions(engine, table)
+        except Exception as e:
+            print(f"❌ Partition bakım hatası ({table}): {e}")
@@ -0,0 +1,88 @@
+# maintenance/reconcile.py
+"""
+Stok defteri mutabakatı
+Değişmez: drugs.stock_quantity = baseline + SUM(stock_movements.quantity_change).
+Şubelerle: drugs.stock_quantity = SUM(branch_stock.quantity) ve her şubede
+branch_stock.quantity = SUM(drug_lots.quantity) (branches.py, drug_lots.py).
+Her kontrol tek bir toplama sorgusudur; yalnızca tutmayan ilaçlar döner.
+Arşivlenen stock_movements partition'larının ilaç bazlı toplamları silinmeden
+önce, aynı transaction içinde stock_ledger_baselines'a katlanır.
+"""
+
+from typing import List
+
+from sqlalchemy import text
+
+# Tek toplama sorgusu: ilaç başına hareket toplamı + baseline, stokla karşılaştır
+MISMATCH_SQL = text("""
+    SELECT d.id, d.name, d.stock_quantity,
+           COALESCE(b.quantity, 0) + COALESCE(m.total, 0) AS ledger_total
+    FROM drugs d
+    LEFT JOIN stock_ledger_baselines b ON b.drug_id = d.id
+    LEFT JOIN (SELECT drug_id, SUM(quantity_change) AS total
+               FROM stock_movements GROUP BY drug_id) m ON m.drug_id = d.id
+    WHERE d.stock_quantity <> COALESCE(b.quantity, 0) + COALESCE(m.total, 0)
+    ORDER BY d.id
+""")
+
+# Şube kırılımı: zincir toplamı şube stoklarının toplamı olmalı
+BRANCH_MISMATCH_SQL = text("""
+    SELECT d.id, d.name, d.stock_quantity, COALESCE(b.total, 0) AS branch_total
+    FROM drugs d
+    LEFT JOIN (SELECT drug_id, SUM(quantity) AS total
+               FROM branch_stock GROUP BY drug_id) b ON b.drug_id = d.id
+    WHERE d.stock_quantity <> COALESCE(b.total, 0)
+    ORDER BY d.id
+""")
+
+# Parti kırılımı: her şubede ilaç başına parti toplamı şube stoğuyla aynı olmalı
+LOT_MISMATCH_SQL = text("""
+    SELECT d.id, d.name, s.branch_id, s.quantity AS stock_quantity, COALESCE(l.total, 0) AS lot_total
+    FROM branch_stock s
+    JOIN drugs d ON d.id = s.drug_id
+    LEFT JOIN (SELECT branch_id, drug_id, SUM(quantity) AS total
+               FROM drug_lots GROUP BY branch_id, drug_id) l
+           ON l.branch_id = s.branch_id AND l.drug_id = s.drug_id
+    WHERE s.quantity <> COALESCE(l.total, 0)
+    ORDER BY s.branch_id, d.id
+""")
+
+def find_mismatches(conn) -> List[dict]:
+    """Defterle tutmayan ilaçları döndür (id, name, stock_quantity, ledger_total)"""
+    return [dict(row._mapping) for row in conn.execute(MISMATCH_SQL)]
+
+def fold_into_baseline(conn, partition: str) -> int:
+    """Silinecek partition'ın ilaç bazlı toplamlarını baseline'a ekle
+
+    DROP TABLE ile aynı transaction içinde çağrılmalıdır; ikisi birlikte
+    commit edilir, değişmez hiçbir an bozulmaz.
+    """
+    folded = conn.execute(text(f"""
+        INSERT INTO stock_ledger_baselines (drug_id, quantity, as_of)
+        SELECT drug_id, SUM(quantity_change), now() AT TIME ZONE 'utc'
+        FROM {partition} GROUP BY drug_id
+        ON CONFLICT (drug_id) DO UPDATE
+           SET quantity = stock_ledger_baselines.quantity + EXCLUDED.quantity,
+               as_of = EXCLUDED.as_of
+    """)).rowcount
+    if folded:
+        print(f"📒 {partition}: {folded} ilacın hareket toplamı baseline'a katlandı")
+    return folded
+
+def reconcile(engine) -> List[dict]:
+    """Mutabakatı çalıştır, tutmayan ilaçları yazdır ve döndür"""
+    with engine.connect() as conn:
+        mismatches = find_mismatches(conn)
+        branch_mismatches = [dict(row._mapping) for row in conn.execute(BRANCH_MISMATCH_SQL)]
+        lot_mismatches = [dict(row._mapping) for row in conn.execute(LOT_MISMATCH_SQL)]
+    for m in mismatches:
+        print(f"❌ {m['name']} (#{m['id']}): stok {m['stock_quantity']}, defter {m['ledger_total']}")
+    for m in branch_mismatches:
+        print(f"❌ {m['name']} (#{m['id']}): stok {m['stock_quantity']}, şubeler {m['branch_total']}")
+    for m in lot_mismatches:
+        print(f"❌ {m['name']} (#{m['id']}) şube #{m['branch_id']}: stok {m['stock_quantity']}, "
+              f"partiler {m['lot_total']}")
+    mismatches += branch_mismatches + lot_mismatches
+    if not mismatches:
+        print("✅ Stok defteri tutarlı")
+    return mismatches
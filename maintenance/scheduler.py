@@ -0,0 +1,38 @@
+# maintenance/scheduler.py
+"""
+Günlük bakım işlerinin zamanlayıcısı (partition bakımı + uyarı budama)
+alerts servisinin global schedule'ından bağımsız kendi zamanlayıcısını kullanır.
+"""
+
+import threading
+import time
+
+import schedule
+
+from maintenance.alerts import prune_read_alerts
+from maintenance.config import PARTITION_CONFIG
+from maintenance.partitions import run_maintenance
+
+def run_daily(engine):
+    run_maintenance(engine)
+    try:
+        prune_read_alerts(engine)
+    except Exception as e:
+        print(f"❌ Uyarı budama hatası: {e}")
+
+def start_scheduler(engine):
+    """Günlük bakımı ayrı bir thread'de zamanla"""
+    if engine.dialect.name != "postgresql" or not PARTITION_CONFIG["ENABLE_SCHEDULER"]:
+        return None
+    scheduler = schedule.Scheduler()
+    scheduler.every().day.at(PARTITION_CONFIG["DAILY_AT"]).do(run_daily, engine)
+
+    def run_scheduler():
+        while True:
+            scheduler.run_pending()
+            time.sleep(30)
+
+    thread = threading.Thread(target=run_scheduler, daemon=True, name="db-maintenance")
+    thread.start()
+    print(f"🗓️ Veritabanı bakımı her gün {PARTITION_CONFIG['DAILY_AT']} çalışacak")
+    return thread
@@ -0,0 +1,90 @@
+# mcp_cache.py
+"""
+MCP salt-okuma tool'ları için sonuç önbelleği
+Anahtar: (tool, normalize edilmiş argümanlar, veri sürümü). Veri sürümü
+database.get_data_version() ile ucuz bir sorguyla okunur; stok, eşik veya
+satış değişince sürüm değişir ve eski kayıtlar kendiliğinden geçersizleşir.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_CONFIG = {
+    "MAX_ENTRIES": int(os.environ.get("MCP_CACHE_MAX_ENTRIES", 512)),
+    # Sürüm sorgusunun sonucu bu kadar süre yeniden kullanılır (ani çağrı
+    # patlamalarında her çağrıda DB'ye gidilmesin)
+    "VERSION_TTL_SECONDS": float(os.environ.get("MCP_CACHE_VERSION_TTL", 0.5)),
+    "ENABLED": os.environ.get("MCP_CACHE_ENABLED", "true").lower() == "true",
+}
+
+class ResultCache:
+    """Sürüm etiketli LRU önbellek (thread-safe)"""
+
+    def __init__(self, max_entries: int, version_ttl: float, enabled: bool = True):
+        self.max_entries = max_entries
+        self.version_ttl = version_ttl
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(tool: str, arguments: Dict[str, Any]) -> Tuple[str, str]:
+        """Argümanları sıralı ve boşluksuz JSON'a çevirerek normalize et"""
+        normalized = {k: v for k, v in arguments.items() if k != "bypass_cache"}
+        return tool, json.dumps(normalized, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+    def cached_version(self) -> Optional[tuple]:
+        """TTL içindeyse son okunan sürümü döndür"""
+        if time.monotonic() - self._version_checked_at < self.version_ttl:
+            return self._version
+        return None
+
+    def set_version(self, version: tuple):
+        with self._lock:
+            if version != self._version:
+                # Sürüm değişti: eski kayıtlar artık hiç eşleşmez, belleği boşalt
+                self._entries.clear()
+            self._version = version
+            self._version_checked_at = time.monotonic()
+
+    def invalidate(self):
+        """Bir sonraki çağrıda sürümü yeniden okumaya zorla"""
+        with self._lock:
+            self._version_checked_at = 0.0
+
+    def get(self, key, version) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+# Global önbellek instance'ı
+result_cache = ResultCache(
+    max_entries=CACHE_CONFIG["MAX_ENTRIES"],
+    version_ttl=CACHE_CONFIG["VERSION_TTL_SECONDS"],
+    enabled=CACHE_CONFIG["ENABLED"],
+)
@@ -1,18 +1,52 @@
-﻿"""
+"""
 Eczane Otomasyonu için MCP (Model Context Protocol) Server
+Her tool, kayıt defterine (TOOLS) girdi şemasıyla birlikte kaydedilir;
+şema bir kez derlenir ve sonuçlar metin + yapılandırılmış JSON olarak döner.
+Salt-okuma tool'larının sonuçları veri sürümüne göre önbelleklenir.
 """
-import json
-from typing import List, Dict, Any
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from mcp.server import Server
-from mcp.types import Tool
-from datetime import datetime
+from mcp.types import Tool, TextContent, CallToolResult
+from datetime import datetime, date, timedelta
+import httpx
 import sqlalchemy
+from jsonschema import Draft7Validator
+from jsonschema.exceptions import best_match
 from sqlalchemy.orm import Session
-from database import SessionLocal, Drug, Sale, Customer, Alert
+from database import SessionLocal, Drug, Sale, get_data_version, replica_router
+from api_client.async_client import build_async_client
+from pagination import decode_cursor, paginate
+from mcp_cache import result_cache
 
 # MCP Server oluştur
 app = Server("eczane-otomasyonu-mcp")
 
+# ORM sorguları senkron; event loop'u bloklamasın diye sınırlı bir thread
+# havuzunda çalışır. Havuz boyutu engine bağlantı havuzunu (5 + 10 taşma)
+# aşmamalı. Her tool çağrısı kendi session'ını açıp kapatır; bağlantılar
+# çağrılar arasında engine havuzu üzerinden yeniden kullanılır.
+MCP_DB_WORKERS = int(os.environ.get("MCP_DB_WORKERS", 10))
+db_executor = ThreadPoolExecutor(max_workers=MCP_DB_WORKERS, thread_name_prefix="mcp-db")
+
+CRITICAL_STOCK_LEVEL = 5
+
+# Dış HTTP çağrıları için paylaşılan (keep-alive) asenkron istemci
+_http_client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = build_async_client()
+    return _http_client
+
+async def run_db(func, *args):
+    """Senkron DB fonksiyonunu thread havuzunda çalıştır"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, func, *args)
+
 # Database session helper
 def get_db():
     db = SessionLocal()
@@ -21,412 +55,505 @@ def get_db():
     finally:
         db.close()
 
-# 1. İLAÇ ARAMA TOOL'U
-@app.list_tools()
-async def handle_list_tools() -> List[Tool]:
-    """Kullanılabilir MCP tool'larını listele"""
-    return [
-        Tool(
-            name="search_drugs",
-            description="İlaç ismi veya etken maddeye göre arama yap",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "search_term": {
-                        "type": "string",
-                        "description": "Aranacak ilaç adı veya etken madde"
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Sonuç sayısı (default: 10)",
-                        "default": 10
-                    }
-                },
-                "required": ["search_term"]
-            }
-        ),
-        Tool(
-            name="check_stock",
-            description="İlaç stok durumunu kontrol et",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "drug_id": {
-                        "type": "integer",
-                        "description": "İlaç ID'si (isteğe bağlı)"
-                    },
-                    "drug_name": {
-                        "type": "string",
-                        "description": "İlaç ismi (isteğe bağlı)"
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="get_low_stock_alerts",
-            description="Düşük ve kritik stok uyarılarını getir",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "limit": {
-                        "type": "integer",
-                        "description": "Sonuç sayısı",
-                        "default": 20
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="get_daily_sales_report",
-            description="Günlük satış raporunu getir",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "date": {
-                        "type": "string",
-                        "description": "Tarih (YYYY-MM-DD formatında, boşsa bugün)",
-                        "default": ""
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="add_drug_to_cart",
-            description="Sanal sepet için ilaç ekle (demo amaçlı)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "drug_id": {
-                        "type": "integer",
-                        "description": "İlaç ID'si",
-                        "required": True
-                    },
-                    "quantity": {
-                        "type": "integer",
-                        "description": "Miktar",
-                        "default": 1
-                    }
-                }
-            }
-        ),
-        # YENİ: Public API sorgusu yapan tool
-        Tool(
-            name="public_api_query",
-            description="Public API'den veri çek (demo amaçlı)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "api_endpoint": {
-                        "type": "string",
-                        "description": "API endpoint URL",
-                        "default": "https://jsonplaceholder.typicode.com/todos/1"
-                    }
-                }
-            }
-        ),
-        # YENİ: Toplama işlemi yapan basit tool
-        Tool(
-            name="toplama_islemi",
-            description="İki sayıyı toplar",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "sayi1": {
-                        "type": "number",
-                        "description": "İlk sayı"
-                    },
-                    "sayi2": {
-                        "type": "number", 
-                        "description": "İkinci sayı"
-                    }
-                },
-                "required": ["sayi1", "sayi2"]
-            }
-        )
-    ]
+# ================ TOOL KAYIT DEFTERİ ================
 
-# 2. TOOL ÇALIŞTIRMA İŞLEMLERİ
-@app.call_tool()
-async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-    """MCP tool'larını çalıştır"""
-    
-    if name == "toplama_islemi":
-        # Basit toplama işlemi
-        sayi1 = arguments.get("sayi1", 0)
-        sayi2 = arguments.get("sayi2", 0)
-        toplam = sayi1 + sayi2
-        
-        return {
-            "content": [{
-                "type": "text",
-                "text": f"Toplama işlemi sonucu: {sayi1} + {sayi2} = {toplam}"
-            }]
+class ToolError(Exception):
+    """Kullanıcıya gösterilecek tool hatası"""
+
+class ToolSpec:
+    """Kayıtlı bir tool: tanım, derlenmiş şema ve handler"""
+
+    def __init__(self, name: str, description: str, input_schema: dict,
+                 handler: Callable, uses_db: bool, cacheable: bool,
+                 resolve: Optional[Callable] = None):
+        if cacheable:
+            input_schema = {**input_schema, "properties": {
+                **input_schema.get("properties", {}), **CACHE_PROPERTIES
+            }}
+        Draft7Validator.check_schema(input_schema)
+        self.name = name
+        self.tool = Tool(name=name, description=description, inputSchema=input_schema)
+        self.validator = Draft7Validator(input_schema)
+        self.defaults = {
+            key: prop["default"]
+            for key, prop in input_schema.get("properties", {}).items()
+            if "default" in prop
         }
-    
-    elif name == "public_api_query":
-        # Public API sorgusu
-        import requests
-        api_endpoint = arguments.get("api_endpoint", "https://jsonplaceholder.typicode.com/todos/1")
-        
-        try:
-            response = requests.get(api_endpoint, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "content": [{
-                        "type": "text",
-                        "text": f"✅ Public API'den veri alındı:\nEndpoint: {api_endpoint}\n\n" +
-                               f"Response (ilk 200 karakter):\n{str(data)[:200]}..."
-                    }]
-                }
-            else:
-                return {
-                    "content": [{
-                        "type": "text",
-                        "text": f"❌ API isteği başarısız. Status code: {response.status_code}"
-                    }]
-                }
-        except Exception as e:
-            return {
-                "content": [{
-                    "type": "text",
-                    "text": f"❌ API sorgusu hatası: {str(e)}"
-                }]
-            }
-    
-    # Diğer tool'lar için database bağlantısı
+        self.handler = handler
+        self.uses_db = uses_db
+        self.cacheable = cacheable
+        self.resolve = resolve
+
+    def validate(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Argümanları doğrula, varsayılanları doldur ve çözümle"""
+        error = best_match(self.validator.iter_errors(arguments))
+        if error is not None:
+            raise ToolError(f"Geçersiz argüman: {error.message}")
+        args = {**self.defaults, **arguments}
+        return self.resolve(args) if self.resolve else args
+
+TOOLS: Dict[str, ToolSpec] = {}
+
+CACHE_PROPERTIES = {
+    "bypass_cache": {
+        "type": "boolean",
+        "description": "true ise önbellek atlanır ve sorgu yeniden çalıştırılır",
+        "default": False
+    }
+}
+
+def tool(name: str, description: str, input_schema: dict, uses_db: bool = True,
+         cacheable: bool = False, resolve: Optional[Callable] = None):
+    """Tool kaydı dekoratörü.
+
+    uses_db=True ise handler(db, args) senkron çalışır (thread havuzunda),
+    aksi halde handler(args) bir coroutine'dir. İkisi de (metin, veri) döndürür.
+    cacheable=True yalnızca veriyi değiştirmeyen DB tool'ları içindir (replikadan okunur).
+    resolve(args), zamana bağlı varsayılanları (ör. "bugün") önbellek anahtarı
+    oluşmadan önce gerçek değerlere çevirir.
+    """
+    def decorator(func):
+        TOOLS[name] = ToolSpec(name, description, input_schema, func, uses_db, cacheable, resolve)
+        return func
+    return decorator
+
+def run_db_tool(spec: ToolSpec, arguments: Dict[str, Any]) -> Tuple[str, dict]:
+    """DB tool'unu tek bir session ile çalıştır (thread havuzunda)"""
     db = SessionLocal()
-    
     try:
-        if name == "search_drugs":
-            search_term = arguments.get("search_term", "")
-            limit = arguments.get("limit", 10)
-            
-            # İlaçları ara
-            drugs = db.query(Drug).filter(
-                (Drug.name.ilike(f"%{search_term}%")) | 
-                (Drug.active_ingredient.ilike(f"%{search_term}%"))
-            ).limit(limit).all()
-            
-            if not drugs:
-                return {
-                    "content": [{
-                        "type": "text",
-                        "text": f"'{search_term}' ile ilgili ilaç bulunamadı."
-                    }]
-                }
-            
-            # Formatla
-            drug_list = []
-            for drug in drugs:
-                stock_status = "🟢 NORMAL"
-                if drug.stock_quantity <= 5:
-                    stock_status = "🔴 KRİTİK"
-                elif drug.stock_quantity <= drug.low_stock_threshold:
-                    stock_status = "🟡 DÜŞÜK"
-                
-                drug_list.append({
-                    "id": drug.id,
-                    "name": drug.name,
-                    "active_ingredient": drug.active_ingredient,
-                    "price": f"{drug.price} TL",
-                    "stock": f"{drug.stock_quantity} adet",
-                    "status": stock_status,
-                    "threshold": drug.low_stock_threshold
-                })
-            
-            return {
-                "content": [{
-                    "type": "text",
-                    "text": f"'{search_term}' için {len(drug_list)} sonuç bulundu:\n\n" +
-                           "\n".join([f"• {d['name']} ({d['active_ingredient']}) - {d['price']} - {d['stock']} - {d['status']}" for d in drug_list])
-                }]
+        return spec.handler(db, arguments)
+    finally:
+        db.close()
+
+def run_cached_db_tool(spec: ToolSpec, arguments: Dict[str, Any], key) -> Tuple[str, dict]:
+    """Veri sürümünü oku; önbellekte yoksa tool'u çalıştırıp sonucu sakla
+
+    Önbelleklenen tool'lar salt-okumadır: DATABASE_REPLICA_URL verilmişse
+    (ve replika yeterince güncelse) sürüm ve sonuç replikadan okunur.
+    """
+    db = replica_router.session()
+    try:
+        version = get_data_version(db)
+        result_cache.set_version(version)
+        cached = result_cache.get(key, version)
+        if cached is not None:
+            return cached
+        result = spec.handler(db, arguments)
+        result_cache.put(key, version, result)
+        return result
+    finally:
+        db.close()
+
+async def call_cached(spec: ToolSpec, arguments: Dict[str, Any]) -> Tuple[str, dict]:
+    """Sürüm TTL içindeyse sonucu doğrudan bellekten ver (thread/DB yok)"""
+    key = result_cache.make_key(spec.name, arguments)
+    version = result_cache.cached_version()
+    if version is not None:
+        cached = result_cache.get(key, version)
+        if cached is not None:
+            return cached
+    return await run_db(run_cached_db_tool, spec, arguments, key)
+
+def stock_level(drug) -> str:
+    """İlacın stok seviyesi: critical / low / normal"""
+    if drug.stock_quantity <= CRITICAL_STOCK_LEVEL:
+        return "critical"
+    if drug.stock_quantity <= drug.low_stock_threshold:
+        return "low"
+    return "normal"
+
+def drug_to_dict(drug) -> dict:
+    return {
+        "id": drug.id,
+        "name": drug.name,
+        "active_ingredient": drug.active_ingredient,
+        "price": float(drug.price),
+        "stock_quantity": drug.stock_quantity,
+        "low_stock_threshold": drug.low_stock_threshold,
+        "stock_level": stock_level(drug)
+    }
+
+PAGINATION_PROPERTIES = {
+    "cursor": {
+        "type": "string",
+        "description": "Önceki sayfanın next_cursor değeri (ilk sayfa için boş bırakın)"
+    }
+}
+
+# ================ TOOL'LAR ================
+
+@tool(
+    name="search_drugs",
+    description="İlaç ismi veya etken maddeye göre arama yap (sayfalı)",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "search_term": {
+                "type": "string",
+                "description": "Aranacak ilaç adı veya etken madde"
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Sayfa boyutu (default: 10)",
+                "minimum": 1,
+                "maximum": 100,
+                "default": 10
+            },
+            **PAGINATION_PROPERTIES
+        },
+        "required": ["search_term"]
+    },
+    cacheable=True
+)
+def search_drugs(db: Session, args: Dict[str, Any]):
+    search_term = args["search_term"]
+    limit = args["limit"]
+
+    query = db.query(Drug).filter(
+        (Drug.name.ilike(f"%{search_term}%")) |
+        (Drug.active_ingredient.ilike(f"%{search_term}%"))
+    )
+    if args.get("cursor"):
+        last_name, last_id = decode_cursor(args["cursor"], (str, int))
+        query = query.filter(sqlalchemy.tuple_(Drug.name, Drug.id) > sqlalchemy.tuple_(last_name, last_id))
+
+    rows = query.order_by(Drug.name, Drug.id).limit(limit + 1).all()
+    drugs, next_cursor = paginate(rows, limit, key=lambda d: (d.name, d.id))
+    items = [drug_to_dict(d) for d in drugs]
+
+    if not items:
+        text = f"'{search_term}' ile ilgili ilaç bulunamadı."
+    else:
+        labels = {"critical": "🔴 KRİTİK", "low": "🟡 DÜŞÜK", "normal": "🟢 NORMAL"}
+        lines = [f"'{search_term}' için {len(items)} sonuç:", ""]
+        lines += [
+            f"• {d['name']} ({d['active_ingredient']}) - {d['price']} TL - "
+            f"{d['stock_quantity']} adet - {labels[d['stock_level']]}"
+            for d in items
+        ]
+        if next_cursor:
+            lines.append("\n(Devamı var: cursor ile sonraki sayfayı isteyin)")
+        text = "\n".join(lines)
+
+    return text, {"items": items, "next_cursor": next_cursor}
+
+@tool(
+    name="check_stock",
+    description="İlaç stok durumunu kontrol et",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "drug_id": {
+                "type": "integer",
+                "description": "İlaç ID'si (isteğe bağlı)"
+            },
+            "drug_name": {
+                "type": "string",
+                "description": "İlaç ismi (isteğe bağlı)"
             }
-        
-        elif name == "check_stock":
-            drug_id = arguments.get("drug_id")
-            drug_name = arguments.get("drug_name")
-            
-            drug = None
-            if drug_id:
-                drug = db.query(Drug).filter(Drug.id == drug_id).first()
-            elif drug_name:
-                drug = db.query(Drug).filter(Drug.name.ilike(f"%{drug_name}%")).first()
-            
-            if not drug:
-                return {
-                    "content": [{
-                        "type": "text",
-                        "text": "İlaç bulunamadı."
-                    }]
-                }
-            
-            stock_status = "NORMAL"
-            if drug.stock_quantity <= 5:
-                stock_status = "KRİTİK STOK! ⚠️"
-            elif drug.stock_quantity <= drug.low_stock_threshold:
-                stock_status = "DÜŞÜK STOK"
-            
-            return {
-                "content": [{
-                    "type": "text",
-                    "text": f"🏥 **{drug.name}** Stok Durumu:\n" +
-                           f"• Etken Madde: {drug.active_ingredient}\n" +
-                           f"• Fiyat: {drug.price} TL\n" +
-                           f"• Mevcut Stok: {drug.stock_quantity} adet\n" +
-                           f"• Stok Eşiği: {drug.low_stock_threshold} adet\n" +
-                           f"• Durum: **{stock_status}**\n" +
-                           f"• Açıklama: {drug.description or 'Açıklama yok'}"
-                }]
+        }
+    },
+    cacheable=True
+)
+def check_stock(db: Session, args: Dict[str, Any]):
+    drug = None
+    if args.get("drug_id"):
+        drug = db.query(Drug).filter(Drug.id == args["drug_id"]).first()
+    elif args.get("drug_name"):
+        drug = db.query(Drug).filter(Drug.name.ilike(f"%{args['drug_name']}%")).first()
+
+    if not drug:
+        return "İlaç bulunamadı.", {"drug": None}
+
+    data = {**drug_to_dict(drug), "description": drug.description}
+    labels = {"critical": "KRİTİK STOK! ⚠️", "low": "DÜŞÜK STOK", "normal": "NORMAL"}
+    text = "\n".join([
+        f"🏥 **{drug.name}** Stok Durumu:",
+        f"• Etken Madde: {drug.active_ingredient}",
+        f"• Fiyat: {drug.price} TL",
+        f"• Mevcut Stok: {drug.stock_quantity} adet",
+        f"• Stok Eşiği: {drug.low_stock_threshold} adet",
+        f"• Durum: **{labels[data['stock_level']]}**",
+        f"• Açıklama: {drug.description or 'Açıklama yok'}",
+    ])
+    return text, {"drug": data}
+
+@tool(
+    name="get_low_stock_alerts",
+    description="Düşük ve kritik stok uyarılarını getir (sayfalı, en düşük stok önce)",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "limit": {
+                "type": "integer",
+                "description": "Sayfa boyutu",
+                "minimum": 1,
+                "maximum": 100,
+                "default": 20
+            },
+            **PAGINATION_PROPERTIES
+        }
+    },
+    cacheable=True
+)
+def get_low_stock_alerts(db: Session, args: Dict[str, Any]):
+    limit = args["limit"]
+
+    query = db.query(Drug).filter(Drug.stock_quantity <= Drug.low_stock_threshold)
+    if args.get("cursor"):
+        last_stock, last_id = decode_cursor(args["cursor"], (int, int))
+        query = query.filter(
+            sqlalchemy.tuple_(Drug.stock_quantity, Drug.id) > sqlalchemy.tuple_(last_stock, last_id)
+        )
+
+    rows = query.order_by(Drug.stock_quantity, Drug.id).limit(limit + 1).all()
+    drugs, next_cursor = paginate(rows, limit, key=lambda d: (d.stock_quantity, d.id))
+    items = [drug_to_dict(d) for d in drugs]
+
+    critical = [d for d in items if d["stock_level"] == "critical"]
+    warning = [d for d in items if d["stock_level"] != "critical"]
+
+    lines = ["📊 **STOK UYARI RAPORU**", ""]
+    if critical:
+        lines.append(f"🔴 **KRİTİK STOK (≤{CRITICAL_STOCK_LEVEL} adet):**")
+        lines += [f"• {d['name']}: {d['stock_quantity']} adet (Eşik: {d['low_stock_threshold']})" for d in critical]
+    if warning:
+        lines.append("\n🟡 **DÜŞÜK STOK:**")
+        lines += [f"• {d['name']}: {d['stock_quantity']} adet (Eşik: {d['low_stock_threshold']})" for d in warning]
+    if not items:
+        lines.append("✅ Tüm ilaçların stok durumu normal.")
+    if next_cursor:
+        lines.append("\n(Devamı var: cursor ile sonraki sayfayı isteyin)")
+
+    return "\n".join(lines), {"items": items, "next_cursor": next_cursor}
+
+def resolve_report_date(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Boş tarih = bugün; önbellek anahtarına gün girer, gece yarısından sonra dünkü rapor dönmez"""
+    if not args["date"]:
+        return {**args, "date": date.today().isoformat()}
+    try:
+        datetime.strptime(args["date"], "%Y-%m-%d")
+    except ValueError:
+        raise ToolError("Geçersiz tarih")
+    return args
+
+@tool(
+    name="get_daily_sales_report",
+    description="Günlük satış raporunu getir",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "date": {
+                "type": "string",
+                "description": "Tarih (YYYY-MM-DD formatında, boşsa bugün)",
+                "pattern": "^(\\d{4}-\\d{2}-\\d{2})?$",
+                "default": ""
             }
-        
-        elif name == "get_low_stock_alerts":
-            limit = arguments.get("limit", 20)
-            
-            # Düşük stoklu ilaçlar
-            low_stock_drugs = db.query(Drug).filter(
-                Drug.stock_quantity <= Drug.low_stock_threshold
-            ).order_by(Drug.stock_quantity).limit(limit).all()
-            
-            critical_drugs = [d for d in low_stock_drugs if d.stock_quantity <= 5]
-            warning_drugs = [d for d in low_stock_drugs if d.stock_quantity > 5]
-            
-            response_text = f"📊 **STOK UYARI RAPORU**\n\n"
-            
-            if critical_drugs:
-                response_text += "🔴 **KRİTİK STOK (<5 adet):**\n"
-                for drug in critical_drugs:
-                    response_text += f"• {drug.name}: {drug.stock_quantity} adet (Eşik: {drug.low_stock_threshold})\n"
-            
-            if warning_drugs:
-                response_text += "\n🟡 **DÜŞÜK STOK:**\n"
-                for drug in warning_drugs:
-                    response_text += f"• {drug.name}: {drug.stock_quantity} adet (Eşik: {drug.low_stock_threshold})\n"
-            
-            if not low_stock_drugs:
-                response_text += "✅ Tüm ilaçların stok durumu normal."
-            
-            return {
-                "content": [{
-                    "type": "text",
-                    "text": response_text
-                }]
+        }
+    },
+    cacheable=True,
+    resolve=resolve_report_date
+)
+def get_daily_sales_report(db: Session, args: Dict[str, Any]):
+    target_date = datetime.strptime(args["date"], "%Y-%m-%d").date()
+
+    # Tek sorguda satış + ilaç adı (satır başına ayrı sorgu yok). Aralık koşulu
+    # partition budamasına izin verir: yalnızca o ayın partition'ı taranır
+    day_start = datetime.combine(target_date, datetime.min.time())
+    sales = db.query(Sale.quantity, Sale.total_price, Drug.name)\
+              .outerjoin(Drug, Sale.drug_id == Drug.id)\
+              .filter(Sale.sale_date >= day_start, Sale.sale_date < day_start + timedelta(days=1))\
+              .order_by(Sale.sale_date).all()
+
+    details = [{
+        "drug": name or "Bilinmeyen",
+        "quantity": quantity,
+        "total": float(total_price)
+    } for quantity, total_price, name in sales]
+
+    data = {
+        "date": target_date.isoformat(),
+        "sales_count": len(details),
+        "total_revenue": round(sum(d["total"] for d in details), 2),
+        "total_quantity": sum(d["quantity"] for d in details),
+        "details": details
+    }
+
+    lines = [
+        "📈 **GÜNLÜK SATIŞ RAPORU**",
+        f"• Tarih: {target_date.strftime('%d.%m.%Y')}",
+        f"• Toplam Satış: {data['sales_count']} adet",
+        f"• Toplam Ciro: {data['total_revenue']:.2f} TL",
+        f"• Toplam Miktar: {data['total_quantity']} adet",
+        "",
+    ]
+    if details:
+        lines.append("**Satış Detayları:**")
+        lines += [f"• {d['drug']}: {d['quantity']} adet - {d['total']:.2f} TL" for d in details]
+    else:
+        lines.append("Bugün satış yapılmamış.")
+
+    return "\n".join(lines), data
+
+@tool(
+    name="add_drug_to_cart",
+    description="Sanal sepet için ilaç ekle (demo amaçlı)",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "drug_id": {
+                "type": "integer",
+                "description": "İlaç ID'si"
+            },
+            "quantity": {
+                "type": "integer",
+                "description": "Miktar",
+                "minimum": 1,
+                "default": 1
             }
-        
-        elif name == "get_daily_sales_report":
-            from datetime import date, datetime
-            
-            report_date = arguments.get("date", "")
-            if report_date:
-                target_date = datetime.strptime(report_date, "%Y-%m-%d").date()
-            else:
-                target_date = date.today()
-            
-            # Bugünkü satışlar
-            sales = db.query(Sale).filter(
-                sqlalchemy.func.date(Sale.sale_date) == target_date
-            ).all()
-            
-            total_revenue = sum(float(s.total_price) for s in sales)
-            total_quantity = sum(s.quantity for s in sales)
-            
-            # Satış detayları
-            details = []
-            for sale in sales:
-                drug = db.query(Drug).filter(Drug.id == sale.drug_id).first()
-                details.append({
-                    "drug": drug.name if drug else "Bilinmeyen",
-                    "quantity": sale.quantity,
-                    "total": float(sale.total_price)
-                })
-            
-            response_text = (
-                f"📈 **GÜNLÜK SATIŞ RAPORU**\n"
-                f"• Tarih: {target_date.strftime('%d.%m.%Y')}\n"
-                f"• Toplam Satış: {len(sales)} adet\n"
-                f"• Toplam Ciro: {total_revenue:.2f} TL\n"
-                f"• Toplam Miktar: {total_quantity} adet\n\n"
-            )
-            
-            if details:
-                response_text += "**Satış Detayları:**\n"
-                for d in details:
-                    response_text += f"• {d['drug']}: {d['quantity']} adet - {d['total']:.2f} TL\n"
-            else:
-                response_text += "Bugün satış yapılmamış."
-            
-            return {
-                "content": [{
-                    "type": "text",
-                    "text": response_text
-                }]
+        },
+        "required": ["drug_id"]
+    }
+)
+def add_drug_to_cart(db: Session, args: Dict[str, Any]):
+    # Demo amaçlı sanal sepet
+    quantity = args["quantity"]
+    drug = db.query(Drug).filter(Drug.id == args["drug_id"]).first()
+    if not drug:
+        return "İlaç bulunamadı.", {"drug": None}
+
+    total_price = float(drug.price) * quantity
+    data = {
+        "drug": drug_to_dict(drug),
+        "quantity": quantity,
+        "unit_price": float(drug.price),
+        "total_price": round(total_price, 2),
+        "demo": True
+    }
+    text = "\n".join([
+        "🛒 **SEPETE EKLENDİ:**",
+        f"• İlaç: {drug.name}",
+        f"• Miktar: {quantity} adet",
+        f"• Birim Fiyat: {drug.price} TL",
+        f"• Toplam: {total_price:.2f} TL",
+        f"• Mevcut Stok: {drug.stock_quantity} adet",
+        "",
+        "(Demo modu - Gerçek satış yapılmadı)",
+    ])
+    return text, data
+
+# YENİ: Public API sorgusu yapan tool
+@tool(
+    name="public_api_query",
+    description="Public API'den veri çek (demo amaçlı)",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "api_endpoint": {
+                "type": "string",
+                "description": "API endpoint URL",
+                "default": "https://jsonplaceholder.typicode.com/todos/1"
             }
-        
-        elif name == "add_drug_to_cart":
-            # Demo amaçlı sanal sepet
-            drug_id = arguments.get("drug_id")
-            quantity = arguments.get("quantity", 1)
-            
-            drug = db.query(Drug).filter(Drug.id == drug_id).first()
-            if not drug:
-                return {
-                    "content": [{
-                        "type": "text",
-                        "text": "İlaç bulunamadı."
-                    }]
-                }
-            
-            total_price = drug.price * quantity
-            
-            return {
-                "content": [{
-                    "type": "text",
-                    "text": f"🛒 **SEPETE EKLENDİ:**\n" +
-                           f"• İlaç: {drug.name}\n" +
-                           f"• Miktar: {quantity} adet\n" +
-                           f"• Birim Fiyat: {drug.price} TL\n" +
-                           f"• Toplam: {total_price:.2f} TL\n" +
-                           f"• Mevcut Stok: {drug.stock_quantity} adet\n\n" +
-                           f"(Demo modu - Gerçek satış yapılmadı)"
-                }]
+        }
+    },
+    uses_db=False
+)
+async def public_api_query(args: Dict[str, Any]):
+    api_endpoint = args["api_endpoint"]
+    try:
+        response = await get_http_client().get(api_endpoint, timeout=10)
+    except httpx.HTTPError as e:
+        raise ToolError(f"❌ API sorgusu hatası: {str(e)}")
+
+    if response.status_code != 200:
+        raise ToolError(f"❌ API isteği başarısız. Status code: {response.status_code}")
+
+    data = response.json()
+    text = (f"✅ Public API'den veri alındı:\nEndpoint: {api_endpoint}\n\n"
+            f"Response (ilk 200 karakter):\n{str(data)[:200]}...")
+    return text, {"endpoint": api_endpoint, "status_code": response.status_code, "data": data}
+
+# YENİ: Toplama işlemi yapan basit tool
+@tool(
+    name="toplama_islemi",
+    description="İki sayıyı toplar",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "sayi1": {
+                "type": "number",
+                "description": "İlk sayı"
+            },
+            "sayi2": {
+                "type": "number",
+                "description": "İkinci sayı"
             }
-        
+        },
+        "required": ["sayi1", "sayi2"]
+    },
+    uses_db=False
+)
+async def toplama_islemi(args: Dict[str, Any]):
+    sayi1, sayi2 = args["sayi1"], args["sayi2"]
+    toplam = sayi1 + sayi2
+    return f"Toplama işlemi sonucu: {sayi1} + {sayi2} = {toplam}", {
+        "sayi1": sayi1, "sayi2": sayi2, "toplam": toplam
+    }
+
+# ================ MCP HANDLER'LARI ================
+
+@app.list_tools()
+async def handle_list_tools() -> List[Tool]:
+    """Kullanılabilir MCP tool'larını listele"""
+    return [spec.tool for spec in TOOLS.values()]
+
+def error_result(message: str) -> CallToolResult:
+    return CallToolResult(content=[TextContent(type="text", text=message)], isError=True)
+
+# Şema doğrulaması ToolSpec'te (derlenmiş validator ile) yapılır
+@app.call_tool(validate_input=False)
+async def handle_call_tool(name: str, arguments: Dict[str, Any]):
+    """MCP tool'larını çalıştır"""
+    spec = TOOLS.get(name)
+    if spec is None:
+        return error_result(f"Bilinmeyen tool: {name}")
+
+    try:
+        args = spec.validate(arguments or {})
+        if spec.cacheable and result_cache.enabled and not args.get("bypass_cache"):
+            text, data = await call_cached(spec, args)
+        elif spec.uses_db:
+            text, data = await run_db(run_db_tool, spec, args)
         else:
-            return {
-                "content": [{
-                    "type": "text",
-                    "text": f"Bilinmeyen tool: {name}"
-                }]
-            }
-    
+            text, data = await spec.handler(args)
+    except (ToolError, ValueError) as e:
+        return error_result(str(e))
     except Exception as e:
-        return {
-            "content": [{
-                "type": "text",
-                "text": f"Hata oluştu: {str(e)}"
-            }]
-        }
-    finally:
-        db.close()
+        return error_result(f"Hata oluştu: {str(e)}")
+
+    return [TextContent(type="text", text=text)], data
 
 # MCP Server'ı başlatmak için - DÜZELTİLDİ!
 if __name__ == "__main__":
-    import asyncio
     import sys
-    
+
     async def main():
         """Basit MCP server - Docker için düzeltildi"""
         print("🚀 Eczane MCP Server başlatılıyor...", file=sys.stderr)
-        print(f"📋 Tool sayısı: 7", file=sys.stderr)
-        print(f"✅ Toplama tool: toplama_islemi", file=sys.stderr)
-        print(f"🌐 Public API tool: public_api_query", file=sys.stderr)
-        
+        print(f"📋 Tool sayısı: {len(TOOLS)}", file=sys.stderr)
+        print(f"✅ Tool'lar: {', '.join(TOOLS)}", file=sys.stderr)
+
         # Stdio modunda çalış
         from mcp.server import stdio
-        async with stdio.stdio_server() as (read_stream, write_stream):
-            await app.run(read_stream, write_stream)
-    
+        try:
+            async with stdio.stdio_server() as (read_stream, write_stream):
+                await app.run(read_stream, write_stream, app.create_initialization_options())
+        finally:
+            if _http_client is not None:
+                await _http_client.aclose()
+            db_executor.shutdown(wait=False)
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\n👋 MCP Server durduruluyor...", file=sys.stderr)
\ No newline at end of file
+        print("\n👋 MCP Server durduruluyor...", file=sys.stderr)
@@ -0,0 +1,39 @@
+"""
+Migration komut satırı
+Çalıştırma:
+    python -m migrations upgrade [--to 0003]    # bekleyenleri uygula
+    python -m migrations status                 # durum listesi
+    python -m migrations sql [--from 0001]      # offline: SQL betiğini yazdır (DB'ye bağlanmaz)
+    python -m migrations.explain_check          # sıcak sorguların index kullanımını doğrula
+"""
+
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description="Veritabanı migration aracı")
+    parser.add_argument("command", choices=["upgrade", "status", "sql"])
+    parser.add_argument("--from", dest="start", help="sql: bu sürümden SONRAKİLERİ üret")
+    parser.add_argument("--to", dest="target", help="Bu sürüme kadar (dahil)")
+    args = parser.parse_args()
+
+    if args.command == "sql":
+        # Offline mod: database modülü (ve engine) hiç yüklenmez
+        from migrations.runner import render_sql
+        print(render_sql(args.start, args.target))
+        return
+
+    from database import engine
+    from migrations.runner import status, upgrade
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, args.target)
+        print(f"📋 {len(applied)} migration uygulandı")
+    else:
+        for row in status(engine):
+            mark = "✅" if row["applied"] else "⏳"
+            mode = "" if row["transactional"] else "  [no-transaction]"
+            note = "  (dosya değiştirilmiş!)" if row["modified"] else ""
+            print(f"{mark} {row['version']}_{row['name']}{mode}{note}")
+
+if __name__ == "__main__":
+    main()
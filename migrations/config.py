@@ -0,0 +1,28 @@
+# migrations/config.py
+"""
+Migration ve toplu doldurma (backfill) ayarları
+Ortam değişkenleriyle ayarlanır, .env gerektirmez
+"""
+
+import os
+
+# ==================== MIGRATION AYARLARI ====================
+MIGRATION_CONFIG = {
+    # Uygulama açılışında bekleyen migration'lar uygulansın mı
+    "MIGRATE_ON_STARTUP": os.environ.get("MIGRATE_ON_STARTUP", "true").lower() == "true",
+    # DDL kilidi bu süre içinde alınamazsa vazgeç (arkada sorgu kuyruğu birikmesin)
+    "LOCK_TIMEOUT": os.environ.get("MIGRATION_LOCK_TIMEOUT", "3s"),
+    "LOCK_RETRIES": int(os.environ.get("MIGRATION_LOCK_RETRIES", 10)),
+    "LOCK_RETRY_DELAY_SECONDS": float(os.environ.get("MIGRATION_LOCK_RETRY_DELAY", 2)),
+    # Aynı anda açılan servislerin migration'ları sıraya girsin diye advisory lock anahtarı
+    "ADVISORY_LOCK_KEY": int(os.environ.get("MIGRATION_ADVISORY_LOCK_KEY", 72033)),
+}
+
+# ==================== BACKFILL AYARLARI ====================
+BACKFILL_CONFIG = {
+    # Her batch ayrı ve kısa bir transaction'dır; satır kilitleri hemen bırakılır
+    "BATCH_SIZE": int(os.environ.get("BACKFILL_BATCH_SIZE", 5000)),
+    # Batch'ler arası bekleme: mesai saatlerinde satış yüküne yer bırakır
+    "PAUSE_SECONDS": float(os.environ.get("BACKFILL_PAUSE_SECONDS", 0.05)),
+    "STATEMENT_TIMEOUT": os.environ.get("BACKFILL_STATEMENT_TIMEOUT", "30s"),
+}
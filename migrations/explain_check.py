@@ -0,0 +1,204 @@
+# migrations/explain_check.py
+"""
+Sıcak sorguların index kullandığını EXPLAIN ile doğrulayan regresyon kontrolü
+Çalıştırma (PostgreSQL gerekir):
+    python -m migrations.explain_check
+Demo tabloları küçük olduğundan planlayıcı zaten seq scan seçer; kontrol
+enable_seqscan=off ile yapılır, yani "bu sorguyu bir index karşılayabiliyor mu"
+sorusunu yanıtlar. Partition'lı tablolarda planda partition index'leri görünür;
+bunlar ana index'in çocukları olarak eşleştirilir. Beklenen index kullanılmazsa
+çıkış kodu 1 olur.
+"""
+
+import json
+import sys
+from typing import List, NamedTuple, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+import branches
+from database import DEFAULT_BRANCH_ID, branch_criteria, engine
+from responses import StockDrugResponse
+
+class HotQuery(NamedTuple):
+    name: str
+    sql: str
+    expected_index: str
+    also_accepted: Tuple[str, ...] = ()  # aynı erişimi sağlayan diğer index'ler
+
+def orm_sql(query) -> str:
+    """Endpoint'in ORM sorgusu, çalışırken eklenen şube kapsamıyla (PostgreSQL SQL'i)"""
+    statement = query.options(branch_criteria(DEFAULT_BRANCH_ID)).statement
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+HOT_QUERIES = [
+    HotQuery(
+        "müşteri satış geçmişi",
+        "SELECT id, drug_id, quantity, total_price, sale_date FROM sales "
+        "WHERE customer_id = 1 ORDER BY sale_date DESC, id DESC LIMIT 50",
+        "ix_sales_customer_date"
+    ),
+    HotQuery(
+        "günlük satış raporu",
+        "SELECT id, drug_id, quantity, total_price FROM sales "
+        "WHERE sale_date >= CURRENT_DATE AND sale_date < CURRENT_DATE + 1 ORDER BY sale_date",
+        "ix_sales_sale_date"
+    ),
+    HotQuery(
+        "uyarı geçmişi",
+        "SELECT id, drug_id, alert_type, message, is_read, created_at FROM alerts "
+        "ORDER BY created_at DESC, id DESC LIMIT 50",
+        "ix_alerts_created"
+    ),
+    HotQuery(
+        "okunmamış uyarılar",
+        "SELECT id, alert_type, created_at FROM alerts WHERE NOT is_read "
+        "ORDER BY created_at DESC, id DESC LIMIT 51",
+        "ix_alerts_unread"
+    ),
+    HotQuery(
+        "okunmuş uyarı budama",
+        "SELECT id FROM alerts WHERE is_read AND read_at < now() - interval '90 days' "
+        "ORDER BY read_at LIMIT 5000",
+        "ix_alerts_read_at"
+    ),
+    HotQuery(
+        "zincir düşük stoklu ilaçlar (MCP)",
+        "SELECT id, name, stock_quantity, low_stock_threshold FROM drugs "
+        "WHERE stock_quantity <= low_stock_threshold ORDER BY stock_quantity, id LIMIT 21",
+        "ix_drugs_low_stock"
+    ),
+    HotQuery(
+        "zincir düşük stok sayısı (MCP)",
+        "SELECT count(*) FROM drugs WHERE stock_quantity <= low_stock_threshold",
+        "ix_drugs_low_stock"
+    ),
+    HotQuery(
+        "şube düşük stoklu ilaçlar (GET /drugs/low-stock)",
+        orm_sql(branches.stock_below(Session(), StockDrugResponse)),
+        "ix_branch_stock_levels",
+        ("branch_stock_pkey",)
+    ),
+    HotQuery(
+        "şube kritik stoklu ilaçlar (GET /drugs/critical-stock)",
+        orm_sql(branches.stock_below(Session(), StockDrugResponse, level=5)),
+        "ix_branch_stock_levels",
+        ("branch_stock_pkey",)
+    ),
+    HotQuery(
+        "ilaç stok hareketleri",
+        "SELECT id, movement_type, quantity_change, created_at FROM stock_movements "
+        "WHERE drug_id = 1 ORDER BY created_at",
+        "ix_stock_movements_drug_created"
+    ),
+    HotQuery(
+        "FEFO parti tahsisi",
+        "SELECT id, quantity FROM drug_lots WHERE branch_id = 1 AND drug_id = 1 AND quantity > 0 "
+        "AND (expiry_date >= CURRENT_DATE OR expiry_date IS NULL) "
+        "ORDER BY expiry_date NULLS LAST, id LIMIT 1",
+        "ix_drug_lots_fefo"
+    ),
+    HotQuery(
+        "toplu satış: satılabilir parti stoğu",
+        "SELECT drug_id, sum(quantity) FROM drug_lots WHERE branch_id = 1 AND drug_id IN (1, 2, 3) "
+        "AND quantity > 0 AND (expiry_date >= CURRENT_DATE OR expiry_date IS NULL) GROUP BY drug_id",
+        "ix_drug_lots_fefo"
+    ),
+    HotQuery(
+        "miadı yaklaşan partiler",
+        "SELECT id, drug_id, lot_number, expiry_date, quantity FROM drug_lots "
+        "WHERE branch_id = 1 AND quantity > 0 AND expiry_date <= CURRENT_DATE + 90 "
+        "ORDER BY expiry_date, id LIMIT 51",
+        "ix_drug_lots_expiry"
+    ),
+    HotQuery(
+        "şube günlük satış raporu",
+        "SELECT id, drug_id, quantity, total_price FROM sales "
+        "WHERE branch_id = 1 AND sale_date >= CURRENT_DATE AND sale_date < CURRENT_DATE + 1",
+        "ix_sales_branch_date"
+    ),
+    HotQuery(
+        "şube uyarı geçmişi",
+        "SELECT id, drug_id, alert_type, message, is_read, created_at FROM alerts "
+        "WHERE branch_id = 1 ORDER BY created_at DESC, id DESC LIMIT 50",
+        "ix_alerts_branch_created"
+    ),
+    HotQuery(
+        "ilacın şube stokları (transfer)",
+        "SELECT branch_id, quantity FROM branch_stock WHERE drug_id = 1",
+        "ix_branch_stock_drug"
+    ),
+    HotQuery(
+        "ITS gönderici: vadesi gelen bildirimler",
+        "SELECT id, sale_id, sale_date, attempts, payload FROM its_notifications "
+        "WHERE status = 'pending' AND next_attempt_at <= now() "
+        "ORDER BY next_attempt_at, id LIMIT 100 FOR UPDATE SKIP LOCKED",
+        "ix_its_notifications_due"
+    ),
+    HotQuery(
+        "outbox relay: sıradaki olaylar",
+        "SELECT id, topic, branch_id, payload, attempts FROM outbox "
+        "WHERE failed_at IS NULL ORDER BY id LIMIT 500 FOR UPDATE SKIP LOCKED",
+        "outbox_pkey"
+    ),
+    HotQuery(
+        "şube günlük satış özeti",
+        "SELECT day, drug_id, sale_count, quantity, revenue FROM sales_daily "
+        "WHERE branch_id = 1 AND day >= CURRENT_DATE - 30",
+        "ix_sales_daily_branch_day"
+    ),
+    HotQuery(
+        "önbellek veri sürümü",
+        "SELECT max(updated_at) FROM drugs",
+        "ix_drugs_updated_at"
+    ),
+]
+
+def plan_indexes(plan: dict) -> List[str]:
+    """Plan ağacındaki tüm 'Index Name' değerlerini topla"""
+    names = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        names.extend(plan_indexes(child))
+    return names
+
+def index_family(conn, name: str) -> set:
+    """Index ve (partition'lı tablolarda) tüm partition index'leri"""
+    rows = conn.execute(text("""
+        WITH RECURSIVE family(oid) AS (
+            SELECT to_regclass(:name)::oid
+            UNION ALL
+            SELECT i.inhrelid FROM pg_inherits i JOIN family f ON i.inhparent = f.oid
+        )
+        SELECT c.relname FROM family f JOIN pg_class c ON c.oid = f.oid
+    """), {"name": name}).scalars().all()
+    return set(rows) | {name}
+
+def check(conn, query: HotQuery) -> List[str]:
+    row = conn.execute(text(f"EXPLAIN (FORMAT JSON) {query.sql}")).scalar()
+    plan = row if isinstance(row, list) else json.loads(row)
+    return plan_indexes(plan[0]["Plan"])
+
+def main() -> int:
+    if engine.dialect.name != "postgresql":
+        print(f"❌ EXPLAIN kontrolü PostgreSQL gerektirir (şu an: {engine.dialect.name})")
+        return 2
+
+    failures = 0
+    with engine.begin() as conn:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for query in HOT_QUERIES:
+            used = check(conn, query)
+            family = set().union(*(index_family(conn, name) for name in (query.expected_index,) + query.also_accepted))
+            if family & set(used):
+                print(f"✅ {query.name}: {query.expected_index}")
+            else:
+                failures += 1
+                print(f"❌ {query.name}: {query.expected_index} kullanılmadı (plan: {used or 'seq scan'})")
+
+    print(f"📋 {len(HOT_QUERIES) - failures}/{len(HOT_QUERIES)} sorgu beklenen index'i kullanıyor")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# migrations/helpers.py
+"""
+Kesintisiz şema değişiklikleri için yardımcılar
+- locked_transaction: kısa lock_timeout ile DDL, kilit alınamazsa yeniden dene
+- backfill: yeni kolonları küçük batch'lerle doldur (tablo kilitlenmez)
+- partitioned_index: partition'lı tabloda yazmaları bloklamadan index kur
+"""
+
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from migrations.config import BACKFILL_CONFIG, MIGRATION_CONFIG
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+def is_lock_timeout(error: OperationalError) -> bool:
+    return getattr(error.orig, "pgcode", None) == LOCK_NOT_AVAILABLE
+
+def locked_transaction(engine, work: Callable, retries: Optional[int] = None):
+    """work(conn)'u lock_timeout'lu bir transaction'da çalıştır
+
+    ALTER TABLE gibi DDL'ler kilidi beklerken arkalarındaki tüm sorguları da
+    bekletir; kısa timeout ile vazgeçip biraz sonra yeniden denemek daha güvenlidir.
+    """
+    retries = MIGRATION_CONFIG["LOCK_RETRIES"] if retries is None else retries
+    attempt = 0
+    while True:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"SET LOCAL lock_timeout = '{MIGRATION_CONFIG['LOCK_TIMEOUT']}'"))
+                return work(conn)
+        except OperationalError as e:
+            if not is_lock_timeout(e) or attempt >= retries:
+                raise
+            attempt += 1
+            print(f"⏳ Kilit alınamadı, yeniden deneniyor ({attempt}/{retries})")
+            time.sleep(MIGRATION_CONFIG["LOCK_RETRY_DELAY_SECONDS"])
+
+def column_type(conn, table: str, column: str) -> Optional[str]:
+    """information_schema'dan kolon tipi (yoksa None)"""
+    return conn.execute(text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = :t AND column_name = :c"
+    ), {"t": table, "c": column}).scalar()
+
+def backfill(engine, table: str, set_clause: str, pending: str,
+             batch_size: Optional[int] = None, pause: Optional[float] = None,
+             key: str = "id") -> int:
+    """pending koşulunu sağlayan satırları batch'ler halinde güncelle
+
+    Her batch: id sırasıyla (keyset) en fazla batch_size satır, FOR UPDATE SKIP
+    LOCKED ile seçilir; o an satış transaction'ının tuttuğu satırlar beklenmez,
+    atlanır ve sonraki turda tekrar denenir. Güncellenen satır sayısını döndürür.
+    """
+    batch_size = batch_size or BACKFILL_CONFIG["BATCH_SIZE"]
+    pause = BACKFILL_CONFIG["PAUSE_SECONDS"] if pause is None else pause
+    update = text(
+        f"UPDATE {table} SET {set_clause} WHERE {key} IN ("
+        f"SELECT {key} FROM {table} WHERE {key} > :last AND ({pending}) "
+        f"ORDER BY {key} LIMIT :batch FOR UPDATE SKIP LOCKED) RETURNING {key}"
+    )
+    remaining = text(f"SELECT count(*) FROM {table} WHERE {pending}")
+
+    total = 0
+    while True:
+        last = -1
+        while True:
+            with engine.begin() as conn:
+                conn.execute(text(f"SET LOCAL lock_timeout = '{MIGRATION_CONFIG['LOCK_TIMEOUT']}'"))
+                conn.execute(text(f"SET LOCAL statement_timeout = '{BACKFILL_CONFIG['STATEMENT_TIMEOUT']}'"))
+                ids = conn.execute(update, {"last": last, "batch": batch_size}).scalars().all()
+            if not ids:
+                break
+            total += len(ids)
+            last = max(ids)
+            if pause:
+                time.sleep(pause)
+
+        # Atlanan (kilitli) satırlar için baştan bir tur daha
+        with engine.connect() as conn:
+            left = conn.execute(remaining).scalar()
+        if not left:
+            break
+        print(f"🔁 {table}: {left} satır kilitli olduğu için atlandı, yeniden deneniyor")
+        time.sleep(MIGRATION_CONFIG["LOCK_RETRY_DELAY_SECONDS"])
+
+    print(f"✅ {table} backfill tamamlandı: {total} satır")
+    return total
+
+def partitioned_index(engine, table: str, name: str, columns: str):
+    """Partition'lı tabloda index'i partition partition CONCURRENTLY kur
+
+    Ana tablodaki düz CREATE INDEX tüm partition'ları build boyunca yazmaya
+    kilitler. Bunun yerine ana tabloda ON ONLY ile boş (geçersiz) index açılır,
+    her partition'ın index'i CONCURRENTLY kurulup ATTACH PARTITION ile bağlanır;
+    son partition bağlanınca ana index geçerli olur. Sonradan açılan
+    partition'lar index'i ana tablodan devralır. Tablo partition'lı değilse
+    index doğrudan CONCURRENTLY kurulur.
+    """
+    from maintenance.partitions import is_partitioned, list_partitions
+    from migrations.runner import drop_invalid_index
+
+    with engine.connect() as conn:
+        partitions = [p.name for p in list_partitions(conn, table)] if is_partitioned(conn, table) else None
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"SET lock_timeout = '{MIGRATION_CONFIG['LOCK_TIMEOUT']}'"))
+        if partitions is None:
+            statement = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {columns}"
+            drop_invalid_index(conn, statement)
+            conn.execute(text(statement))
+            return
+
+        # Yalnızca katalog: ana tablo taranmaz, partition'lara dokunulmaz
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} {columns}"))
+        for partition in partitions:
+            attached = conn.execute(text(
+                "SELECT 1 FROM pg_inherits i JOIN pg_index x ON x.indexrelid = i.inhrelid "
+                "WHERE i.inhparent = (:parent)::regclass AND x.indrelid = (:partition)::regclass"
+            ), {"parent": name, "partition": partition}).scalar()
+            if attached:
+                continue
+            suffix = partition[len(table) + 1:] if partition.startswith(f"{table}_") else partition
+            statement = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}_{suffix} ON {partition} {columns}"
+            drop_invalid_index(conn, statement)
+            conn.execute(text(statement))
+            conn.execute(text(f"ALTER INDEX {name} ATTACH PARTITION {name}_{suffix}"))
+    print(f"✅ {table}: {name} {len(partitions)} partition'da kuruldu")
@@ -0,0 +1,260 @@
+# migrations/runner.py
+"""
+Numaralı migration dosyalarını uygulayan çalıştırıcı
+Dosyalar migrations/versions/ altındadır ve sürüm sırasıyla uygulanır:
+- NNNN_ad.sql: SQL ifadeleri. İlk satırlarda "-- migrate: no-transaction"
+  varsa ifadeler autocommit çalışır (CREATE INDEX CONCURRENTLY için).
+- NNNN_ad.py: upgrade(conn) fonksiyonu; TRANSACTIONAL = False ise
+  upgrade(engine) alır ve kendi transaction'larını yönetir (batch backfill).
+Uygulananlar schema_migrations tablosuna (sürüm + checksum) yazılır.
+"""
+
+import hashlib
+import importlib.util
+import os
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text
+
+from migrations.config import MIGRATION_CONFIG
+from migrations.helpers import locked_transaction
+
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "versions")
+FILENAME_RE = re.compile(r"^(\d{4})_([a-z0-9_]+)\.(sql|py)$")
+NO_TRANSACTION_RE = re.compile(r"^--\s*migrate:\s*no-transaction\s*$", re.MULTILINE)
+CONCURRENT_INDEX_RE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE
+)
+
+VERSION_TABLE_SQL = """CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(16) PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    checksum VARCHAR(64) NOT NULL,
+    applied_at TIMESTAMP NOT NULL
+)"""
+
+class Migration(NamedTuple):
+    version: str
+    name: str
+    kind: str  # 'sql' veya 'py'
+    path: str
+    source: str
+    checksum: str
+    transactional: bool
+
+    def load_module(self):
+        spec = importlib.util.spec_from_file_location(f"migration_{self.version}", self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+def discover(directory: str = VERSIONS_DIR) -> List[Migration]:
+    """versions/ altındaki migration dosyalarını sürüm sırasıyla oku"""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = FILENAME_RE.match(filename)
+        if not match:
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        kind = match.group(3)
+        if kind == "sql":
+            transactional = not NO_TRANSACTION_RE.search(source)
+        else:
+            transactional = not re.search(r"^TRANSACTIONAL\s*=\s*False", source, re.MULTILINE)
+        migrations.append(Migration(
+            version=match.group(1),
+            name=match.group(2),
+            kind=kind,
+            path=path,
+            source=source,
+            checksum=hashlib.sha256(source.encode()).hexdigest(),
+            transactional=transactional
+        ))
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Aynı sürüm numarasına sahip birden fazla migration var")
+    return migrations
+
+def split_statements(sql: str) -> List[str]:
+    """SQL metnini ifadelere böl ('...' ve $$...$$ içindeki ; bölünmez)"""
+    statements, current = [], []
+    i, n = 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end == -1 else end + 1
+            continue
+        if ch == "'":
+            end = i + 1
+            while end < n:
+                if sql[end] == "'" and not sql.startswith("''", end):
+                    break
+                end += 2 if sql.startswith("''", end) else 1
+            current.append(sql[i:end + 1])
+            i = end + 1
+            continue
+        if ch == "$":
+            tag = re.match(r"\$[A-Za-z_]*\$", sql[i:])
+            if tag:
+                end = sql.find(tag.group(0), i + len(tag.group(0)))
+                end = n if end == -1 else end + len(tag.group(0))
+                current.append(sql[i:end])
+                i = end
+                continue
+        if ch == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+def ensure_version_table(conn):
+    conn.execute(text(VERSION_TABLE_SQL))
+
+def applied_versions(conn) -> dict:
+    """Uygulanmış sürümler: {version: checksum}"""
+    rows = conn.execute(text("SELECT version, checksum FROM schema_migrations"))
+    return {version: checksum for version, checksum in rows}
+
+def record(conn, migration: Migration):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name, checksum, applied_at) "
+             "VALUES (:v, :n, :c, :t)"),
+        {"v": migration.version, "n": migration.name,
+         "c": migration.checksum, "t": datetime.utcnow()}
+    )
+
+def drop_invalid_index(conn, statement: str):
+    """Yarıda kalmış CONCURRENTLY build'in bıraktığı INVALID index'i temizle
+
+    Aksi halde IF NOT EXISTS onu var sayar ve kullanılamaz index kalıcı olur.
+    """
+    match = CONCURRENT_INDEX_RE.search(statement)
+    if not match:
+        return
+    invalid = conn.execute(text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": match.group(1)}).scalar()
+    if invalid:
+        print(f"🧹 Geçersiz index siliniyor: {match.group(1)}")
+        conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}")
+
+def apply(engine, migration: Migration):
+    """Tek bir migration'ı uygula ve kaydet"""
+    if migration.transactional:
+        def work(conn):
+            if migration.kind == "sql":
+                for statement in split_statements(migration.source):
+                    conn.exec_driver_sql(statement)
+            else:
+                migration.load_module().upgrade(conn)
+            record(conn, migration)
+        locked_transaction(engine, work)
+        return
+
+    if migration.kind == "py":
+        migration.load_module().upgrade(engine)
+    else:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"SET lock_timeout = '{MIGRATION_CONFIG['LOCK_TIMEOUT']}'"))
+            for statement in split_statements(migration.source):
+                drop_invalid_index(conn, statement)
+                conn.exec_driver_sql(statement)
+    # İfadeler idempotent yazılır (IF NOT EXISTS); kayıt düşmezse yeniden çalıştırılabilir
+    with engine.begin() as conn:
+        record(conn, migration)
+
+def upgrade(engine, target: Optional[str] = None) -> List[str]:
+    """Bekleyen migration'ları (target dahil) sırayla uygula"""
+    if engine.dialect.name != "postgresql":
+        print(f"⚠️ Migration'lar yalnızca PostgreSQL içindir ({engine.dialect.name} atlandı)")
+        return []
+
+    applied = []
+    # Aynı anda açılan servisler (backend + auth) migration'ı iki kez çalıştırmasın
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        lock_key = MIGRATION_CONFIG["ADVISORY_LOCK_KEY"]
+        lock_conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": lock_key})
+        try:
+            with engine.begin() as conn:
+                ensure_version_table(conn)
+                done = applied_versions(conn)
+
+            for migration in discover():
+                if target is not None and migration.version > target:
+                    break
+                if migration.version in done:
+                    if done[migration.version] != migration.checksum:
+                        print(f"⚠️ {migration.version}_{migration.name} uygulandıktan sonra değiştirilmiş")
+                    continue
+                print(f"🔄 Migration uygulanıyor: {migration.version}_{migration.name}")
+                apply(engine, migration)
+                applied.append(migration.version)
+                print(f"✅ Migration uygulandı: {migration.version}_{migration.name}")
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": lock_key})
+    return applied
+
+def status(engine) -> List[dict]:
+    """Her migration için uygulanma durumu"""
+    done = {}
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            ensure_version_table(conn)
+            done = applied_versions(conn)
+    return [{
+        "version": m.version,
+        "name": m.name,
+        "transactional": m.transactional,
+        "applied": m.version in done,
+        "modified": m.version in done and done[m.version] != m.checksum
+    } for m in discover()]
+
+def pending(engine) -> List[Migration]:
+    rows = {row["version"]: row for row in status(engine)}
+    return [m for m in discover() if not rows[m.version]["applied"]]
+
+def render_sql(start: Optional[str] = None, target: Optional[str] = None) -> str:
+    """Veritabanına bağlanmadan (offline) uygulanacak SQL betiğini üret
+
+    psql ile çalıştırılabilir; her migration'dan sonra schema_migrations'a
+    kayıt eklenir, böylece betik sonradan online çalıştırıcıyla da uyumludur.
+    """
+    out = ["-- Üretildi: python -m migrations sql", f"{VERSION_TABLE_SQL};", ""]
+    for m in discover():
+        if (start is not None and m.version <= start) or (target is not None and m.version > target):
+            continue
+        out.append(f"-- ==== {m.version}_{m.name} ====")
+        if m.kind == "py":
+            offline = getattr(m.load_module(), "OFFLINE_SQL", None)
+            if offline is None:
+                out.append(f"-- UYARI: {m.version} bir Python migration'ı; online çalıştırın:")
+                out.append("--   python -m migrations upgrade")
+                out.append("")
+                continue
+            statements = split_statements(offline)
+        else:
+            statements = split_statements(m.source)
+        if m.transactional:
+            out.append("BEGIN;")
+        out.extend(f"{statement};" for statement in statements)
+        out.append(
+            "INSERT INTO schema_migrations (version, name, checksum, applied_at) "
+            f"VALUES ('{m.version}', '{m.name}', '{m.checksum}', now()) ON CONFLICT DO NOTHING;"
+        )
+        if m.transactional:
+            out.append("COMMIT;")
+        out.append("")
+    return "\n".join(out)
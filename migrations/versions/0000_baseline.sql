@@ -0,0 +1,91 @@
+-- 0000: Temel şema (database.py modelleriyle birebir)
+-- Daha önce create_all veya init-db/init.sql ile kurulmuş veritabanlarında
+-- tüm ifadeler IF NOT EXISTS olduğundan etkisizdir.
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR(50) NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    role VARCHAR(20) NOT NULL DEFAULT 'personel',
+    full_name VARCHAR(100),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username);
+
+CREATE TABLE IF NOT EXISTS drugs (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    active_ingredient VARCHAR(100),
+    price NUMERIC(10, 2) NOT NULL,
+    stock_quantity INTEGER NOT NULL DEFAULT 0,
+    low_stock_threshold INTEGER DEFAULT 10,
+    description TEXT,
+    barcode VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS ix_drugs_name ON drugs (name);
+
+CREATE TABLE IF NOT EXISTS customers (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    tc_no VARCHAR(11),
+    phone VARCHAR(20),
+    email VARCHAR(100),
+    address TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_customers_tc_no ON customers (tc_no);
+
+CREATE TABLE IF NOT EXISTS sales (
+    id SERIAL PRIMARY KEY,
+    drug_id INTEGER REFERENCES drugs(id) ON DELETE SET NULL,
+    customer_id INTEGER REFERENCES customers(id) ON DELETE SET NULL,
+    quantity INTEGER NOT NULL,
+    unit_price NUMERIC(10, 2) NOT NULL,
+    total_price NUMERIC(10, 2) NOT NULL,
+    its_transaction_id VARCHAR(50),
+    sale_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_by INTEGER REFERENCES users(id),
+    notes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS stock_movements (
+    id SERIAL PRIMARY KEY,
+    drug_id INTEGER REFERENCES drugs(id),
+    movement_type VARCHAR(20) NOT NULL, -- 'purchase', 'sale', 'adjustment'
+    quantity_change INTEGER NOT NULL,
+    previous_quantity INTEGER NOT NULL,
+    new_quantity INTEGER NOT NULL,
+    reason TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_by INTEGER REFERENCES users(id)
+);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    id SERIAL PRIMARY KEY,
+    drug_id INTEGER REFERENCES drugs(id),
+    alert_type VARCHAR(20) NOT NULL, -- 'low_stock', 'critical_stock'
+    message TEXT NOT NULL,
+    is_read BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti VARCHAR(64) PRIMARY KEY,
+    token_type VARCHAR(10) NOT NULL, -- 'access', 'refresh'
+    username VARCHAR(50),
+    expires_at TIMESTAMP NOT NULL,
+    revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS ix_revoked_tokens_username ON revoked_tokens (username);
+CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at ON revoked_tokens (expires_at);
+CREATE INDEX IF NOT EXISTS ix_revoked_tokens_revoked_at ON revoked_tokens (revoked_at);
+
+COMMENT ON TABLE users IS 'Sistem kullanıcıları tablosu';
+COMMENT ON TABLE drugs IS 'İlaç bilgileri ve stok tablosu';
+COMMENT ON TABLE customers IS 'Müşteri bilgileri tablosu';
+COMMENT ON TABLE sales IS 'Satış kayıtları tablosu (İTS entegrasyonlu)';
+COMMENT ON TABLE stock_movements IS 'Stok hareketleri log tablosu';
+COMMENT ON TABLE alerts IS 'Stok uyarıları tablosu';
@@ -0,0 +1,36 @@
+-- migrate: no-transaction
+-- 0001: Sorgu desenlerine göre bileşik, kısmi ve ifade index'leri
+-- (CONCURRENTLY: satış ve stok hareketleri build boyunca yazılmaya devam eder)
+-- Her index, eczane_otomasyonu.py / mcp_server.py içindeki bir sıcak sorguya karşılık gelir.
+-- ORM tarafında database.py __table_args__ ile aynı isimlerle tanımlıdır.
+
+-- /customers/{id}/history: WHERE customer_id = ? ORDER BY sale_date DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sales_customer_date
+    ON sales (customer_id, sale_date DESC, id DESC);
+
+-- get_daily_sales_report (MCP): WHERE date(sale_date) = ?
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sales_sale_day
+    ON sales ((date(sale_date)));
+
+-- /alerts/history: ORDER BY created_at DESC LIMIT 50
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alerts_created
+    ON alerts (created_at DESC, id DESC);
+
+-- Stok hareket geçmişi (ilaç bazında, zamana göre); drug_id FK'sının da index'i
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_stock_movements_drug_created
+    ON stock_movements (drug_id, created_at);
+
+-- /drugs/low-stock, /reports/stock-status, get_low_stock_alerts:
+-- WHERE stock_quantity <= low_stock_threshold (yalnızca düşük stoklu satırlar)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_drugs_low_stock
+    ON drugs (stock_quantity, id)
+    WHERE stock_quantity <= low_stock_threshold;
+
+-- get_data_version (MCP önbellek sürümü): max(updated_at)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_drugs_updated_at
+    ON drugs (updated_at);
+
+ANALYZE drugs;
+ANALYZE sales;
+ANALYZE alerts;
+ANALYZE stock_movements;
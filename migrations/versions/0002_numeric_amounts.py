@@ -0,0 +1,97 @@
+"""
+0002: Fiyat ve tutar kolonlarını NUMERIC(10,2)'ye hizala
+create_all ile kurulmuş veritabanlarında bu kolonlar double precision'dır.
+drugs küçük olduğundan doğrudan ALTER edilir. sales ise kilitlenmeden
+dönüştürülür: yeni kolon ekle (anlık) → trigger ile çift yazım →
+batch backfill → NOT NULL kontrolünü arka planda doğrula → kısa kilitle
+kolonları değiştir. Her adım idempotenttir; yarıda kalırsa yeniden çalıştırılabilir.
+"""
+
+from sqlalchemy import text
+
+from migrations.helpers import backfill, column_type, locked_transaction
+
+TRANSACTIONAL = False
+
+# Temel şema zaten NUMERIC; offline betikte yapılacak bir şey yok
+OFFLINE_SQL = "SELECT 1"
+
+def _convert_drugs(conn):
+    conn.execute(text(
+        "ALTER TABLE drugs ALTER COLUMN price TYPE NUMERIC(10, 2) USING round(price::numeric, 2)"
+    ))
+
+def _expand_sales(conn):
+    conn.execute(text("ALTER TABLE sales ADD COLUMN IF NOT EXISTS unit_price_new NUMERIC(10, 2)"))
+    conn.execute(text("ALTER TABLE sales ADD COLUMN IF NOT EXISTS total_price_new NUMERIC(10, 2)"))
+    # Backfill sürerken gelen satış/güncellemeler yeni kolonlara da yazılsın
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION sales_amounts_sync() RETURNS trigger AS $$
+        BEGIN
+            NEW.unit_price_new := round(NEW.unit_price::numeric, 2);
+            NEW.total_price_new := round(NEW.total_price::numeric, 2);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    conn.execute(text("DROP TRIGGER IF EXISTS trg_sales_amounts_sync ON sales"))
+    conn.execute(text(
+        "CREATE TRIGGER trg_sales_amounts_sync BEFORE INSERT OR UPDATE OF unit_price, total_price "
+        "ON sales FOR EACH ROW EXECUTE FUNCTION sales_amounts_sync()"
+    ))
+
+def _swap_sales(conn):
+    # Tetikleyici öncesinden kalan (backfill'in atladığı) son satırlar
+    conn.execute(text(
+        "UPDATE sales SET unit_price_new = round(unit_price::numeric, 2), "
+        "total_price_new = round(total_price::numeric, 2) WHERE unit_price_new IS NULL"
+    ))
+    conn.execute(text("DROP TRIGGER IF EXISTS trg_sales_amounts_sync ON sales"))
+    conn.execute(text("DROP FUNCTION IF EXISTS sales_amounts_sync()"))
+    conn.execute(text("ALTER TABLE sales DROP COLUMN unit_price"))
+    conn.execute(text("ALTER TABLE sales DROP COLUMN total_price"))
+    conn.execute(text("ALTER TABLE sales RENAME COLUMN unit_price_new TO unit_price"))
+    conn.execute(text("ALTER TABLE sales RENAME COLUMN total_price_new TO total_price"))
+    # Doğrulanmış CHECK kısıtı sayesinde SET NOT NULL tabloyu yeniden taramaz
+    conn.execute(text("ALTER TABLE sales ALTER COLUMN unit_price SET NOT NULL"))
+    conn.execute(text("ALTER TABLE sales ALTER COLUMN total_price SET NOT NULL"))
+    conn.execute(text("ALTER TABLE sales DROP CONSTRAINT IF EXISTS sales_amounts_new_not_null"))
+
+def upgrade(engine):
+    with engine.connect() as conn:
+        drugs_type = column_type(conn, "drugs", "price")
+        sales_type = column_type(conn, "sales", "unit_price")
+        swap_pending = column_type(conn, "sales", "unit_price_new") is not None
+
+    if drugs_type == "double precision":
+        locked_transaction(engine, _convert_drugs)
+        print("✅ drugs.price → NUMERIC(10,2)")
+
+    if sales_type != "double precision" and not swap_pending:
+        return
+
+    locked_transaction(engine, _expand_sales)
+    backfill(
+        engine, "sales",
+        set_clause="unit_price_new = round(unit_price::numeric, 2), "
+                   "total_price_new = round(total_price::numeric, 2)",
+        pending="unit_price_new IS NULL"
+    )
+
+    # NOT VALID ekleme anlık; VALIDATE yazmaları bloklamayan bir kilitle tarar
+    def add_check(conn):
+        exists = conn.execute(text(
+            "SELECT 1 FROM pg_constraint WHERE conname = 'sales_amounts_new_not_null'"
+        )).scalar()
+        if not exists:
+            conn.execute(text(
+                "ALTER TABLE sales ADD CONSTRAINT sales_amounts_new_not_null "
+                "CHECK (unit_price_new IS NOT NULL AND total_price_new IS NOT NULL) NOT VALID"
+            ))
+    locked_transaction(engine, add_check)
+    locked_transaction(engine, lambda conn: conn.execute(
+        text("ALTER TABLE sales VALIDATE CONSTRAINT sales_amounts_new_not_null")
+    ))
+
+    locked_transaction(engine, _swap_sales)
+    print("✅ sales.unit_price / total_price → NUMERIC(10,2)")
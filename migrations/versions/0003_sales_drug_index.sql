@@ -0,0 +1,7 @@
+-- migrate: no-transaction
+-- 0003: sales.drug_id için index (CONCURRENTLY: satışlar build boyunca yazılmaya devam eder)
+-- İlaç silinirken ON DELETE SET NULL, sales'i drug_id ile tarar; index yoksa
+-- her silme tüm satış tablosunu okur. sale_date ikinci kolon: ilaç bazlı satış geçmişi.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sales_drug_date
+    ON sales (drug_id, sale_date);
@@ -0,0 +1,153 @@
+"""
+0004: sales ve stock_movements tablolarını aylık range partition'a çevir
+Mevcut tablo veri kopyalanmadan "legacy" partition olarak eklenir:
+1. Eski tabloya NOT VALID aralık CHECK'i eklenir ve yazmaları bloklamadan doğrulanır
+2. Ana tablonun index'leriyle eşleşen index'ler CONCURRENTLY oluşturulur
+3. Boş partition'lı ana tablo yaratılır (kısa DDL)
+4. Kısa bir transaction'da isimler değiştirilir ve eski tablo ATTACH edilir;
+   doğrulanmış CHECK sayesinde ATTACH tabloyu taramaz
+5. Sonraki aylar için partition'lar maintenance.partitions ile önceden açılır
+Eski (legacy) partition, tamamı saklama süresinden eskiye düştüğünde arşiv işi
+tarafından ayrılır. Adımlar idempotenttir; yarıda kalırsa yeniden çalıştırılabilir.
+0001'in date(sale_date) ifade index'i taşınmaz, CONCURRENTLY silinir: günlük
+rapor sale_date aralığıyla süzer (ix_sales_sale_date).
+Offline betikte (init.sql) tablolar boştur: doğrudan partition'lı olarak yeniden
+kurulur; legacy partition betiğin çalıştığı ayın sonuna kadarını kapsar.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import text
+
+from maintenance.partitions import add_months, ensure_partitions, is_partitioned, month_start
+from migrations.helpers import backfill, locked_transaction
+
+TRANSACTIONAL = False
+
+# Tablo: (partition kolonu, ana tabloda olacak index'ler, yabancı anahtarlar)
+TABLES = {
+    "sales": ("sale_date", [
+        ("ix_sales_customer_date", "(customer_id, sale_date DESC, id DESC)"),
+        ("ix_sales_sale_date", "(sale_date)"),
+        ("ix_sales_drug_date", "(drug_id, sale_date)"),
+    ], [
+        "FOREIGN KEY (drug_id) REFERENCES drugs(id) ON DELETE SET NULL",
+        "FOREIGN KEY (customer_id) REFERENCES customers(id) ON DELETE SET NULL",
+        "FOREIGN KEY (created_by) REFERENCES users(id)",
+    ]),
+    "stock_movements": ("created_at", [
+        ("ix_stock_movements_drug_created", "(drug_id, created_at)"),
+        ("ix_stock_movements_created", "(created_at)"),
+    ], [
+        "FOREIGN KEY (drug_id) REFERENCES drugs(id)",
+        "FOREIGN KEY (created_by) REFERENCES users(id)",
+    ]),
+}
+
+# Partition'lı tabloya taşınmayan eski index'ler
+DROPPED_INDEXES = {"sales": ["ix_sales_sale_day"]}
+
+def offline_sql() -> str:
+    """Boş tabloları partition'lı olarak yeniden kur (kilit/veri kopyası derdi yok)"""
+    statements = []
+    for table, (column, indexes, foreign_keys) in TABLES.items():
+        statements += [
+            # Dizi eski tabloyla birlikte silinmesin
+            f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE",
+            f"CREATE TABLE {table}_partitioned (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE ({column})",
+            f"DROP TABLE {table}",
+            f"ALTER TABLE {table}_partitioned RENAME TO {table}",
+            f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL",
+            f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT CURRENT_TIMESTAMP",
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_part_pkey PRIMARY KEY (id, {column})",
+            *(f"ALTER TABLE {table} ADD {fk}" for fk in foreign_keys),
+            *(f"CREATE INDEX {name} ON {table} {columns}" for name, columns in indexes),
+            f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id",
+            # Sınır betik üretilirken değil çalışırken hesaplanır; sonraki aylar
+            # backend açılışında maintenance.partitions ile açılır
+            f"DO $$\nBEGIN\n    EXECUTE format('CREATE TABLE {table}_legacy PARTITION OF {table} "
+            f"FOR VALUES FROM (MINVALUE) TO (%L)',\n"
+            f"                   date_trunc('month', now() AT TIME ZONE 'utc') + interval '1 month');\nEND\n$$",
+        ]
+    return "".join(f"{statement};\n" for statement in statements)
+
+OFFLINE_SQL = offline_sql()
+
+def _index_exists(conn, name: str) -> bool:
+    return bool(conn.execute(text("SELECT to_regclass(:n)"), {"n": name}).scalar())
+
+def convert(engine, table: str, column: str, indexes: list, foreign_keys: list):
+    parent = f"{table}_partitioned"
+    legacy = f"{table}_legacy"
+    check = f"{table}_legacy_range"
+    # Eski tabloya düşecek son an: gelecek ayın başı (takas bu aydan önce biter)
+    boundary = add_months(month_start(datetime.utcnow().date()), 1).isoformat()
+
+    with engine.connect() as conn:
+        if is_partitioned(conn, table):
+            return
+
+    # 0. Partition anahtarı NULL olamaz (tarihi bilinmeyen eski satırlar: 1970-01-01)
+    backfill(engine, table, f"{column} = timestamp '1970-01-01'", f"{column} IS NULL")
+
+    # 1. Aralık kısıtı: ekleme anlık, doğrulama yazmaları bloklamaz
+    def add_check(conn):
+        conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {check}"))
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD CONSTRAINT {check} "
+            f"CHECK ({column} IS NOT NULL AND {column} < '{boundary}') NOT VALID"
+        ))
+    locked_transaction(engine, add_check)
+    locked_transaction(engine, lambda conn: conn.execute(
+        text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {check}")
+    ))
+
+    # 2. Ana tablonun PK'sı ve index'leriyle eşleşen index'ler (eski tabloda);
+    #    taşınmayan index'ler yazmaları bloklamadan silinir
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name in DROPPED_INDEXES.get(table, []):
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        statements = [f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {legacy}_pk_idx ON {table} (id, {column})"]
+        for name, columns in indexes:
+            if not _index_exists(conn, name):
+                statements.append(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {columns}")
+        for statement in statements:
+            conn.execute(text(statement))
+
+    # 3. Boş ana tablo; index adları eski tablodan devralınır (eskiler _legacy olur)
+    def create_parent(conn):
+        conn.execute(text(f"DROP TABLE IF EXISTS {parent}"))
+        for name, _ in indexes:
+            if _index_exists(conn, name):
+                conn.execute(text(f"ALTER INDEX {name} RENAME TO {name}_legacy"))
+        conn.execute(text(
+            f"CREATE TABLE {parent} (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE ({column})"
+        ))
+        conn.execute(text(f"ALTER TABLE {parent} ALTER COLUMN {column} SET NOT NULL"))
+        conn.execute(text(f"ALTER TABLE {parent} ALTER COLUMN {column} SET DEFAULT CURRENT_TIMESTAMP"))
+        conn.execute(text(f"ALTER TABLE {parent} ADD CONSTRAINT {table}_part_pkey PRIMARY KEY (id, {column})"))
+        for fk in foreign_keys:
+            conn.execute(text(f"ALTER TABLE {parent} ADD {fk}"))
+        for name, columns in indexes:
+            conn.execute(text(f"CREATE INDEX {name} ON {parent} {columns}"))
+    locked_transaction(engine, create_parent)
+
+    # 4. Takas: birkaç katalog işlemi, tablo taranmaz
+    def swap(conn):
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+        conn.execute(text(f"ALTER TABLE {parent} RENAME TO {table}"))
+        conn.execute(text(f"ALTER TABLE {legacy} ALTER COLUMN {column} SET NOT NULL"))
+        conn.execute(text(
+            f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO ('{boundary}')"
+        ))
+        conn.execute(text(f"ALTER TABLE {legacy} DROP CONSTRAINT {check}"))
+        # id dizisi eski tabloya bağlı kalırsa legacy silinince dizi de silinir
+        conn.execute(text(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id"))
+    locked_transaction(engine, swap)
+    print(f"✅ {table} aylık partition'a çevrildi (eski veri: {legacy} < {boundary})")
+
+    ensure_partitions(engine, table)
+
+def upgrade(engine):
+    for table, (column, indexes, foreign_keys) in TABLES.items():
+        convert(engine, table, column, indexes, foreign_keys)
@@ -0,0 +1,43 @@
+"""
+0005: Uyarılara read_at kolonu ve okundu/okunmadı erişim index'leri
+read_at, budama işinin (maintenance.alerts) "ne zamandan beri okunmuş"
+sorusunu index'ten yanıtlaması içindir. Daha önce okunmuş satırlar için
+created_at ile batch'ler halinde doldurulur; index'ler CONCURRENTLY kurulur.
+"""
+
+from sqlalchemy import text
+
+from migrations.config import MIGRATION_CONFIG
+from migrations.helpers import backfill, locked_transaction
+
+TRANSACTIONAL = False
+
+OFFLINE_SQL = """
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS read_at TIMESTAMP;
+CREATE INDEX IF NOT EXISTS ix_alerts_unread ON alerts (created_at DESC, id DESC) WHERE NOT is_read;
+CREATE INDEX IF NOT EXISTS ix_alerts_drug_created ON alerts (drug_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_alerts_read_at ON alerts (read_at) WHERE is_read;
+"""
+
+INDEXES = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alerts_unread "
+    "ON alerts (created_at DESC, id DESC) WHERE NOT is_read",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alerts_drug_created "
+    "ON alerts (drug_id, created_at DESC)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alerts_read_at "
+    "ON alerts (read_at) WHERE is_read",
+]
+
+def upgrade(engine):
+    # Varsayılansız nullable kolon: yalnızca katalog değişir, tablo yeniden yazılmaz
+    locked_transaction(engine, lambda conn: conn.execute(
+        text("ALTER TABLE alerts ADD COLUMN IF NOT EXISTS read_at TIMESTAMP")
+    ))
+    backfill(engine, "alerts", "read_at = COALESCE(created_at, now())", "is_read AND read_at IS NULL")
+
+    from migrations.runner import drop_invalid_index
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"SET lock_timeout = '{MIGRATION_CONFIG['LOCK_TIMEOUT']}'"))
+        for statement in INDEXES:
+            drop_invalid_index(conn, statement)
+            conn.execute(text(statement))
@@ -0,0 +1,77 @@
+-- 0006: Stok defteri (ledger) veritabanında tutulur
+-- drugs.stock_quantity = baseline + SUM(stock_movements.quantity_change) değişmezi:
+-- * stock_movements'a eklenen her satır, aynı transaction içinde drugs'ı günceller
+--   ve previous_quantity / new_quantity değerlerini kilitli satırdan hesaplar.
+-- * drugs.stock_quantity doğrudan değiştirilemez (yalnızca bu trigger değiştirebilir).
+-- * Stok negatife düşemez (CHECK); aşırı satış transaction'ı geri alır.
+-- * Arşivlenen eski partition'ların toplamı stock_ledger_baselines'a katlanır.
+
+CREATE TABLE IF NOT EXISTS stock_ledger_baselines (
+    drug_id INTEGER PRIMARY KEY REFERENCES drugs(id) ON DELETE CASCADE,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    as_of TIMESTAMP NOT NULL
+);
+
+-- Açılış bakiyesi: defteri mevcut stokla eşitle (trigger'lar henüz yokken)
+INSERT INTO stock_movements (drug_id, movement_type, quantity_change, previous_quantity,
+                             new_quantity, reason, created_at)
+SELECT d.id, 'adjustment', d.stock_quantity - COALESCE(m.total, 0), COALESCE(m.total, 0),
+       d.stock_quantity, 'Açılış bakiyesi (stok defteri geçişi)', now() AT TIME ZONE 'utc'
+FROM drugs d
+LEFT JOIN (SELECT drug_id, SUM(quantity_change) AS total
+           FROM stock_movements GROUP BY drug_id) m ON m.drug_id = d.id
+WHERE d.stock_quantity <> COALESCE(m.total, 0);
+
+CREATE OR REPLACE FUNCTION stock_ledger_apply() RETURNS trigger AS $$
+DECLARE
+    current_qty INTEGER;
+BEGIN
+    PERFORM set_config('eczane.ledger', 'on', true);
+    UPDATE drugs
+       SET stock_quantity = stock_quantity + NEW.quantity_change,
+           updated_at = now() AT TIME ZONE 'utc'
+     WHERE id = NEW.drug_id
+    RETURNING stock_quantity INTO current_qty;
+    PERFORM set_config('eczane.ledger', 'off', true);
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Stok hareketi için ilaç bulunamadı: %', NEW.drug_id
+            USING ERRCODE = 'foreign_key_violation';
+    END IF;
+
+    NEW.new_quantity := current_qty;
+    NEW.previous_quantity := current_qty - NEW.quantity_change;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_stock_ledger_apply ON stock_movements;
+CREATE TRIGGER trg_stock_ledger_apply
+    BEFORE INSERT ON stock_movements
+    FOR EACH ROW EXECUTE FUNCTION stock_ledger_apply();
+
+CREATE OR REPLACE FUNCTION drugs_stock_guard() RETURNS trigger AS $$
+BEGIN
+    IF COALESCE(current_setting('eczane.ledger', true), 'off') = 'on' THEN
+        RETURN NEW;
+    END IF;
+    IF TG_OP = 'INSERT' AND NEW.stock_quantity <> 0 THEN
+        RAISE EXCEPTION 'Yeni ilaç 0 stokla eklenir; stok stock_movements ile girilir'
+            USING ERRCODE = 'check_violation';
+    END IF;
+    IF TG_OP = 'UPDATE' AND NEW.stock_quantity IS DISTINCT FROM OLD.stock_quantity THEN
+        RAISE EXCEPTION 'drugs.stock_quantity yalnızca stock_movements üzerinden değişir'
+            USING ERRCODE = 'check_violation';
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_drugs_stock_guard ON drugs;
+CREATE TRIGGER trg_drugs_stock_guard
+    BEFORE INSERT OR UPDATE OF stock_quantity ON drugs
+    FOR EACH ROW EXECUTE FUNCTION drugs_stock_guard();
+
+-- drugs küçük bir tablo: doğrulama aynı transaction'da yapılabilir
+ALTER TABLE drugs DROP CONSTRAINT IF EXISTS drugs_stock_nonnegative;
+ALTER TABLE drugs ADD CONSTRAINT drugs_stock_nonnegative CHECK (stock_quantity >= 0);
@@ -0,0 +1,33 @@
+-- 0007: Parti (lot) ve son kullanma tarihi takibi
+-- Her ilacın stoğu partilere bölünür: SUM(drug_lots.quantity) = drugs.stock_quantity.
+-- Satış FEFO ile (ilk miadı dolan ilk çıkar) en erken miatlı dolu partiden düşülür.
+-- expiry_date NULL: miadı bilinmiyor (geçiş öncesi stok), FEFO'da en son tüketilir.
+-- ORM tarafında database.py DrugLot modeli ve aynı isimli index'lerle tanımlıdır.
+
+CREATE TABLE IF NOT EXISTS drug_lots (
+    id SERIAL PRIMARY KEY,
+    drug_id INTEGER NOT NULL REFERENCES drugs(id) ON DELETE CASCADE,
+    lot_number VARCHAR(50) NOT NULL,
+    expiry_date DATE,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    received_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    CONSTRAINT uq_drug_lots_drug_lot UNIQUE (drug_id, lot_number),
+    CONSTRAINT drug_lots_quantity_nonnegative CHECK (quantity >= 0)
+);
+
+-- FEFO tahsisi: WHERE drug_id = ? ORDER BY expiry_date, id (yalnızca dolu partiler)
+CREATE INDEX IF NOT EXISTS ix_drug_lots_fefo
+    ON drug_lots (drug_id, expiry_date, id)
+    WHERE quantity > 0;
+
+-- /lots/expiring: WHERE expiry_date <= ? ORDER BY expiry_date, id
+CREATE INDEX IF NOT EXISTS ix_drug_lots_expiry
+    ON drug_lots (expiry_date, id)
+    WHERE quantity > 0;
+
+-- Açılış partisi: mevcut stok miadı bilinmeyen tek partiye yazılır
+INSERT INTO drug_lots (drug_id, lot_number, expiry_date, quantity)
+SELECT id, 'ACILIS', NULL, stock_quantity
+FROM drugs
+WHERE stock_quantity > 0
+ON CONFLICT (drug_id, lot_number) DO NOTHING;
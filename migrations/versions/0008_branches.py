@@ -0,0 +1,144 @@
+"""
+0008: Çok şubeli stok modeli (şube = kiracı)
+- branches: şube boyutu; mevcut veriler 1 numaralı MERKEZ şubesine aittir.
+- branch_stock: şube x ilaç stoğu. drugs.stock_quantity zincir toplamı olarak kalır.
+- sales, stock_movements, alerts, drug_lots: branch_id (varsayılan 1). Sabit
+  varsayılanlı ADD COLUMN tabloyu yeniden yazmaz (yalnızca katalog değişir).
+- Şube kapsamlı sorguların index'leri branch_id ile başlar. sales ve
+  stock_movements partition'lı olduğundan FK yerine uygulama şubeyi doğrular.
+- Stok defteri trigger'ı hareketin şubesindeki stoğu günceller; negatif şube
+  stoğu branch_stock_nonnegative CHECK'i ile reddedilir.
+Satışlar sürerken uygulanır:
+1. Tablolar, kolonlar, parti kısıtları ve trigger kısa bir transaction'da
+2. alerts/drug_lots -> branches FK'leri NOT VALID eklenir, ayrı adımda
+   yazmaları bloklamadan doğrulanır
+3. Index'ler CONCURRENTLY; partition'lı tablolarda partition partition kurulup
+   ana tablonun index'ine bağlanır (migrations.helpers.partitioned_index)
+Adımlar idempotenttir; yarıda kalırsa yeniden çalıştırılabilir.
+"""
+
+from sqlalchemy import text
+
+from migrations.helpers import locked_transaction, partitioned_index
+
+TRANSACTIONAL = False
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS branches (
+    id SERIAL PRIMARY KEY,
+    code VARCHAR(20) NOT NULL UNIQUE,
+    name VARCHAR(100) NOT NULL,
+    city VARCHAR(50),
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc')
+);
+
+INSERT INTO branches (id, code, name) VALUES (1, 'MERKEZ', 'Merkez Eczane')
+ON CONFLICT (id) DO NOTHING;
+SELECT setval(pg_get_serial_sequence('branches', 'id'), GREATEST((SELECT max(id) FROM branches), 1));
+
+CREATE TABLE IF NOT EXISTS branch_stock (
+    branch_id INTEGER NOT NULL REFERENCES branches(id) ON DELETE CASCADE,
+    drug_id INTEGER NOT NULL REFERENCES drugs(id) ON DELETE CASCADE,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+    PRIMARY KEY (branch_id, drug_id),
+    CONSTRAINT branch_stock_nonnegative CHECK (quantity >= 0)
+);
+
+-- Açılış: mevcut stok merkez şubenin stoğudur
+INSERT INTO branch_stock (branch_id, drug_id, quantity)
+SELECT 1, id, stock_quantity FROM drugs
+ON CONFLICT (branch_id, drug_id) DO NOTHING;
+
+-- Transfer önerisi: bir ilacın tüm şubelerdeki stoğu
+CREATE INDEX IF NOT EXISTS ix_branch_stock_drug ON branch_stock (drug_id, quantity);
+
+ALTER TABLE sales ADD COLUMN IF NOT EXISTS branch_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE stock_movements ADD COLUMN IF NOT EXISTS branch_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS branch_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE drug_lots ADD COLUMN IF NOT EXISTS branch_id INTEGER NOT NULL DEFAULT 1;
+
+-- Partiler şubeye aittir: lot numarası şube + ilaç içinde benzersiz, FEFO ve
+-- miat taraması şube önde
+ALTER TABLE drug_lots DROP CONSTRAINT IF EXISTS uq_drug_lots_drug_lot;
+ALTER TABLE drug_lots ADD CONSTRAINT uq_drug_lots_branch_lot UNIQUE (branch_id, drug_id, lot_number);
+DROP INDEX IF EXISTS ix_drug_lots_fefo;
+CREATE INDEX ix_drug_lots_fefo ON drug_lots (branch_id, drug_id, expiry_date, id) WHERE quantity > 0;
+DROP INDEX IF EXISTS ix_drug_lots_expiry;
+CREATE INDEX ix_drug_lots_expiry ON drug_lots (branch_id, expiry_date, id) WHERE quantity > 0;
+
+-- Stok defteri: hareket önce şube stoğunu, sonra zincir toplamını günceller
+-- (kilit sırası her zaman branch_stock -> drugs)
+CREATE OR REPLACE FUNCTION stock_ledger_apply() RETURNS trigger AS $$
+DECLARE
+    branch_qty INTEGER;
+BEGIN
+    INSERT INTO branch_stock (branch_id, drug_id, quantity, updated_at)
+    VALUES (NEW.branch_id, NEW.drug_id, NEW.quantity_change, now() AT TIME ZONE 'utc')
+    ON CONFLICT (branch_id, drug_id) DO UPDATE
+       SET quantity = branch_stock.quantity + EXCLUDED.quantity,
+           updated_at = EXCLUDED.updated_at
+    RETURNING quantity INTO branch_qty;
+
+    PERFORM set_config('eczane.ledger', 'on', true);
+    UPDATE drugs
+       SET stock_quantity = stock_quantity + NEW.quantity_change,
+           updated_at = now() AT TIME ZONE 'utc'
+     WHERE id = NEW.drug_id;
+    PERFORM set_config('eczane.ledger', 'off', true);
+
+    NEW.new_quantity := branch_qty;
+    NEW.previous_quantity := branch_qty - NEW.quantity_change;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+FOREIGN_KEYS = {
+    "alerts": "alerts_branch_id_fkey",
+    "drug_lots": "drug_lots_branch_id_fkey",
+}
+
+# Şube kapsamlı sorgular (günlük rapor, satış hızı, hareket geçmişi, uyarılar)
+INDEXES = [
+    ("sales", "ix_sales_branch_date", "(branch_id, sale_date)"),
+    ("sales", "ix_sales_branch_drug_date", "(branch_id, drug_id, sale_date)"),
+    ("stock_movements", "ix_stock_movements_branch_drug_created", "(branch_id, drug_id, created_at)"),
+    ("alerts", "ix_alerts_branch_created", "(branch_id, created_at DESC, id DESC)"),
+]
+
+# Boş veritabanında (init.sql) kilit derdi yok: FK ve index'ler doğrudan
+OFFLINE_SQL = SCHEMA_SQL + "".join(
+    f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY (branch_id) REFERENCES branches(id);\n"
+    for table, name in FOREIGN_KEYS.items()
+) + "".join(
+    f"CREATE INDEX IF NOT EXISTS {name} ON {table} {columns};\n" for table, name, columns in INDEXES
+)
+
+def _schema(conn):
+    from migrations.runner import split_statements
+    for statement in split_statements(SCHEMA_SQL):
+        conn.exec_driver_sql(statement)
+
+def _add_foreign_keys(conn):
+    for table, name in FOREIGN_KEYS.items():
+        exists = conn.execute(text("SELECT 1 FROM pg_constraint WHERE conname = :n"), {"n": name}).scalar()
+        if not exists:
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+                f"FOREIGN KEY (branch_id) REFERENCES branches(id) NOT VALID"
+            ))
+
+def upgrade(engine):
+    locked_transaction(engine, _schema)
+
+    # NOT VALID ekleme anlık; VALIDATE yazmaları bloklamayan bir kilitle tarar
+    locked_transaction(engine, _add_foreign_keys)
+    for table, name in FOREIGN_KEYS.items():
+        locked_transaction(engine, lambda conn, table=table, name=name: conn.execute(
+            text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+        ))
+
+    for table, name, columns in INDEXES:
+        partitioned_index(engine, table, name, columns)
@@ -0,0 +1,12 @@
+-- 0009: Çevrimdışı kasa senkronu (POST /sales/batch) için idempotency kaydı
+-- Kasa bağlantısızken kuyruğa aldığı her satışa bir client_ref (UUID) verir.
+-- Parti yeniden gönderilirse (yanıt yolda kaybolduysa) client_ref burada
+-- bulunur ve satış ikinci kez yazılmaz. sales partition'lı olduğundan global
+-- UNIQUE orada tutulamaz; eşleme ayrı, küçük bir tabloda durur.
+
+CREATE TABLE IF NOT EXISTS sale_client_refs (
+    client_ref VARCHAR(64) PRIMARY KEY,
+    branch_id INTEGER NOT NULL REFERENCES branches(id),
+    sale_id INTEGER NOT NULL,
+    synced_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+);
@@ -0,0 +1,30 @@
+-- 0010: İTS (İlaç Takip Sistemi) satış bildirim kuyruğu
+-- Satış, bildirimini aynı transaction'da bu tabloya yazar; checkout ITS'i
+-- beklemez. its/gateway.py arka planda bekleyen satırları partiler halinde
+-- ITS'e gönderir ve onay numarasını sales.its_transaction_id'ye yazar.
+-- * Sahiplenme: FOR UPDATE SKIP LOCKED ile alınan satırların next_attempt_at'i
+--   kira süresi kadar ileri atılır; birden çok backend süreci aynı satırı
+--   göndermez, ölen sürecin satırları kira dolunca yeniden alınır.
+-- * Geçici hata (bağlantı, 429, 5xx): attempts artar, next_attempt_at üstel
+--   beklemeyle ileri atılır; ITS_MAX_ATTEMPTS'ta 'failed'.
+-- * sale_date: partition'lı sales'te onay güncellemesi tek partition'a gider.
+
+CREATE TABLE IF NOT EXISTS its_notifications (
+    id SERIAL PRIMARY KEY,
+    sale_id INTEGER NOT NULL UNIQUE,
+    sale_date TIMESTAMP NOT NULL,
+    branch_id INTEGER NOT NULL DEFAULT 1 REFERENCES branches(id),
+    payload JSONB NOT NULL,
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    transaction_id VARCHAR(50),
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    confirmed_at TIMESTAMP
+);
+
+-- Gönderilecekler: WHERE status = 'pending' AND next_attempt_at <= now ORDER BY next_attempt_at, id
+CREATE INDEX IF NOT EXISTS ix_its_notifications_due
+    ON its_notifications (next_attempt_at, id)
+    WHERE status = 'pending';
@@ -0,0 +1,45 @@
+-- 0011: İşlemsel outbox + günlük satış özeti
+-- Satış, sipariş, eşik değişikliği, transfer, ilaç ve şube yazıları yan
+-- etkilerini (canlı akış, uyarı, İTS, özet, önbellek) doğrudan yapmaz; aynı
+-- transaction'da outbox'a bir olay yazar. outbox/relay.py olayları id
+-- sırasıyla FOR UPDATE SKIP LOCKED ile partiler halinde alır, abonelere
+-- dağıtır ve siler. Veritabanına yazan aboneler (uyarı, İTS kuyruğu, özet)
+-- silme ile aynı transaction'da çalışır: olay ya tamamen işlenir ya hiç.
+-- * failed_at: tek başına da işlenemeyen olay OUTBOX_MAX_ATTEMPTS denemeden
+--   sonra bekletilir; relay onu atlar (POST /outbox/retry yeniden kuyruğa alır).
+
+CREATE TABLE IF NOT EXISTS outbox (
+    id BIGSERIAL PRIMARY KEY,
+    topic VARCHAR(30) NOT NULL,
+    branch_id INTEGER NOT NULL DEFAULT 1 REFERENCES branches(id),
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    failed_at TIMESTAMP
+);
+
+-- Günlük satış özeti (şube x ilaç x gün); relay her partide tek upsert yapar
+CREATE TABLE IF NOT EXISTS sales_daily (
+    day DATE NOT NULL,
+    branch_id INTEGER NOT NULL DEFAULT 1 REFERENCES branches(id),
+    drug_id INTEGER NOT NULL,
+    sale_count INTEGER NOT NULL DEFAULT 0,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, branch_id, drug_id)
+);
+
+-- Şube trend raporu: WHERE branch_id = ? AND day >= ?
+CREATE INDEX IF NOT EXISTS ix_sales_daily_branch_day
+    ON sales_daily (branch_id, day);
+
+-- Geçmiş satışlar: özet yalnızca relay'le dolsaydı rapor migration öncesini
+-- sıfır gösterirdi. Salt okuma taraması satış yazılarını bloklamaz; outbox
+-- bu migration'la açıldığından çift sayılacak bekleyen satış olayı yoktur.
+INSERT INTO sales_daily (day, branch_id, drug_id, sale_count, quantity, revenue)
+SELECT date(sale_date), branch_id, drug_id, count(*), sum(quantity), sum(total_price)
+FROM sales
+WHERE drug_id IS NOT NULL
+GROUP BY 1, 2, 3
+ON CONFLICT (day, branch_id, drug_id) DO NOTHING;
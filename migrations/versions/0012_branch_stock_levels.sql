@@ -0,0 +1,10 @@
+-- migrate: no-transaction
+-- 0012: Şube stok listeleri için kapsayan index (CONCURRENTLY: satışlar sürerken)
+-- Düşük/kritik stok endpoint'leri drugs'ı session şubesinin branch_stock
+-- satırıyla outer join'ler ve COALESCE(quantity, 0) ile süzer; drugs üzerindeki
+-- ix_drugs_low_stock (zincir toplamı) bu sorgulara artık hizmet etmez.
+-- (branch_id, drug_id, quantity) join'i şubenin aralığından, tabloya gitmeden
+-- (index-only) karşılar.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_branch_stock_levels
+    ON branch_stock (branch_id, drug_id, quantity);
@@ -0,0 +1,7 @@
+-- 0013: date(sale_date) ifade index'ini kaldır
+-- Günlük rapor sale_date aralığıyla süzer (ix_sales_sale_date); bu index her
+-- satış yazısında tüm partition'larda boşuna güncelleniyordu. 0004'ü önceden
+-- uygulanmış veritabanlarında index partition'lı ana tablodadır: partition'lı
+-- index CONCURRENTLY silinemez, ama silme yalnızca katalog işlemidir (kısa kilit).
+
+DROP INDEX IF EXISTS ix_sales_sale_day;
@@ -0,0 +1,29 @@
+-- 0014: Stok defteri trigger'ı updated_at'i işlem anıyla damgalar
+-- get_data_version (MCP önbellek sürümü) max(drugs.updated_at) okur. now()
+-- transaction başlangıcıdır: daha önce başlayıp daha geç commit edilen bir
+-- stok siparişi, max'ı geçemez ve önbellekteki eski stok sunulmaya devam eder.
+-- clock_timestamp() satırın güncellendiği anı yazar.
+
+CREATE OR REPLACE FUNCTION stock_ledger_apply() RETURNS trigger AS $$
+DECLARE
+    branch_qty INTEGER;
+BEGIN
+    INSERT INTO branch_stock (branch_id, drug_id, quantity, updated_at)
+    VALUES (NEW.branch_id, NEW.drug_id, NEW.quantity_change, clock_timestamp() AT TIME ZONE 'utc')
+    ON CONFLICT (branch_id, drug_id) DO UPDATE
+       SET quantity = branch_stock.quantity + EXCLUDED.quantity,
+           updated_at = EXCLUDED.updated_at
+    RETURNING quantity INTO branch_qty;
+
+    PERFORM set_config('eczane.ledger', 'on', true);
+    UPDATE drugs
+       SET stock_quantity = stock_quantity + NEW.quantity_change,
+           updated_at = clock_timestamp() AT TIME ZONE 'utc'
+     WHERE id = NEW.drug_id;
+    PERFORM set_config('eczane.ledger', 'off', true);
+
+    NEW.new_quantity := branch_qty;
+    NEW.previous_quantity := branch_qty - NEW.quantity_change;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
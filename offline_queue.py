@@ -0,0 +1,290 @@
+# offline_queue.py
+"""
+Çevrimdışı kasa modu (Flask istemcisi)
+Backend'e ulaşılamazken kasa satış yapmaya devam eder:
+- Katalog (ilaçlar, müşteriler) her başarılı okumada yerel SQLite dosyasına
+  anlık görüntü olarak yazılır; bağlantı yokken panel bu kopyadan çizilir.
+  Gösterilen stok = anlık görüntü stoğu - kuyrukta bekleyen satışlar.
+- Satışlar queued_sales tablosuna (WAL modu, synchronous=FULL: her satış
+  commit'te diske iner) bir client_ref (UUID) ile yazılır.
+- SyncWorker bağlantıyı SYNC_INTERVAL_SECONDS'ta bir yoklar; geri gelince
+  kuyruğu BATCH_SIZE'lık partilerle POST /sales/batch'e gönderir. Yazılan ve
+  tekrar (duplicate) satırlar tek transaction'da silinir; çakışanlar
+  (stok/parti yetersiz, ilaç silinmiş) 'conflict' durumunda kalır ve panelde
+  gösterilir. Yanıt kaybolsa da parti aynı client_ref'lerle yeniden
+  gönderilir; backend tekrar yazmaz.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from api_client.errors import ApiConnectionError, ApiError
+from events import stock_level
+
+OFFLINE_CONFIG = {
+    "ENABLED": os.environ.get("CLIENT_OFFLINE_ENABLED", "true").lower() == "true",
+    "DB_PATH": os.environ.get("CLIENT_OFFLINE_DB", "offline/counter.db"),
+    # Bağlantı yoklama / kuyruk boşaltma aralığı
+    "SYNC_INTERVAL_SECONDS": float(os.environ.get("CLIENT_OFFLINE_SYNC_SECONDS", 10)),
+    # POST /sales/batch başına satış (backend SALES_BATCH_MAX_ITEMS'ı aşmamalı)
+    "BATCH_SIZE": int(os.environ.get("CLIENT_OFFLINE_BATCH_SIZE", 500)),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queued_sales (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_ref TEXT NOT NULL UNIQUE,
+    drug_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    customer_id INTEGER,
+    unit_price REAL,
+    sold_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_queued_sales_status ON queued_sales (status, id);
+CREATE TABLE IF NOT EXISTS catalog (
+    name TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    saved_at TEXT NOT NULL
+);
+"""
+
+class OfflineStore:
+    """Yerel satış kuyruğu + katalog anlık görüntüsü + bağlantı durumu (thread-safe)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or OFFLINE_CONFIG["DB_PATH"]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # isolation_level=None: transaction'lar açıkça BEGIN/COMMIT ile
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._catalog_digest = {}
+        self.offline_since = None
+
+    # ---- Bağlantı durumu ----
+
+    @property
+    def is_offline(self) -> bool:
+        return self.offline_since is not None
+
+    def mark_offline(self):
+        if self.offline_since is None:
+            self.offline_since = time.time()
+            print("📴 Backend'e ulaşılamıyor: çevrimdışı kasa modu")
+
+    def mark_online(self):
+        if self.offline_since is not None:
+            self.offline_since = None
+            print("📶 Backend bağlantısı geri geldi")
+
+    # ---- Katalog anlık görüntüsü ----
+
+    def save_catalog(self, name: str, rows: list):
+        """Katalog listesini sakla (içerik değişmediyse diske yazmaz)"""
+        payload = json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+        digest = hashlib.sha1(payload.encode("utf-8")).digest()
+        if self._catalog_digest.get(name) == digest:
+            return
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO catalog (name, payload, saved_at) VALUES (?, ?, ?)",
+                               (name, payload, datetime.utcnow().isoformat(timespec="seconds")))
+        self._catalog_digest[name] = digest
+
+    def load_catalog(self, name: str) -> Optional[list]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM catalog WHERE name = ?", (name,)).fetchone()
+        return json.loads(row["payload"]) if row else None
+
+    def catalog_saved_at(self, name: str = "drugs") -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT saved_at FROM catalog WHERE name = ?", (name,)).fetchone()
+        return row["saved_at"] if row else None
+
+    def local_drugs(self) -> list:
+        """Anlık görüntüdeki ilaçlar; stok, kuyrukta bekleyen satışlar düşülmüş hali"""
+        drugs = self.load_catalog("drugs") or []
+        with self._lock:
+            queued = dict(self._conn.execute(
+                "SELECT drug_id, SUM(quantity) FROM queued_sales WHERE status = 'pending' GROUP BY drug_id"
+            ).fetchall())
+        for drug in drugs:
+            drug["stock_quantity"] = drug.get("stock_quantity", 0) - queued.get(drug["id"], 0)
+        return drugs
+
+    # ---- Satış kuyruğu ----
+
+    def enqueue_sale(self, drug_id: int, quantity: int = 1, customer_id: Optional[int] = None) -> dict:
+        """Satışı kuyruğa yaz; yanıt backend'in satış yanıtı biçimindedir (offline=True)"""
+        drug = next((d for d in self.local_drugs() if d["id"] == drug_id), None)
+        if drug is None:
+            raise ApiError(404, "İlaç çevrimdışı katalogda yok")
+        if drug["stock_quantity"] < quantity:
+            raise ApiError(400, f"Yetersiz stok (çevrimdışı). Mevcut: {drug['stock_quantity']}")
+
+        client_ref = uuid.uuid4().hex
+        sold_at = datetime.utcnow().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO queued_sales (client_ref, drug_id, quantity, customer_id, unit_price, sold_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (client_ref, drug_id, quantity, customer_id, drug.get("price"), sold_at))
+        stock = drug["stock_quantity"] - quantity
+        pending = self.counts()["pending"]
+        return {
+            "message": f"Bağlantı yok: satış çevrimdışı kaydedildi ({pending} satış senkron bekliyor)",
+            "offline": True,
+            "sale": {
+                "client_ref": client_ref,
+                "drug_name": drug["name"],
+                "quantity": quantity,
+                "total_price": round((drug.get("price") or 0) * quantity, 2),
+                "date": sold_at
+            },
+            "stock": {"id": drug_id, "name": drug["name"], "stock": stock,
+                      "threshold": drug.get("low_stock_threshold"),
+                      "level": stock_level(stock, drug.get("low_stock_threshold")), "branch_id": None}
+        }
+
+    def pending_batch(self, limit: Optional[int] = None) -> List[dict]:
+        """Kuyruk sırasıyla gönderilecek satışlar (POST /sales/batch gövdesi)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT client_ref, drug_id, quantity, customer_id, unit_price, sold_at FROM queued_sales "
+                "WHERE status = 'pending' ORDER BY id LIMIT ?", (limit or OFFLINE_CONFIG["BATCH_SIZE"],)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def apply_results(self, results: List[dict]):
+        """Backend sonuçlarını işle: yazılan/tekrar satırları sil, çakışanları işaretle"""
+        done = [(r["client_ref"],) for r in results if r["status"] in ("applied", "duplicate")]
+        conflicts = [(r.get("message"), r["client_ref"]) for r in results if r["status"] == "conflict"]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("DELETE FROM queued_sales WHERE client_ref = ?", done)
+                self._conn.executemany(
+                    "UPDATE queued_sales SET status = 'conflict', error = ? WHERE client_ref = ?", conflicts)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM queued_sales GROUP BY status").fetchall())
+        return {"pending": rows.get("pending", 0), "conflict": rows.get("conflict", 0)}
+
+    def conflicts(self, limit: int = 100) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT client_ref, drug_id, quantity, customer_id, unit_price, sold_at, error "
+                "FROM queued_sales WHERE status = 'conflict' ORDER BY id LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def resolve(self, client_refs: List[str], action: str) -> int:
+        """Çakışan satırlar: 'requeue' (stok geldi, yeniden dene) ya da 'discard' (iptal)"""
+        params = [(ref,) for ref in client_refs]
+        sql = ("UPDATE queued_sales SET status = 'pending', error = NULL WHERE client_ref = ? AND status = 'conflict'"
+               if action == "requeue" else
+               "DELETE FROM queued_sales WHERE client_ref = ? AND status = 'conflict'")
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(sql, params)
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def status(self) -> dict:
+        return {"offline": self.is_offline, **self.counts(), "catalog_saved_at": self.catalog_saved_at()}
+
+    def close(self):
+        self._conn.close()
+
+# ================ SENKRON ================
+
+def replay(store: OfflineStore, client, batch_size: Optional[int] = None) -> dict:
+    """Kuyruğu partiler halinde backend'e gönder; bağlantı koparsa kalanı bırakır"""
+    batch_size = batch_size or OFFLINE_CONFIG["BATCH_SIZE"]
+    totals = {"applied": 0, "duplicate": 0, "conflict": 0}
+    while True:
+        batch = store.pending_batch(batch_size)
+        if not batch:
+            break
+        try:
+            result = client.sell_batch(batch)
+        except ApiConnectionError:
+            store.mark_offline()
+            break
+        except ApiError as e:
+            # 409: aynı parti eşzamanlı yazılıyor; sonraki turda tekrar denenir
+            print(f"⚠️ Çevrimdışı satışlar gönderilemedi: {e}")
+            break
+        store.mark_online()
+        store.apply_results(result["results"])
+        for key in totals:
+            totals[key] += result[key]
+        if len(batch) < batch_size:
+            break
+    return {**totals, "pending": store.counts()["pending"]}
+
+class SyncWorker:
+    """Arka planda bağlantıyı yoklar ve kuyruğu boşaltır"""
+
+    def __init__(self, store: OfflineStore, client, interval: Optional[float] = None):
+        self.store = store
+        self.client = client  # tekrar denemesiz istemci: yoklama hızlı başarısız olmalı
+        self.interval = interval or OFFLINE_CONFIG["SYNC_INTERVAL_SECONDS"]
+        self._wake = threading.Event()
+        self._sync_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="offline-sync", daemon=True)
+                    self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.sync_once()
+            except Exception as e:
+                print(f"⚠️ Çevrimdışı senkron hatası: {e}")
+
+    def sync_once(self) -> Optional[dict]:
+        """Çevrimdışıysa bağlantıyı yokla; bekleyen satış varsa gönder"""
+        with self._sync_lock:
+            if self.store.is_offline:
+                try:
+                    self.client.data_version()
+                except ApiConnectionError:
+                    return None
+                except ApiError:
+                    pass  # backend ayakta, yalnızca sürüm uç noktası hata verdi
+                self.store.mark_online()
+            if not self.store.counts()["pending"]:
+                return None
+            result = replay(self.store, self.client)
+            print(f"🔄 Çevrimdışı satışlar gönderildi: {result['applied']} yazıldı, "
+                  f"{result['duplicate']} tekrar, {result['conflict']} çakışma, {result['pending']} bekliyor")
+            return result
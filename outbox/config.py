@@ -0,0 +1,16 @@
+# outbox/config.py
+"""
+İşlemsel outbox ve relay ayarları
+Ortam değişkenleriyle ayarlanır, .env gerektirmez
+"""
+
+import os
+
+OUTBOX_CONFIG = {
+    # Tek turda sahiplenilen en fazla olay (tek SELECT + tek DELETE)
+    "BATCH_SIZE": int(os.environ.get("OUTBOX_BATCH_SIZE", 500)),
+    # Yazı olmasa da tablo bu aralıkla yoklanır (diğer süreçlerin olayları, yeniden denemeler)
+    "POLL_INTERVAL_MS": int(os.environ.get("OUTBOX_POLL_INTERVAL_MS", 200)),
+    # Tek başına da işlenemeyen olay bu kadar denemeden sonra bekletilir (POST /outbox/retry)
+    "MAX_ATTEMPTS": int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 5)),
+}
@@ -0,0 +1,218 @@
+# outbox/relay.py
+"""
+İşlemsel outbox: yan etkiler yazıyla aynı transaction'da olay olarak kaydedilir
+Endpoint'ler canlı akışa yayın, uyarı, İTS kuyruğu gibi yan etkileri kendileri
+yapmaz; emit() ile outbox'a bir satır ekler ve olay ancak yazı commit edilirse
+var olur. Relay arka planda:
+- Olayları id sırasıyla BATCH_SIZE'lık partiler halinde FOR UPDATE SKIP LOCKED
+  ile sahiplenir (birden çok backend süreci aynı olayı almaz).
+- Her abonenin handle(db, events) metodunu aynı transaction'da çağırır, olayları
+  siler ve commit eder: veritabanına yazan aboneler (uyarı satırı, İTS kuyruğu,
+  günlük özet) olayı tam olarak bir kez işler.
+- Commit'ten sonra after_commit(events) ile süreç içi etkileri (SSE yayını,
+  bildirim, önbellek yenileme) çalıştırır.
+Abone bir parti başına bir kez çağrılır ve satır başına değil parti başına
+sorgu yapar (toplu insert/upsert); relay saniyede binlerce olayı bu sayede
+taşır. Parti hata verirse olaylar tek tek denenir; tek başına da işlenemeyen
+olay MAX_ATTEMPTS denemeden sonra failed_at ile bekletilir (POST /outbox/retry).
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from database import OutboxEvent, SessionLocal, session_branch
+from outbox.config import OUTBOX_CONFIG
+
+OUTBOX = OutboxEvent.__table__
+
+def emit(db: Session, topic: str, payload: dict, branch_id: Optional[int] = None) -> OutboxEvent:
+    """Olayı outbox'a ekle (commit etmez; yazıyla birlikte commit edilir)"""
+    event = OutboxEvent(topic=topic, payload=payload,
+                        branch_id=session_branch(db) if branch_id is None else branch_id)
+    db.add(event)
+    return event
+
+class OutboxRelay:
+    """Outbox'ı arka planda boşaltıp olayları abonelere dağıtır"""
+
+    def __init__(self, session_factory=SessionLocal, batch_size: Optional[int] = None,
+                 poll_interval_ms: Optional[int] = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or OUTBOX_CONFIG["BATCH_SIZE"]
+        self.poll_interval = (poll_interval_ms or OUTBOX_CONFIG["POLL_INTERVAL_MS"]) / 1000
+        self.subscribers = []
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.relayed = 0
+        self.failed = 0
+        self.last_batch_ms = None
+
+    def subscribe(self, subscriber):
+        """Abone: topics (kümesi), handle(db, events) ve/veya after_commit(events)"""
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    # ---- Yaşam döngüsü ----
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+        self._thread.start()
+        names = ", ".join(s.name for s in self.subscribers)
+        print(f"✅ Outbox relay aktif: {len(self.subscribers)} abone ({names}), {self.batch_size} olay/parti")
+
+    def stop(self):
+        """Thread'i durdur ve kalan olayları dağıt"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        try:
+            self.drain()
+        except Exception as e:
+            print(f"❌ Outbox kapanış hatası: {e}")
+
+    def wake(self):
+        """Yeni olay commit edildi: yoklama aralığını bekleme"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                # Dolu parti geldikçe beklemeden devam (birikmiş olaylar)
+                while not self._stopped.is_set() and self.relay_once() >= self.batch_size:
+                    pass
+            except Exception as e:
+                print(f"❌ Outbox relay hatası: {e}")
+
+    def drain(self) -> int:
+        """Outbox boşalana kadar dağıt (kapanış, ölçüm)"""
+        total = 0
+        while True:
+            count = self.relay_once()
+            total += count
+            if count < self.batch_size:
+                return total
+
+    # ---- Dağıtım ----
+
+    def _claim(self, db: Session, ids: Optional[List[int]] = None) -> List[dict]:
+        query = select(OUTBOX.c.id, OUTBOX.c.topic, OUTBOX.c.branch_id, OUTBOX.c.payload, OUTBOX.c.attempts)\
+            .where(OUTBOX.c.failed_at.is_(None))
+        if ids is not None:
+            query = query.where(OUTBOX.c.id.in_(ids))
+        query = query.order_by(OUTBOX.c.id).limit(self.batch_size).with_for_update(skip_locked=True)
+        return [dict(row._mapping) for row in db.execute(query)]
+
+    def _handle(self, db: Session, events: List[dict]):
+        for subscriber in self.subscribers:
+            handle = getattr(subscriber, "handle", None)
+            selected = [e for e in events if e["topic"] in subscriber.topics]
+            if handle and selected:
+                handle(db, selected)
+
+    def _after_commit(self, events: List[dict]):
+        for subscriber in self.subscribers:
+            after_commit = getattr(subscriber, "after_commit", None)
+            selected = [e for e in events if e["topic"] in subscriber.topics]
+            if after_commit and selected:
+                try:
+                    after_commit(selected)
+                except Exception as e:
+                    # Commit edilmiş olay geri alınamaz; süreç içi etki kaçırılır
+                    print(f"⚠️ Outbox abonesi {subscriber.name} hatası: {e}")
+
+    def relay_once(self) -> int:
+        """Bir parti sahiplen, dağıt, sil; sahiplenilen olay sayısı"""
+        start = time.perf_counter()
+        db = self.session_factory()
+        try:
+            events = self._claim(db)
+            if not events:
+                db.rollback()
+                return 0
+            try:
+                self._handle(db, events)
+                db.execute(delete(OUTBOX).where(OUTBOX.c.id.in_([e["id"] for e in events])))
+                db.commit()
+                done = events
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️ Outbox partisi işlenemedi ({len(events)} olay), tek tek deneniyor: {e}")
+                done = self._isolate(events)
+        finally:
+            db.close()
+        self._after_commit(done)
+        self.relayed += len(done)
+        self.last_batch_ms = round((time.perf_counter() - start) * 1000, 2)
+        return len(events)
+
+    def _isolate(self, events: List[dict]) -> List[dict]:
+        """Partiyi olay olay işle; hata veren olayın deneme sayısını artır"""
+        done = []
+        for event in events:
+            db = self.session_factory()
+            try:
+                # Kilitler rollback'te bırakıldı: başka relay aldıysa atla
+                claimed = self._claim(db, [event["id"]])
+                if not claimed:
+                    continue
+                try:
+                    self._handle(db, claimed)
+                    db.execute(delete(OUTBOX).where(OUTBOX.c.id == event["id"]))
+                    db.commit()
+                    done.extend(claimed)
+                except Exception as e:
+                    db.rollback()
+                    attempts = claimed[0]["attempts"] + 1
+                    dead = attempts >= OUTBOX_CONFIG["MAX_ATTEMPTS"]
+                    db.execute(update(OUTBOX).where(OUTBOX.c.id == event["id"]).values(
+                        attempts=attempts, last_error=str(e)[:500],
+                        failed_at=datetime.utcnow() if dead else None))
+                    db.commit()
+                    if dead:
+                        self.failed += 1
+                        print(f"❌ Outbox olayı #{event['id']} ({event['topic']}) bekletildi: {e}")
+            finally:
+                db.close()
+        return done
+
+    # ---- Durum ----
+
+    def requeue_failed(self, db: Session) -> int:
+        """Bekletilen olayları yeniden dağıtıma al"""
+        count = db.execute(update(OUTBOX).where(OUTBOX.c.failed_at.isnot(None))
+                           .values(failed_at=None, attempts=0)).rowcount
+        db.commit()
+        self.wake()
+        return count
+
+    def status(self, db: Session) -> dict:
+        """Bekleyen/bekletilen olaylar (konu başına) ve relay sayaçları"""
+        rows = db.execute(select(OUTBOX.c.topic, OUTBOX.c.failed_at.isnot(None), func.count(),
+                                 func.min(OUTBOX.c.created_at))
+                          .group_by(OUTBOX.c.topic, OUTBOX.c.failed_at.isnot(None))).all()
+        pending: Dict[str, int] = {}
+        failed: Dict[str, int] = {}
+        oldest = None
+        for topic, is_failed, count, created_at in rows:
+            (failed if is_failed else pending)[topic] = count
+            if not is_failed and created_at and (oldest is None or created_at < oldest):
+                oldest = created_at
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "subscribers": [s.name for s in self.subscribers],
+            "pending": pending,
+            "failed": failed,
+            "oldest_pending_seconds": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else None,
+            "relayed": self.relayed,
+            "last_batch_ms": self.last_batch_ms
+        }
@@ -0,0 +1,183 @@
+# outbox/subscribers.py
+"""
+Outbox relay aboneleri
+Her abonenin name ve topics alanı, handle(db, events) (relay transaction'ında,
+veritabanı yazıları) ve/veya after_commit(events) (commit'ten sonra, süreç içi
+etkiler) metodu vardır. Olay: {"id", "topic", "branch_id", "payload"}.
+- live: canlı stok akışı (SSE); istemci tablolarının önbelleğini yerinde günceller
+- alerts: satış sonrası uyarı satırları + seviye değişiminde uyarı servisi
+- rollups: günlük satış özeti (sales_daily)
+- its: İTS bildirim kuyruğu (its/gateway.py)
+- cache: süreç içi önbellekler (şube kaydı, analitiğin ilaç boyutu)
+"""
+
+from collections import defaultdict
+from datetime import date
+from typing import Callable, List, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import Alert, Drug, SalesDaily, SessionLocal
+from events import stock_alert_row, stock_level
+
+SALES_DAILY = SalesDaily.__table__
+
+def stock_of(event: dict) -> Optional[dict]:
+    """Olayın taşıdığı stok deltası (satış olayında iç içe)"""
+    if event["topic"] == "sale":
+        return event["payload"]["stock"]
+    if event["topic"] == "stock":
+        return event["payload"]
+    return None
+
+def latest_stock(events: List[dict]) -> dict:
+    """Parti içinde şube/ilaç başına son stok (olay sırasıyla)"""
+    latest = {}
+    for event in events:
+        stock = stock_of(event)
+        if stock is not None:
+            latest.pop((stock["branch_id"], stock["id"]), None)
+            latest[(stock["branch_id"], stock["id"])] = stock
+    return latest
+
+class LiveStream:
+    """Olayları SSE akışına yayınla; aynı ilacın ara stokları atlanır (yalnızca son durum)"""
+    name = "live"
+    topics = {"sale", "stock", "drug_added", "drug_removed"}
+
+    def __init__(self, bus):
+        self.bus = bus
+
+    def after_commit(self, events: List[dict]):
+        ordered = {}
+        for event in events:
+            stock = stock_of(event)
+            if stock is not None:
+                key = ("stock", stock["branch_id"], stock["id"])
+                ordered.pop(key, None)
+                ordered[key] = ("stock", stock)
+            else:
+                payload = event["payload"]
+                if event["topic"] == "drug_removed":
+                    # Silinen ilacın bekleyen deltaları yayınlanmaz
+                    ordered = {k: v for k, v in ordered.items() if v[1].get("id") != payload["id"]}
+                ordered[(event["topic"], event["id"])] = (event["topic"], payload)
+        for topic, payload in ordered.values():
+            self.bus.publish(topic, payload)
+
+class StockAlerts:
+    """Satış sonrası stok uyarıları; parti içinde şube/ilaç başına son stok için tek uyarı
+
+    buffer (yazma-arkası tampon) verilirse satırlar commit'ten sonra tampona,
+    yoksa relay transaction'ında alerts tablosuna yazılır. notifier(level, drugs)
+    ilacın seviyesi düşük/kritiğe geçtiğinde bir kez çağrılır (e-posta, SMS,
+    otomatik sipariş).
+    """
+    name = "alerts"
+    topics = {"sale", "stock"}
+
+    def __init__(self, bus, buffer=None, notifier: Optional[Callable] = None, session_factory=SessionLocal):
+        self.bus = bus
+        self.buffer = buffer
+        self.notifier = notifier
+        self.session_factory = session_factory
+        self._levels = {}  # (şube, ilaç) -> son görülen seviye
+
+    def _rows(self, events: List[dict]) -> List[dict]:
+        sales = [e for e in events if e["topic"] == "sale"]
+        return [row for row in map(stock_alert_row, latest_stock(sales).values()) if row]
+
+    def handle(self, db, events: List[dict]):
+        rows = self._rows(events)
+        if rows and not self.buffer:
+            db.execute(Alert.__table__.insert(), rows)
+
+    def after_commit(self, events: List[dict]):
+        rows = self._rows(events)
+        for row in rows:
+            if self.buffer:
+                self.buffer.append(row)
+            self.bus.publish("alert", {"drug_id": row["drug_id"], "type": row["alert_type"],
+                                       "message": row["message"], "branch_id": row["branch_id"]})
+        self._notify(events)
+
+    def _notify(self, events: List[dict]):
+        changed = defaultdict(list)
+        for key, stock in latest_stock(events).items():
+            level = stock_level(stock["stock"], stock["threshold"])
+            if self._levels.get(key) != level and level != "normal":
+                changed[level].append(stock)
+            self._levels[key] = level
+        if not changed or not self.notifier:
+            return
+        ids = {s["id"] for stocks in changed.values() for s in stocks}
+        with self.session_factory() as db:
+            drugs = {d.id: d for d in db.query(Drug).filter(Drug.id.in_(ids)).all()}
+        for level, stocks in changed.items():
+            self.notifier(level, [{
+                "id": s["id"],
+                "name": s["name"],
+                "active_ingredient": drugs[s["id"]].active_ingredient if s["id"] in drugs else None,
+                "price": float(drugs[s["id"]].price) if s["id"] in drugs else None,
+                "stock_quantity": s["stock"],
+                "low_stock_threshold": s["threshold"],
+                "branch_id": s["branch_id"]
+            } for s in stocks])
+
+class SalesRollup:
+    """Günlük satış özeti: parti başına şube/ilaç/gün toplamlarıyla tek upsert"""
+    name = "rollups"
+    topics = {"sale"}
+
+    @staticmethod
+    def upsert(dialect: str):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(SALES_DAILY)
+        return stmt.on_conflict_do_update(
+            index_elements=[SALES_DAILY.c.day, SALES_DAILY.c.branch_id, SALES_DAILY.c.drug_id],
+            set_={c: SALES_DAILY.c[c] + stmt.excluded[c] for c in ("sale_count", "quantity", "revenue")})
+
+    def handle(self, db, events: List[dict]):
+        totals = defaultdict(lambda: [0, 0, 0.0])
+        for event in events:
+            sale = event["payload"]
+            total = totals[(sale["sale_date"][:10], event["branch_id"], sale["drug_id"])]
+            total[0] += 1
+            total[1] += sale["quantity"]
+            total[2] += sale["total_price"]
+        db.execute(self.upsert(db.get_bind().dialect.name), [{
+            "day": date.fromisoformat(day), "branch_id": branch_id, "drug_id": drug_id,
+            "sale_count": count, "quantity": quantity, "revenue": round(revenue, 2)
+        } for (day, branch_id, drug_id), (count, quantity, revenue) in totals.items()])
+
+class ItsNotifications:
+    """Satışların İTS bildirimlerini kuyruğa ekle; commit'ten sonra göndericiyi uyandır"""
+    name = "its"
+    topics = {"sale"}
+
+    def __init__(self, gateway):
+        self.gateway = gateway
+
+    def handle(self, db, events: List[dict]):
+        self.gateway.enqueue(db, [(e["branch_id"], e["payload"]) for e in events])
+
+    def after_commit(self, events: List[dict]):
+        self.gateway.wake()
+
+class CacheInvalidation:
+    """Süreç içi önbellekler: şube eklenince şube kaydı, ilaç eklenip silinince
+    analitik anlık görüntüsünün ilaç boyutu (ve bellekteki sorgu sonuçları) yenilenir"""
+    name = "cache"
+    topics = {"branch", "drug_added", "drug_removed"}
+
+    def __init__(self, registry, snapshot=None, session_factory=SessionLocal):
+        self.registry = registry
+        self.snapshot = snapshot
+        self.session_factory = session_factory
+
+    def after_commit(self, events: List[dict]):
+        topics = {e["topic"] for e in events}
+        if "branch" in topics:
+            self.registry.reload()
+        if self.snapshot and topics & {"drug_added", "drug_removed"}:
+            self.snapshot.reload_drugs(self.session_factory)
@@ -0,0 +1,45 @@
+# pagination.py
+"""
+Keyset (cursor) sayfalama yardımcıları
+Cursor, sayfadaki son satırın sıralama anahtarlarının base64 JSON halidir;
+OFFSET gibi atlanan satırları taramaz, derin sayfalarda da sabit maliyetlidir.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Callable, List, Optional, Sequence, Tuple
+
+def encode_cursor(*values) -> str:
+    """Sıralama anahtarlarını cursor string'ine çevir"""
+    plain = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(plain, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, types: Optional[Sequence[type]] = None) -> list:
+    """Cursor'ı çöz; types verilirse değerleri o tiplere dönüştür"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, binascii.Error):
+        raise ValueError("Geçersiz cursor")
+    if not isinstance(values, list) or (types and len(values) != len(types)):
+        raise ValueError("Geçersiz cursor")
+    if types:
+        try:
+            values = [
+                t.fromisoformat(v) if t in (datetime, date) and v is not None else
+                (t(v) if v is not None else None)
+                for v, t in zip(values, types)
+            ]
+        except (TypeError, ValueError):
+            raise ValueError("Geçersiz cursor")
+    return values
+
+def paginate(rows: list, limit: int, key: Callable) -> Tuple[List, Optional[str]]:
+    """limit+1 satır çekilmiş sorgudan sayfayı ve sonraki cursor'ı çıkar"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(*key(rows[-1])) if has_more and rows else None
+    return rows, next_cursor
@@ -0,0 +1,18 @@
+#!/bin/sh
+# Okuma replikası: veri dizini boşsa birincilden pg_basebackup ile kopyala,
+# standby olarak (hot_standby) başlat. -R, primary_conninfo ve standby.signal yazar.
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    mkdir -p "$PGDATA"
+    chown postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+    until gosu postgres pg_basebackup -h "$PRIMARY_HOST" -U "$PRIMARY_USER" \
+            -D "$PGDATA" -R -X stream -c fast; do
+        echo "⏳ Birincil bekleniyor ($PRIMARY_HOST)..."
+        sleep 2
+    done
+    echo "✅ Replika birincilden kopyalandı"
+fi
+
+exec gosu postgres postgres -c hot_standby=on
@@ -0,0 +1,64 @@
+# responses.py
+"""
+Sıcak endpoint'ler için hızlı yanıt katmanı
+Yanıt modelleri TypeAdapter ile modül yüklenirken bir kez derlenir. ORM
+nesneleri ya da kolon satırları doğrudan (from_attributes) doğrulanır ve
+pydantic-core ile JSON byte'larına yazılır; FastAPI'nin jsonable_encoder
+yürüyüşü ve json.dumps adımı atlanır.
+"""
+
+from datetime import datetime
+from typing import List, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+
+class DrugResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    active_ingredient: Optional[str] = None
+    price: float
+    stock_quantity: int
+    low_stock_threshold: Optional[int] = None
+    description: Optional[str] = None
+
+class StockDrugResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    stock_quantity: int
+    low_stock_threshold: Optional[int] = None
+    price: float
+
+class CustomerResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    tc_no: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+# Önceden derlenmiş doğrulayıcı + serileştiriciler
+DRUG = TypeAdapter(DrugResponse)
+DRUG_LIST = TypeAdapter(List[DrugResponse])
+STOCK_DRUG_LIST = TypeAdapter(List[StockDrugResponse])
+CUSTOMER = TypeAdapter(CustomerResponse)
+CUSTOMER_LIST = TypeAdapter(List[CustomerResponse])
+
+def columns(entity, model: Type[BaseModel]) -> list:
+    """Yanıt modelinin alanlarına karşılık gelen ORM kolonları (yalnızca bunlar SELECT edilir)"""
+    return [getattr(entity, field) for field in model.model_fields]
+
+def as_dict(adapter: TypeAdapter, data):
+    """Tek bir ORM nesnesini JSON uyumlu dict'e çevir (büyük bir yanıtın parçası olarak)"""
+    return adapter.dump_python(adapter.validate_python(data, from_attributes=True), mode="json")
+
+def json_response(adapter: TypeAdapter, data, status_code: int = 200) -> Response:
+    """ORM nesnelerini/satırlarını doğrula ve doğrudan JSON byte'larıyla yanıtla"""
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return Response(content=body, status_code=status_code, media_type="application/json")
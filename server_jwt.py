@@ -4,34 +4,44 @@ JWT Token Kullanan Authentication Sunucusu
 """
 
 from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 from typing import Optional
+import uuid
 import jwt
 from decouple import config
 import uvicorn
 
+from database import SessionLocal, User, create_tables
+from auth.passwords import (
+    dummy_hash, hash_password, needs_rehash, password_verifier, VerifierBusy
+)
+from auth.config import PASSWORD_CONFIG
+from auth.revocation import revocation_store
+
 # JWT ayarlarını .env'den al
 SECRET_KEY = config("JWT_SECRET_KEY")
 ALGORITHM = config("JWT_ALGORITHM", default="HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(config("JWT_EXPIRE_MINUTES", default=60))
+REFRESH_TOKEN_EXPIRE_DAYS = int(config("JWT_REFRESH_EXPIRE_DAYS", default=7))
 
-# Demo kullanıcılar (eczane otomasyonundan)
-users_db = {
-    config("ADMIN_USERNAME"): {
-        "username": config("ADMIN_USERNAME"),
-        "password": config("ADMIN_PASSWORD"),
+# İlk kurulumda users tablosuna eklenecek hesaplar (.env'de varsa)
+BOOTSTRAP_USERS = [
+    {
+        "username": config("ADMIN_USERNAME", default=""),
+        "password": config("ADMIN_PASSWORD", default=""),
         "role": "Yönetici",
         "full_name": "Eczane Yöneticisi"
     },
-    config("PERSONEL_USERNAME"): {
-        "username": config("PERSONEL_USERNAME"),
-        "password": config("PERSONEL_PASSWORD"),
+    {
+        "username": config("PERSONEL_USERNAME", default=""),
+        "password": config("PERSONEL_PASSWORD", default=""),
         "role": "Personel",
         "full_name": "Eczane Personeli"
     }
-}
+]
 
 # FastAPI uygulaması
 app = FastAPI(
@@ -50,10 +60,18 @@ class LoginRequest(BaseModel):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str
     expires_in: int
+    refresh_expires_in: int
     user_info: dict
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class UserInfo(BaseModel):
     username: str
     role: str
@@ -73,7 +91,8 @@ class ValidateResponse(BaseModel):
     message: Optional[str] = None
 
 # =============== JWT FONKSİYONLARI ===============
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None,
+                        token_type: str = "access"):
     """JWT token oluştur"""
     to_encode = data.copy()
     
@@ -85,23 +104,51 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({
         "exp": expire,
         "iat": datetime.utcnow(),  # issued at
-        "iss": "eczane-auth-server"  # issuer
+        "iss": "eczane-auth-server",  # issuer
+        "jti": uuid.uuid4().hex,  # iptal listesi anahtarı
+        "type": token_type
     })
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def decode_token(token: str):
+def create_refresh_token(data: dict):
+    """Uzun ömürlü yenileme token'ı oluştur (sadece /refresh kabul eder)"""
+    return create_access_token(
+        {"sub": data["sub"], "role": data.get("role"), "full_name": data.get("full_name")},
+        expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        token_type="refresh"
+    )
+
+def issue_token_pair(claims: dict, user_info: dict) -> dict:
+    """Erişim + yenileme token çiftini üret"""
+    return {
+        "access_token": create_access_token(
+            data=claims,
+            expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        ),
+        "refresh_token": create_refresh_token(claims),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_expires_in": REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600,
+        "user_info": user_info
+    }
+
+def decode_token(token: str, expected_type: str = "access"):
     """Token'ı decode et ve doğrula"""
     try:
         payload = jwt.decode(
             token, 
             SECRET_KEY, 
             algorithms=[ALGORITHM],
-            options={"require": ["exp", "iat", "sub"]}
+            options={"require": ["exp", "iat", "sub", "jti"]}
         )
         username = payload.get("sub")
         if username is None:
             return {"error": "Token'da kullanıcı adı yok"}
+        if payload.get("type", "access") != expected_type:
+            return {"error": "Token türü bu işlem için geçersiz"}
+        if revocation_store.is_revoked(payload["jti"]):
+            return {"error": "Token iptal edilmiş"}
         return payload
     except jwt.ExpiredSignatureError:
         return {"error": "Token süresi dolmuş"}
@@ -110,6 +157,15 @@ def decode_token(token: str):
     except Exception as e:
         return {"error": f"Token doğrulama hatası: {str(e)}"}
 
+def revoke_payload(payload: dict) -> bool:
+    """Decode edilmiş token'ı süresi dolana kadar iptal listesine ekle"""
+    return revocation_store.revoke(
+        payload["jti"],
+        payload.get("type", "access"),
+        payload.get("sub"),
+        datetime.utcfromtimestamp(payload["exp"])
+    )
+
 # Token doğrulama fonksiyonu (dependency)
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
@@ -123,11 +179,79 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     
     return payload
 
+# =============== KULLANICI DEPOSU ===============
+def user_to_dict(user: User) -> dict:
+    """ORM kaydını token/profil için sözlüğe çevir (hash hariç)"""
+    return {
+        "username": user.username,
+        "role": user.role,
+        "full_name": user.full_name or user.username
+    }
+
+def get_user_record(username: str):
+    """users tablosundan kullanıcıyı ve parola hash'ini getir"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        if not user:
+            return None
+        return {**user_to_dict(user), "id": user.id, "password_hash": user.password_hash}
+    finally:
+        db.close()
+
+def update_password_hash(user_id: int, old_hash: str, new_hash: str):
+    """Eski/zayıf hash'i yenisiyle değiştir (arada parola değiştiyse dokunma)"""
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.id == user_id, User.password_hash == old_hash)\
+          .update({User.password_hash: new_hash, User.updated_at: datetime.utcnow()},
+                  synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def bootstrap_users():
+    """.env'de tanımlı hesapları tabloda yoksa ekle"""
+    db = SessionLocal()
+    try:
+        for account in BOOTSTRAP_USERS:
+            if not account["username"] or not account["password"]:
+                continue
+            exists = db.query(User.id).filter(User.username == account["username"]).first()
+            if exists:
+                continue
+            db.add(User(
+                username=account["username"],
+                password_hash=hash_password(account["password"]),
+                role=account["role"],
+                full_name=account["full_name"]
+            ))
+            print(f"✅ Kullanıcı eklendi: {account['username']}")
+        db.commit()
+    finally:
+        db.close()
+
 # Kullanıcı doğrulama
-def authenticate_user(username: str, password: str):
-    user = users_db.get(username)
-    if not user or user["password"] != password:
+async def authenticate_user(username: str, password: str):
+    user = await run_in_threadpool(get_user_record, username)
+    if not user:
+        # Süre farkı kullanıcı adının varlığını sızdırmasın
+        await password_verifier.verify(username, password, dummy_hash())
+        return False
+
+    stored_hash = user["password_hash"]
+    if not await password_verifier.verify(username, password, stored_hash):
         return False
+
+    # MD5 veya eski maliyetli hash'i girişte sessizce yükselt; havuz doluysa
+    # giriş yine başarılıdır, yükseltme bir sonraki girişe kalır
+    if needs_rehash(stored_hash):
+        try:
+            new_hash = await password_verifier.hash(password)
+        except VerifierBusy:
+            return user
+        await run_in_threadpool(update_password_hash, user["id"], stored_hash, new_hash)
+
     return user
 
 # =============== ENDPOINT'LER ===============
@@ -137,6 +261,8 @@ def read_root():
         "message": "🏥 Eczane JWT Authentication API",
         "endpoints": {
             "login": "POST /login (username, password)",
+            "refresh": "POST /refresh (refresh_token)",
+            "logout": "POST /logout (Bearer token gerekli)",
             "profile": "GET /profile (Bearer token gerekli)",
             "validate": "POST /validate (token doğrulama)",
             "users": "GET /users (tüm kullanıcılar)"
@@ -145,10 +271,32 @@ def read_root():
         "status": "active"
     }
 
+@app.on_event("startup")
+def startup_event():
+    try:
+        create_tables()
+        bootstrap_users()
+        revocation_store.load()
+        revocation_store.start_sync()
+        dummy_hash()  # ilk bilinmeyen kullanıcı girişi hash üretimini beklemesin
+    except Exception as e:
+        print(f"❌ Auth başlangıç hatası: {e}")
+
+@app.on_event("shutdown")
+def shutdown_event():
+    password_verifier.shutdown()
+
 @app.post("/login", response_model=Token)
-def login(request: LoginRequest):
+async def login(request: LoginRequest):
     """Kullanıcı girişi yap ve JWT token al"""
-    user = authenticate_user(request.username, request.password)
+    try:
+        user = await authenticate_user(request.username, request.password)
+    except VerifierBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Sunucu yoğun, lütfen tekrar deneyin",
+            headers={"Retry-After": "1"},
+        )
     
     if not user:
         raise HTTPException(
@@ -157,36 +305,74 @@ def login(request: LoginRequest):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Token oluştur
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={
-            "sub": user["username"],
-            "role": user["role"],
-            "full_name": user["full_name"]
-        },
-        expires_delta=access_token_expires
-    )
-    
-    # Kullanıcı bilgilerini token'dan çıkar (şifre hariç)
+    # Token çiftini oluştur
     user_info = {
         "username": user["username"],
         "role": user["role"],
         "full_name": user["full_name"]
     }
+    claims = {
+        "sub": user["username"],
+        "role": user["role"],
+        "full_name": user["full_name"]
+    }
+    return issue_token_pair(claims, user_info)
+
+@app.post("/refresh", response_model=Token)
+def refresh_tokens(request: RefreshRequest):
+    """Yenileme token'ı ile yeni token çifti al (parola doğrulaması yok)"""
+    payload = decode_token(request.refresh_token, expected_type="refresh")
     
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-        "user_info": user_info
+    if isinstance(payload, dict) and "error" in payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=payload["error"],
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Rotasyon: eski yenileme token'ı tek kullanımlıktır
+    if not revoke_payload(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token iptal edilmiş",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Rol ve ad token'dan değil veritabanından: silinen kullanıcı yenileyemez,
+    # rolü değişenin yeni token'ı güncel rolü taşır
+    user = get_user_record(payload["sub"])
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Kullanıcı bulunamadı",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user_info = {
+        "username": user["username"],
+        "role": user["role"],
+        "full_name": user["full_name"]
     }
+    claims = {"sub": user["username"], "role": user["role"], "full_name": user["full_name"]}
+    return issue_token_pair(claims, user_info)
+
+@app.post("/logout")
+def logout(request: Optional[LogoutRequest] = None, payload: dict = Depends(verify_token)):
+    """Erişim token'ını (ve verilirse yenileme token'ını) iptal et"""
+    revoke_payload(payload)
+    
+    if request and request.refresh_token:
+        refresh_payload = decode_token(request.refresh_token, expected_type="refresh")
+        if "error" not in refresh_payload and refresh_payload.get("sub") == payload.get("sub"):
+            revoke_payload(refresh_payload)
+    
+    return {"message": "Oturum kapatıldı"}
 
 @app.get("/profile", response_model=UserInfo)
 def get_profile(payload: dict = Depends(verify_token)):
     """Token ile kullanıcı profilini getir"""
     username = payload.get("sub")
-    user = users_db.get(username)
+    user = get_user_record(username)
     
     if not user:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
@@ -225,13 +411,11 @@ def get_users(payload: dict = Depends(verify_token)):
             detail="Bu işlem için yetkiniz yok"
         )
     
-    users_list = []
-    for username, user in users_db.items():
-        users_list.append({
-            "username": user["username"],
-            "role": user["role"],
-            "full_name": user["full_name"]
-        })
+    db = SessionLocal()
+    try:
+        users_list = [user_to_dict(u) for u in db.query(User).order_by(User.username).all()]
+    finally:
+        db.close()
     
     return {
         "count": len(users_list),
@@ -259,7 +443,8 @@ if __name__ == "__main__":
     print(f"   Secret Key: {SECRET_KEY[:10]}...")
     print(f"   Algorithm: {ALGORITHM}")
     print(f"   Token Süresi: {ACCESS_TOKEN_EXPIRE_MINUTES} dakika")
-    print(f"   Kullanıcılar: {list(users_db.keys())}")
+    print(f"   bcrypt maliyeti: {PASSWORD_CONFIG['BCRYPT_ROUNDS']}")
+    print(f"   Hash süreç havuzu: {PASSWORD_CONFIG['HASH_WORKERS']}")
     
     uvicorn.run(
         app, 
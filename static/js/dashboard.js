@@ -0,0 +1,278 @@
+// JavaScript Fonksiyonları
+function manualStockCheck() {
+    fetch('/api/check_stock')
+        .then(response => response.json())
+        .then(data => {
+            alert(data.message || 'Stok kontrolü başlatıldı!');
+            setTimeout(() => location.reload(), 1000);
+        })
+        .catch(error => {
+            console.error('Hata:', error);
+            alert('Stok kontrolü başlatılamadı');
+        });
+}
+
+function checkStock() {
+    fetch('/api/check_stock')
+        .then(response => response.json())
+        .then(data => {
+            alert('Stok kontrolü tamamlandı!');
+            location.reload();
+        });
+}
+
+function viewAlertHistory(cursor) {
+    const params = new URLSearchParams({limit: 10});
+    if (cursor) params.set('cursor', cursor);
+    fetch('/api/alert_history?' + params)
+        .then(response => response.json())
+        .then(data => {
+            const historyDiv = document.getElementById('alertHistory');
+            const items = data.items || [];
+            if (items.length === 0) {
+                historyDiv.innerHTML = '<p class="text-muted">Henüz uyarı yok.</p>';
+                return;
+            }
+            
+            let html = '<table class="table table-sm"><thead><tr><th>Tarih</th><th>Tip</th><th>İlaç</th><th>Durum</th></tr></thead><tbody>';
+            items.forEach(alert => {
+                const date = new Date(alert.created_at).toLocaleString('tr-TR');
+                const typeBadge = alert.alert_type === 'critical_stock' ? 
+                    '<span class="badge bg-danger">KRİTİK</span>' : 
+                    '<span class="badge bg-warning">DÜŞÜK</span>';
+                const readBadge = alert.is_read ?
+                    '<span class="badge bg-secondary">Okundu</span>' :
+                    `<button class="btn btn-outline-primary btn-sm py-0" onclick="ackAlerts([${alert.id}])">Okundu</button>`;
+                
+                html += `<tr>
+                    <td>${date}</td>
+                    <td>${typeBadge}</td>
+                    <td>${alert.drug_name}</td>
+                    <td>${readBadge}</td>
+                </tr>`;
+            });
+            html += '</tbody></table>';
+            html += '<button class="btn btn-outline-secondary btn-sm me-2" onclick="ackAlerts(null)">Tümünü Okundu İşaretle</button>';
+            if (data.next_cursor) {
+                html += `<button class="btn btn-outline-secondary btn-sm" onclick="viewAlertHistory('${data.next_cursor}')">Daha Eski</button>`;
+            }
+            historyDiv.innerHTML = html;
+        });
+}
+
+function ackAlerts(ids) {
+    fetch('/api/alerts/ack', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(ids ? {ids: ids} : {all: true})
+    })
+        .then(response => response.json())
+        .then(() => viewAlertHistory());
+}
+
+function getAlertHistory() {
+    viewAlertHistory();
+}
+
+function saveAlertSettings() {
+    const settings = {
+        check_interval: document.getElementById('checkInterval').value,
+        enable_email: document.getElementById('enableEmail').checked,
+        enable_sms: document.getElementById('enableSMS').checked,
+        enable_auto_order: document.getElementById('enableAutoOrder').checked
+    };
+    
+    alert('Ayarlar kaydedildi (demo modu). Gerçek uygulamada API\'ye gönderilecek.');
+    console.log('Kaydedilen ayarlar:', settings);
+}
+
+function autoOrderLowStock() {
+    if (confirm('Düşük stoklu tüm ilaçlara otomatik sipariş verilsin mi?')) {
+        alert('Otomatik siparişler oluşturuluyor... (demo modu)');
+        // Gerçek uygulamada API çağrısı yapılacak
+    }
+}
+
+// Sayfa yüklendiğinde stok grafiğini çiz
+document.addEventListener('DOMContentLoaded', function() {
+    // Stok grafiği verileri (sayfadaki JSON bloğundan; şablon önbelleğinde tutulur)
+    const chartData = JSON.parse(document.getElementById('chartData').textContent);
+    const drugNames = chartData.names;
+    const stockQuantities = chartData.quantities;
+    
+    if (drugNames && drugNames.length > 0 && drugNames[0] !== '') {
+        const ctx = document.getElementById('stockChart').getContext('2d');
+        stockChart = new Chart(ctx, {
+            type: 'bar',
+            data: {
+                labels: drugNames,
+                datasets: [{
+                    label: 'Stok Miktarı',
+                    data: stockQuantities,
+                    backgroundColor: stockQuantities.map(q => 
+                        q <= 5 ? '#dc3545' : 
+                        q <= 10 ? '#ffc107' : '#198754'
+                    ),
+                    borderColor: '#333',
+                    borderWidth: 1
+                }]
+            },
+            options: {
+                responsive: true,
+                scales: {
+                    y: {
+                        beginAtZero: true,
+                        title: {
+                            display: true,
+                            text: 'Adet'
+                        }
+                    },
+                    x: {
+                        ticks: {
+                            maxRotation: 45,
+                            minRotation: 45
+                        }
+                    }
+                }
+            }
+        });
+    } else {
+        // Grafik yoksa mesaj göster
+        document.getElementById('stockChart').parentElement.innerHTML = 
+            '<p class="text-muted">Grafik verisi bulunamadı veya henüz ilaç eklenmedi.</p>';
+    }
+    
+    // Sayfa açıldığında uyarı geçmişini yükle
+    if (document.getElementById('alerts').classList.contains('active')) {
+        viewAlertHistory();
+    }
+    
+    subscribeStockEvents();
+});
+
+// ================ CANLI STOK AKIŞI (SSE) ================
+// Satış/sipariş olunca backend delta gönderir; tablo ve grafik yerinde güncellenir
+let stockChart = null;
+const LEVELS = {
+    critical: {row: 'stock-critical', badge: 'bg-danger', label: 'KRİTİK'},
+    low: {row: 'stock-low', badge: 'bg-warning', label: 'DÜŞÜK'},
+    normal: {row: 'stock-ok', badge: 'bg-success', label: 'NORMAL'}
+};
+
+function applyStockEvent(e) {
+    const row = document.querySelector(`tr[data-drug-id="${e.id}"]`);
+    if (!row) return;
+    const level = LEVELS[e.level];
+    row.classList.remove('stock-critical', 'stock-low', 'stock-ok');
+    row.classList.add(level.row);
+    const badge = row.querySelector('.stock-badge');
+    badge.textContent = e.stock;
+    badge.classList.remove('bg-danger', 'bg-warning', 'bg-success');
+    badge.classList.add(level.badge);
+    row.querySelector('.stock-status').innerHTML = `<span class="badge ${level.badge}">${level.label}</span>`;
+    const threshold = row.querySelector('input[name="threshold"]');
+    if (threshold && document.activeElement !== threshold) threshold.value = e.threshold;
+
+    if (stockChart) {
+        const i = stockChart.data.labels.indexOf(e.name);
+        if (i >= 0) {
+            const dataset = stockChart.data.datasets[0];
+            dataset.data[i] = e.stock;
+            dataset.backgroundColor[i] = e.stock <= 5 ? '#dc3545' : e.stock <= 10 ? '#ffc107' : '#198754';
+            stockChart.update('none');
+        }
+    }
+}
+
+function subscribeStockEvents() {
+    if (!window.EventSource || !document.querySelector('tr[data-drug-id]')) return;
+    const source = new EventSource('/api/events/stock');
+    source.addEventListener('stock', ev => applyStockEvent(JSON.parse(ev.data)));
+    source.addEventListener('alert', ev => {
+        if (document.getElementById('alerts').classList.contains('active')) viewAlertHistory();
+    });
+    source.addEventListener('drug_removed', ev => removeDrugRow(JSON.parse(ev.data).id));
+    // Başka terminalden eklenen ilaç (satırı bu sayfada yok) ya da kaçırılmış
+    // olaylar: tabloyu bir kez yeniden çiz
+    source.addEventListener('drug_added', ev => {
+        if (!document.querySelector(`tr[data-drug-id="${JSON.parse(ev.data).id}"]`)) location.reload();
+    });
+    source.addEventListener('resync', () => location.reload());
+}
+
+// ================ YERİNDE YAZMA İŞLEMLERİ ================
+// data-api'li formlar fetch ile gönderilir; Flask yalnızca güncellenen satırı
+// döner (tek backend isteği), sayfa yeniden yüklenmez
+function showMessage(text, category) {
+    const box = document.createElement('div');
+    box.className = `alert alert-${category}`;
+    box.textContent = text;
+    document.getElementById('liveMessages').replaceChildren(box);
+    setTimeout(() => box.remove(), 4000);
+}
+
+function removeDrugRow(id) {
+    const row = document.querySelector(`tr[data-drug-id="${id}"]`);
+    if (!row) return;
+    const name = row.querySelector('strong').textContent;
+    row.remove();
+    if (stockChart) {
+        const i = stockChart.data.labels.indexOf(name);
+        if (i >= 0) {
+            stockChart.data.labels.splice(i, 1);
+            stockChart.data.datasets[0].data.splice(i, 1);
+            stockChart.data.datasets[0].backgroundColor.splice(i, 1);
+            stockChart.update('none');
+        }
+    }
+}
+
+function addDrugRow(html, stock) {
+    if (document.querySelector(`tr[data-drug-id="${stock.id}"]`)) return;
+    const body = document.getElementById('drugRows');
+    body.insertAdjacentHTML('beforeend', html);
+    // Müşteri seçenekleri mevcut bir satırdan kopyalanır
+    const source = body.querySelector('select[name="customer_id"]');
+    const target = body.lastElementChild.querySelector('select[name="customer_id"]');
+    if (source && target && source !== target) target.innerHTML = source.innerHTML;
+    if (stockChart) {
+        stockChart.data.labels.push(stock.name);
+        stockChart.data.datasets[0].data.push(stock.stock);
+        stockChart.data.datasets[0].backgroundColor.push('#198754');
+    }
+    applyStockEvent(stock);
+}
+
+function addCustomerRow(html, customer) {
+    document.getElementById('customerRows').insertAdjacentHTML('beforeend', html);
+    document.querySelectorAll('select[name="customer_id"]').forEach(select =>
+        select.add(new Option(customer.name, customer.id)));
+}
+
+document.addEventListener('submit', function(event) {
+    const form = event.target;
+    // Satır içi onsubmit (ör. silme onayı) iptal ettiyse gönderme
+    if (!form.dataset.api || event.defaultPrevented) return;
+    event.preventDefault();
+    fetch(form.dataset.api, {method: form.dataset.method || 'POST', body: new FormData(form)})
+        .then(response => response.json().then(data => ({ok: response.ok, data})))
+        .then(({ok, data}) => {
+            if (!ok) {
+                showMessage(`Hata: ${data.error}`, 'danger');
+                return;
+            }
+            if (data.drug) addDrugRow(data.row, data.stock);
+            else if (data.stock) applyStockEvent(data.stock);
+            if (data.customer) addCustomerRow(data.row, data.customer);
+            if (form.dataset.method === 'DELETE') removeDrugRow(data.id);
+            if (form.id === 'addDrugForm') {
+                bootstrap.Modal.getOrCreateInstance(document.getElementById('addDrugModal')).hide();
+            }
+            if (data.drug || data.customer) form.reset();
+            showMessage(data.message, 'success');
+        })
+        .catch(error => {
+            console.error('Hata:', error);
+            showMessage('Bağlantı hatası', 'danger');
+        });
+});
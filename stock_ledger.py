@@ -0,0 +1,80 @@
+# stock_ledger.py
+"""
+Stok defteri: stok yalnızca stock_movements satırı eklenerek değişir
+PostgreSQL'de trg_stock_ledger_apply trigger'ı (migration 0006, şubeli hali
+0008) hareketin şubesinin branch_stock satırını ve drugs zincir toplamını aynı
+transaction içinde günceller, önceki/yeni şube miktarını hesaplar ve negatif
+stoğu CHECK ile reddeder. Diğer veritabanlarında (yerel geliştirme) aynı
+kurallar burada Python ile uygulanır. Hareketin şubesi session'ın şubesidir.
+"""
+
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import BranchStock, Drug, StockMovement, engine, session_branch
+
+LEDGER_IN_DB = engine.dialect.name == "postgresql"
+STOCK_CHECKS = {"drugs_stock_nonnegative", "branch_stock_nonnegative"}
+
+class InsufficientStock(Exception):
+    """Hareket (şube) stoğu negatife düşürürdü"""
+
+    def __init__(self, drug: Drug, requested: int, available: Optional[int] = None):
+        self.available = drug.stock_quantity if available is None else available
+        super().__init__(f"Yetersiz stok. Mevcut: {self.available}, istenen: {requested}")
+
+def branch_quantity(db: Session, drug_id: int, branch_id: Optional[int] = None) -> int:
+    """İlacın şubedeki stoğu (satırı yoksa 0)"""
+    branch_id = session_branch(db) if branch_id is None else branch_id
+    return db.query(BranchStock.quantity)\
+             .filter(BranchStock.branch_id == branch_id, BranchStock.drug_id == drug_id)\
+             .execution_options(all_branches=True).scalar() or 0
+
+def record_movement(db: Session, drug: Drug, movement_type: str, quantity_change: int,
+                    reason: str = "", created_by: Optional[int] = 1) -> StockMovement:
+    """Stok hareketini ekle; şube stoğunu ve drug.stock_quantity'yi güncelle (commit etmez)
+
+    Çağıranın transaction'ı içinde çalışır: satış kaydı ile stok hareketi
+    birlikte commit edilir ya da birlikte geri alınır.
+    """
+    branch_id = session_branch(db)
+    movement = StockMovement(
+        branch_id=branch_id,
+        drug_id=drug.id,
+        movement_type=movement_type,
+        quantity_change=quantity_change,
+        reason=reason,
+        created_by=created_by
+    )
+
+    if LEDGER_IN_DB:
+        db.add(movement)
+        try:
+            db.flush()
+        except IntegrityError as e:
+            db.rollback()
+            diag = getattr(e.orig, "diag", None)
+            if getattr(diag, "constraint_name", None) in STOCK_CHECKS:
+                db.refresh(drug)
+                raise InsufficientStock(drug, -quantity_change, branch_quantity(db, drug.id, branch_id))
+            raise
+        # Trigger drugs satırını değiştirdi; bellekteki nesneyi tazele
+        db.refresh(drug, ["stock_quantity", "updated_at"])
+        return movement
+
+    stock = db.get(BranchStock, (branch_id, drug.id))
+    if stock is None:
+        stock = BranchStock(branch_id=branch_id, drug_id=drug.id, quantity=0)
+        db.add(stock)
+    previous = stock.quantity
+    if previous + quantity_change < 0:
+        raise InsufficientStock(drug, -quantity_change, previous)
+    stock.quantity = previous + quantity_change
+    drug.stock_quantity += quantity_change
+    movement.previous_quantity = previous
+    movement.new_quantity = stock.quantity
+    db.add(movement)
+    db.flush()
+    return movement
@@ -0,0 +1,200 @@
+# write_behind.py
+"""
+Yazma-arkası (write-behind) tampon: sık yazılan ikincil satırlar (satış sonrası
+stok uyarıları) istek içinde commit edilmez; bellekte biriktirilip her
+FLUSH_INTERVAL_MS'de ya da MAX_ROWS satırda tek bir çok satırlı INSERT ile yazılır.
+Dayanıklılık: her satır önce yerel, yalnızca eklenen bir WAL dosyasına yazılır.
+Başarılı flush'tan sonra o dosya silinir; süreç ölürse açılışta kalan dosyalar
+yeniden oynatılır (en az bir kez teslim).
+Stok defteri satırları (stock_movements) bu tampondan geçmez: stok onlardan
+hesaplandığı için satışla aynı transaction'da yazılmak zorundadır.
+"""
+
+import glob
+import json
+import os
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import DateTime, Table
+from sqlalchemy.exc import IntegrityError
+
+WRITE_BEHIND_CONFIG = {
+    "ENABLED": os.environ.get("WRITE_BEHIND_ENABLED", "false").lower() == "true",
+    "FLUSH_INTERVAL_MS": int(os.environ.get("WRITE_BEHIND_FLUSH_MS", 200)),
+    "MAX_ROWS": int(os.environ.get("WRITE_BEHIND_MAX_ROWS", 500)),
+    "WAL_DIR": os.environ.get("WRITE_BEHIND_WAL_DIR", "wal"),
+    # true: her satırda fsync (işletim sistemi çökmesine de dayanıklı, daha yavaş)
+    "FSYNC": os.environ.get("WRITE_BEHIND_FSYNC", "false").lower() == "true",
+}
+
+class WriteBehindBuffer:
+    """Tek bir tablo için WAL destekli yazma-arkası tampon (thread-safe)"""
+
+    def __init__(self, engine, table: Table, wal_dir: Optional[str] = None,
+                 flush_interval_ms: Optional[int] = None, max_rows: Optional[int] = None,
+                 fsync: Optional[bool] = None):
+        self.engine = engine
+        self.table = table
+        self.wal_dir = wal_dir or WRITE_BEHIND_CONFIG["WAL_DIR"]
+        self.flush_interval = (flush_interval_ms or WRITE_BEHIND_CONFIG["FLUSH_INTERVAL_MS"]) / 1000
+        self.max_rows = max_rows or WRITE_BEHIND_CONFIG["MAX_ROWS"]
+        self.fsync = WRITE_BEHIND_CONFIG["FSYNC"] if fsync is None else fsync
+        self._datetime_columns = {c.name for c in table.columns if isinstance(c.type, DateTime)}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._rows: List[dict] = []
+        self._pending: List[Tuple[str, List[dict]]] = []  # yazılamamış (segment, satırlar)
+        self._segment = None
+        self._fd = None
+        self._seq = 0
+        self._thread = None
+        self.flushed = 0
+
+    # ---- WAL segmentleri ----
+
+    def _segment_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.wal_dir, f"{self.table.name}.*.wal")))
+
+    def _open_segment(self):
+        self._seq += 1
+        self._segment = os.path.join(self.wal_dir, f"{self.table.name}.{os.getpid()}.{self._seq:08d}.wal")
+        self._fd = os.open(self._segment, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def _encode(self, row: dict) -> bytes:
+        plain = {k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()}
+        return (json.dumps(plain, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def _decode(self, line: str) -> dict:
+        row = json.loads(line)
+        for column in self._datetime_columns & row.keys():
+            if row[column] is not None:
+                row[column] = datetime.fromisoformat(row[column])
+        return row
+
+    @staticmethod
+    def _owner_alive(path: str) -> bool:
+        """Segmenti yazan süreç (başka bir worker) hâlâ çalışıyor mu"""
+        pid = int(os.path.basename(path).split(".")[-3])
+        if pid == os.getpid():
+            return False  # aynı pid: önceki (ölmüş) süreçten kalma
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def recover(self) -> int:
+        """Ölmüş süreçlerden kalan WAL segmentlerini veritabanına yaz"""
+        recovered = 0
+        for path in self._segment_paths():
+            if self._owner_alive(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                # Yarım yazılmış son satır (çökme anı) atlanır
+                rows = []
+                for line in f:
+                    try:
+                        rows.append(self._decode(line))
+                    except ValueError:
+                        print(f"⚠️ WAL'da bozuk satır atlandı: {path}")
+            if rows:
+                self._write(rows)
+            os.remove(path)
+            recovered += len(rows)
+        if recovered:
+            print(f"♻️ {self.table.name}: WAL'dan {recovered} satır kurtarıldı")
+        return recovered
+
+    # ---- Yaşam döngüsü ----
+
+    def start(self):
+        """Kalan WAL'ı kurtar, yeni segment aç ve flush thread'ini başlat"""
+        os.makedirs(self.wal_dir, exist_ok=True)
+        self.recover()
+        self._open_segment()
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.table.name}", daemon=True)
+        self._thread.start()
+        print(f"✅ Yazma-arkası tampon aktif: {self.table.name} "
+              f"({int(self.flush_interval * 1000)} ms / {self.max_rows} satır)")
+
+    def stop(self):
+        """Thread'i durdur ve kalan satırları yaz"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            if self._segment and os.path.exists(self._segment) and not os.path.getsize(self._segment):
+                os.remove(self._segment)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Satırlar WAL'da duruyor; bir sonraki turda yeniden denenir
+                print(f"❌ {self.table.name} flush hatası: {e}")
+
+    # ---- Yazma ----
+
+    def append(self, row: dict):
+        """Satırı WAL'a ekle ve tampona al (veritabanına gitmez)"""
+        line = self._encode(row)
+        with self._lock:
+            os.write(self._fd, line)
+            if self.fsync:
+                os.fsync(self._fd)
+            self._rows.append(row)
+            full = len(self._rows) >= self.max_rows
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Tampondaki satırları tek transaction'da yaz; başarılıysa WAL'ı sil"""
+        with self._flush_lock:
+            with self._lock:
+                if self._rows:
+                    # Segmenti kapat, yeni satırlar yeni segmente gitsin
+                    os.close(self._fd)
+                    self._pending.append((self._segment, self._rows))
+                    self._rows = []
+                    self._open_segment()
+                pending = list(self._pending)
+            if not pending:
+                return 0
+
+            rows = [row for _, segment_rows in pending for row in segment_rows]
+            self._write(rows)
+            for segment, _ in pending:
+                os.remove(segment)
+            with self._lock:
+                self._pending = self._pending[len(pending):]
+            self.flushed += len(rows)
+            return len(rows)
+
+    def _write(self, rows: List[dict]):
+        # executemany: SQLAlchemy bunu çok satırlı INSERT ... VALUES'a çevirir
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(self.table.insert(), rows)
+        except IntegrityError:
+            # Tek bir geçersiz satır (ör. bu arada silinmiş ilaç) tüm batch'i
+            # sonsuza dek bekletmesin: satır satır yaz, yazılamayanı at
+            for row in rows:
+                try:
+                    with self.engine.begin() as conn:
+                        conn.execute(self.table.insert(), [row])
+                except IntegrityError as e:
+                    print(f"⚠️ {self.table.name} satırı atlandı: {row} ({e.orig})")